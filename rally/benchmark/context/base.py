@@ -37,11 +37,17 @@ class Context(object):
         2) Auto discovering & get by name
         3) Validation by CONFIG_SCHEMA
         4) Order of context creation
+        5) Sharing of the context by benchmarks of a task
 
     """
     __ctx_name__ = "base"
     __ctx_order__ = 0
     __ctx_hidden__ = True
+    # NOTE: Shared contexts are set up once for consecutive benchmarks with
+    #       the same config of them, so they must not keep any state of a
+    #       benchmark and must be ordered before all contexts that are not
+    #       shared.
+    __ctx_shared__ = False
 
     CONFIG_SCHEMA = {}
 
@@ -77,13 +83,17 @@ class Context(object):
     def get_order(cls):
         return cls.__ctx_order__
 
+    @classmethod
+    def is_shared(cls):
+        return cls.__ctx_shared__
+
     @staticmethod
     def get_by_name(name):
         """Return Context class by name."""
-        for context in utils.itersubclasses(Context):
-            if name == context.__ctx_name__:
-                return context
-        raise exceptions.NoSuchContext(name=name)
+        context = utils.find_subclass(Context, name, "__ctx_name__")
+        if context is None:
+            raise exceptions.NoSuchContext(name=name)
+        return context
 
     @abc.abstractmethod
     def setup(self):
@@ -106,6 +116,8 @@ class ContextManager(object):
     def __init__(self, context_obj):
         self._visited = []
         self.context_obj = context_obj
+        self.setup_duration = 0.0
+        self.cleanup_duration = 0.0
 
     @staticmethod
     def validate(context, non_hidden=False):
@@ -118,6 +130,21 @@ class ContextManager(object):
             Context.get_by_name(name).validate_semantic(config, admin=admin,
                                                         users=users, task=task)
 
+    @staticmethod
+    def split_shared(context):
+        """Split the context config into shared and not shared contexts.
+
+        :returns: tuple of two context configs
+        """
+        shared = {}
+        own = {}
+        for name, config in context.items():
+            if Context.get_by_name(name).is_shared():
+                shared[name] = config
+            else:
+                own[name] = config
+        return shared, own
+
     def _get_sorted_context_lst(self):
         ctxlst = map(Context.get_by_name, self.context_obj["config"])
         return sorted(map(lambda ctx: ctx(self.context_obj), ctxlst))
@@ -126,15 +153,20 @@ class ContextManager(object):
         """Creates benchmark environment from config."""
 
         self._visited = []
-        for ctx in self._get_sorted_context_lst():
-            self._visited.append(ctx)
-            ctx.setup()
+        start = utils.monotonic()
+        try:
+            for ctx in self._get_sorted_context_lst():
+                self._visited.append(ctx)
+                ctx.setup()
+        finally:
+            self.setup_duration = utils.monotonic() - start
 
         return self.context_obj
 
     def cleanup(self):
         """Destroys benchmark environment."""
 
+        start = utils.monotonic()
         ctxlst = self._visited or self._get_sorted_context_lst()
         for ctx in ctxlst[::-1]:
             try:
@@ -142,6 +174,7 @@ class ContextManager(object):
             except Exception as e:
                 LOG.error("Context %s failed during cleanup." % ctx.get_name())
                 LOG.exception(e)
+        self.cleanup_duration = utils.monotonic() - start
 
     def __enter__(self):
         try:
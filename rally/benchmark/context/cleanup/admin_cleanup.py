@@ -49,11 +49,30 @@ class AdminCleanup(base.Context):
         super(AdminCleanup, self).__init__(context)
         self.endpoint = None
 
+    @staticmethod
+    def _delete_recorded_keystone_resources(keystone, recorded):
+        for step in utils.LEDGER_STEPS["keystone"]:
+            step.delete(keystone, recorded)
+        # NOTE: Services and roles are not recorded in the ledger.
+        utils.delete_keystone_resources(keystone, ("service", "role"))
+
     def _cleanup_resources(self):
         client = osclients.Clients(self.endpoint)
 
+        recorded = {}
+        if (self.context.get("resource_ledger") and
+                not self.context.get("resource_ledger_incomplete")):
+            recorded = utils.get_recorded_resources(
+                self.context["task"]["uuid"]).get(None, {}).get("keystone",
+                                                                {})
+            keystone_cleanup = (self._delete_recorded_keystone_resources,
+                                client.keystone(), recorded)
+        else:
+            keystone_cleanup = (utils.delete_keystone_resources,
+                                client.keystone())
+
         cleanup_methods = {
-            "keystone": (utils.delete_keystone_resources, client.keystone()),
+            "keystone": keystone_cleanup,
             "quotas": (utils.delete_admin_quotas, client,
                        self.context.get("tenants", [])),
         }
@@ -68,10 +87,14 @@ class AdminCleanup(base.Context):
                           exc_info=sys.exc_info())
                 LOG.warning(_('Unable to fully cleanup the cloud: %s') %
                             (six.text_type(e)))
+        if recorded:
+            utils.forget_deleted_resources([recorded])
 
     @rutils.log_task_wrapper(LOG.info, _("Enter context: `admin cleanup`"))
     def setup(self):
         self.endpoint = self.context["admin"]["endpoint"]
+        if not utils.CONF.benchmark.cleanup_sweep:
+            self.context["resource_ledger"] = True
 
     @rutils.log_task_wrapper(LOG.info, _("Exit context: `admin cleanup`"))
     def cleanup(self):
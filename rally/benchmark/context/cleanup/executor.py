@@ -0,0 +1,189 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import Queue
+import sys
+import threading
+
+from oslo.config import cfg
+import six
+
+from rally.openstack.common.gettextutils import _
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+CONF = cfg.CONF
+cleanup_opts = [
+    cfg.IntOpt("cleanup_concurrency", default=20,
+               help="Number of threads that delete resources of different "
+                    "tenants and services at the same time during cleanup")
+]
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(cleanup_opts, group=benchmark_group)
+
+
+class _ServiceCleanup(object):
+    """Cleanup of one service of one tenant."""
+
+    def __init__(self, service, steps, get_args):
+        self.service = service
+        self.steps = collections.OrderedDict((s.name, s) for s in steps)
+        self.waiting_for = dict((s.name, set(s.depends)) for s in steps)
+        self._get_args = get_args
+        self._args = None
+        self._args_error = None
+        self._args_lock = threading.Lock()
+
+    def args(self):
+        """Return arguments of the step functions, created on first use."""
+        with self._args_lock:
+            # NOTE: If the client can't be created, e.g. the tenant can't
+            #       authenticate, the rest of steps fail without retries.
+            if self._args is None and self._args_error is None:
+                try:
+                    self._args = tuple(self._get_args())
+                except Exception as e:
+                    self._args_error = e
+            if self._args_error is not None:
+                raise self._args_error
+            return self._args
+
+    def dependents(self, step_name):
+        return [name for name, step in self.steps.items()
+                if step_name in step.depends]
+
+
+class CleanupExecutor(object):
+    """Runs cleanup steps of many tenants and services concurrently.
+
+    Steps of all added cleanups are executed by a bounded pool of threads.
+    A step starts as soon as steps of the same cleanup it depends on are
+    finished; steps that depend on a failed step are skipped, because their
+    resources can't be deleted anyway.
+    """
+
+    def __init__(self, concurrency=None):
+        self.concurrency = concurrency or CONF.benchmark.cleanup_concurrency
+        self._cleanups = []
+        self._queue = Queue.Queue()
+        self._lock = threading.Lock()
+        self._unfinished = 0
+        self._report = {}
+
+    def add(self, service, steps, get_args):
+        """Add cleanup of one service of one tenant.
+
+        :param service: name of the service
+        :param steps: list of CleanupStep of the service
+        :param get_args: function that returns arguments of the step
+                         functions, e.g. the client of the tenant; it is
+                         called by the pool before the first step
+        """
+        self._cleanups.append(_ServiceCleanup(service, steps, get_args))
+
+    def _service_report(self, service):
+        return self._report.setdefault(service, {"duration": 0.0,
+                                                 "steps": 0, "failed": 0,
+                                                 "skipped": 0,
+                                                 "leftovers": 0})
+
+    def _count_leftovers(self, cleanup, step):
+        try:
+            return len(step.list(*cleanup.args()))
+        except Exception:
+            LOG.debug("Failed to count leftovers of %(service)s %(step)s" %
+                      {"service": cleanup.service, "step": step.name},
+                      exc_info=sys.exc_info())
+            return 0
+
+    def _run_step(self, cleanup, step):
+        failed = False
+        with rutils.Timer() as timer:
+            try:
+                step.delete(*cleanup.args())
+            except Exception as e:
+                failed = True
+                LOG.debug("Not all user resources were cleaned.",
+                          exc_info=sys.exc_info())
+                LOG.warning(_("Unable to fully cleanup %(service)s "
+                              "%(step)s: %(error)s") %
+                            {"service": cleanup.service, "step": step.name,
+                             "error": six.text_type(e)})
+            leftovers = self._count_leftovers(cleanup, step)
+        self._finish(cleanup, step.name, timer.duration(), failed, leftovers)
+
+    def _finish(self, cleanup, step_name, duration, failed, leftovers):
+        with self._lock:
+            report = self._service_report(cleanup.service)
+            report["duration"] += duration
+            report["steps"] += 1
+            report["failed"] += int(failed)
+            report["leftovers"] += leftovers
+            self._unfinished -= 1
+            for name in cleanup.dependents(step_name):
+                if failed:
+                    self._skip(cleanup, name)
+                elif name in cleanup.waiting_for:
+                    waiting_for = cleanup.waiting_for[name]
+                    waiting_for.discard(step_name)
+                    if not waiting_for:
+                        del cleanup.waiting_for[name]
+                        self._queue.put((cleanup, cleanup.steps[name]))
+            if not self._unfinished:
+                for i in range(self.concurrency):
+                    self._queue.put(None)
+
+    def _skip(self, cleanup, step_name):
+        if cleanup.waiting_for.pop(step_name, None) is None:
+            return
+        self._service_report(cleanup.service)["skipped"] += 1
+        self._unfinished -= 1
+        for name in cleanup.dependents(step_name):
+            self._skip(cleanup, name)
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+            self._run_step(*task)
+
+    def run(self):
+        """Run all added cleanups.
+
+        :returns: dict with a report for each service: total duration of
+                  its steps in seconds, number of steps that were run,
+                  failed and skipped, and number of resources left
+        """
+        for cleanup in self._cleanups:
+            for name, step in cleanup.steps.items():
+                self._unfinished += 1
+                if not step.depends:
+                    del cleanup.waiting_for[name]
+                    self._queue.put((cleanup, step))
+        if not self._unfinished:
+            return self._report
+
+        workers = [threading.Thread(target=self._worker)
+                   for i in range(min(self.concurrency, self._unfinished))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return self._report
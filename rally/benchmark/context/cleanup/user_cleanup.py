@@ -13,11 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import sys
+import functools
 
-import six
+from oslo.config import cfg
 
 from rally.benchmark.context import base
+from rally.benchmark.context.cleanup import executor
 from rally.benchmark.context.cleanup import utils
 from rally.openstack.common.gettextutils import _
 from rally.openstack.common import log as logging
@@ -27,6 +28,8 @@ from rally import utils as rutils
 
 LOG = logging.getLogger(__name__)
 
+CONF = cfg.CONF
+
 
 class UserCleanup(base.Context):
     """Context class for user resource cleanup."""
@@ -49,44 +52,83 @@ class UserCleanup(base.Context):
 
     def __init__(self, context):
         super(UserCleanup, self).__init__(context)
+        self.users = []
         self.users_endpoints = []
 
-    def _cleanup_resources(self):
-        for user in self.users_endpoints:
-            clients = osclients.Clients(user)
-            tenant_id = clients.keystone().tenant_id
-            cleanup_methods = {
-                "nova": (utils.delete_nova_resources, clients.nova),
-                "glance": (utils.delete_glance_resources, clients.glance,
-                           tenant_id),
-                "cinder": (utils.delete_cinder_resources, clients.cinder),
-                "neutron": (utils.delete_neutron_resources, clients.neutron,
-                            tenant_id),
-                "ceilometer": (utils.delete_ceilometer_resources,
-                               clients.ceilometer, tenant_id),
-                "heat": (utils.delete_heat_resources, clients.heat),
-                "sahara": (utils.delete_sahara_resources, clients.sahara),
-                "designate": (utils.delete_designate_resources,
-                              clients.designate),
-                "zaqar": (utils.delete_zaqar_resources, clients.zaqar),
-            }
+    @staticmethod
+    def _get_cleanup_args(clients, service_name):
+        if service_name in ("glance", "neutron", "ceilometer"):
+            return (getattr(clients, service_name)(),
+                    clients.keystone().tenant_id)
+        return (getattr(clients, service_name)(),)
+
+    @staticmethod
+    def _get_ledger_args(clients, service_name, recorded):
+        return ((getattr(clients, service_name)(), recorded),
+                UserCleanup._get_cleanup_args(clients, service_name))
 
+    def _cleanup_resources(self):
+        use_ledger = self.context.get("resource_ledger")
+        sweep = self.context.get("resource_ledger_incomplete", False)
+        if use_ledger and sweep:
+            LOG.info(_("Some iterations timed out or their workers died, "
+                       "so resources that could be missed by the resource "
+                       "ledger are listed and deleted."))
+        recorded = (utils.get_recorded_resources(self.context["task"]["uuid"])
+                    if use_ledger else {})
+        recorded_by_type = []
+        cleaned_tenants = set()
+        cleanup_executor = executor.CleanupExecutor()
+        for user in self.users:
+            clients = osclients.Clients(user["endpoint"])
+            tenant_id = user.get("tenant_id")
             for service_name in self.config:
-                cleanup_method = cleanup_methods[service_name]
-                method = cleanup_method[0]
-                client = cleanup_method[1]()
-                try:
-                    method(client, *cleanup_method[2:])
-                except Exception as e:
-                    LOG.debug("Not all user resources were cleaned.",
-                              exc_info=sys.exc_info())
-                    LOG.warning(_('Unable to fully cleanup the cloud: %s') %
-                                (six.text_type(e)))
+                if use_ledger and service_name in utils.LEDGER_STEPS:
+                    # NOTE: Recorded resources belong to the tenant, so they
+                    #       are deleted once with clients of any of its users,
+                    #       while resources of the rest of types are listed
+                    #       with clients of each user.
+                    by_type = {}
+                    if tenant_id not in cleaned_tenants:
+                        by_type = recorded.get(tenant_id, {}).get(
+                            service_name, {})
+                    if by_type:
+                        recorded_by_type.append(by_type)
+                    cleanup_executor.add(
+                        service_name,
+                        utils.get_ledger_cleanup_steps(service_name, sweep),
+                        functools.partial(self._get_ledger_args, clients,
+                                          service_name, by_type))
+                else:
+                    cleanup_executor.add(
+                        service_name, utils.CLEANUP_STEPS[service_name],
+                        functools.partial(self._get_cleanup_args, clients,
+                                          service_name))
+            cleaned_tenants.add(tenant_id)
+
+        report = cleanup_executor.run()
+        if recorded_by_type:
+            utils.forget_deleted_resources(recorded_by_type)
+        for service_name in self.config:
+            service_report = report.get(service_name)
+            if not service_report:
+                continue
+            message = (_("Cleanup of %(service)s took %(duration).3f sec in "
+                         "total, steps failed: %(failed)d, skipped: "
+                         "%(skipped)d, resources left: %(leftovers)d") %
+                       dict(service_report, service=service_name))
+            if service_report["leftovers"] or service_report["failed"]:
+                LOG.warning(message)
+            else:
+                LOG.info(message)
+        return report
 
     @rutils.log_task_wrapper(LOG.info, _("Enter context: `cleanup`"))
     def setup(self):
-        self.users_endpoints = [u["endpoint"]
-                                for u in self.context.get("users", [])]
+        self.users = list(self.context.get("users", []))
+        self.users_endpoints = [u["endpoint"] for u in self.users]
+        if not CONF.benchmark.cleanup_sweep:
+            self.context["resource_ledger"] = True
 
     @rutils.log_task_wrapper(LOG.info, _("Exit context: `cleanup`"))
     def cleanup(self):
@@ -13,22 +13,32 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import logging
 
 from neutronclient.common import exceptions as neutron_exceptions
+from oslo.config import cfg
 
 from rally.benchmark.scenarios.keystone import utils as kutils
 from rally.benchmark import utils as bench_utils
 from rally.benchmark.wrappers import keystone as keystone_wrapper
+from rally import db
 
 LOG = logging.getLogger(__name__)
 
+CONF = cfg.CONF
+cleanup_opts = [
+    cfg.BoolOpt("cleanup_sweep", default=False,
+                help="Cleanup contexts list all resources of the cloud and "
+                     "delete temporary ones instead of deleting only "
+                     "resources recorded in the resource ledger of the task")
+]
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(cleanup_opts, group=benchmark_group)
+
 
 def delete_cinder_resources(cinder):
-    delete_volume_transfers(cinder)
-    delete_volumes(cinder)
-    delete_volume_snapshots(cinder)
-    delete_volume_backups(cinder)
+    _delete_in_order("cinder", cinder)
 
 
 def delete_glance_resources(glance, project_uuid):
@@ -44,9 +54,11 @@ def delete_admin_quotas(client, tenants):
         delete_quotas(client, tenant["id"])
 
 
-def delete_keystone_resources(keystone):
+def delete_keystone_resources(keystone,
+                              resources=("user", "project", "service",
+                                         "role")):
     keystone = keystone_wrapper.wrap(keystone)
-    for resource in ["user", "project", "service", "role"]:
+    for resource in resources:
         _delete_single_keystone_resource_type(keystone, resource)
 
 
@@ -101,9 +113,7 @@ def delete_volume_backups(cinder):
 
 
 def delete_nova_resources(nova):
-    delete_servers(nova)
-    delete_keypairs(nova)
-    delete_secgroups(nova)
+    _delete_in_order("nova", nova)
 
 
 def delete_secgroups(nova):
@@ -125,9 +135,11 @@ def delete_keypairs(nova):
 
 
 def delete_neutron_resources(neutron, project_uuid):
-    search_opts = {"tenant_id": project_uuid}
-    # Ports
-    for port in neutron.list_ports(**search_opts)["ports"]:
+    _delete_in_order("neutron", neutron, project_uuid)
+
+
+def delete_neutron_ports(neutron, project_uuid):
+    for port in neutron.list_ports(tenant_id=project_uuid)["ports"]:
         # Detach routers
         if port["device_owner"] == "network:router_interface":
             neutron.remove_interface_router(
@@ -140,16 +152,20 @@ def delete_neutron_resources(neutron, project_uuid):
             except neutron_exceptions.PortNotFoundClient:
                 # Port can be already auto-deleted, skip silently
                 pass
-    # Routers
-    for router in neutron.list_routers(**search_opts)["routers"]:
+
+
+def delete_neutron_routers(neutron, project_uuid):
+    for router in neutron.list_routers(tenant_id=project_uuid)["routers"]:
         neutron.delete_router(router["id"])
 
-    # Subnets
-    for subnet in neutron.list_subnets(**search_opts)["subnets"]:
+
+def delete_neutron_subnets(neutron, project_uuid):
+    for subnet in neutron.list_subnets(tenant_id=project_uuid)["subnets"]:
         neutron.delete_subnet(subnet["id"])
 
-    # Networks
-    for network in neutron.list_networks(**search_opts)["networks"]:
+
+def delete_neutron_networks(neutron, project_uuid):
+    for network in neutron.list_networks(tenant_id=project_uuid)["networks"]:
         neutron.delete_network(network["id"])
 
 
@@ -171,17 +187,7 @@ def delete_alarms(ceilometer, project_uuid):
 
 
 def delete_sahara_resources(sahara):
-    # Delete EDP related objects
-    delete_job_executions(sahara)
-    delete_jobs(sahara)
-    delete_job_binary_internals(sahara)
-    delete_job_binaries(sahara)
-    delete_data_sources(sahara)
-
-    # Delete cluster related objects
-    delete_clusters(sahara)
-    delete_cluster_templates(sahara)
-    delete_node_group_templates(sahara)
+    _delete_in_order("sahara", sahara)
 
 
 def delete_job_executions(sahara):
@@ -239,6 +245,317 @@ def delete_zaqar_resources(zaqar):
         queue.delete()
 
 
+def _list(manager_name):
+    return lambda client, *args: getattr(client, manager_name).list()
+
+
+def _list_not_deleted(manager_name):
+    def _list_resources(client, *args):
+        return [r for r in getattr(client, manager_name).list()
+                if bench_utils.get_status(r) not in ("DELETED",
+                                                     "DELETE_COMPLETE")]
+    return _list_resources
+
+
+def _list_neutron(resources_name):
+    def _list_resources(neutron, project_uuid):
+        list_method = getattr(neutron, "list_%s" % resources_name)
+        return list_method(tenant_id=project_uuid)[resources_name]
+    return _list_resources
+
+
+def _list_secgroups(nova):
+    return [secgroup for secgroup in nova.security_groups.list()
+            if secgroup.name != "default"]
+
+
+def _list_glance_images(glance, project_uuid):
+    return [image for image in glance.images.list(owner=project_uuid)
+            if bench_utils.get_status(image) != "DELETED"]
+
+
+def _list_alarms(ceilometer, project_uuid):
+    return ceilometer.alarms.list(q=[{"field": "project_id", "op": "eq",
+                                      "value": project_uuid}])
+
+
+# Step of cleanup of a service deletes one kind of its resources. "list"
+# returns resources that are left after the step and "depends" contains
+# names of steps of the same service that must be finished before it.
+# Functions of all steps of a service take the same arguments.
+CleanupStep = collections.namedtuple("CleanupStep",
+                                     ["name", "delete", "list", "depends"])
+
+# Steps of each service are listed in an order that satisfies dependencies.
+CLEANUP_STEPS = {
+    "nova": [
+        CleanupStep("servers", delete_servers, _list("servers"), []),
+        CleanupStep("keypairs", delete_keypairs, _list("keypairs"), []),
+        CleanupStep("security_groups", delete_secgroups, _list_secgroups,
+                    ["servers"])
+    ],
+    "glance": [
+        CleanupStep("images", delete_images, _list_glance_images, [])
+    ],
+    "cinder": [
+        CleanupStep("transfers", delete_volume_transfers, _list("transfers"),
+                    []),
+        CleanupStep("snapshots", delete_volume_snapshots,
+                    _list("volume_snapshots"), []),
+        CleanupStep("backups", delete_volume_backups, _list("backups"), []),
+        CleanupStep("volumes", delete_volumes, _list("volumes"),
+                    ["transfers", "snapshots"])
+    ],
+    "neutron": [
+        CleanupStep("ports", delete_neutron_ports, _list_neutron("ports"),
+                    []),
+        CleanupStep("routers", delete_neutron_routers,
+                    _list_neutron("routers"), ["ports"]),
+        CleanupStep("subnets", delete_neutron_subnets,
+                    _list_neutron("subnets"), ["routers"]),
+        CleanupStep("networks", delete_neutron_networks,
+                    _list_neutron("networks"), ["subnets"])
+    ],
+    "ceilometer": [
+        CleanupStep("alarms", delete_alarms, _list_alarms, [])
+    ],
+    "heat": [
+        CleanupStep("stacks", delete_stacks, _list_not_deleted("stacks"), [])
+    ],
+    "sahara": [
+        CleanupStep("job_executions", delete_job_executions,
+                    _list("job_executions"), []),
+        CleanupStep("jobs", delete_jobs, _list("jobs"), ["job_executions"]),
+        CleanupStep("job_binary_internals", delete_job_binary_internals,
+                    _list("job_binary_internals"), ["jobs"]),
+        CleanupStep("job_binaries", delete_job_binaries,
+                    _list("job_binaries"), ["jobs"]),
+        CleanupStep("data_sources", delete_data_sources,
+                    _list("data_sources"), ["job_executions"]),
+        CleanupStep("clusters", delete_clusters, _list("clusters"),
+                    ["job_executions"]),
+        CleanupStep("cluster_templates", delete_cluster_templates,
+                    _list("cluster_templates"), ["clusters"]),
+        CleanupStep("node_group_templates", delete_node_group_templates,
+                    _list("node_group_templates"), ["cluster_templates"])
+    ],
+    "designate": [
+        CleanupStep("domains", delete_designate_resources, _list("domains"),
+                    [])
+    ],
+    "zaqar": [
+        CleanupStep("queues", delete_zaqar_resources, _list("queues"), [])
+    ]
+}
+
+
+def get_recorded_resources(task_uuid):
+    """Get resources of the task recorded in the resource ledger.
+
+    :param task_uuid: UUID of the task
+    :returns: dict {tenant_id: {service: {type: [record, ...]}}}, where each
+              record is a dict with "id" of the ledger entry and
+              "resource_id"; tenant_id is None for admin resources
+    """
+    recorded = collections.defaultdict(
+        lambda: collections.defaultdict(
+            lambda: collections.defaultdict(list)))
+    for resource in db.task_resources_get(task_uuid):
+        recorded[resource.tenant_id][resource.service][resource.type].append(
+            {"id": resource.id, "resource_id": resource.resource_id})
+    return recorded
+
+
+def forget_deleted_resources(recorded_by_type):
+    """Remove records of deleted resources from the resource ledger.
+
+    :param recorded_by_type: list of dicts {type: [record, ...]}
+    :returns: number of records removed
+    """
+    ids = [record["id"] for by_type in recorded_by_type
+           for records in by_type.values()
+           for record in records if record.get("deleted")]
+    db.task_resources_delete(ids)
+    return len(ids)
+
+
+def _is_not_found(e):
+    return 404 in (getattr(e, "code", None), getattr(e, "status_code", None))
+
+
+def _delete_recorded(resource_type, delete, get=None, timeout=600,
+                     check_interval=3):
+    """Make a step that deletes resources recorded in the resource ledger.
+
+    Each recorded resource is deleted by a direct call with its id, resources
+    that are already gone are skipped. If "get" is given, the step waits
+    until all deleted resources disappear. Records of deleted resources are
+    marked with "deleted".
+    """
+    def _is_gone(client, record):
+        try:
+            resource = get(client, record["resource_id"])
+        except Exception as e:
+            if _is_not_found(e):
+                return True
+            raise
+        return bench_utils.get_status(resource) in ("DELETED",
+                                                    "DELETE_COMPLETE")
+
+    def _delete(client, recorded):
+        errors = []
+        pending = []
+        for record in recorded.get(resource_type, []):
+            try:
+                delete(client, record["resource_id"])
+            except Exception as e:
+                if not _is_not_found(e):
+                    errors.append(e)
+                    continue
+            pending.append(record)
+
+        def _all_gone(recorded):
+            for record in list(pending):
+                if _is_gone(client, record):
+                    record["deleted"] = True
+                    pending.remove(record)
+            return not pending
+
+        if get is None:
+            for record in pending:
+                record["deleted"] = True
+        elif pending:
+            bench_utils.wait_for(recorded, is_ready=_all_gone,
+                                 update_resource=None, timeout=timeout,
+                                 check_interval=check_interval)
+        if errors:
+            raise errors[0]
+
+    return _delete
+
+
+def _list_recorded(resource_type):
+    def _list_resources(client, recorded):
+        return [record for record in recorded.get(resource_type, [])
+                if not record.get("deleted")]
+    return _list_resources
+
+
+def _recorded_step(name, manager_name, depends=(), wait=True, **kwargs):
+    def _delete(client, resource_id):
+        getattr(client, manager_name).delete(resource_id)
+
+    def _get(client, resource_id):
+        return getattr(client, manager_name).get(resource_id)
+
+    return CleanupStep(name,
+                       _delete_recorded(name, _delete, _get if wait else None,
+                                        **kwargs),
+                       _list_recorded(name), list(depends))
+
+
+def _recorded_neutron_step(name, depends=()):
+    def _delete(neutron, resource_id):
+        getattr(neutron, "delete_%s" % name[:-1])(resource_id)
+
+    return CleanupStep(name, _delete_recorded(name, _delete),
+                       _list_recorded(name), list(depends))
+
+
+def _delete_router(neutron, router_id):
+    ports = neutron.list_ports(device_id=router_id,
+                               device_owner="network:router_interface")
+    for port in ports["ports"]:
+        neutron.remove_interface_router(router_id, {"port_id": port["id"]})
+    neutron.delete_router(router_id)
+
+
+def _delete_keystone_user(keystone, user_id):
+    keystone_wrapper.wrap(keystone).delete_user(user_id)
+
+
+def _delete_keystone_tenant(keystone, tenant_id):
+    keystone_wrapper.wrap(keystone).delete_project(tenant_id)
+
+
+# Steps that delete only resources recorded in the resource ledger of the
+# task by scenario utils. Their functions take the client of the service and
+# the dict {type: [record, ...]} of recorded resources of one tenant.
+LEDGER_STEPS = {
+    "nova": [
+        _recorded_step("servers", "servers"),
+        _recorded_step("images", "images"),
+        _recorded_step("floating_ips", "floating_ips", wait=False)
+    ],
+    "glance": [
+        _recorded_step("images", "images")
+    ],
+    "cinder": [
+        _recorded_step("snapshots", "volume_snapshots", timeout=240),
+        _recorded_step("volumes", "volumes", ["snapshots"], timeout=240)
+    ],
+    "neutron": [
+        _recorded_neutron_step("ports"),
+        CleanupStep("routers", _delete_recorded("routers", _delete_router),
+                    _list_recorded("routers"), ["ports"]),
+        _recorded_neutron_step("subnets", ["routers"]),
+        _recorded_neutron_step("networks", ["subnets"])
+    ],
+    "heat": [
+        _recorded_step("stacks", "stacks")
+    ],
+    "keystone": [
+        CleanupStep("users", _delete_recorded("users", _delete_keystone_user),
+                    _list_recorded("users"), []),
+        CleanupStep("tenants",
+                    _delete_recorded("tenants", _delete_keystone_tenant),
+                    _list_recorded("tenants"), [])
+    ]
+}
+
+
+def _with_args(step, index, depends):
+    """Make a step that takes arguments of both ledger and sweep steps."""
+    return CleanupStep(step.name,
+                       lambda *args: step.delete(*args[index]),
+                       lambda *args: step.list(*args[index]),
+                       depends)
+
+
+def get_ledger_cleanup_steps(service, sweep=False):
+    """Return steps of the service that use the resource ledger.
+
+    The ledger has steps only for some types of resources, resources of
+    the rest of types, e.g. nova keypairs, are listed and deleted by steps
+    from CLEANUP_STEPS. If sweep is True, steps from CLEANUP_STEPS are used
+    for all types they have, e.g. if the ledger could miss some resources.
+
+    Functions of the returned steps take two tuples: arguments of steps from
+    LEDGER_STEPS and arguments of steps from CLEANUP_STEPS.
+    """
+    ledger = collections.OrderedDict((step.name, step)
+                                     for step in LEDGER_STEPS[service])
+    listed = collections.OrderedDict((step.name, step)
+                                     for step in CLEANUP_STEPS.get(service,
+                                                                   []))
+    names = list(listed) + [name for name in ledger if name not in listed]
+    steps = []
+    for name in names:
+        depends = set(ledger[name].depends if name in ledger else [])
+        depends.update(listed[name].depends if name in listed else [])
+        depends = [n for n in names if n in depends]
+        if name in listed and (sweep or name not in ledger):
+            steps.append(_with_args(listed[name], 1, depends))
+        else:
+            steps.append(_with_args(ledger[name], 0, depends))
+    return steps
+
+
+def _delete_in_order(service, *args):
+    for step in CLEANUP_STEPS[service]:
+        step.delete(*args)
+
+
 def _wait_for_empty_list(mgr, timeout=10, check_interval=1):
     _wait_for_list_size(mgr, sizes=[0], timeout=timeout,
                         check_interval=check_interval)
@@ -30,6 +30,7 @@ class RoleGenerator(base.Context):
     __ctx_name__ = "roles"
     __ctx_order__ = 101
     __ctx_hidden__ = False
+    __ctx_shared__ = True
 
     CONFIG_SCHEMA = {
         "type": "array",
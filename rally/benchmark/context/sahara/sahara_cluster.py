@@ -20,6 +20,7 @@ from rally.benchmark.context.cleanup import utils as cleanup_utils
 from rally.benchmark.scenarios.sahara import utils
 from rally.benchmark import types
 from rally.benchmark import utils as bench_utils
+from rally.openstack.common.gettextutils import _
 from rally.openstack.common import log as logging
 from rally import osclients
 from rally import utils as rutils
@@ -18,6 +18,7 @@ import urllib2
 from rally.benchmark.context import base
 from rally.benchmark.context.cleanup import utils as cleanup_utils
 from rally import exceptions
+from rally.openstack.common.gettextutils import _
 from rally.openstack.common import log as logging
 from rally import osclients
 from rally import utils as rutils
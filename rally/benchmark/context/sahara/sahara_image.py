@@ -17,6 +17,7 @@ from rally.benchmark.context.cleanup import utils as cleanup_utils
 from rally.benchmark.scenarios import base as scenarios_base
 from rally.benchmark.scenarios.glance import utils as glance_utils
 from rally import exceptions
+from rally.openstack.common.gettextutils import _
 from rally.openstack.common import log as logging
 from rally import osclients
 from rally import utils as rutils
@@ -16,6 +16,7 @@
 from oslo.config import cfg
 
 from rally.benchmark.context import base
+from rally.benchmark import users_pool
 from rally.benchmark import utils
 from rally.benchmark.wrappers import keystone
 from rally import consts
@@ -53,6 +54,7 @@ class UserGenerator(base.Context):
     __ctx_name__ = "users"
     __ctx_order__ = 100
     __ctx_hidden__ = False
+    __ctx_shared__ = True
 
     CONFIG_SCHEMA = {
         "type": "object",
@@ -76,6 +78,9 @@ class UserGenerator(base.Context):
             "user_domain": {
                 "type": "string",
             },
+            "users_pool": {
+                "type": "boolean",
+            },
         },
         "additionalProperties": False
     }
@@ -92,6 +97,7 @@ class UserGenerator(base.Context):
                                cfg.CONF.users_context.project_domain)
         self.config.setdefault("user_domain",
                                cfg.CONF.users_context.user_domain)
+        self.config.setdefault("users_pool", False)
         self.context["users"] = []
         self.context["tenants"] = []
         self.endpoint = self.context["admin"]["endpoint"]
@@ -199,10 +205,26 @@ class UserGenerator(base.Context):
                             "Exception: %(ex)s" %
                             {"user_id": user["id"], "ex": ex})
 
+    def _get_users_pool(self):
+        return users_pool.UsersPool(self.task["deployment_uuid"],
+                                    self.endpoint,
+                                    concurrent=self.config["concurrent"],
+                                    project_domain=self.config[
+                                        "project_domain"],
+                                    user_domain=self.config["user_domain"])
+
     @rutils.log_task_wrapper(LOG.info, _("Enter context: `users`"))
     def setup(self):
         """Create tenants and users, using pool of threads."""
 
+        if self.config["users_pool"]:
+            tenants, users = self._get_users_pool().lease(
+                self.task["uuid"], self.config["tenants"],
+                self.config["users_per_tenant"])
+            self.context["tenants"] = tenants
+            self.context["users"] = users
+            return
+
         users_num = self.config["users_per_tenant"]
 
         args = [(self.endpoint, users_num, self.config["project_domain"],
@@ -224,6 +246,12 @@ class UserGenerator(base.Context):
     def cleanup(self):
         """Delete tenants and users, using pool of threads."""
 
+        if self.config["users_pool"]:
+            self._get_users_pool().release(
+                self.task["uuid"],
+                [tenant["id"] for tenant in self.context["tenants"]])
+            return
+
         concurrent = self.config["concurrent"]
 
         # Delete users
@@ -15,6 +15,7 @@
 from rally.benchmark.context import base
 from rally.benchmark.context.cleanup import utils as cleanup_utils
 from rally.benchmark.scenarios.cinder import utils as cinder_utils
+from rally.openstack.common.gettextutils import _
 from rally.openstack.common import log as logging
 from rally import osclients
 from rally import utils as rutils
@@ -13,12 +13,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import json
+import sys
 import threading
 import time
 import traceback
 
 import jsonschema
+from oslo.config import cfg
 import six
 
 from rally.benchmark.context import base as base_ctx
@@ -26,6 +29,7 @@ from rally.benchmark.context import users as users_ctx
 from rally.benchmark.runners import base as base_runner
 from rally.benchmark.scenarios import base as base_scenario
 from rally.benchmark.sla import base as base_sla
+from rally.benchmark import users_pool
 from rally import consts
 from rally import exceptions
 from rally.objects import endpoint
@@ -37,6 +41,21 @@ from rally import utils as rutils
 
 LOG = logging.getLogger(__name__)
 
+CONF = cfg.CONF
+engine_opts = [
+    cfg.IntOpt("result_chunk_size", default=1000,
+               help="Results of benchmark iterations are saved to the "
+                    "database in chunks of this number of iterations"),
+    cfg.IntOpt("result_chunk_interval", default=60,
+               help="Maximum number of seconds during which results of "
+                    "benchmark iterations are kept in memory before they "
+                    "are saved to the database")
+]
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(engine_opts, group=benchmark_group)
+
+# NOTE: Interval in seconds between checks whether the task is aborted.
+ABORT_CHECK_INTERVAL = 1
 
 CONFIG_SCHEMA = {
     "type": "object",
@@ -63,6 +82,9 @@ CONFIG_SCHEMA = {
                     "sla": {
                         "type": "object",
                     },
+                    "parallel_section": {
+                        "type": "string"
+                    },
                 },
                 "additionalProperties": False
             }
@@ -71,6 +93,32 @@ CONFIG_SCHEMA = {
 }
 
 
+# NOTE: Key of the section of the task config with contexts that are set up
+#       once and used by all benchmarks of the task.
+SHARED_CONTEXT = "shared_context"
+
+SHARED_CONTEXT_SCHEMA = {
+    "type": "object",
+    "$schema": rutils.JSON_SCHEMA
+}
+
+
+def _get_benchmark_context(shared_context, name, config):
+    """Return context of a benchmark that uses the shared context.
+
+    Data created by shared contexts, e.g. users, is copied, so contexts of
+    the benchmark can change it without affecting other benchmarks.
+    """
+    context_obj = dict((key, copy.deepcopy(value))
+                       for key, value in shared_context.items()
+                       if key not in ("task", "admin", "config"))
+    context_obj.update({"task": shared_context["task"],
+                        "admin": dict(shared_context["admin"]),
+                        "scenario_name": name,
+                        "config": config})
+    return context_obj
+
+
 class BenchmarkEngine(object):
     """The Benchmark engine class is used to execute benchmark scenarios.
 
@@ -96,7 +144,19 @@ class BenchmarkEngine(object):
         :param task: The current task which is being performed
         """
         self.config = config
+        self.shared_context = {}
+        if SHARED_CONTEXT in config:
+            self.shared_context = config[SHARED_CONTEXT]
+            self.config = dict((name, values)
+                               for name, values in config.items()
+                               if name != SHARED_CONTEXT)
         self.task = task
+        self.durations = {}
+        self.context_durations = {}
+        self._contexts = {}
+        self._shared_contexts = {}
+        self._shared_contexts_lock = threading.Lock()
+        self._setup_lock = threading.Lock()
 
     @rutils.log_task_wrapper(LOG.info,
                              _("Task validation of scenarios names."))
@@ -125,6 +185,15 @@ class BenchmarkEngine(object):
                         reason=six.text_type(e)
                     )
 
+    @rutils.log_task_wrapper(LOG.info,
+                             _("Task validation of shared context."))
+    def _validate_shared_context(self, context):
+        jsonschema.validate(context, SHARED_CONTEXT_SCHEMA)
+        base_ctx.ContextManager.validate(context, non_hidden=True)
+        own = base_ctx.ContextManager.split_shared(context)[1]
+        if own:
+            raise exceptions.NotSharedContexts(names=", ".join(sorted(own)))
+
     def _validate_config_semantic_helper(self, admin, user, name, pos,
                                          task, kwargs):
         context = {} if not kwargs else kwargs.get("context", {})
@@ -139,24 +208,37 @@ class BenchmarkEngine(object):
                   "config": kwargs, "reason": six.text_type(e)}
             raise exceptions.InvalidBenchmarkConfig(**kw)
 
+    def _validate_config_semantic_with_user(self, config, user_endpoint):
+        admin = osclients.Clients(self.admin_endpoint)
+        user = osclients.Clients(user_endpoint)
+
+        base_ctx.ContextManager.validate_semantic(
+            self.shared_context, admin=admin, users=[user], task=self.task)
+        for name, values in config.iteritems():
+            for pos, kwargs in enumerate(values):
+                self._validate_config_semantic_helper(admin, user, name,
+                                                      pos, self.task,
+                                                      kwargs)
+
     @rutils.log_task_wrapper(LOG.info, _("Task validation of semantic."))
     def _validate_config_semantic(self, config):
-        # NOTE(boris-42): In future we will have more complex context, because
-        #                 we will have pre-created users mode as well.
+        # NOTE: A user of the users pool of the deployment is used if there
+        #       is one, so a temporary user is not created for validation.
+        pool = users_pool.UsersPool(self.task["deployment_uuid"],
+                                    self.admin_endpoint)
+        user_endpoint = pool.get_user()
+        if user_endpoint is not None:
+            self._validate_config_semantic_with_user(config, user_endpoint)
+            return
+
         context = {
             "task": self.task,
             "admin": {"endpoint": self.admin_endpoint}
         }
         with users_ctx.UserGenerator(context) as ctx:
             ctx.setup()
-            admin = osclients.Clients(self.admin_endpoint)
-            user = osclients.Clients(context["users"][0]["endpoint"])
-
-            for name, values in config.iteritems():
-                for pos, kwargs in enumerate(values):
-                    self._validate_config_semantic_helper(admin, user, name,
-                                                          pos, self.task,
-                                                          kwargs)
+            self._validate_config_semantic_with_user(
+                config, context["users"][0]["endpoint"])
 
     @rutils.log_task_wrapper(LOG.info, _("Task validation."))
     def validate(self):
@@ -164,6 +246,7 @@ class BenchmarkEngine(object):
         self.task.update_status(consts.TaskStatus.VERIFYING)
         try:
             jsonschema.validate(self.config, CONFIG_SCHEMA)
+            self._validate_shared_context(self.shared_context)
             self._validate_config_scenarios_name(self.config)
             self._validate_config_syntax(self.config)
             self._validate_config_semantic(self.config)
@@ -180,8 +263,9 @@ class BenchmarkEngine(object):
 
     def _prepare_context(self, context, name, endpoint):
         scenario_context = base_scenario.Scenario.meta(name, "context")
+        scenario_context.update(copy.deepcopy(self.shared_context))
         scenario_context.setdefault("users", {})
-        scenario_context.update(context)
+        scenario_context.update(copy.deepcopy(context))
         context_obj = {
             "task": self.task,
             "admin": {"endpoint": endpoint},
@@ -191,38 +275,248 @@ class BenchmarkEngine(object):
 
         return context_obj
 
+    def _get_sections(self):
+        """Split benchmarks of the task into sections run one by one.
+
+        Benchmarks that have the same "parallel_section" value are run
+        concurrently, all other benchmarks are run alone. A section takes
+        the place of its first benchmark in the task config.
+
+        :returns: list of sections, each of them is a list of benchmark keys
+        """
+        sections = []
+        parallel = {}
+        for name in self.config:
+            for n, kw in enumerate(self.config[name]):
+                key = {"name": name, "pos": n, "kw": kw}
+                section = kw.get("parallel_section")
+                if section is None:
+                    sections.append([key])
+                elif section in parallel:
+                    parallel[section].append(key)
+                else:
+                    parallel[section] = [key]
+                    sections.append(parallel[section])
+        return sections
+
+    def _prepare_contexts(self, sections):
+        """Split context configs of benchmarks into shared and own parts.
+
+        Benchmarks whose shared contexts (e.g. users) have the same config
+        use the same shared context if they run one after another or in
+        the same parallel section.
+        """
+        for keys in sections:
+            for key in keys:
+                config = self._prepare_context(key["kw"].get("context", {}),
+                                               key["name"], None)["config"]
+                shared, own = base_ctx.ContextManager.split_shared(config)
+                self._contexts[(key["name"], key["pos"])] = (
+                    json.dumps(shared, sort_keys=True), shared, own)
+
+    def _get_released_contexts(self, sections, index):
+        """Return shared contexts that are not needed after the section.
+
+        The shared context configured by the "shared_context" section of
+        the task is kept until its last use, other shared contexts are kept
+        only while the next section uses them.
+        """
+        def needed(keys):
+            return set(self._contexts[(k["name"], k["pos"])][0]
+                       for k in keys)
+
+        config = dict({"users": {}}, **copy.deepcopy(self.shared_context))
+        task_context = json.dumps(
+            base_ctx.ContextManager.split_shared(config)[0], sort_keys=True)
+        released = needed(sections[index])
+        if index + 1 < len(sections):
+            released -= needed(sections[index + 1])
+        if task_context in released:
+            for keys in sections[index + 1:]:
+                if task_context in needed(keys):
+                    released.discard(task_context)
+                    break
+        return released
+
+    def _get_context_obj(self, key):
+        """Return context of the benchmark, set up shared contexts for it.
+
+        Durations of context setup and cleanup of the benchmark are saved
+        to self.context_durations, "reused" is True if it uses shared
+        contexts set up for another benchmark.
+        """
+        name_pos = (key["name"], key["pos"])
+        shared_key, shared, own = self._contexts[name_pos]
+        durations = self.context_durations[name_pos]
+        with self._setup_lock:
+            if shared_key not in self._shared_contexts:
+                manager = base_ctx.ContextManager({
+                    "task": self.task,
+                    "admin": {"endpoint": self.admin_endpoint},
+                    "config": copy.deepcopy(shared)})
+                durations["reused"] = False
+                try:
+                    manager.setup()
+                except Exception:
+                    manager.cleanup()
+                    raise
+                finally:
+                    durations["setup"] += manager.setup_duration
+                with self._shared_contexts_lock:
+                    self._shared_contexts[shared_key] = manager
+            shared_context = self._shared_contexts[shared_key].context_obj
+        return _get_benchmark_context(shared_context, key["name"], own)
+
+    def _mark_ledger_incomplete(self, name_pos, context_obj):
+        """Make cleanup contexts of the benchmark list all resources.
+
+        Both the benchmark context and the shared one are marked, since
+        resources of the benchmark could be left to either of them.
+        """
+        context_obj["resource_ledger_incomplete"] = True
+        with self._shared_contexts_lock:
+            manager = self._shared_contexts.get(self._contexts[name_pos][0])
+            if manager is not None:
+                manager.context_obj["resource_ledger_incomplete"] = True
+
+    def _cleanup_shared_contexts(self, shared_keys):
+        """Clean up shared contexts.
+
+        :returns: duration of their cleanup in seconds
+        """
+        duration = 0.0
+        for shared_key in shared_keys:
+            with self._shared_contexts_lock:
+                manager = self._shared_contexts.pop(shared_key, None)
+            if manager is not None:
+                manager.cleanup()
+                duration += manager.cleanup_duration
+        return duration
+
+    def _run_benchmark(self, key, finish=None):
+        """Run the benchmark in its own context based on the shared one.
+
+        :param finish: function that is called after contexts of the
+                       benchmark are cleaned up, it returns duration of
+                       cleanup of shared contexts done by it
+        """
+        LOG.info("Running benchmark with key: \n%s"
+                 % json.dumps(key, indent=2))
+        kw = key["kw"]
+        name_pos = (key["name"], key["pos"])
+        runner = self._get_runner(kw)
+        is_done = threading.Event()
+        consumer = threading.Thread(
+            target=self.consume_results,
+            args=(key, self.task, runner, is_done))
+        consumer.start()
+
+        durations = {"setup": 0.0, "cleanup": 0.0, "reused": True}
+        self.context_durations[name_pos] = durations
+        manager = None
+        try:
+            try:
+                context_obj = self._get_context_obj(key)
+                manager = base_ctx.ContextManager(context_obj)
+                with manager:
+                    try:
+                        self.durations[name_pos] = runner.run(
+                            key["name"], context_obj, kw.get("args", {}))
+                    finally:
+                        if runner.ledger_incomplete:
+                            self._mark_ledger_incomplete(name_pos,
+                                                         context_obj)
+            finally:
+                if manager is not None:
+                    durations["setup"] += manager.setup_duration
+                    durations["cleanup"] += manager.cleanup_duration
+                if finish:
+                    durations["cleanup"] += finish()
+        finally:
+            is_done.set()
+            consumer.join()
+
+    def _run_section(self, keys, released=()):
+        """Run benchmarks of the section.
+
+        :param released: shared contexts that are cleaned up after the
+                         section by the benchmark that finishes last
+        """
+        unfinished = [len(keys)]
+
+        def finish():
+            with self._shared_contexts_lock:
+                unfinished[0] -= 1
+                if unfinished[0]:
+                    return 0.0
+            return self._cleanup_shared_contexts(released)
+
+        if len(keys) == 1:
+            self._run_benchmark(keys[0], finish)
+            return
+
+        LOG.info("Running %(count)d benchmarks of parallel section "
+                 "\"%(section)s\" concurrently" %
+                 {"count": len(keys),
+                  "section": keys[0]["kw"]["parallel_section"]})
+        errors = []
+
+        def run_benchmark(key):
+            try:
+                self._run_benchmark(key, finish)
+            except Exception:
+                errors.append(sys.exc_info())
+
+        threads = [threading.Thread(target=run_benchmark, args=(key,))
+                   for key in keys]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            # NOTE: Other benchmarks of the section are finished and their
+            #       results are saved, so the first error fails the task.
+            six.reraise(*errors[0])
+
     @rutils.log_task_wrapper(LOG.info, _("Benchmarking."))
     def run(self):
         """Run the benchmark according to the test configuration.
 
         Test configuration is specified on engine initialization.
+        Benchmarks of the same parallel section are run at the same time,
+        each of them with its own runner, context and results consumer.
+        Shared contexts, e.g. users, are set up once for consecutive
+        benchmarks with the same config of them.
 
         :returns: List of dicts, each dict containing the results of all the
                   corresponding benchmark test launches
         """
+        if self._is_aborting():
+            LOG.info("Task %s is aborted before start" % self.task["uuid"])
+            self.task.update_status(consts.TaskStatus.ABORTED)
+            return
         self.task.update_status(consts.TaskStatus.RUNNING)
-        for name in self.config:
-            for n, kw in enumerate(self.config[name]):
-                key = {'name': name, 'pos': n, 'kw': kw}
-                LOG.info("Running benchmark with key: \n%s"
-                         % json.dumps(key, indent=2))
-                runner = self._get_runner(kw)
-                is_done = threading.Event()
-                consumer = threading.Thread(
-                    target=self.consume_results,
-                    args=(key, self.task, runner.result_queue, is_done))
-                consumer.start()
-
-                context_obj = self._prepare_context(kw.get("context", {}),
-                                                    name, self.admin_endpoint)
-                try:
-                    with base_ctx.ContextManager(context_obj):
-                        self.duration = runner.run(name, context_obj,
-                                                   kw.get("args", {}))
-                finally:
-                    is_done.set()
-                    consumer.join()
-        self.task.update_status(consts.TaskStatus.FINISHED)
+        sections = self._get_sections()
+        self._prepare_contexts(sections)
+        try:
+            for i, keys in enumerate(sections):
+                if self._is_aborting():
+                    LOG.info("Task %s is aborted, the rest of benchmarks "
+                             "are skipped" % self.task["uuid"])
+                    self.task.update_status(consts.TaskStatus.ABORTED)
+                    return
+                self._run_section(keys,
+                                  self._get_released_contexts(sections, i))
+        finally:
+            self._cleanup_shared_contexts(list(self._shared_contexts))
+        if self._is_aborting():
+            self.task.update_status(consts.TaskStatus.ABORTED)
+        else:
+            self.task.update_status(consts.TaskStatus.FINISHED)
+
+    def _is_aborting(self):
+        return self.task.get_status() == consts.TaskStatus.ABORTING
 
     @rutils.log_task_wrapper(LOG.info, _("Check cloud."))
     def bind(self, admin=None, users=None):
@@ -240,29 +534,69 @@ class BenchmarkEngine(object):
         clients.verified_keystone()
         return self
 
-    def consume_results(self, key, task, result_queue, is_done):
+    def consume_results(self, key, task, runner, is_done):
         """Consume scenario runner results from queue and send them to db.
 
         Has to be run from different thread simultaneously with the runner.run
-        method.
+        method. Results are saved in chunks of result_chunk_size iterations
+        or every result_chunk_interval seconds, so memory usage doesn't
+        depend on the duration of the benchmark.
+
+        SLA criteria are checked as results arrive. The runner is aborted
+        if the task is aborted or if an SLA criterion fails for good and
+        the benchmark has "abort_on_failure" in its "sla" section.
 
         :param key: Scenario identifier
         :param task: Running task
-        :param result_queue: Deque with runner results
+        :param runner: Scenario runner which puts results to its result_queue
         :param is_done: Event which is set from the runner thread after the
                         runner finishes it's work.
         """
-        results = []
+        result_queue = runner.result_queue
+        sla_checker = base_sla.SLAChecker(key["kw"])
+        sla_aborted = False
+        result_id = task.create_chunked_results(key)
+        chunk = []
+        position = 0
+        saved_at = checked_at = rutils.monotonic()
         while True:
             if result_queue:
                 result = result_queue.popleft()
-                results.append(result)
+                chunk.append(result)
+                sla_checker.add_iteration(result)
+                if not sla_aborted and sla_checker.should_abort():
+                    sla_aborted = True
+                    LOG.info("SLA of benchmark %(name)s [%(pos)d] failed "
+                             "after %(count)d iterations, the benchmark "
+                             "is aborted" %
+                             {"name": key["name"], "pos": key["pos"],
+                              "count": sla_checker.iterations})
+                    runner.abort()
             elif is_done.isSet():
                 break
             else:
                 time.sleep(0.1)
 
-        sla = base_sla.SLA.check_all(key['kw'], results)
-        task.append_results(key, {"raw": results,
-                                  "scenario_duration": self.duration,
-                                  "sla": sla})
+            if rutils.monotonic() - checked_at >= ABORT_CHECK_INTERVAL:
+                checked_at = rutils.monotonic()
+                if task.get_status() == consts.TaskStatus.ABORTING:
+                    runner.abort()
+
+            if chunk and (len(chunk) >= CONF.benchmark.result_chunk_size or
+                          rutils.monotonic() - saved_at >=
+                          CONF.benchmark.result_chunk_interval):
+                task.append_results_chunk(result_id, position, chunk)
+                position += 1
+                chunk = []
+                saved_at = rutils.monotonic()
+
+        if chunk:
+            task.append_results_chunk(result_id, position, chunk)
+
+        duration = self.durations.get((key["name"], key["pos"]))
+        data = {"scenario_duration": duration, "sla": sla_checker.results()}
+        context_duration = self.context_durations.get((key["name"],
+                                                       key["pos"]))
+        if context_duration:
+            data["context_duration"] = context_duration
+        task.finish_chunked_results(result_id, data)
@@ -15,12 +15,16 @@
 
 import copy
 import json
+import math
 import os
 
 import mako.template
 
 from rally.benchmark.processing.charts import histogram as histo
 from rally.benchmark.processing import utils
+from rally.benchmark.runners import base as base_runner
+from rally.benchmark.runners import saturation
+from rally import consts
 
 
 def _prepare_data(data, reduce_rows=1000):
@@ -217,9 +221,176 @@ def _process_atomic(result, data):
     }
 
 
-def _get_atomic_action_durations(result):
+def _process_load(result):
+    concurrency = [
+        {"key": "in flight",
+         "values": [(round(offset, 3), running) for offset, running
+                    in utils.get_concurrency_data(result["result"])]}
+    ]
+    if not concurrency[0]["values"]:
+        concurrency = []
+    load = utils.get_load_data(result["result"])
+    if not load:
+        return {"rate": [], "lag": [], "concurrency": concurrency}
+
+    return {
+        "concurrency": concurrency,
+        "rate": [
+            {"key": "requested", "values": load["requested_per_second"]},
+            {"key": "achieved", "values": load["achieved_per_second"]}
+        ],
+        "lag": [
+            {"key": "scheduling lag",
+             "values": list(enumerate([round(lag, 3)
+                                       for lag in load["lag"]], start=1))}
+        ]
+    }
+
+
+def _get_waterfall(row, iteration):
+    tree = row["atomic_actions_tree"]
+    depth = []
+    starts = []
+    durations = []
+    for i, (name, start, duration, parent) in enumerate(tree):
+        depth.append(0 if parent is None else depth[parent] + 1)
+        label = "%d. %s%s" % (i + 1, "- " * depth[i], name)
+        starts.append((label, round(start, 3)))
+        durations.append((label, round(duration or 0, 3)))
+    return {"iteration": iteration,
+            "label": "iteration %d (%.3f sec%s)" % (
+                iteration, row["duration"],
+                ", failed" if row["error"] else ""),
+            "data": [{"key": "start", "values": starts},
+                     {"key": "duration", "values": durations}]}
+
+
+def _process_atomic_tree(result, max_iterations=100):
+    rows = []
+    actions = utils.get_atomic_actions_self_time(result["result"])
+    all_self_time = sum(a[3] for a in actions)
+    for name, calls, total, self_time in actions:
+        rows.append([name, calls, round(total, 3), round(self_time, 3),
+                     round(total / calls, 3), round(self_time / calls, 3),
+                     "%.1f%%" % (self_time * 100.0 / all_self_time
+                                 if all_self_time else 0)])
+
+    with_tree = [(i + 1, r) for i, r in enumerate(result["result"])
+                 if r.get("atomic_actions_tree")]
+    step = int(math.ceil(len(with_tree) / float(max_iterations))) or 1
+    waterfall = [_get_waterfall(row, iteration)
+                 for iteration, row in with_tree[::step]]
+
+    return {"cols": [{"title": "action", "class": "center"},
+                     {"title": "calls", "class": "center"},
+                     {"title": "total time (sec)", "class": "center"},
+                     {"title": "self time (sec)", "class": "center"},
+                     {"title": "avg total (sec)", "class": "center"},
+                     {"title": "avg self (sec)", "class": "center"},
+                     {"title": "share of self time", "class": "center"}],
+            "rows": rows,
+            "waterfall": waterfall}
+
+
+def _process_api_calls(result):
+    rows = []
+    for (action, name, count, per_iteration, latency, size,
+         statuses) in utils.get_api_calls(result["result"]):
+        statuses = ", ".join("%s: %s" % s for s in sorted(statuses.items()))
+        rows.append([action, name, count, round(per_iteration, 1),
+                     round(latency, 3), size, statuses])
+    return {"cols": [{"title": "action", "class": "center"},
+                     {"title": "API call", "class": "center"},
+                     {"title": "calls", "class": "center"},
+                     {"title": "calls per iteration", "class": "center"},
+                     {"title": "avg latency (sec)", "class": "center"},
+                     {"title": "bytes", "class": "center"},
+                     {"title": "statuses", "class": "center"}],
+            "rows": rows}
+
+
+def _process_stages(result):
+    runner_config = result["key"]["kw"].get("runner", {})
+    stages = base_runner.ScenarioRunner.get_stages(runner_config)
+    cols = [{"title": "stage", "class": "center"},
+            {"title": "load", "class": "center"},
+            {"title": "duration (sec)", "class": "center"},
+            {"title": "iterations", "class": "center"},
+            {"title": "throughput (iter/sec)", "class": "center"},
+            {"title": "min (sec)", "class": "center"},
+            {"title": "avg (sec)", "class": "center"},
+            {"title": "95 percentile", "class": "center"},
+            {"title": "max (sec)", "class": "center"},
+            {"title": "success", "class": "center"}]
+    stages_data = utils.get_stages_data(result["result"], stages)
+    saturation_point = None
+    if runner_config.get("type") == consts.RunnerType.SATURATION:
+        stages_data, saturation_point = saturation.get_saturation_report(
+            runner_config, stages_data)
+    rows = []
+    for i, stage in enumerate(stages_data):
+        config = stage["config"]
+        load = ("concurrency %s" % config["concurrency"]
+                if "concurrency" in config else "rps %s" % config["rps"])
+        durations = stage["durations"]
+        if durations:
+            latency = [round(min(durations), 3),
+                       round(utils.mean(durations), 3),
+                       round(utils.percentile(durations, 0.95), 3),
+                       round(max(durations), 3)]
+        else:
+            latency = [None, None, None, None]
+        success = (len(durations) * 100.0 / stage["iterations"]
+                   if stage["iterations"] else 0.0)
+        rows.append([i + 1, load, config["duration"], stage["iterations"],
+                     round(stage["throughput"], 3)] + latency +
+                    ["%.1f%%" % success])
+    return {"cols": cols, "rows": rows, "saturation": saturation_point}
+
+
+def _process_parallel(results):
+    """Put durations of benchmarks of each parallel section on one timeline.
+
+    Benchmarks of a parallel section run at the same time, so comparing
+    their iteration durations over time shows how they interfere.
+
+    :returns: dict that maps (name, pos) of each benchmark run in a parallel
+              section to its section data
+    """
+    sections = {}
+    for result in results:
+        section = result["key"]["kw"].get("parallel_section")
+        if section is not None:
+            sections.setdefault(section, []).append(result)
+
+    parallel = {}
+    for section, members in sections.items():
+        timeline = []
+        for result in members:
+            key = result["key"]
+            points = sorted((r["timestamp"], r["duration"])
+                            for r in result["result"]
+                            if "timestamp" in r and not r["error"])
+            timeline.append({"key": "%s [%d]" % (key["name"], key["pos"] + 1),
+                             "values": points})
+        starts = [s["values"][0][0] for s in timeline if s["values"]]
+        start = min(starts) if starts else 0
+        for series in timeline:
+            series["values"] = [(round(ts - start, 3), round(duration, 3))
+                                for ts, duration in series["values"]]
+
+        names = [series["key"] for series in timeline]
+        for result in members:
+            key = result["key"]
+            parallel[(key["name"], key["pos"])] = {"section": section,
+                                                   "members": names,
+                                                   "timeline": timeline}
+    return parallel
+
+
+def _get_atomic_action_durations(result, include_warmup=False):
     raw = result.get('result', [])
-    actions_data = utils.get_atomic_actions_data(raw)
+    actions_data = utils.get_atomic_actions_data(raw, include_warmup)
     table = []
     for action in actions_data:
         durations = actions_data[action]
@@ -239,8 +410,12 @@ def _get_atomic_action_durations(result):
     return table
 
 
-def _process_results(results):
+def _process_results(results, include_warmup=False):
+    if not include_warmup:
+        results = [dict(result, result=utils.without_warmup(result["result"]))
+                   for result in results]
     output = []
+    parallel = _process_parallel(results)
     for result in results:
         table_cols = [
                 {"title": "action", "class": "center"},
@@ -251,7 +426,7 @@ def _process_results(results):
                 {"title": "95 percentile", "class": "center"},
                 {"title": "success", "class": "center"},
                 {"title": "count", "class": "center"}]
-        table_rows = _get_atomic_action_durations(result)
+        table_rows = _get_atomic_action_durations(result, include_warmup)
         info = result["key"]
         config = {}
         config[info["name"]] = [info["kw"]]
@@ -269,14 +444,21 @@ def _process_results(results):
             "config": json.dumps(config, indent=2),
             "duration": _process_main_duration(result, data),
             "atomic": _process_atomic(result, data),
+            "load": _process_load(result),
+            "tree": _process_atomic_tree(result),
+            "api_calls": _process_api_calls(result),
+            "stages": _process_stages(result),
+            "parallel": parallel.get((name, pos), {"section": None,
+                                                   "members": [],
+                                                   "timeline": []}),
             "table_rows": table_rows,
             "table_cols": table_cols
         })
     return sorted(output, key=lambda r: "%s%s" % (r["cls"], r["name"]))
 
 
-def plot(results):
-    data = _process_results(results)
+def plot(results, include_warmup=False):
+    data = _process_results(results, include_warmup)
 
     template_file = os.path.join(os.path.dirname(__file__),
                                  "src", "index.mako")
@@ -31,6 +31,25 @@
           id: "details.html",
           name: "Details",
           visible: function(){ return !! $scope.scenario.atomic.pie.length }
+        },{
+          id: "tree.html",
+          name: "Waterfall",
+          visible: function(){ return !! $scope.scenario.tree.rows.length }
+        },{
+          id: "api_calls.html",
+          name: "API Calls",
+          visible: function(){ return !! $scope.scenario.api_calls.rows.length }
+        },{
+          id: "load.html",
+          name: "Load",
+          visible: function(){
+            return !! ($scope.scenario.load.lag.length ||
+                       $scope.scenario.load.concurrency.length)
+          }
+        },{
+          id: "parallel.html",
+          name: "Parallel",
+          visible: function(){ return !! $scope.scenario.parallel.timeline.length }
         },{
           id: "config.html",
           name: "Config",
@@ -104,6 +123,21 @@
             .tickFormat(d3.format(',.2f'));
           this._render(selector, datum, chart)
         },
+        line: function(selector, datum, xLabel, yLabel, yFormat){
+          var chart = nv.models.lineChart()
+            .x(function(d) { return d[0] })
+            .y(function(d) { return d[1] })
+            .margin({left: 75})
+            .useInteractiveGuideline(true);
+          chart.xAxis
+            .axisLabel(xLabel)
+            .showMaxMin(false)
+            .tickFormat(d3.format('d'));
+          chart.yAxis
+            .axisLabel(yLabel)
+            .tickFormat(d3.format(yFormat));
+          this._render(selector, datum, chart)
+        },
         histogram: function(selector, datum){
           var chart = nv.models.multiBarChart()
             .margin({left: 75})
@@ -119,6 +153,20 @@
             .axisLabel("Iterations (frequency)")
             .tickFormat(d3.format('d'));
           this._render(selector, datum, chart)
+        },
+        waterfall: function(selector, datum){
+          var chart = nv.models.multiBarHorizontalChart()
+            .x(function(d) { return d[0] })
+            .y(function(d) { return d[1] })
+            .margin({left: 250})
+            .stacked(true)
+            .showControls(false)
+            .showLegend(false)
+            .color(["transparent", "#1f77b4"]);
+          chart.yAxis
+            .axisLabel("Time (seconds since iteration start)")
+            .tickFormat(d3.format(',.3f'));
+          this._render(selector, datum, chart)
         }
       };
 
@@ -152,8 +200,42 @@
         }
       }
 
+      $scope.renderTree = function() {
+        if (! $scope.scenario || ! $scope.scenario.tree.waterfall.length) {
+          return
+        }
+        var waterfall = $scope.scenario.tree.waterfall;
+        if (waterfall.indexOf($scope.waterfallModel.selected) < 0) {
+          $scope.waterfallModel.selected = waterfall[0]
+        }
+        Charts.waterfall("#tree-waterfall",
+                         $scope.waterfallModel.selected.data);
+      }
+
       /* Scenario */
 
+      $scope.renderLoad = function() {
+        if (! $scope.scenario) {
+          return
+        }
+        Charts.line("#load-rate", $scope.scenario.load.rate,
+                    "Time (seconds since start)", "Iterations started", 'd');
+        Charts.line("#load-lag", $scope.scenario.load.lag,
+                    "Iteration (order number of scheduled start)",
+                    "Scheduling lag (seconds)", ',.3f');
+        Charts.line("#load-concurrency", $scope.scenario.load.concurrency,
+                    "Time (seconds since start)", "Iterations in flight", 'd');
+      }
+
+      $scope.renderParallel = function() {
+        if (! $scope.scenario) {
+          return
+        }
+        Charts.line("#parallel-timeline", $scope.scenario.parallel.timeline,
+                    "Time (seconds since section start)",
+                    "Iteration duration (seconds)", ',.3f');
+      }
+
       $scope.showScenario = function(class_idx, scenario_idx) {
         $scope.class_idx = class_idx;
         $scope.scenario_idx = scenario_idx;
@@ -168,6 +250,7 @@
         $scope.histogramOptions = [];
         $scope.totalHistogramModel = {label:'', value:0};
         $scope.atomicHistogramModel = {label:'', value:0};
+        $scope.waterfallModel = {selected: null};
 
         /* Compose nav data */
 
@@ -331,6 +414,23 @@
             </tbody>
           </table>
 
+          <div ng-show="scenario.stages.rows.length">
+            <h2>Table for load stages</h2>
+            <p ng-show="scenario.stages.saturation">{{scenario.stages.saturation}}</p>
+            <table class="table table-striped">
+              <thead>
+                <tr>
+                  <th ng-repeat="col in scenario.stages.cols track by $index">{{col.title}}</th>
+                <tr>
+              </thead>
+              <tbody>
+                <tr ng-repeat="row in scenario.stages.rows track by $index">
+                  <td ng-repeat="i in row track by $index">{{i}}</td>
+                <tr>
+              </tbody>
+            </table>
+          </div>
+
           {{renderTotal()}}
           <h2>Charts for the Total Duration</h2>
           <div class="chart-container">
@@ -368,6 +468,82 @@
           </div>
         </script>
 
+        <script type="text/ng-template" id="tree.html">
+          {{renderTree()}}
+          <h2>Self and Total Time of Atomic Actions</h2>
+          <p>Self time of an action doesn't include time of actions nested in it.</p>
+          <table class="table table-striped">
+            <thead>
+              <tr>
+                <th ng-repeat="col in scenario.tree.cols track by $index">{{col.title}}</th>
+              <tr>
+            </thead>
+            <tbody>
+              <tr ng-repeat="row in scenario.tree.rows track by $index">
+                <td ng-repeat="i in row track by $index">{{i}}</td>
+              <tr>
+            </tbody>
+          </table>
+
+          <div ng-show="scenario.tree.waterfall.length">
+            <h2>Waterfall of Atomic Actions</h2>
+            <select class="chart-dropdown"
+                    ng-model="waterfallModel.selected"
+                    ng-options="w.label for w in scenario.tree.waterfall"></select>
+            <div class="chart-container">
+              <svg id="tree-waterfall"></svg>
+            </div>
+          </div>
+        </script>
+
+        <script type="text/ng-template" id="api_calls.html">
+          <h2>API Calls per Action</h2>
+          <p>Requests sent by OpenStack clients through the shared HTTP connection pool.</p>
+          <table class="table table-striped">
+            <thead>
+              <tr>
+                <th ng-repeat="col in scenario.api_calls.cols track by $index">{{col.title}}</th>
+              <tr>
+            </thead>
+            <tbody>
+              <tr ng-repeat="row in scenario.api_calls.rows track by $index">
+                <td ng-repeat="i in row track by $index">{{i}}</td>
+              <tr>
+            </tbody>
+          </table>
+        </script>
+
+        <script type="text/ng-template" id="load.html">
+          {{renderLoad()}}
+          <div ng-show="scenario.load.rate.length">
+            <h2>Requested and Achieved Load</h2>
+            <div class="chart-container">
+              <svg id="load-rate"></svg>
+            </div>
+
+            <h2>Scheduling Lag</h2>
+            <div class="chart-container">
+              <svg id="load-lag"></svg>
+            </div>
+          </div>
+
+          <div ng-show="scenario.load.concurrency.length">
+            <h2>Concurrency</h2>
+            <div class="chart-container">
+              <svg id="load-concurrency"></svg>
+            </div>
+          </div>
+        </script>
+
+        <script type="text/ng-template" id="parallel.html">
+          {{renderParallel()}}
+          <h2>Parallel Section "{{scenario.parallel.section}}"</h2>
+          <p>Benchmarks run at the same time: {{scenario.parallel.members.join(", ")}}</p>
+          <div class="chart-container">
+            <svg id="parallel-timeline"></svg>
+          </div>
+        </script>
+
         <script type="text/ng-template" id="config.html">
           <h2>Scenario Configuration</h2>
           <pre>{{scenario.config}}</pre>
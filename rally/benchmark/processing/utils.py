@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import math
 
 from rally import exceptions
@@ -52,14 +53,51 @@ def percentile(values, percent):
     return (d0 + d1)
 
 
-def get_atomic_actions_data(raw_data):
+class _WithoutWarmup(object):
+    """Sized iterable over records that are not of warm-up iterations.
+
+    Records are filtered on each pass, so records that are loaded from
+    the database chunk by chunk are not all kept in memory.
+    """
+
+    def __init__(self, raw_data):
+        self.raw_data = raw_data
+        self._len = None
+
+    def __iter__(self):
+        for row in self.raw_data:
+            if not row.get("warmup"):
+                yield row
+
+    def __len__(self):
+        if self._len is None:
+            self._len = sum(1 for row in self)
+        return self._len
+
+
+def without_warmup(raw_data):
+    """Filter out records of warm-up iterations.
+
+    :parameter raw_data: iterable of raw records (scenario runner output)
+
+    :returns: sized iterable of records that are not marked with the
+              "warmup" flag, records are filtered lazily on each pass
+    """
+    return _WithoutWarmup(raw_data)
+
+
+def get_atomic_actions_data(raw_data, include_warmup=False):
     """Retrieve detailed (by atomic actions & total runtime) benchmark data.
 
     :parameter raw_data: list of raw records (scenario runner output)
+    :parameter include_warmup: whether to take records of warm-up
+                               iterations into account
 
     :returns: dictionary containing atomic action + total duration lists
               for all atomic action keys
     """
+    if not include_warmup:
+        raw_data = without_warmup(raw_data)
     atomic_actions = []
     for row in raw_data:
         # find first non-error result to get atomic actions names
@@ -73,3 +111,210 @@ def get_atomic_actions_data(raw_data):
             if r["atomic_actions"].get(atomic_action) is not None]
     actions_data["total"] = [r["duration"] for r in raw_data if not r["error"]]
     return actions_data
+
+
+def get_atomic_actions_polls(raw_data):
+    """Retrieve numbers of status checks made by atomic actions.
+
+    :parameter raw_data: list of raw records (scenario runner output)
+
+    :returns: OrderedDict of action names and lists of numbers of status
+              checks, one for each record in which the action polled
+    """
+    polls = collections.OrderedDict()
+    for row in raw_data:
+        for name, count in sorted((row.get("atomic_actions_polls") or
+                                   {}).items()):
+            polls.setdefault(name, []).append(count)
+    return polls
+
+
+def get_api_calls(raw_data):
+    """Retrieve API calls made by atomic actions summed over all records.
+
+    :parameter raw_data: list of raw records (scenario runner output)
+
+    :returns: list of (action name, API call, number of calls, average
+              number of calls per record, average duration, total bytes,
+              dict of numbers of responses by status) sorted by action and
+              call; records without API calls are not counted. Numbers
+              may be fractional, because a list call that checks statuses
+              of resources of several iterations is shared by them
+    """
+    calls = {}
+    records = 0
+    for row in raw_data:
+        if not row.get("api_calls"):
+            continue
+        records += 1
+        for action, action_calls in row["api_calls"].items():
+            for name, call in action_calls.items():
+                total = calls.setdefault((action, name),
+                                         {"count": 0, "duration": 0.0,
+                                          "bytes": 0, "status": {}})
+                total["count"] += call["count"]
+                total["duration"] += call["duration"]
+                total["bytes"] += call["bytes"]
+                for status, count in call["status"].items():
+                    total["status"][status] = (
+                        total["status"].get(status, 0) + count)
+    return [(action, name, _round_count(call["count"]),
+             call["count"] / float(records),
+             call["duration"] / call["count"],
+             _round_count(call["bytes"]),
+             dict((status, _round_count(count))
+                  for status, count in call["status"].items()))
+            for (action, name), call in sorted(calls.items())]
+
+
+def _round_count(count):
+    count = round(count, 1)
+    return int(count) if count == int(count) else count
+
+
+def get_atomic_actions_self_time(raw_data):
+    """Retrieve total and self time of atomic actions from their trees.
+
+    Self time of an atomic action is its duration without the durations of
+    atomic actions nested in it, so nested actions are not counted twice.
+
+    :parameter raw_data: list of raw records (scenario runner output)
+
+    :returns: list of (action name, number of calls, total time, self time)
+              summed over all records, in order of the first call
+    """
+    stats = collections.OrderedDict()
+    for row in raw_data:
+        tree = row.get("atomic_actions_tree") or []
+        nested = [0.0] * len(tree)
+        for name, start, duration, parent in tree:
+            if parent is not None and duration is not None:
+                nested[parent] += duration
+        for i, (name, start, duration, parent) in enumerate(tree):
+            if duration is None:
+                continue
+            action = stats.setdefault(name, [0, 0.0, 0.0])
+            action[0] += 1
+            action[1] += duration
+            action[2] += duration - nested[i]
+    return [(name, calls, total, self_time)
+            for name, (calls, total, self_time) in stats.items()]
+
+
+def _rate(starts):
+    if len(starts) < 2 or max(starts) == min(starts):
+        return None
+    return (len(starts) - 1) / (max(starts) - min(starts))
+
+
+def _per_second(starts):
+    counts = {}
+    for start in starts:
+        second = int(math.floor(start))
+        counts[second] = counts.get(second, 0) + 1
+    return [(sec, counts.get(sec, 0))
+            for sec in range(min(counts), max(counts) + 1)]
+
+
+def get_load_data(raw_data):
+    """Retrieve requested vs achieved load of an open-loop scenario runner.
+
+    :parameter raw_data: list of raw records (scenario runner output)
+
+    :returns: None if records don't contain scheduled start times,
+              otherwise dictionary with average requested and achieved
+              rates, scheduling lag of each iteration (in order of
+              scheduled start) and number of requested and actually
+              started iterations for each second of the load
+    """
+    rows = sorted([r for r in raw_data if "scheduled_start" in r],
+                  key=lambda r: r["scheduled_start"])
+    if not rows:
+        return None
+    scheduled = [r["scheduled_start"] for r in rows]
+    actual = [r["actual_start"] for r in rows]
+    return {
+        "requested_rps": _rate(scheduled),
+        "achieved_rps": _rate(actual),
+        "lag": [a - s for s, a in zip(scheduled, actual)],
+        "requested_per_second": _per_second(scheduled),
+        "achieved_per_second": _per_second(actual)
+    }
+
+
+def get_concurrency_data(raw_data, max_points=1000):
+    """Retrieve the number of iterations in flight over time.
+
+    :parameter raw_data: list of raw records (scenario runner output)
+    :parameter max_points: maximal number of returned points, the busiest
+                           point of each group of neighbours is kept
+
+    :returns: list of (seconds since the benchmark start, number of
+              iterations running at that moment) for every moment the
+              number changes, empty if records don't contain start offsets
+    """
+    events = []
+    for r in raw_data:
+        if "start_offset" in r:
+            end = r["start_offset"] + r["duration"] + r.get("idle_duration", 0)
+            events.append((r["start_offset"], 1))
+            events.append((end, -1))
+    # NOTE: Finishes go before starts at the same moment, so iterations
+    #       that follow each other without a gap are not counted twice.
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    points = []
+    running = 0
+    for offset, change in events:
+        running += change
+        if points and points[-1][0] == offset:
+            points[-1] = (offset, running)
+        else:
+            points.append((offset, running))
+
+    step = int(math.ceil(len(points) / float(max_points))) or 1
+    return [max(points[i:i + step], key=lambda p: p[1])
+            for i in range(0, len(points), step)]
+
+
+def get_stages_data(raw_data, stages):
+    """Retrieve throughput and latency of each stage of a stepped load.
+
+    :parameter raw_data: list of raw records (scenario runner output)
+    :parameter stages: list of stages from the runner config
+
+    :returns: list with a dictionary for each stage containing its config,
+              number of iterations and errors, throughput (successful
+              iterations per second of the stage) and durations of
+              successful iterations; empty list if records aren't
+              tagged with stages
+
+    If records contain start timestamps, throughput counts only iterations
+    finished within the stage duration since the first iteration of the
+    stage was started. Otherwise iterations that were still running at the
+    end of a stage would inflate its throughput in proportion to its load.
+    """
+    rows_by_stage = {}
+    for row in raw_data:
+        if "stage" in row:
+            rows_by_stage.setdefault(row["stage"], []).append(row)
+    if not rows_by_stage:
+        return []
+
+    data = []
+    for i, stage in enumerate(stages):
+        rows = rows_by_stage.get(i, [])
+        durations = [r["duration"] for r in rows if not r["error"]]
+        finished = len(durations)
+        if rows and all("timestamp" in r for r in rows):
+            end = min(r["timestamp"] for r in rows) + stage["duration"]
+            finished = len([r for r in rows if not r["error"] and
+                            r["timestamp"] + r["duration"] <= end])
+        data.append({
+            "config": stage,
+            "iterations": len(rows),
+            "errors": len(rows) - len(durations),
+            "throughput": finished / float(stage["duration"]),
+            "durations": durations
+        })
+    return data
@@ -15,7 +15,11 @@
 
 import abc
 import collections
+import multiprocessing
+import os
 import random
+import threading
+import time
 
 import jsonschema
 from oslo.config import cfg
@@ -25,6 +29,7 @@ from rally.benchmark import types
 from rally.benchmark import utils
 from rally import consts
 from rally import exceptions
+from rally import httppool
 from rally.openstack.common import log as logging
 from rally import osclients
 from rally import utils as rutils
@@ -32,6 +37,52 @@ from rally import utils as rutils
 
 LOG = logging.getLogger(__name__)
 
+CONF = cfg.CONF
+runner_opts = [
+    cfg.BoolOpt("reuse_clients", default=True,
+                help="Reuse authenticated OpenStack clients between "
+                     "scenario iterations executed in the same process"),
+    cfg.IntOpt("clients_token_stale_duration", default=300,
+               help="Reused OpenStack clients are recreated if their "
+                    "keystone token expires in less than this number "
+                    "of seconds")
+]
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(runner_opts, group=benchmark_group)
+
+# Clients are shared only inside of one process, so after fork() worker
+# process starts with an empty registry and doesn't reuse HTTP connections
+# of its parent.
+_clients_registry = {"pid": None, "clients": {}}
+_clients_lock = threading.Lock()
+
+# Errors of iterations that timed out or whose worker died, such iterations
+# could create resources that are not recorded in the resource ledger.
+# Results keep the type of the error as formatted by utils.format_exc().
+UNFINISHED_ERRORS = (str(exceptions.TimeoutException),
+                     str(exceptions.WorkerProcessDied))
+
+
+# Schema of the "warmup" property of runner configs: either a number of the
+# first iterations or a number of the first seconds of the benchmark.
+WARMUP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "iterations": {
+            "type": "integer",
+            "minimum": 1
+        },
+        "duration": {
+            "type": "number",
+            "minimum": 0,
+            "exclusiveMinimum": True
+        }
+    },
+    "minProperties": 1,
+    "maxProperties": 1,
+    "additionalProperties": False
+}
+
 
 def format_result_on_timeout(exc, timeout):
     return {
@@ -53,6 +104,45 @@ def _get_scenario_context(context):
     return scenario_ctx
 
 
+def _get_clients(endpoint):
+    """Return osclients.Clients for endpoint shared in the current process.
+
+    Clients are kept in per-process registry keyed by endpoint, so keystone
+    authentication and service catalog lookup are done once per worker
+    instead of once per iteration. Clients whose token expires in less than
+    CONF.benchmark.clients_token_stale_duration seconds are reset and
+    authenticate again on first use.
+
+    :param endpoint: objects.Endpoint instance
+    :returns: tuple (clients, reused), where reused is True if clients
+              already hold a valid token, i.e. authentication is avoided
+    """
+    if not CONF.benchmark.reuse_clients:
+        return osclients.Clients(endpoint), False
+
+    key = tuple(sorted(endpoint.to_dict(include_permission=True).items()))
+    with _clients_lock:
+        if _clients_registry["pid"] != os.getpid():
+            _clients_registry["pid"] = os.getpid()
+            _clients_registry["clients"] = {}
+        clients = _clients_registry["clients"].get(key)
+        if clients is None:
+            clients = osclients.Clients(endpoint)
+            _clients_registry["clients"][key] = clients
+            return clients, False
+        if clients.is_authenticated(
+                CONF.benchmark.clients_token_stale_duration):
+            return clients, True
+        clients.clear()
+        return clients, False
+
+
+def _clear_clients():
+    """Drop all clients reused by the current process."""
+    with _clients_lock:
+        _clients_registry["clients"] = {}
+
+
 def _run_scenario_once(args):
     iteration, cls, method_name, context, kwargs = args
 
@@ -60,13 +150,16 @@ def _run_scenario_once(args):
              {"task": context["task"]["uuid"], "iteration": iteration})
 
     context["iteration"] = iteration
-    scenario = cls(
-            context=context,
-            admin_clients=osclients.Clients(context["admin"]["endpoint"]),
-            clients=osclients.Clients(context["user"]["endpoint"]))
+    admin_clients, admin_reused = _get_clients(context["admin"]["endpoint"])
+    clients, reused = _get_clients(context["user"]["endpoint"])
+    scenario = cls(context=context, admin_clients=admin_clients,
+                   clients=clients)
 
     error = []
     scenario_output = {"errors": "", "data": {}}
+    http_stats = httppool.get_stats()
+    httppool.start_api_calls_record()
+    timestamp = time.time()
     try:
         with rutils.Timer() as timer:
             scenario_output = getattr(scenario,
@@ -81,11 +174,34 @@ def _run_scenario_once(args):
                  {"task": context["task"]["uuid"], "iteration": iteration,
                   "status": status})
 
-        return {"duration": timer.duration() - scenario.idle_duration(),
-                "idle_duration": scenario.idle_duration(),
-                "error": error,
-                "scenario_output": scenario_output,
-                "atomic_actions": scenario.atomic_actions()}
+        result = {"duration": timer.duration() - scenario.idle_duration(),
+                  "idle_duration": scenario.idle_duration(),
+                  "error": error,
+                  "scenario_output": scenario_output,
+                  "atomic_actions": scenario.atomic_actions(),
+                  "atomic_actions_tree": [
+                      [name, start - timer.start, duration, parent]
+                      for name, start, duration, parent
+                      in scenario.atomic_actions_tree()],
+                  "atomic_actions_polls": scenario.atomic_actions_polls(),
+                  "auth_calls_avoided": int(admin_reused) + int(reused),
+                  "timestamp": timestamp,
+                  "iteration": iteration}
+        benchmark_start = context.get("benchmark_start")
+        if benchmark_start is not None:
+            result["start_offset"] = timer.start - benchmark_start
+        # NOTE: The pool is shared by iterations that run in threads of the
+        #       same process, so its counters of concurrent iterations are
+        #       attributed to the iteration that finishes first.
+        http_connections = dict(
+            (key, value - http_stats[key])
+            for key, value in httppool.get_stats().items())
+        if any(http_connections.values()):
+            result["http_connections"] = http_connections
+        api_calls = httppool.stop_api_calls_record()
+        if api_calls:
+            result["api_calls"] = api_calls
+        return result
 
 
 class ScenarioRunnerResult(dict):
@@ -127,6 +243,99 @@ class ScenarioRunnerResult(dict):
                 "items": {
                     "type": "string"
                 }
+            },
+            "auth_calls_avoided": {
+                "type": "integer",
+                "minimum": 0
+            },
+            "scheduled_start": {
+                "type": "number"
+            },
+            "actual_start": {
+                "type": "number"
+            },
+            "stage": {
+                "type": "integer",
+                "minimum": 0
+            },
+            "worker": {
+                "type": "string"
+            },
+            "iteration": {
+                "type": "integer",
+                "minimum": 0
+            },
+            "worker_recycled": {
+                "type": "boolean"
+            },
+            "timestamp": {
+                "type": "number"
+            },
+            "warmup": {
+                "type": "boolean"
+            },
+            "start_offset": {
+                "type": "number"
+            },
+            "atomic_actions_tree": {
+                "type": "array",
+                "items": {
+                    "type": "array",
+                    "items": [
+                        {"type": "string"},
+                        {"type": "number"},
+                        {"type": ["number", "null"]},
+                        {"type": ["integer", "null"]}
+                    ],
+                    "minItems": 4,
+                    "maxItems": 4
+                }
+            },
+            "atomic_actions_polls": {
+                "type": "object",
+                "patternProperties": {
+                    ".*": {"type": "integer", "minimum": 0}
+                }
+            },
+            "api_calls": {
+                "type": "object",
+                "patternProperties": {
+                    ".*": {
+                        "type": "object",
+                        "patternProperties": {
+                            ".*": {
+                                "type": "object",
+                                # NOTE: Numbers of calls are fractional
+                                #       for list calls of the status
+                                #       poller that are shared by waiting
+                                #       iterations.
+                                "properties": {
+                                    "count": {"type": "number",
+                                              "minimum": 0},
+                                    "duration": {"type": "number"},
+                                    "bytes": {"type": "number",
+                                              "minimum": 0},
+                                    "status": {
+                                        "type": "object",
+                                        "patternProperties": {
+                                            ".*": {"type": "number",
+                                                   "minimum": 0}
+                                        }
+                                    }
+                                },
+                                "additionalProperties": False
+                            }
+                        }
+                    }
+                }
+            },
+            "http_connections": {
+                "type": "object",
+                "properties": {
+                    "opened": {"type": "integer", "minimum": 0},
+                    "reused": {"type": "integer", "minimum": 0}
+                },
+                "additionalProperties": False
             }
         },
         "additionalProperties": False
@@ -153,7 +362,8 @@ class ScenarioRunner(object):
         """Runner constructor.
 
         It sets task and config to local variables. Also initialize
-        result_queue, where results will be put by _send_result method.
+        result_queue, where results will be put by _send_result method,
+        and aborted event, which is set by abort method.
 
         :param task: Instance of objects.Task
         :param config: Dict with runner section from benchmark configuration
@@ -161,13 +371,18 @@ class ScenarioRunner(object):
         self.task = task
         self.config = config
         self.result_queue = collections.deque()
+        self.aborted = multiprocessing.Event()
+        self.started_at = None
+        self.results_sent = 0
+        self.ledger_incomplete = False
 
     @staticmethod
     def _get_cls(runner_type):
-        for runner in rutils.itersubclasses(ScenarioRunner):
-            if runner_type == runner.__execution_type__:
-                return runner
-        raise exceptions.NoSuchRunner(type=runner_type)
+        runner = rutils.find_subclass(ScenarioRunner, runner_type,
+                                      "__execution_type__")
+        if runner is None:
+            raise exceptions.NoSuchRunner(type=runner_type)
+        return runner
 
     @staticmethod
     def get_runner(task, config):
@@ -186,6 +401,28 @@ class ScenarioRunner(object):
                                                     consts.RunnerType.SERIAL))
         jsonschema.validate(config, runner.CONFIG_SCHEMA)
 
+    @staticmethod
+    def get_stages(config):
+        """Returns stages of the stepped load described by runner config.
+
+        :param config: contents of "runner" section from task configuration
+                       for specific benchmark
+        :returns: list of dicts with "duration" and either "concurrency" or
+                  "rps" of each stage, results of iterations are tagged with
+                  indexes of these stages; empty list if the runner doesn't
+                  change the load step by step
+        """
+        try:
+            runner = ScenarioRunner._get_cls(config.get(
+                "type", consts.RunnerType.SERIAL))
+        except exceptions.NoSuchRunner:
+            return []
+        return runner._get_stages(config)
+
+    @classmethod
+    def _get_stages(cls, config):
+        return []
+
     @abc.abstractmethod
     def _run_scenario(self, cls, method_name, context, args):
         """Runs the specified benchmark scenario with given arguments.
@@ -207,15 +444,73 @@ class ScenarioRunner(object):
         # NOTE(boris-42): processing @types decorators
         args = types.preprocess(cls, method_name, context, args)
 
-        with rutils.Timer() as timer:
-            self._run_scenario(cls, method_name, context, args)
+        # NOTE: Iterations and atomic actions record their start offsets
+        #       relative to this monotonic clock value.
+        self.started_at = rutils.monotonic()
+        context = dict(context, benchmark_start=self.started_at)
+        try:
+            with rutils.Timer() as timer:
+                self._run_scenario(cls, method_name, context, args)
+        finally:
+            # Serial runner executes iterations in this process, while
+            # users of the next benchmark will be different.
+            _clear_clients()
         return timer.duration()
 
+    def abort(self):
+        """Stop starting new iterations.
+
+        Iterations that are already started are finished and their results
+        are sent as usual. May be called from any thread.
+        """
+        self.aborted.set()
+
+    def _until_aborted(self, iterations):
+        """Yield arguments of iterations until the runner is aborted."""
+        for iteration in iterations:
+            if self.aborted.is_set():
+                break
+            yield iteration
+
+    def _is_warmup(self, result):
+        """Check if the result belongs to a warm-up iteration.
+
+        Warm-up is either a number of the first iterations or the
+        iterations started during the first seconds of the benchmark.
+        Concurrent iterations finish in any order, so the first iterations
+        are found by their numbers; results without a number are counted
+        in the order they are received.
+        """
+        warmup = self.config.get("warmup", {})
+        if "iterations" in warmup:
+            iteration = result.get("iteration")
+            if iteration is None:
+                iteration = self.results_sent
+            return iteration < warmup["iterations"]
+        if "duration" in warmup:
+            offset = result.get("start_offset")
+            if offset is None:
+                if self.started_at is None:
+                    self.started_at = rutils.monotonic()
+                offset = rutils.monotonic() - self.started_at
+            return offset < warmup["duration"]
+        return False
+
     def _send_result(self, result):
         """Send partial result to consumer.
 
+        Results of warm-up iterations are marked with the "warmup" flag, so
+        they can be excluded from statistics and SLA checks. If an iteration
+        timed out or its worker died, ledger_incomplete is set, so the
+        cleanup lists all resources instead of trusting the ledger.
+
         :param result: Result dict to be sent. It should match the
                        ScenarioRunnerResult schema, otherwise
                        ValidationError is raised.
         """
+        if self._is_warmup(result):
+            result = dict(result, warmup=True)
+        if result["error"] and result["error"][0] in UNFINISHED_ERRORS:
+            self.ledger_incomplete = True
+        self.results_sent += 1
         self.result_queue.append(ScenarioRunnerResult(result))
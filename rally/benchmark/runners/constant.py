@@ -15,16 +15,22 @@
 
 
 import multiprocessing
+import Queue
+import threading
 import time
 
 from rally.benchmark.runners import base
+from rally.benchmark.runners import process_pool
 from rally.benchmark import utils
 from rally import consts
+from rally import exceptions
 from rally.openstack.common import log as logging
 from rally import utils as rutils
 
 
 LOG = logging.getLogger(__name__)
+SEND_RESULT_DELAY = 1
+HUNG_CHECK_INTERVAL = 1
 
 
 class ConstantScenarioRunner(base.ScenarioRunner):
@@ -38,6 +44,9 @@ class ConstantScenarioRunner(base.ScenarioRunner):
     number of concurrent scenarios which execute during a single
     iteration in order to simulate the activities of multiple users
     placing load on the cloud under test.
+
+    A worker process whose iteration exceeds the timeout is killed and
+    replaced with a new one, so hung iterations don't reduce concurrency.
     """
 
     __execution_type__ = consts.RunnerType.CONSTANT
@@ -49,6 +58,7 @@ class ConstantScenarioRunner(base.ScenarioRunner):
             "type": {
                 "type": "string"
             },
+            "warmup": base.WARMUP_SCHEMA,
             "concurrency": {
                 "type": "integer",
                 "minimum": 1
@@ -78,21 +88,12 @@ class ConstantScenarioRunner(base.ScenarioRunner):
         # NOTE(msdubov): If not specified, perform single scenario run.
         times = self.config.get("times", 1)
 
-        pool = multiprocessing.Pool(concurrency)
-        iter_result = pool.imap(base._run_scenario_once,
-                                self._iter_scenario_args(cls, method, context,
-                                                         args, times))
-        for i in range(times):
-            try:
-                result = iter_result.next(timeout)
-            except multiprocessing.TimeoutError as e:
-                result = base.format_result_on_timeout(e, timeout)
-
+        pool = process_pool.ProcessPool(concurrency, timeout)
+        iterations = self._iter_scenario_args(cls, method, context, args,
+                                              times)
+        for result in pool.imap_unordered(self._until_aborted(iterations)):
             self._send_result(result)
 
-        pool.close()
-        pool.join()
-
 
 class ConstantForDurationScenarioRunner(base.ScenarioRunner):
     """Creates constant load executing a scenario for an interval of time.
@@ -116,6 +117,7 @@ class ConstantForDurationScenarioRunner(base.ScenarioRunner):
             "type": {
                 "type": "string"
             },
+            "warmup": base.WARMUP_SCHEMA,
             "concurrency": {
                 "type": "integer",
                 "minimum": 1
@@ -145,23 +147,270 @@ class ConstantForDurationScenarioRunner(base.ScenarioRunner):
         concurrency = self.config.get("concurrency", 1)
         duration = self.config.get("duration")
 
-        pool = multiprocessing.Pool(concurrency)
+        pool = process_pool.ProcessPool(concurrency, timeout)
 
         run_args = utils.infinite_run_args_generator(
                     self._iter_scenario_args(cls, method, context, args))
-        iter_result = pool.imap(base._run_scenario_once, run_args)
 
-        start = time.time()
-        while True:
-            try:
-                result = iter_result.next(timeout)
-            except multiprocessing.TimeoutError as e:
-                result = base.format_result_on_timeout(e, timeout)
+        start = rutils.monotonic()
+        try:
+            for result in pool.imap_unordered(self._until_aborted(run_args)):
+                self._send_result(result)
 
-            self._send_result(result)
+                if rutils.monotonic() - start > duration:
+                    break
+        finally:
+            pool.terminate()
+
+
+def _has_iterations(counter, times, deadline=None, aborted=None):
+    if times is not None and counter.value >= times:
+        return False
+    if deadline is not None and rutils.monotonic() >= deadline:
+        return False
+    return aborted is None or not aborted.is_set()
+
+
+def _next_iteration(counter, times, deadline=None, aborted=None):
+    with counter.get_lock():
+        if not _has_iterations(counter, times, deadline, aborted):
+            return None
+        counter.value += 1
+        return counter.value - 1
+
+
+class _IterationThreads(object):
+    """Fixed set of threads of a worker process that run iterations.
+
+    Each thread runs iterations one by one until all of them are taken, so
+    no thread is started per iteration. The thread that calls run() sends
+    the timeout result for an iteration that doesn't finish in time at
+    once, and the result that the iteration returns later is dropped.
+
+    A thread of a hung iteration is replaced with a new one, so the number
+    of running iterations stays the same, and exits when the iteration
+    returns. Not more threads than run() starts are replaced at a time,
+    other hung threads are counted against the concurrency until their
+    iterations return. Hung threads are not waited for when there are no
+    more iterations to run.
+    """
 
-            if time.time() - start > duration:
+    def __init__(self, queue, counter, times, timeout, cls, method_name,
+                 context, args, deadline=None, aborted=None):
+        self.queue = queue
+        self.counter = counter
+        self.times = times
+        self.timeout = timeout
+        self.cls = cls
+        self.method_name = method_name
+        self.context = context
+        self.args = args
+        self.deadline = deadline
+        self.aborted = aborted
+        self._cond = threading.Condition()
+        self._threads = set()
+        self._running = {}
+        self._hung = set()
+        self._replaced = set()
+        self._max_replaced = 0
+
+    def _run(self):
+        thread = threading.current_thread()
+        while True:
+            i = _next_iteration(self.counter, self.times, self.deadline,
+                                self.aborted)
+            if i is None:
                 break
+            with self._cond:
+                self._running[thread] = (rutils.monotonic(), i, time.time())
+                self._cond.notify()
+            result = base._run_scenario_once(
+                (i, self.cls, self.method_name,
+                 base._get_scenario_context(self.context), self.args))
+            with self._cond:
+                if thread in self._hung:
+                    self._hung.discard(thread)
+                    if thread in self._replaced:
+                        self._replaced.discard(thread)
+                        return
+                    continue
+                del self._running[thread]
+            self.queue.put(result)
+        with self._cond:
+            self._threads.discard(thread)
+            self._cond.notify()
+
+    def _start_thread(self):
+        thread = threading.Thread(target=self._run)
+        # NOTE: The process doesn't wait for threads of hung iterations.
+        thread.daemon = True
+        self._threads.add(thread)
+        thread.start()
+
+    def _send_timeouts(self):
+        """Send timeout results of hung iterations.
+
+        :returns: seconds until the next running iteration times out or
+                  None if no iterations are running
+        """
+        now = rutils.monotonic()
+        wait = None
+        for thread, (started_at, i, timestamp) in self._running.items():
+            left = started_at + self.timeout - now
+            if left > 0:
+                wait = left if wait is None else min(wait, left)
+                continue
+            del self._running[thread]
+            self._hung.add(thread)
+            if len(self._replaced) < self._max_replaced:
+                self._replaced.add(thread)
+                self._threads.discard(thread)
+                self._start_thread()
+            result = base.format_result_on_timeout(
+                exceptions.TimeoutException(), self.timeout)
+            result.update({"iteration": i, "timestamp": timestamp})
+            benchmark_start = self.context.get("benchmark_start")
+            if benchmark_start is not None:
+                result["start_offset"] = started_at - benchmark_start
+            self.queue.put(result)
+        return wait
+
+    def run(self, threads):
+        """Run all iterations in the threads.
+
+        :param threads: number of concurrent threads
+        """
+        with self._cond:
+            self._max_replaced = threads
+            for i in range(threads):
+                self._start_thread()
+            while True:
+                wait = self._send_timeouts()
+                if not (self._threads - self._hung or (
+                        self._threads and
+                        _has_iterations(self.counter, self.times,
+                                        self.deadline, self.aborted))):
+                    break
+                if self._hung:
+                    # NOTE: Iterations may run out while all threads are
+                    #       hung, e.g. at the deadline.
+                    wait = min(wait or HUNG_CHECK_INTERVAL,
+                               HUNG_CHECK_INTERVAL)
+                self._cond.wait(wait)
+
+
+def _worker_process(queue, counter, times, threads, timeout, cls,
+                    method_name, context, args, deadline=None, aborted=None):
+    """Start scenario within a fixed number of threads.
+
+    :param queue: queue object to append results
+    :param counter: shared multiprocessing.Value with next iteration number
+    :param times: total number of iterations of all workers, None if
+                  the number of iterations is limited only by deadline
+    :param threads: number of concurrent threads in this process
+    :param timeout: timeout of a single iteration
+    :param cls: scenario class
+    :param method_name: scenario method name
+    :param context: benchmark context
+    :param args: scenario args
+    :param deadline: rutils.monotonic() value after which new iterations
+                     are not started
+    :param aborted: multiprocessing.Event, new iterations are not started
+                    after it is set
+    """
+    _IterationThreads(queue, counter, times, timeout, cls, method_name,
+                      context, args, deadline, aborted).run(threads)
+
+
+class ConstantAsyncScenarioRunner(base.ScenarioRunner):
+    """Creates constant load using threads spread over a few processes.
+
+    This runner places the same load as ConstantScenarioRunner, but instead
+    of forking a process per concurrent iteration it starts a small number
+    of worker processes (not more than the number of CPUs by default) and
+    runs concurrent iterations in threads inside them. Scenarios spend
+    most of their time waiting for the cloud API, so this allows to keep
+    thousands of iterations in flight with a small memory footprint.
+
+    The load is limited either by the number of iterations (times) or by
+    the time during which new iterations are started (duration), or by
+    both of them.
+    """
+
+    __execution_type__ = consts.RunnerType.CONSTANT_ASYNC
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "warmup": base.WARMUP_SCHEMA,
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "duration": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            },
+            "processes": {
+                "type": "integer",
+                "minimum": 1
+            }
+        },
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _run_scenario(self, cls, method_name, context, args):
+        timeout = self.config.get("timeout", 600)
+        concurrency = self.config.get("concurrency", 1)
+        duration = self.config.get("duration")
+        times = self.config.get("times", None if duration else 1)
+        deadline = rutils.monotonic() + duration if duration else None
+        if times is not None:
+            concurrency = min(concurrency, times)
+        processes = self.config.get("processes",
+                                    multiprocessing.cpu_count())
+        processes_to_start = min(processes, concurrency)
+
+        queue = multiprocessing.Queue()
+        counter = multiprocessing.Value("i", 0)
+
+        process_pool = []
+        threads_per_worker, rest = divmod(concurrency, processes_to_start)
+        for i in range(processes_to_start):
+            threads = threads_per_worker + int(i < rest)
+            worker_args = (queue, counter, times, threads, timeout, cls,
+                           method_name, context, args, deadline,
+                           self.aborted)
+            process = multiprocessing.Process(target=_worker_process,
+                                              args=worker_args)
+            process.start()
+            process_pool.append(process)
+
+        received = 0
+        while times is None or received < times:
+            try:
+                result = queue.get(timeout=SEND_RESULT_DELAY)
+            except Queue.Empty:
+                if not any(p.is_alive() for p in process_pool):
+                    break
+                continue
+            received += 1
+            self._send_result(result)
 
-        pool.terminate()
-        pool.join()
+        for process in process_pool:
+            process.join()
+        queue.close()
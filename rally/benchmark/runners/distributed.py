@@ -0,0 +1,283 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+import Queue
+import threading
+import time
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import constant
+from rally.benchmark.scenarios import base as scenario_base
+from rally import consts
+from rally import db
+from rally import exceptions
+from rally.openstack.common.gettextutils import _
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+POLL_INTERVAL = 1
+
+
+def _run_batch(hostname, job, batch, flush_interval=POLL_INTERVAL):
+    """Run a batch of iterations and send their results to the coordinator.
+
+    Results are sent in portions every flush_interval seconds, so the
+    coordinator gets them while the batch is still running. If the job is
+    deleted meanwhile (the benchmark is aborted or finished without this
+    worker) or the batch is given to another worker, the rest of
+    iterations of the batch are not started.
+    """
+    payload = job["payload"]
+    cls = scenario_base.Scenario.get_by_name(payload["cls"])
+    context = payload["context"]
+    if "benchmark_start_timestamp" in payload:
+        # NOTE: Monotonic clocks of different hosts are not comparable, so
+        #       the benchmark start is passed as wall clock time and
+        #       converted to the monotonic clock of this host.
+        context = dict(context, benchmark_start=(
+            rutils.monotonic() -
+            (time.time() - payload["benchmark_start_timestamp"])))
+    queue = Queue.Queue()
+    counter = multiprocessing.Value("i", batch["start"])
+    end = batch["start"] + batch["count"]
+    stopped = threading.Event()
+
+    iteration_threads = constant._IterationThreads(
+        queue, counter, end, payload["timeout"], cls, payload["method_name"],
+        context, payload["args"], None, stopped)
+    runner = threading.Thread(
+        target=iteration_threads.run,
+        args=(min(payload["concurrency"], batch["count"]),))
+    runner.start()
+
+    sent = 0
+    try:
+        while sent < batch["count"]:
+            results = []
+            deadline = time.time() + flush_interval
+            while sent + len(results) < batch["count"]:
+                try:
+                    results.append(queue.get(
+                        timeout=max(0, deadline - time.time())))
+                except Queue.Empty:
+                    break
+            if results:
+                try:
+                    db.worker_results_create(job["uuid"], hostname, results,
+                                             batch_id=batch["id"])
+                except (exceptions.WorkerJobNotFound,
+                        exceptions.WorkerBatchNotFound):
+                    LOG.info("Job %s is deleted or its batch is taken by "
+                             "another worker, the rest of the batch is "
+                             "skipped" % job["uuid"])
+                    break
+                sent += len(results)
+            db.update_worker(hostname)
+    finally:
+        stopped.set()
+        runner.join()
+
+
+def run_worker(hostname, poll_interval=POLL_INTERVAL, stop_event=None):
+    """Run iterations of distributed benchmarks until stopped.
+
+    The worker registers itself in the database, takes pending batches of
+    iterations of jobs created by the "distributed" scenario runners one
+    by one and sends results of iterations back through the database.
+
+    :param hostname: unique name of the worker, which is also stored in
+                     results of all iterations executed by it
+    :param poll_interval: seconds to wait if there are no pending batches
+    :param stop_event: threading.Event that stops the worker when set
+    """
+    stop_event = stop_event or threading.Event()
+    db.register_worker({"hostname": hostname})
+    LOG.info("Worker %s started" % hostname)
+    try:
+        while not stop_event.is_set():
+            batch = db.worker_batch_take(hostname)
+            if batch is None:
+                db.update_worker(hostname)
+                stop_event.wait(poll_interval)
+                continue
+            try:
+                job = db.worker_job_get(batch["job_uuid"])
+            except exceptions.WorkerJobNotFound:
+                continue
+            LOG.info("Worker %(hostname)s | JOB %(job)s | ITER %(start)d-"
+                     "%(end)d" % {"hostname": hostname, "job": job["uuid"],
+                                  "start": batch["start"],
+                                  "end": batch["start"] + batch["count"] - 1})
+            try:
+                _run_batch(hostname, job, batch, poll_interval)
+            except Exception as e:
+                LOG.error(_("Worker %(hostname)s failed to run iterations "
+                            "of job %(job)s: %(error)s") %
+                          {"hostname": hostname, "job": job["uuid"],
+                           "error": e})
+                LOG.exception(e)
+                db.worker_batch_finish(batch["id"], hostname, failed=True)
+            else:
+                db.worker_batch_finish(batch["id"], hostname)
+    finally:
+        base._clear_clients()
+        db.unregister_worker(hostname)
+        LOG.info("Worker %s stopped" % hostname)
+
+
+class DistributedScenarioRunner(base.ScenarioRunner):
+    """Spreads iterations of the benchmark over rally worker services.
+
+    Load generated by one host is limited by its CPU and network. This
+    runner splits the iterations into batches of "batch_size" iterations
+    and stores them in the database, from which they are taken by the
+    workers started with the "rally worker start" command on any number
+    of hosts that share the same database. Each worker runs iterations of
+    its batch in "concurrency" threads and sends the results back, so the
+    total concurrency is the number of workers multiplied by "concurrency".
+
+    Results received from workers are processed as results of any other
+    runner. Each of them contains the hostname of its worker.
+
+    A batch whose worker hasn't reported to be alive for "worker_timeout"
+    seconds is returned to pending batches without iterations whose
+    results were received, so another worker runs them. Batches that a
+    worker failed to run are not retried. The benchmark is stopped when
+    all batches are finished or failed, or when none of its batches is
+    running and there are no results for "worker_timeout" seconds, e.g.
+    because there are no workers to take pending batches.
+
+    When the runner is aborted, the job with pending batches is removed at
+    once, while workers finish iterations of their current batches without
+    sending the results.
+    """
+
+    __execution_type__ = consts.RunnerType.DISTRIBUTED
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "warmup": base.WARMUP_SCHEMA,
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "batch_size": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            },
+            "worker_timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _get_batch_statuses(self, job_uuid, worker_timeout):
+        if db.worker_batches_requeue(job_uuid, worker_timeout):
+            # NOTE: Workers of requeued batches are dead, so resources of
+            #       their unfinished iterations could be not recorded.
+            self.ledger_incomplete = True
+        batches = db.worker_batches_get(job_uuid)
+        if any(batch["status"] == consts.WorkerBatchStatus.FAILED
+               for batch in batches):
+            self.ledger_incomplete = True
+        return set(batch["status"] for batch in batches)
+
+    def _run_scenario(self, cls, method_name, context, args):
+        times = self.config.get("times", 1)
+        batch_size = self.config.get("batch_size", 10)
+        worker_timeout = self.config.get("worker_timeout", 60)
+
+        # NOTE: The task object is bound to the database session of this
+        #       process, while workers need only its uuid.
+        context = dict(context)
+        context["task"] = {"uuid": context["task"]["uuid"]}
+        benchmark_start = context.pop("benchmark_start", None)
+        payload = {"cls": cls.__name__,
+                   "method_name": method_name,
+                   "context": context,
+                   "args": args,
+                   "concurrency": self.config.get("concurrency", 1),
+                   "timeout": self.config.get("timeout", 600)}
+        if benchmark_start is not None:
+            payload["benchmark_start_timestamp"] = (
+                time.time() - (rutils.monotonic() - benchmark_start))
+        batches = [(start, min(batch_size, times - start))
+                   for start in range(0, times, batch_size)]
+        job = db.worker_job_create({"task_uuid": context["task"]["uuid"],
+                                    "payload": payload}, batches)
+
+        received = 0
+        last_received_at = time.time()
+        all_batches_done = False
+        try:
+            while received < times:
+                results = db.worker_results_pop(job["uuid"])
+                for result in results:
+                    data = dict(result["data"])
+                    data["worker"] = result["hostname"]
+                    self._send_result(data)
+                received += len(results)
+
+                if self.aborted.is_set():
+                    LOG.info(_("The benchmark is aborted, %d iterations "
+                               "are not executed or not received.")
+                             % (times - received))
+                    break
+                if results:
+                    last_received_at = time.time()
+                    continue
+                if all_batches_done:
+                    LOG.error(_("Workers failed to run %d iterations of "
+                                "the benchmark.") % (times - received))
+                    break
+
+                statuses = self._get_batch_statuses(job["uuid"],
+                                                    worker_timeout)
+                if not statuses & set([consts.WorkerBatchStatus.PENDING,
+                                       consts.WorkerBatchStatus.RUNNING]):
+                    # NOTE: Results of the last batches could be sent
+                    #       after they were popped, so they are popped once
+                    #       again before the benchmark is stopped.
+                    all_batches_done = True
+                elif (consts.WorkerBatchStatus.RUNNING not in statuses and
+                        time.time() - last_received_at > worker_timeout):
+                    LOG.error(_("Pending batches of the benchmark are not "
+                                "taken by workers, %d iterations of the "
+                                "benchmark were not executed.")
+                              % (times - received))
+                    break
+                else:
+                    time.sleep(POLL_INTERVAL)
+        finally:
+            db.worker_job_delete(job["uuid"])
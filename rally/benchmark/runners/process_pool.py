@@ -0,0 +1,195 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+import select
+
+from rally.benchmark.runners import base
+from rally import exceptions
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+
+def _worker_loop(conn):
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            break
+        if args is None:
+            break
+        conn.send(base._run_scenario_once(args))
+
+
+class _Worker(object):
+    """Worker process that runs one iteration at a time."""
+
+    def __init__(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_loop,
+                                               args=(child_conn,))
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+        self.iteration = None
+        self.started_at = None
+
+    def fileno(self):
+        return self.conn.fileno()
+
+    def run(self, args):
+        self.iteration = args[0]
+        self.started_at = rutils.monotonic()
+        self.conn.send(args)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except IOError:
+            pass
+        self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+def _wait_ready(workers, timeout):
+    """Wait until some of workers have results to receive.
+
+    select.poll() is used instead of select.select(), which can't wait for
+    file descriptors greater than 1023, i.e. with about a thousand workers.
+
+    :param workers: list of busy workers
+    :param timeout: max time to wait in seconds
+    :returns: list of workers that have results or have died
+    """
+    poller = select.poll()
+    by_fd = {}
+    for worker in workers:
+        by_fd[worker.fileno()] = worker
+        poller.register(worker.fileno(), select.POLLIN)
+    return [by_fd[fd] for fd, event in poller.poll(timeout * 1000)]
+
+
+class ProcessPool(object):
+    """Pool of processes that runs scenario iterations with hard timeouts.
+
+    Unlike multiprocessing.Pool it knows which iteration is executed by
+    each process. A process that runs its iteration longer than timeout
+    is killed and replaced with a new one, so the number of concurrently
+    executed iterations stays the same, and the timeout result is returned
+    for exactly this iteration.
+    """
+
+    def __init__(self, size, timeout):
+        """Pool constructor.
+
+        :param size: number of worker processes
+        :param timeout: timeout of a single iteration in seconds
+        """
+        self.size = size
+        self.timeout = timeout
+        self.workers = []
+        self.recycled = 0
+
+    def _recycle(self, worker):
+        worker.kill()
+        worker.iteration = None
+        self.workers[self.workers.index(worker)] = _Worker()
+        self.recycled += 1
+
+    def _on_timeout(self, worker):
+        iteration = worker.iteration
+        LOG.warning("Iteration %(iteration)s exceeded timeout of %(timeout)s "
+                    "sec, its worker process is replaced with a new one." %
+                    {"iteration": iteration, "timeout": self.timeout})
+        self._recycle(worker)
+        result = base.format_result_on_timeout(exceptions.TimeoutException(),
+                                               self.timeout)
+        result.update({"iteration": iteration, "worker_recycled": True})
+        return result
+
+    def _receive(self, worker):
+        iteration = worker.iteration
+        try:
+            result = worker.conn.recv()
+        except (EOFError, IOError):
+            duration = rutils.monotonic() - worker.started_at
+            self._recycle(worker)
+            result = base.format_result_on_timeout(
+                exceptions.WorkerProcessDied(iteration=iteration), duration)
+            result["worker_recycled"] = True
+        else:
+            worker.iteration = None
+        result["iteration"] = iteration
+        return result
+
+    def imap_unordered(self, iterations):
+        """Run iterations and yield their results as soon as they are ready.
+
+        :param iterations: iterable with arguments of _run_scenario_once()
+                           for each iteration, it may be infinite
+        """
+        iterations = iter(iterations)
+        self.workers = [_Worker() for i in range(self.size)]
+        has_iterations = True
+        try:
+            while True:
+                for worker in self.workers:
+                    if not has_iterations:
+                        break
+                    if worker.iteration is None:
+                        try:
+                            worker.run(next(iterations))
+                        except StopIteration:
+                            has_iterations = False
+
+                busy = [w for w in self.workers if w.iteration is not None]
+                if not busy:
+                    break
+
+                wait = min(w.started_at for w in busy) + self.timeout
+                ready = _wait_ready(busy, max(0, wait - rutils.monotonic()))
+                for worker in ready:
+                    yield self._receive(worker)
+
+                now = rutils.monotonic()
+                for worker in busy:
+                    if (worker.iteration is not None and
+                            now - worker.started_at >= self.timeout):
+                        yield self._on_timeout(worker)
+
+            for worker in self.workers:
+                worker.stop()
+        finally:
+            self.terminate()
+
+    def terminate(self):
+        """Kill all processes of the pool without waiting for iterations."""
+        if not self.workers:
+            return
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.kill()
+        self.workers = []
+        if self.recycled:
+            LOG.info("%d worker processes were recycled after timeouts" %
+                     self.recycled)
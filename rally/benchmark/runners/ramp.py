@@ -0,0 +1,147 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import constant
+from rally.benchmark.runners import rps
+from rally import consts
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+
+class _StageResults(object):
+    """Result queue of a stage runner that tags and forwards its results."""
+
+    def __init__(self, runner, stage):
+        self.runner = runner
+        self.stage = stage
+
+    def append(self, result):
+        result = dict(result)
+        result["stage"] = self.stage
+        self.runner._send_result(result)
+
+
+class RampScenarioRunner(base.ScenarioRunner):
+    """Creates load that changes step by step.
+
+    The load is described by a list of stages which are executed one after
+    another. Each stage keeps either a constant number of concurrent
+    iterations (concurrency) or a constant rate of started iterations (rps)
+    during its duration in seconds, e.g. to find out how the cloud behaves
+    under load growing from 10 to 100 concurrent users:
+
+        "stages": [{"concurrency": 10, "duration": 60},
+                   {"concurrency": 50, "duration": 60},
+                   {"concurrency": 100, "duration": 60}]
+
+    Concurrency stages are executed like the "constant_async" runner and
+    rps stages like the "rps" runner. Each result is tagged with the index
+    of its stage, so throughput and latency can be reported per stage.
+    """
+
+    __execution_type__ = consts.RunnerType.RAMP
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "warmup": base.WARMUP_SCHEMA,
+            "stages": {
+                "type": "array",
+                "minItems": 1,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "duration": {
+                            "type": "number",
+                            "minimum": 0,
+                            "exclusiveMinimum": True
+                        },
+                        "concurrency": {
+                            "type": "integer",
+                            "minimum": 1
+                        },
+                        "rps": {
+                            "type": "number",
+                            "minimum": 0,
+                            "exclusiveMinimum": True
+                        },
+                        "max_concurrency": {
+                            "type": "integer",
+                            "minimum": 1
+                        }
+                    },
+                    "required": ["duration"],
+                    "oneOf": [{"required": ["concurrency"]},
+                              {"required": ["rps"]}],
+                    "additionalProperties": False
+                }
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            },
+            "distribution": {
+                "enum": ["fixed", "uniform", "poisson"]
+            },
+            "processes": {
+                "type": "integer",
+                "minimum": 1
+            }
+        },
+        "required": ["type", "stages"],
+        "additionalProperties": False
+    }
+
+    @classmethod
+    def _get_stages(cls, config):
+        return config["stages"]
+
+    def _get_stage_runner(self, stage):
+        if "concurrency" in stage:
+            config = {"type": consts.RunnerType.CONSTANT_ASYNC,
+                      "concurrency": stage["concurrency"],
+                      "duration": stage["duration"],
+                      "timeout": self.config.get("timeout", 600)}
+            if "processes" in self.config:
+                config["processes"] = self.config["processes"]
+            return constant.ConstantAsyncScenarioRunner(self.task, config)
+
+        config = {"type": consts.RunnerType.RPS,
+                  "rps": stage["rps"],
+                  "times": max(1, int(round(stage["rps"] *
+                                            stage["duration"]))),
+                  "distribution": self.config.get("distribution", "fixed")}
+        if "max_concurrency" in stage:
+            config["max_concurrency"] = stage["max_concurrency"]
+        return rps.RPSScenarioRunner(self.task, config)
+
+    def _run_scenario(self, cls, method_name, context, args):
+        for i, stage in enumerate(self._get_stages(self.config)):
+            if self.aborted.is_set():
+                break
+            LOG.info("Ramp stage %(stage)d: %(config)s" %
+                     {"stage": i, "config": stage})
+            runner = self._get_stage_runner(stage)
+            runner.result_queue = _StageResults(self, i)
+            runner.aborted = self.aborted
+            runner._run_scenario(cls, method_name, context, args)
@@ -14,12 +14,14 @@
 #    under the License.
 
 import multiprocessing
+import Queue
 import random
 import threading
 import time
 
 from rally.benchmark.runners import base
 from rally import consts
+from rally import exceptions
 from rally.openstack.common import log as logging
 from rally import utils as rutils
 
@@ -28,80 +30,211 @@ LOG = logging.getLogger(__name__)
 SEND_RESULT_DELAY = 1
 
 
-def _worker_thread(queue, args):
-        queue.put(base._run_scenario_once(args))
+def _get_arrival_offsets(times, rps, distribution="fixed"):
+    """Precompute start times of all iterations of the open-loop load.
 
+    :param times: number of iterations
+    :param rps: requested average number of iterations started per second
+    :param distribution: distribution of intervals between two consecutive
+                         iterations: "fixed" - all intervals are 1/rps,
+                         "uniform" - random intervals from [0, 2/rps),
+                         "poisson" - exponentially distributed intervals,
+                         i.e. iterations form a Poisson process
+    :returns: list of offsets in seconds from the beginning of the load
+    """
+    if distribution not in ("poisson", "uniform"):
+        return [i / float(rps) for i in range(times)]
+
+    offsets = []
+    offset = 0.0
+    for i in range(times):
+        offsets.append(offset)
+        if distribution == "poisson":
+            offset += random.expovariate(rps)
+        else:
+            offset += random.uniform(0, 2.0 / rps)
+    return offsets
+
+
+class _WorkerPool(object):
+    """Bounded pool of reusable threads that run scenario iterations.
+
+    Threads are started on demand, when there is no idle thread to run
+    next iteration, but not more than size. If all threads are busy, the
+    iteration waits for a free thread and this delay is recorded as its
+    scheduling lag.
+
+    If an iteration runs longer than timeout, its timeout result is sent
+    at once and its thread is replaced with a new one, the result of the
+    hung iteration is dropped when it finishes.
+    """
 
-def _worker_process(rps, times, queue, scenario_context, timeout,
-                    worker_id, workers, cls, method_name, args):
-    """Start scenario within threads.
-
-    Spawn N threads per second. Each thread runs scenario once, and appends
-    result to queue.
+    def __init__(self, size, queue, start, cls, method_name, context, args,
+                 timeout=600):
+        self.size = size
+        self.queue = queue
+        self.start = start
+        self.cls = cls
+        self.method_name = method_name
+        self.context = context
+        self.args = args
+        self.timeout = timeout
+        self.tasks = Queue.Queue()
+        self.threads = []
+        self.idle = 0
+        self.lock = threading.Condition()
+        self.running = {}
+        self.hung = set()
+        self.stopped = False
+        self.watchdog = threading.Thread(target=self._watch)
+        self.watchdog.daemon = True
+        self.watchdog.start()
+
+    def _run(self):
+        thread = threading.current_thread()
+        while True:
+            task = self.tasks.get()
+            with self.lock:
+                self.idle -= 1
+                if task is None:
+                    self.threads.remove(thread)
+                    self.lock.notify_all()
+                    return
+
+            iteration, scheduled = task
+            actual = rutils.monotonic() - self.start
+            with self.lock:
+                self.running[thread] = (rutils.monotonic(), time.time(),
+                                        iteration, scheduled, actual)
+                self.lock.notify_all()
+            result = base._run_scenario_once(
+                (iteration, self.cls, self.method_name,
+                 base._get_scenario_context(self.context), self.args))
+            result["scheduled_start"] = scheduled
+            result["actual_start"] = actual
+
+            with self.lock:
+                if thread in self.hung:
+                    self.hung.discard(thread)
+                    return
+                del self.running[thread]
+                self.queue.put(result)
+                self.idle += 1
+
+    def _start_thread(self):
+        self.idle += 1
+        thread = threading.Thread(target=self._run)
+        # NOTE: The process doesn't wait for threads of hung iterations.
+        thread.daemon = True
+        thread.start()
+        self.threads.append(thread)
+
+    def _send_timeouts(self):
+        """Send timeout results of hung iterations.
+
+        :returns: seconds until the next running iteration times out or
+                  None if no iterations are running
+        """
+        now = rutils.monotonic()
+        wait = None
+        for thread, running in self.running.items():
+            started_at, timestamp, iteration, scheduled, actual = running
+            left = started_at + self.timeout - now
+            if left > 0:
+                wait = left if wait is None else min(wait, left)
+                continue
+            del self.running[thread]
+            self.hung.add(thread)
+            self.threads.remove(thread)
+            if self.idle < self.tasks.qsize():
+                self._start_thread()
+            result = base.format_result_on_timeout(
+                exceptions.TimeoutException(), self.timeout)
+            result.update({"iteration": iteration, "timestamp": timestamp,
+                           "scheduled_start": scheduled,
+                           "actual_start": actual})
+            benchmark_start = self.context.get("benchmark_start")
+            if benchmark_start is not None:
+                result["start_offset"] = started_at - benchmark_start
+            self.queue.put(result)
+        return wait
+
+    def _watch(self):
+        with self.lock:
+            while not self.stopped:
+                self.lock.wait(self._send_timeouts())
+
+    def put(self, iteration, scheduled):
+        """Run iteration in the first free thread."""
+        with self.lock:
+            if (self.idle <= self.tasks.qsize() and
+                    len(self.threads) < self.size):
+                self._start_thread()
+        self.tasks.put((iteration, scheduled))
+
+    def join(self):
+        """Wait for all iterations and stop threads.
+
+        Threads of hung iterations are not waited for.
+        """
+        with self.lock:
+            for thread in self.threads:
+                self.tasks.put(None)
+            while self.threads:
+                self.lock.wait()
+            self.stopped = True
+            self.lock.notify_all()
+
+
+def _worker_process(queue, iterations, max_concurrency, start, cls,
+                    method_name, context, args, aborted=None, timeout=600):
+    """Start scenario iterations at precomputed times.
 
-    :param rps: runs per second
-    :param times: number of threads to be run
     :param queue: queue object to append results
-    :param scenario_context: scenario context object
-    :param timeout: timeout operation
-    :param worker_id: id of worker process
-    :param workers: number of total workers
+    :param iterations: list of pairs (iteration number, offset in seconds
+                       from start when this iteration should be started)
+    :param max_concurrency: maximum number of threads in the process
+    :param start: rutils.monotonic() value when the load starts
     :param cls: scenario class
     :param method_name: scenario method name
+    :param context: benchmark context
     :param args: scenario args
+    :param aborted: multiprocessing.Event, iterations that are not started
+                    yet are skipped after it is set
+    :param timeout: timeout of an iteration in seconds
     """
-
-    pool = []
-    i = 0
-    start = time.time()
-    sleep = 1.0 / rps
-
-    # Injecting timeout to exclude situations, where start time and
-    # actual time are neglible close
-
-    randsleep_delay = random.randint(int(sleep / 2 * 100), int(sleep * 100))
-    time.sleep(randsleep_delay / 100.0)
-
-    while times > i:
-        i += 1
-        scenario_args = (queue, (worker_id + workers * (i - 1), cls,
-                         method_name, scenario_context, args),)
-        thread = threading.Thread(target=_worker_thread,
-                                  args=scenario_args)
-        thread.start()
-        pool.append(thread)
-
-        time_gap = time.time() - start
-        real_rps = i / time_gap if time_gap else "Infinity"
-
-        LOG.debug("Worker: %s rps: %s (requested rps: %s)" % (
-            worker_id, real_rps, rps))
-
-        # try to join latest thread(s) until it finished, or until time to
-        # start new thread
-        while i / (time.time() - start) > rps:
-            if pool:
-                pool[0].join(sleep)
-                if not pool[0].isAlive():
-                    pool.pop(0)
-            else:
-                time.sleep(sleep)
-
-    while pool:
-        thr = pool.pop(0)
-        thr.join()
+    pool = _WorkerPool(max_concurrency, queue, start, cls, method_name,
+                       context, args, timeout)
+    for i, scheduled in iterations:
+        delay = start + scheduled - rutils.monotonic()
+        if aborted is None:
+            if delay > 0:
+                time.sleep(delay)
+        elif aborted.wait(max(0, delay)):
+            break
+        pool.put(i, scheduled)
+
+        LOG.debug("Iteration %s started with lag %.3f" %
+                  (i, rutils.monotonic() - start - scheduled))
+    pool.join()
 
 
 class RPSScenarioRunner(base.ScenarioRunner):
     """Scenario runner that does the job with with specified frequency.
 
-    Each execution is a single benchmark scenario iteration (i.e. no parallel
-    execution of multiple iterations is performed). The scenario will be
+    Every single benchmark scenario iteration is executed with specified
+    frequency (runs per second) in a pool of processes. The scenario will be
     launched for a fixed number of times in total (specified in the config).
 
-    An example of a rps scenario is booting 1 VM onse per second. This
+    An example of a rps scenario is booting 1 VM per second. This
     execution type is thus very helpful in understanding the maximal load that
     a certain cloud can handle.
+
+    The load is open-loop: start times of all iterations are computed in
+    advance (with fixed, uniformly or exponentially distributed intervals)
+    and don't depend on durations of previous iterations. Each result
+    contains scheduled and actual start times of its iteration, so the lag
+    of the load generator can be seen in reports.
     """
 
     __execution_type__ = consts.RunnerType.RPS
@@ -113,40 +246,52 @@ class RPSScenarioRunner(base.ScenarioRunner):
             "type": {
                 "type": "string"
             },
+            "warmup": base.WARMUP_SCHEMA,
             "times": {
                 "type": "integer",
                 "minimum": 1
             },
             "rps": {
                 "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
             },
             "timeout": {
                 "type": "number",
             },
+            "distribution": {
+                "enum": ["fixed", "uniform", "poisson"]
+            },
+            "max_concurrency": {
+                "type": "integer",
+                "minimum": 1
+            }
         },
         "additionalProperties": False
     }
 
     def _run_scenario(self, cls, method_name, context, args):
         times = self.config["times"]
-        timeout = self.config.get("timeout", 600)
-        cpu_count = multiprocessing.cpu_count()
-        processes_to_start = min(cpu_count, times)
-        rps_per_worker = float(self.config["rps"]) / processes_to_start
+        max_concurrency = self.config.get("max_concurrency", times)
+        offsets = _get_arrival_offsets(times, float(self.config["rps"]),
+                                       self.config.get("distribution",
+                                                       "fixed"))
+        processes_to_start = min(multiprocessing.cpu_count(), times,
+                                 max_concurrency)
+        threads_per_worker, rest = divmod(max_concurrency,
+                                          processes_to_start)
 
         queue = multiprocessing.Queue()
-
         process_pool = []
-        scenario_context = base._get_scenario_context(context)
-
-        times_per_worker, rest = divmod(times, processes_to_start)
+        start = rutils.monotonic()
 
         for i in range(processes_to_start):
-            times = times_per_worker + int(rest > 0)
-            rest -= 1
-            worker_args = (rps_per_worker, times, queue, scenario_context,
-                           timeout, i, processes_to_start, cls,
-                           method_name, args)
+            iterations = [(n, offsets[n])
+                          for n in range(i, times, processes_to_start)]
+            threads = threads_per_worker + int(i < rest)
+            worker_args = (queue, iterations, threads, start, cls,
+                           method_name, context, args, self.aborted,
+                           self.config.get("timeout", 600))
             process = multiprocessing.Process(target=_worker_process,
                                               args=worker_args)
             process.start()
@@ -0,0 +1,257 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import math
+
+from rally.benchmark.processing import utils as putils
+from rally.benchmark.runners import base
+from rally.benchmark.runners import ramp
+from rally import consts
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+
+def get_saturation_point(config, phases):
+    """Find the last phase of the search before the load stopped scaling.
+
+    A phase saturates the cloud if its failure rate or 95 percentile of
+    durations exceeds the limits from the runner config, or if its
+    throughput is less than "min_throughput_gain" percent higher than the
+    throughput of the previous phase.
+
+    :param config: config of the saturation runner
+    :param phases: list of phases in the order they were run, each of them
+                   is a dict returned by processing.utils.get_stages_data()
+    :returns: tuple of index of the saturation point (None if already the
+              first phase saturates the cloud) and description of the
+              reason why the next phase saturates it (None if all phases
+              scale well)
+    """
+    max_failure_percent = config.get("max_failure_percent")
+    max_p95 = config.get("max_p95_latency")
+    min_gain = config.get("min_throughput_gain", 10)
+
+    for i, phase in enumerate(phases):
+        failure_percent = (phase["errors"] * 100.0 / phase["iterations"]
+                           if phase["iterations"] else 0.0)
+        p95 = putils.percentile(list(phase["durations"]), 0.95)
+        if (max_failure_percent is not None and
+                failure_percent > max_failure_percent):
+            reason = ("failure rate %.1f%% exceeds %s%%" %
+                      (failure_percent, max_failure_percent))
+        elif max_p95 is not None and (p95 is None or p95 > max_p95):
+            reason = ("95 percentile of durations %s sec exceeds %s sec" %
+                      (p95 if p95 is None else round(p95, 3), max_p95))
+        elif i and phase["throughput"] < (phases[i - 1]["throughput"] *
+                                          (1 + min_gain / 100.0)):
+            reason = ("throughput %.3f iter/sec grows less than %s%%" %
+                      (phase["throughput"], min_gain))
+        else:
+            continue
+        return (i - 1 if i else None), reason
+    return (len(phases) - 1 if phases else None), None
+
+
+def _format_load(stage):
+    if "concurrency" in stage:
+        return "concurrency %s" % stage["concurrency"]
+    return "rps %s" % stage["rps"]
+
+
+def get_saturation_report(config, stages_data):
+    """Describe results of the saturation search.
+
+    :param config: config of the saturation runner
+    :param stages_data: data of all phases returned by
+                        processing.utils.get_stages_data()
+    :returns: tuple of the list of phases that were run and the message
+              with the saturation point
+    """
+    phases = list(stages_data)
+    while phases and not phases[-1]["iterations"]:
+        phases.pop()
+    if not phases:
+        return phases, "No phases of the saturation search were run"
+
+    point, reason = get_saturation_point(config, phases)
+    if reason is None:
+        return phases, ("Saturation point is not reached up to %s" %
+                        _format_load(phases[-1]["config"]))
+    if point is None:
+        return phases, ("The cloud is saturated already at %s: %s" %
+                        (_format_load(phases[0]["config"]), reason))
+    return phases, ("Saturation point is %s (phase %d, %.3f iter/sec), "
+                    "at %s %s" % (_format_load(phases[point]["config"]),
+                                  point + 1, phases[point]["throughput"],
+                                  _format_load(phases[point + 1]["config"]),
+                                  reason))
+
+
+class _PhaseResults(ramp._StageResults):
+    """Stage results that also keep what is needed to evaluate phases."""
+
+    def __init__(self, runner, stage, rows):
+        super(_PhaseResults, self).__init__(runner, stage)
+        self.rows = rows
+
+    def append(self, result):
+        row = {"stage": self.stage, "duration": result["duration"],
+               "error": result["error"]}
+        if "timestamp" in result:
+            row["timestamp"] = result["timestamp"]
+        self.rows.append(row)
+        super(_PhaseResults, self).append(result)
+
+
+class SaturationScenarioRunner(ramp.RampScenarioRunner):
+    """Searches for the load at which the cloud stops scaling.
+
+    The runner executes short probe phases of "phase_duration" seconds with
+    growing load: from "start" up to "max_load" concurrent iterations (or
+    iterations started per second, if "load" is "rps"), multiplying the load
+    by "factor" or adding "step" to it after each phase. Phases are run
+    like stages of the "ramp" runner and each result is tagged with the
+    index of its phase.
+
+    The search stops at the knee of the throughput curve: when throughput
+    of a phase grows less than "min_throughput_gain" percent compared to
+    the previous phase, or when its failure rate or 95 percentile of
+    durations exceeds "max_failure_percent" or "max_p95_latency". The last
+    phase before the knee is reported as the saturation point together
+    with throughput and latency of all phases.
+    """
+
+    __execution_type__ = consts.RunnerType.SATURATION
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "warmup": base.WARMUP_SCHEMA,
+            "load": {
+                "enum": ["concurrency", "rps"]
+            },
+            "start": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "factor": {
+                "type": "number",
+                "minimum": 1,
+                "exclusiveMinimum": True
+            },
+            "step": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "max_load": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "phase_duration": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "min_throughput_gain": {
+                "type": "number",
+                "minimum": 0
+            },
+            "max_p95_latency": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "max_failure_percent": {
+                "type": "number",
+                "minimum": 0,
+                "maximum": 100
+            },
+            "max_concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            },
+            "distribution": {
+                "enum": ["fixed", "uniform", "poisson"]
+            },
+            "processes": {
+                "type": "integer",
+                "minimum": 1
+            }
+        },
+        "required": ["type", "max_load"],
+        "not": {"required": ["factor", "step"]},
+        "additionalProperties": False
+    }
+
+    @classmethod
+    def _get_stages(cls, config):
+        load = config.get("load", "concurrency")
+        factor = config.get("factor", 2)
+        step = config.get("step")
+        value = config.get("start", 1)
+
+        stages = []
+        while value <= config["max_load"]:
+            stage = {"duration": config.get("phase_duration", 30)}
+            if load == "concurrency":
+                stage["concurrency"] = max(1, int(value))
+            else:
+                stage["rps"] = value
+                if "max_concurrency" in config:
+                    stage["max_concurrency"] = config["max_concurrency"]
+            stages.append(stage)
+
+            next_value = value + step if step else value * factor
+            if load == "concurrency":
+                next_value = max(int(math.ceil(next_value)), int(value) + 1)
+            value = next_value
+        return stages
+
+    def _run_scenario(self, cls, method_name, context, args):
+        stages = self._get_stages(self.config)
+        rows = []
+        for i, stage in enumerate(stages):
+            if self.aborted.is_set():
+                break
+            runner = self._get_stage_runner(stage)
+            runner.result_queue = _PhaseResults(self, i, rows)
+            runner.aborted = self.aborted
+            runner._run_scenario(cls, method_name, context, args)
+
+            phases = putils.get_stages_data(rows, stages[:i + 1])
+            throughput = phases[-1]["throughput"] if phases else 0.0
+            LOG.info("Saturation search phase %(phase)d: %(config)s, "
+                     "throughput %(throughput).3f iter/sec" %
+                     {"phase": i, "config": stage, "throughput": throughput})
+            point, reason = get_saturation_point(self.config, phases)
+            if reason:
+                LOG.info("Saturation point is found at phase %(point)s: "
+                         "%(reason)s in the next phase" %
+                         {"point": point, "reason": reason})
+                break
@@ -39,6 +39,7 @@ class SerialScenarioRunner(base.ScenarioRunner):
             "type": {
                 "type": "string"
             },
+            "warmup": base.WARMUP_SCHEMA,
             "times": {
                 "type": "integer",
                 "minimum": 1
@@ -50,7 +51,7 @@ class SerialScenarioRunner(base.ScenarioRunner):
     def _run_scenario(self, cls, method_name, context, args):
         times = self.config.get('times', 1)
 
-        for i in range(times):
+        for i in self._until_aborted(range(times)):
             run_args = (i, cls, method_name,
                         base._get_scenario_context(context), args)
             result = base._run_scenario_once(run_args)
@@ -20,8 +20,11 @@ import random
 import string
 import time
 
+from rally.benchmark import utils as bench_utils
 from rally import consts
+from rally import db
 from rally import exceptions
+from rally import httppool
 from rally import utils
 
 
@@ -56,6 +59,10 @@ class Scenario(object):
         self._clients = clients
         self._idle_duration = 0
         self._atomic_actions = {}
+        self._atomic_actions_tree = []
+        self._atomic_actions_stack = []
+        self._atomic_actions_polls = {}
+        self._resources = []
 
     # TODO(amaretskiy): consider about prefix part of benchmark uuid
     @classmethod
@@ -75,10 +82,10 @@ class Scenario(object):
         """Returns Scenario class by name."""
         # TODO(msdubov): support approximate string matching
         #                (here and in other base classes).
-        for scenario in utils.itersubclasses(Scenario):
-            if name == scenario.__name__:
-                return scenario
-        raise exceptions.NoSuchScenario(name=name)
+        scenario = utils.find_subclass(Scenario, name)
+        if scenario is None:
+            raise exceptions.NoSuchScenario(name=name)
+        return scenario
 
     @staticmethod
     def get_scenario_by_name(name):
@@ -95,7 +102,7 @@ class Scenario(object):
             if Scenario.is_scenario(scenario_cls, scenario_name):
                 return getattr(scenario_cls, scenario_name)
         else:
-            for scenario_cls in utils.itersubclasses(Scenario):
+            for scenario_cls in utils.get_subclasses(Scenario):
                 if Scenario.is_scenario(scenario_cls, name):
                     return getattr(scenario_cls, name)
         raise exceptions.NoSuchScenario(name=name)
@@ -112,7 +119,7 @@ class Scenario(object):
         benchmark_scenarios = [
             ["%s.%s" % (scenario.__name__, func)
              for func in dir(scenario) if Scenario.is_scenario(scenario, func)]
-            for scenario in utils.itersubclasses(Scenario)
+            for scenario in utils.get_subclasses(Scenario)
         ]
         benchmark_scenarios_flattened = list(itertools.chain.from_iterable(
                                                         benchmark_scenarios))
@@ -175,8 +182,9 @@ class Scenario(object):
         :param method_name: method name
         :returns: True if the method is a benchmark scenario, False otherwise
         """
-        return (hasattr(cls, method_name) and
-                Scenario.meta(cls, "is_scenario", method_name, default=False))
+        # NOTE: The flag is immutable, so it's read without the deep copy
+        #       made by meta().
+        return getattr(getattr(cls, method_name, None), "is_scenario", False)
 
     def context(self):
         """Returns the context of the current benchmark scenario."""
@@ -241,6 +249,86 @@ class Scenario(object):
         """Returns the content of each atomic action."""
         return self._atomic_actions
 
+    def _start_atomic_action(self, name, start):
+        """Adds a started atomic action to the tree of atomic actions.
+
+        The action becomes a child of the innermost action that is still
+        running, so nested atomic actions keep their parent/child relations.
+        """
+        parent = (self._atomic_actions_stack[-1]
+                  if self._atomic_actions_stack else None)
+        self._atomic_actions_tree.append([name, start, None, parent])
+        self._atomic_actions_stack.append(len(self._atomic_actions_tree) - 1)
+
+    def _finish_atomic_action(self, duration):
+        """Sets the duration of the innermost running atomic action."""
+        index = self._atomic_actions_stack.pop()
+        self._atomic_actions_tree[index][2] = duration
+
+    def atomic_actions_tree(self):
+        """Returns the tree of atomic actions in the order they started.
+
+        Each node is a list of the action name, the monotonic clock value
+        when the action started, its duration and the index of the parent
+        node (None for top level actions).
+        """
+        return self._atomic_actions_tree
+
+    def _add_atomic_action_polls(self, name, polls):
+        """Adds the number of status checks of an atomic action."""
+        self._atomic_actions_polls[name] = polls
+
+    def atomic_actions_polls(self):
+        """Returns the number of status checks made by each atomic action.
+
+        Only atomic actions that waited for resources are included.
+        """
+        return self._atomic_actions_polls
+
+    def _register_resource(self, service, resource_type, resource_id,
+                           admin=False):
+        """Records a created cloud resource in the resource ledger.
+
+        Resources are recorded only if a cleanup context turned the ledger
+        on with "resource_ledger" in the context, so the cleanup can delete
+        exactly them instead of listing everything in the tenant. The record
+        is saved to the database right away, so the resource is known to the
+        cleanup even if the iteration never finishes.
+
+        :param service: name of the service, e.g. "nova"
+        :param resource_type: type of the resource, e.g. "servers"
+        :param resource_id: id of the resource
+        :param admin: whether the resource was created with admin clients
+        """
+        context = self._context or {}
+        if not context.get("resource_ledger"):
+            return
+        tenant_id = None if admin else context["user"].get("tenant_id")
+        resource = {"tenant_id": tenant_id, "service": service,
+                    "type": resource_type, "id": str(resource_id)}
+        ledger_id = db.task_resources_create(context["task"]["uuid"],
+                                             [resource])[0]
+        self._resources.append((ledger_id, resource))
+
+    def _unregister_resource(self, service, resource_type, resource_id=None):
+        """Forgets recorded resources that the scenario itself deleted.
+
+        :param resource_id: id of the resource, all resources of the type
+                            are forgotten if it is None
+        """
+        deleted = [(ledger_id, r) for ledger_id, r in self._resources
+                   if r["service"] == service and r["type"] == resource_type
+                   and resource_id in (None, r["id"])]
+        if not deleted:
+            return
+        db.task_resources_delete([ledger_id for ledger_id, r in deleted])
+        self._resources = [item for item in self._resources
+                           if item not in deleted]
+
+    def resources(self):
+        """Returns resources recorded in the ledger and not deleted yet."""
+        return [resource for ledger_id, resource in self._resources]
+
 
 def atomic_action_timer(name):
     """Provide measure of execution time.
@@ -278,6 +366,7 @@ class AtomicAction(utils.Timer):
         """
         super(AtomicAction, self).__init__()
         self.scenario_instance = scenario_instance
+        self.action_name = name
         self.name = self._get_atomic_action_name(name)
         self.scenario_instance._register_atomic_action(self.name)
 
@@ -292,8 +381,21 @@ class AtomicAction(utils.Timer):
                 atomic_action_iteration += 1
             return name_template % atomic_action_iteration
 
+    def __enter__(self):
+        super(AtomicAction, self).__enter__()
+        self.scenario_instance._start_atomic_action(self.action_name,
+                                                    self.start)
+        bench_utils.start_polls_count(self.action_name)
+        httppool.start_api_action(self.name)
+        return self
+
     def __exit__(self, type, value, tb):
         super(AtomicAction, self).__exit__(type, value, tb)
+        self.scenario_instance._finish_atomic_action(self.duration())
+        httppool.stop_api_action()
+        polls = bench_utils.stop_polls_count()
+        if polls:
+            self.scenario_instance._add_atomic_action_polls(self.name, polls)
         if type is None:
             self.scenario_instance._add_atomic_actions(self.name,
                                                        self.duration())
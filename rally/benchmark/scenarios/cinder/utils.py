@@ -72,6 +72,7 @@ class CinderScenario(base.Scenario):
         kwargs["display_name"] = kwargs.get("display_name",
                                             self._generate_random_name())
         volume = self.clients("cinder").volumes.create(size, **kwargs)
+        self._register_resource("cinder", "volumes", volume.id)
         # NOTE(msdubov): It is reasonable to wait 5 secs before starting to
         #                check whether the volume is ready => less API calls.
         time.sleep(CONF.benchmark.cinder_volume_create_prepoll_delay)
@@ -99,6 +100,7 @@ class CinderScenario(base.Scenario):
             timeout=CONF.benchmark.cinder_volume_delete_timeout,
             check_interval=CONF.benchmark.cinder_volume_delete_poll_interval
         )
+        self._unregister_resource("cinder", "volumes", volume.id)
 
     @base.atomic_action_timer('cinder.create_snapshot')
     def _create_snapshot(self, volume_id, force=False, **kwargs):
@@ -119,6 +121,7 @@ class CinderScenario(base.Scenario):
         kwargs["force"] = force
         snapshot = self.clients("cinder").volume_snapshots.create(volume_id,
                                                                   **kwargs)
+        self._register_resource("cinder", "snapshots", snapshot.id)
         time.sleep(CONF.benchmark.cinder_volume_create_prepoll_delay)
         snapshot = bench_utils.wait_for(
             snapshot,
@@ -144,3 +147,4 @@ class CinderScenario(base.Scenario):
             timeout=CONF.benchmark.cinder_volume_delete_timeout,
             check_interval=CONF.benchmark.cinder_volume_delete_poll_interval
         )
+        self._unregister_resource("cinder", "snapshots", snapshot.id)
@@ -11,32 +11,61 @@
 #    under the License.
 
 import random
+import threading
 import time
 
 from rally.benchmark.scenarios import base
 from rally.benchmark import validation
 from rally import exceptions
+from rally.openstack.common.gettextutils import _
 
 
 class DummyScenarioException(exceptions.RallyException):
     msg_fmt = _("Dummy scenario expected exception: '%(msg)s'")
 
 
+# NOTE: Number of concurrent calls of Dummy.dummy with capacity in this
+#       process, used to simulate contention for a service.
+_calls = {"count": 0}
+_calls_lock = threading.Lock()
+
+
 class Dummy(base.Scenario):
     """Benchmarks for testing Rally benchmark engine at scale."""
 
+    @validation.number("capacity",
+                       minval=1, integer_only=True, nullable=True)
     @base.scenario()
-    def dummy(self, sleep=0):
+    def dummy(self, sleep=0, capacity=None):
         """Test the performance of ScenarioRunners.
 
         Dummy.dummy can be used for testing performance of different
         ScenarioRunners and ability of rally to store a large
         amount of results.
 
+        If capacity is specified, the method simulates a service that
+        serves this number of concurrent calls without slowing down: idle
+        time grows in proportion to the number of concurrent calls above
+        the capacity, so throughput doesn't grow beyond capacity / sleep
+        calls per second. Concurrent calls are counted within one process.
+
         :param sleep: Idle time of method.
+        :param capacity: Number of concurrent calls of simulated service.
         """
-        if sleep:
+        if not sleep:
+            return
+        if not capacity:
             time.sleep(sleep)
+            return
+
+        with _calls_lock:
+            _calls["count"] += 1
+            concurrent = _calls["count"]
+        try:
+            time.sleep(sleep * max(1.0, float(concurrent) / capacity))
+        finally:
+            with _calls_lock:
+                _calls["count"] -= 1
 
     @validation.number("size_of_message",
                        minval=1, integer_only=True, nullable=True)
@@ -88,6 +88,7 @@ class GlanceScenario(base.Scenario):
                 kw["copy_from"] = image_location
 
             image = self.clients("glance").images.create(**kw)
+            self._register_resource("glance", "images", image.id)
 
             time.sleep(CONF.benchmark.glance_image_create_prepoll_delay)
 
@@ -119,3 +120,4 @@ class GlanceScenario(base.Scenario):
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.glance_image_delete_timeout,
             check_interval=CONF.benchmark.glance_image_delete_poll_interval)
+        self._unregister_resource("glance", "images", image.id)
@@ -87,6 +87,7 @@ class HeatScenario(base.Scenario):
         # heat client returns body instead manager object, so we should
         # get manager object using stack_id
         stack_id = self.clients("heat").stacks.create(**kw)["stack"]["id"]
+        self._register_resource("heat", "stacks", stack_id)
         stack = self.clients("heat").stacks.get(stack_id)
 
         time.sleep(CONF.benchmark.heat_stack_create_prepoll_delay)
@@ -114,3 +115,4 @@ class HeatScenario(base.Scenario):
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.heat_stack_delete_timeout,
             check_interval=CONF.benchmark.heat_stack_delete_poll_interval)
+        self._unregister_resource("heat", "stacks", stack.id)
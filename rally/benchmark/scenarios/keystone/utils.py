@@ -39,13 +39,17 @@ class KeystoneScenario(base.Scenario):
         #                 when we switch to v3.
         password = password or name
         email = email or (name + "@rally.me")
-        return self.admin_clients("keystone").users.create(
+        user = self.admin_clients("keystone").users.create(
                     name, password=password, email=email, **kwargs)
+        self._register_resource("keystone", "users", user.id, admin=True)
+        return user
 
     @base.atomic_action_timer('keystone.delete_resource')
     def _resource_delete(self, resource):
         """"Delete keystone resource."""
         resource.delete()
+        for resource_type in ("users", "tenants"):
+            self._unregister_resource("keystone", resource_type, resource.id)
 
     @base.atomic_action_timer('keystone.create_tenant')
     def _tenant_create(self, name_length=10, **kwargs):
@@ -56,7 +60,10 @@ class KeystoneScenario(base.Scenario):
         :return: keystone tenant instance
         """
         name = self._generate_random_name(length=name_length)
-        return self.admin_clients("keystone").tenants.create(name, **kwargs)
+        tenant = self.admin_clients("keystone").tenants.create(
+            name, **kwargs)
+        self._register_resource("keystone", "tenants", tenant.id, admin=True)
+        return tenant
 
     @base.atomic_action_timer('keystone.create_users')
     def _users_create(self, tenant, users_per_tenant, name_length=10):
@@ -69,8 +76,10 @@ class KeystoneScenario(base.Scenario):
             name = self._generate_random_name(length=name_length)
             password = name
             email = (name + "@rally.me")
-            self.admin_clients("keystone").users.create(
+            user = self.admin_clients("keystone").users.create(
                     name, password=password, email=email, tenant_id=tenant.id)
+            self._register_resource("keystone", "users", user.id,
+                                    admin=True)
 
     @base.atomic_action_timer('keystone.list_users')
     def _list_users(self):
@@ -55,8 +55,11 @@ class NeutronScenario(base.Scenario):
         :returns: neutron network dict
         """
         network_create_args.setdefault("name", self._generate_random_name())
-        return self.clients("neutron").create_network(
+        network = self.clients("neutron").create_network(
             {"network": network_create_args})
+        self._register_resource("neutron", "networks",
+                                network["network"]["id"])
+        return network
 
     @base.atomic_action_timer('neutron.list_networks')
     def _list_networks(self):
@@ -93,6 +96,7 @@ class NeutronScenario(base.Scenario):
         :param network: Network object
         """
         self.clients("neutron").delete_network(network['id'])
+        self._unregister_resource("neutron", "networks", network['id'])
 
     @base.atomic_action_timer('neutron.create_subnet')
     def _create_subnet(self, network, subnets_per_network, subnet_create_args):
@@ -115,8 +119,10 @@ class NeutronScenario(base.Scenario):
         subnet_create_args.setdefault(
             "ip_version", self.SUBNET_IP_VERSION)
 
-        return self.clients("neutron"
-                            ).create_subnet({"subnet": subnet_create_args})
+        subnet = self.clients("neutron"
+                              ).create_subnet({"subnet": subnet_create_args})
+        self._register_resource("neutron", "subnets", subnet["subnet"]["id"])
+        return subnet
 
     @base.atomic_action_timer('neutron.list_subnets')
     def _list_subnets(self):
@@ -153,6 +159,8 @@ class NeutronScenario(base.Scenario):
         :param subnet: Subnet object
         """
         self.clients("neutron").delete_subnet(subnet['subnet']['id'])
+        self._unregister_resource("neutron", "subnets",
+                                  subnet['subnet']['id'])
 
     @base.atomic_action_timer('neutron.create_router')
     def _create_router(self, router_create_args):
@@ -163,8 +171,10 @@ class NeutronScenario(base.Scenario):
         """
         router_create_args.setdefault(
             "name", self._generate_random_name("rally_router_"))
-        return self.clients("neutron").create_router(
+        router = self.clients("neutron").create_router(
             {"router": router_create_args})
+        self._register_resource("neutron", "routers", router["router"]["id"])
+        return router
 
     @base.atomic_action_timer('neutron.list_routers')
     def _list_routers(self):
@@ -205,7 +215,9 @@ class NeutronScenario(base.Scenario):
         port_create_args["network_id"] = network["network"]["id"]
         port_create_args.setdefault(
             "name", self._generate_random_name("rally_port_"))
-        return self.clients("neutron").create_port({"port": port_create_args})
+        port = self.clients("neutron").create_port({"port": port_create_args})
+        self._register_resource("neutron", "ports", port["port"]["id"])
+        return port
 
     @base.atomic_action_timer('neutron.list_ports')
     def _list_ports(self):
@@ -246,6 +258,7 @@ class NeutronScenario(base.Scenario):
         :param port: Port object
         """
         self.clients("neutron").delete_port(port['port']['id'])
+        self._unregister_resource("neutron", "ports", port['port']['id'])
 
     def _create_network_and_subnets(self,
                                     network_create_args,
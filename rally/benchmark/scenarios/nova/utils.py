@@ -115,6 +115,7 @@ class NovaScenario(base.Scenario):
 
         server = self.clients("nova").servers.create(server_name, image_id,
                                                      flavor_id, **kwargs)
+        self._register_resource("nova", "servers", server.id)
 
         time.sleep(CONF.benchmark.nova_server_boot_prepoll_delay)
         server = bench_utils.wait_for(
@@ -260,6 +261,7 @@ class NovaScenario(base.Scenario):
             timeout=CONF.benchmark.nova_server_delete_timeout,
             check_interval=CONF.benchmark.nova_server_delete_poll_interval
         )
+        self._unregister_resource("nova", "servers", server.id)
 
     @base.atomic_action_timer('nova.delete_all_servers')
     def _delete_all_servers(self):
@@ -284,6 +286,7 @@ class NovaScenario(base.Scenario):
             timeout=CONF.benchmark.nova_server_image_delete_timeout,
             check_interval=check_interval
         )
+        self._unregister_resource("nova", "images", image.id)
 
     @base.atomic_action_timer('nova.create_image')
     def _create_image(self, server):
@@ -298,6 +301,7 @@ class NovaScenario(base.Scenario):
         """
         image_uuid = self.clients("nova").servers.create_image(server,
                                                                server.name)
+        self._register_resource("nova", "images", image_uuid)
         image = self.clients("nova").images.get(image_uuid)
         check_interval = CONF.benchmark.nova_server_image_create_poll_interval
         image = bench_utils.wait_for(
@@ -337,6 +341,8 @@ class NovaScenario(base.Scenario):
         #                created servers manyally.
         servers = filter(lambda server: server.name.startswith(name_prefix),
                          self.clients("nova").servers.list())
+        for server in servers:
+            self._register_resource("nova", "servers", server.id)
         time.sleep(CONF.benchmark.nova_server_boot_prepoll_delay)
         servers = [bench_utils.wait_for(
             server,
@@ -366,7 +372,9 @@ class NovaScenario(base.Scenario):
 
         :returns: The created floating ip
         """
-        return self.clients("nova").floating_ips.create(pool)
+        floating_ip = self.clients("nova").floating_ips.create(pool)
+        self._register_resource("nova", "floating_ips", floating_ip.id)
+        return floating_ip
 
     @base.atomic_action_timer('nova.delete_floating_ip')
     def _delete_floating_ip(self, floating_ip):
@@ -379,6 +387,7 @@ class NovaScenario(base.Scenario):
             floating_ip,
             update_resource=bench_utils.get_from_manager()
         )
+        self._unregister_resource("nova", "floating_ips", floating_ip.id)
 
     @base.atomic_action_timer('nova.associate_floating_ip')
     def _associate_floating_ip(self, server, address, fixed_address=None):
@@ -19,6 +19,7 @@ from saharaclient.api import base as sahara_base
 from rally.benchmark.scenarios import base
 from rally.benchmark import utils as bench_utils
 from rally import exceptions
+from rally.openstack.common.gettextutils import _
 from rally.openstack.common import log as logging
 
 LOG = logging.getLogger(__name__)
@@ -0,0 +1,309 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark of the overhead of Rally's own scenario runners.
+
+Dummy.dummy with zero sleep (by default) is run without any cloud through
+scenario runners at several concurrency levels, so all the measured time is
+spent by Rally itself: starting processes, pickling of scenario context,
+validation of results, logging and so on. Memory is read from /proc, so
+peak RSS is reported only on Linux.
+
+Start of the command line interface is benchmarked separately: time to
+import its modules and time until common commands print their first output.
+"""
+
+import collections
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from rally.benchmark import engine
+from rally.benchmark.runners import base
+from rally import consts
+from rally.objects import endpoint
+
+
+# NOTE: The "distributed" runner needs workers started with the
+#       "rally worker start" command and the "saturation" runner searches
+#       for a load instead of keeping it, so they are not benchmarked.
+RUNNER_CONFIGS = collections.OrderedDict([
+    (consts.RunnerType.SERIAL,
+     lambda concurrency, times, duration: {"times": times}),
+    (consts.RunnerType.CONSTANT,
+     lambda concurrency, times, duration: {"times": concurrency * times,
+                                           "concurrency": concurrency}),
+    (consts.RunnerType.CONSTANT_FOR_DURATION,
+     lambda concurrency, times, duration: {"duration": duration,
+                                           "concurrency": concurrency}),
+    (consts.RunnerType.CONSTANT_ASYNC,
+     lambda concurrency, times, duration: {"times": concurrency * times,
+                                           "concurrency": concurrency}),
+    (consts.RunnerType.RPS,
+     lambda concurrency, times, duration: {"times": concurrency * times,
+                                           "rps": concurrency * 1000,
+                                           "max_concurrency": concurrency}),
+    (consts.RunnerType.RAMP,
+     lambda concurrency, times, duration: {
+         "stages": [{"concurrency": concurrency, "duration": duration}]})
+])
+
+COLUMNS = ["runner", "concurrency", "iterations", "processes",
+           "iterations/sec", "overhead (ms/iter)", "consumer (results/sec)",
+           "peak rss (MB)"]
+
+STARTUP_COMMANDS = [
+    ("import rally.cmd.main", ["-c", "import rally.cmd.main; print(0)"]),
+    ("rally version", ["-m", "rally.cmd.main", "version"]),
+    ("rally task list", ["-m", "rally.cmd.main", "task", "list"]),
+    ("rally deployment list", ["-m", "rally.cmd.main", "deployment", "list"])
+]
+
+STARTUP_COLUMNS = ["command", "first output (ms)", "exit (ms)"]
+
+# Columns compared with the baseline and whether greater values are better.
+COMPARED_COLUMNS = [("iterations/sec", True),
+                    ("overhead (ms/iter)", False),
+                    ("consumer (results/sec)", True),
+                    ("peak rss (MB)", False),
+                    ("first output (ms)", False)]
+
+
+def _process_rss(pid):
+    try:
+        with open("/proc/%d/status" % pid) as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return 0
+
+
+def _children(pid):
+    children = []
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return children
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open("/proc/%s/stat" % name) as stat:
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (IOError, IndexError):
+            continue
+        if ppid == pid:
+            children.append(int(name))
+    return children
+
+
+class Sampler(threading.Thread):
+    """Samples the number and total RSS of the runner processes."""
+
+    def __init__(self, interval=0.05):
+        super(Sampler, self).__init__()
+        self.daemon = True
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.max_processes = 0
+        self.max_rss = 0
+
+    def run(self):
+        pid = os.getpid()
+        while not self.stopped.is_set():
+            pids = [pid] + _children(pid)
+            self.max_processes = max(self.max_processes, len(pids))
+            self.max_rss = max(self.max_rss, sum(map(_process_rss, pids)))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class _ResultsSink(object):
+    """Task that keeps results in memory instead of the database."""
+
+    def __init__(self):
+        self.results = 0
+
+    def create_chunked_results(self, key):
+        return 0
+
+    def append_results_chunk(self, result_id, position, chunk):
+        self.results += len(chunk)
+
+    def finish_chunked_results(self, result_id, data):
+        pass
+
+    def get_status(self):
+        return consts.TaskStatus.RUNNING
+
+
+def _context():
+    user = {"id": "user",
+            "endpoint": endpoint.Endpoint("http://localhost:5000/v2.0",
+                                          "user", "password", "tenant")}
+    return {"task": {"uuid": "selfbench"}, "admin": user, "users": [user]}
+
+
+def _consume(runner, results):
+    """Measure throughput of the benchmark engine's result consumer."""
+    runner.result_queue = collections.deque(results)
+    is_done = threading.Event()
+    is_done.set()
+    sink = _ResultsSink()
+    key = {"name": "Dummy.dummy", "pos": 0,
+           "kw": {"sla": {"max_failure_percent": 0}}}
+    start = time.time()
+    engine.BenchmarkEngine({}, sink).consume_results(key, sink, runner,
+                                                     is_done)
+    duration = time.time() - start
+    return len(results) / duration if duration else None
+
+
+def run(runner_type, concurrency, times=20, duration=1, sleep=0):
+    """Run Dummy.dummy through the runner.
+
+    :param runner_type: type of the scenario runner
+    :param concurrency: number of concurrent iterations
+    :param times: number of iterations per concurrent slot
+    :param duration: seconds of load for runners that keep it for duration
+    :param sleep: seconds each iteration of Dummy.dummy sleeps
+    :returns: dict with values of all COLUMNS
+    """
+    if runner_type == consts.RunnerType.SERIAL:
+        concurrency = 1
+    config = RUNNER_CONFIGS[runner_type](concurrency, times, duration)
+    config["type"] = runner_type
+    runner = base.ScenarioRunner.get_runner(None, config)
+
+    sampler = Sampler()
+    sampler.start()
+    try:
+        run_duration = runner.run("Dummy.dummy", _context(),
+                                  {"sleep": sleep})
+    finally:
+        sampler.stop()
+
+    results = list(runner.result_queue)
+    iterations = len(results)
+    busy = sum(r["duration"] + r["idle_duration"] for r in results)
+    # NOTE: Each of concurrent slots is either running the scenario or
+    #       waiting for Rally to dispatch the next iteration to it.
+    overhead = ((run_duration * concurrency - busy) * 1000.0 / iterations
+                if iterations else None)
+    return {"runner": runner_type,
+            "concurrency": concurrency,
+            "iterations": iterations,
+            "processes": sampler.max_processes,
+            "iterations/sec": (iterations / run_duration
+                               if run_duration else None),
+            "overhead (ms/iter)": overhead,
+            "consumer (results/sec)": _consume(runner, results),
+            "peak rss (MB)": sampler.max_rss / 1024.0}
+
+
+def run_all(runner_types, concurrency_levels, times=20, duration=1,
+            sleep=0):
+    """Run the self benchmark for each runner and concurrency level.
+
+    The serial runner is run only once, because it has no concurrency.
+
+    :returns: list of dicts returned by run()
+    """
+    rows = []
+    for runner_type in runner_types:
+        levels = ([1] if runner_type == consts.RunnerType.SERIAL
+                  else concurrency_levels)
+        for concurrency in levels:
+            rows.append(run(runner_type, concurrency, times, duration,
+                            sleep))
+    return rows
+
+
+def _time_command(args, env):
+    start = time.time()
+    process = subprocess.Popen([sys.executable, "-u"] + args, env=env,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    process.stdout.read(1)
+    first_output = time.time() - start
+    process.communicate()
+    return first_output, time.time() - start
+
+
+def run_startup(commands=None, repeat=3):
+    """Measure how fast the command line interface starts.
+
+    Each command is run in a new Python interpreter, so nothing is imported
+    in advance. The best time of all repeats is reported.
+
+    :param commands: list of (name, interpreter arguments), STARTUP_COMMANDS
+                     by default
+    :param repeat: number of runs of each command
+    :returns: list of dicts with values of all STARTUP_COLUMNS
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [root, env.get("PYTHONPATH")]))
+    rows = []
+    for name, args in commands or STARTUP_COMMANDS:
+        times = [_time_command(args, env) for i in range(repeat)]
+        rows.append({"command": name,
+                     "first output (ms)": min(t[0] for t in times) * 1000,
+                     "exit (ms)": min(t[1] for t in times) * 1000})
+    return rows
+
+
+def _row_key(row):
+    if "command" in row:
+        return row["command"]
+    return "%s, concurrency %s" % (row["runner"], row["concurrency"])
+
+
+def compare(rows, baseline, tolerance=20):
+    """Find results that are worse than the baseline.
+
+    :param rows: results returned by run_all() or run_startup()
+    :param baseline: results of a previous run of the same function
+    :param tolerance: allowed degradation of each value in percent
+    :returns: list of messages, one for each degraded value
+    """
+    baseline = dict((_row_key(r), r) for r in baseline)
+    regressions = []
+    for row in rows:
+        old = baseline.get(_row_key(row))
+        if not old:
+            continue
+        for column, greater_is_better in COMPARED_COLUMNS:
+            new_value, old_value = row.get(column), old.get(column)
+            if not (new_value and old_value):
+                continue
+            change = (new_value - old_value) * 100.0 / old_value
+            if not greater_is_better:
+                change = -change
+            if change < -tolerance:
+                regressions.append(
+                    "%(key)s: %(column)s %(old).2f -> %(new).2f" %
+                    {"key": _row_key(row), "column": column,
+                     "old": old_value, "new": new_value})
+    return regressions
@@ -24,7 +24,6 @@ import abc
 import jsonschema
 import six
 
-from rally.benchmark.processing import utils as putils
 from rally.openstack.common.gettextutils import _
 from rally import utils
 
@@ -38,12 +37,27 @@ class SLAResult(object):
 
 @six.add_metaclass(abc.ABCMeta)
 class SLA(object):
-    """Factory for criteria classes."""
+    """Factory for criteria classes.
+
+    Criteria are checked incrementally: an instance of criterion class is
+    updated with results of iterations one by one as they arrive, so SLA
+    failures are detected while the benchmark is still running.
+    """
+
+    # NOTE: Rates and averages of the first iterations are too noisy to
+    #       abort a benchmark of unknown length because of them.
+    MIN_ITERATIONS_TO_ABORT = 10
+
+    def __init__(self, criterion_value):
+        self.criterion_value = criterion_value
+        self.success = True
 
     @staticmethod
     def validate(config):
         properties = dict([(c.OPTION_NAME, c.CONFIG_SCHEMA)
-                           for c in utils.itersubclasses(SLA)])
+                           for c in utils.get_subclasses(SLA)])
+        properties["abort_on_failure"] = {"type": "boolean"}
+        properties["include_warmup"] = {"type": "boolean"}
         schema = {
             "type": "object",
             "properties": properties,
@@ -51,15 +65,43 @@ class SLA(object):
         }
         jsonschema.validate(config, schema)
 
-    @staticmethod
     @abc.abstractmethod
-    def check(criterion_value, result):
+    def add_iteration(self, iteration):
+        """Update the criterion with result of the next iteration.
+
+        :param iteration: result of a single iteration
+        :returns: True if the criterion is met by all iterations so far
+        """
+
+    @abc.abstractmethod
+    def details(self):
+        """Describe the criterion and its actual value."""
+
+    def can_recover(self, remaining):
+        """Check if the failed criterion may still be met in the end.
+
+        Criteria like the maximum duration fail for good, so by default
+        a failure can't be recovered.
+
+        :param remaining: max number of iterations left, None if unknown
+        """
+        return False
+
+    def result(self):
+        return SLAResult(self.success, self.details())
+
+    @classmethod
+    def check(cls, criterion_value, result):
         """Check if task succeeded according to criterion.
 
         :param criterion_value: Criterion value specified in configuration
         :param result: result object
-        :returns: True if success
+        :returns: SLAResult instance
         """
+        criterion = cls(criterion_value)
+        for iteration in result:
+            criterion.add_iteration(iteration)
+        return criterion.result()
 
     @staticmethod
     def check_all(config, result):
@@ -72,9 +114,14 @@ class SLA(object):
 
         results = []
         opt_name_map = dict([(c.OPTION_NAME, c)
-                             for c in utils.itersubclasses(SLA)])
+                             for c in utils.get_subclasses(SLA)])
+        sla = config.get("sla", {})
+        if not sla.get("include_warmup"):
+            result = [r for r in result if not r.get("warmup")]
 
-        for name, criterion in config.get("sla", {}).iteritems():
+        for name, criterion in sla.iteritems():
+            if name in ("abort_on_failure", "include_warmup"):
+                continue
             check_result = opt_name_map[name].check(criterion, result)
             results.append({'criterion': name,
                             'success': check_result.success,
@@ -82,21 +129,147 @@ class SLA(object):
         return results
 
 
+class _CheckOnlySLA(object):
+    """Adapter for criteria classes that implement only check().
+
+    Such criteria can't be checked incrementally, so results of all
+    iterations are kept and checked when the result is requested.
+    """
+
+    def __init__(self, criterion_cls, criterion_value):
+        self.criterion_cls = criterion_cls
+        self.criterion_value = criterion_value
+        self.iterations = []
+
+    def add_iteration(self, iteration):
+        self.iterations.append(iteration)
+        return True
+
+    @property
+    def success(self):
+        return True
+
+    def result(self):
+        return self.criterion_cls.check(self.criterion_value,
+                                        self.iterations)
+
+
+def _get_criterion(criterion_cls, criterion_value):
+    """Create an incremental criterion of the class.
+
+    :param criterion_cls: subclass of SLA
+    :param criterion_value: criterion value specified in configuration
+    :returns: object with add_iteration() and result() methods
+    """
+    if "add_iteration" in getattr(criterion_cls, "__abstractmethods__", ()):
+        return _CheckOnlySLA(criterion_cls, criterion_value)
+    return criterion_cls(criterion_value)
+
+
+class SLAChecker(object):
+    """Checks all SLA criteria of a benchmark while its results arrive."""
+
+    def __init__(self, config):
+        """SLAChecker constructor.
+
+        :param config: benchmark config, criteria are taken from its "sla"
+                       section
+        """
+        sla = dict(config.get("sla", {}))
+        self.abort_on_failure = sla.pop("abort_on_failure", False)
+        self.include_warmup = sla.pop("include_warmup", False)
+        opt_name_map = dict([(c.OPTION_NAME, c)
+                             for c in utils.get_subclasses(SLA)])
+        self.criteria = [(name, _get_criterion(opt_name_map[name], value))
+                         for name, value in sla.iteritems()]
+        self.times = config.get("runner", {}).get("times")
+        self.received = 0
+        self.iterations = 0
+        self.failed_at = {}
+
+    def add_iteration(self, iteration):
+        """Update all criteria with result of the next iteration.
+
+        Results of warm-up iterations are skipped unless the "include_warmup"
+        option is set in the "sla" section.
+
+        :param iteration: result of a single iteration
+        :returns: True if all criteria are met by all iterations so far
+        """
+        self.received += 1
+        if iteration.get("warmup") and not self.include_warmup:
+            return all(criterion.success for name, criterion in self.criteria)
+        self.iterations += 1
+        success = True
+        for name, criterion in self.criteria:
+            if not criterion.add_iteration(iteration):
+                self.failed_at.setdefault(name, self.iterations)
+                success = False
+        return success
+
+    def should_abort(self):
+        """Check if the benchmark should be aborted because of its SLA.
+
+        It is aborted if "abort_on_failure" is set and a failed criterion
+        can't be met anymore, even if all the remaining iterations succeed.
+        """
+        if not self.abort_on_failure:
+            return False
+        remaining = (max(self.times - self.received, 0)
+                     if self.times is not None else None)
+        return any(not criterion.success and
+                   not criterion.can_recover(remaining)
+                   for name, criterion in self.criteria)
+
+    def results(self):
+        """Return results of all criteria.
+
+        Each failed criterion contains the number of iteration results
+        received by the moment when the criterion failed for the first time.
+        """
+        results = []
+        for name, criterion in self.criteria:
+            check_result = criterion.result()
+            failed_at = (None if check_result.success
+                         else self.failed_at.get(name))
+            results.append({"criterion": name,
+                            "success": check_result.success,
+                            "detail": check_result.msg,
+                            "failed_at_iteration": failed_at})
+        return results
+
+
 class FailureRate(SLA):
     """Failure rate in percents."""
     OPTION_NAME = "max_failure_percent"
     CONFIG_SCHEMA = {"type": "number", "minimum": 0.0, "maximum": 100.0}
 
-    @staticmethod
-    def check(criterion_value, result):
-        errors = len(filter(lambda x: x['error'], result))
-        if criterion_value < errors * 100.0 / len(result):
-            success = False
-        else:
-            success = True
-        msg = (_("Maximum failure percent %s%% failures, actually %s%%") %
-                (criterion_value * 100.0, errors * 100.0 / len(result)))
-        return SLAResult(success, msg)
+    def __init__(self, criterion_value):
+        super(FailureRate, self).__init__(criterion_value)
+        self.total = 0
+        self.errors = 0
+
+    def _failure_percent(self):
+        return self.errors * 100.0 / self.total if self.total else 0.0
+
+    def add_iteration(self, iteration):
+        self.total += 1
+        if iteration["error"]:
+            self.errors += 1
+        self.success = self.criterion_value >= self._failure_percent()
+        return self.success
+
+    def can_recover(self, remaining):
+        if not self.criterion_value:
+            return False
+        if remaining is None:
+            return self.total < self.MIN_ITERATIONS_TO_ABORT
+        best = self.errors * 100.0 / (self.total + remaining)
+        return self.criterion_value >= best
+
+    def details(self):
+        return (_("Maximum failure percent %s%% failures, actually %s%%") %
+                (self.criterion_value * 100.0, self._failure_percent()))
 
 
 class IterationTime(SLA):
@@ -105,18 +278,20 @@ class IterationTime(SLA):
     CONFIG_SCHEMA = {"type": "number", "minimum": 0.0,
                      "exclusiveMinimum": True}
 
-    @staticmethod
-    def check(criterion_value, result):
-        duration = 0
-        success = True
-        for i in result:
-            if i['duration'] >= duration:
-                duration = i['duration']
-            if i['duration'] > criterion_value:
-                success = False
-        msg = (_("Maximum seconds per iteration %ss, found with %ss") %
-                (criterion_value, duration))
-        return SLAResult(success, msg)
+    def __init__(self, criterion_value):
+        super(IterationTime, self).__init__(criterion_value)
+        self.max_duration = 0
+
+    def add_iteration(self, iteration):
+        if iteration["duration"] >= self.max_duration:
+            self.max_duration = iteration["duration"]
+        if iteration["duration"] > self.criterion_value:
+            self.success = False
+        return self.success
+
+    def details(self):
+        return (_("Maximum seconds per iteration %ss, found with %ss") %
+                (self.criterion_value, self.max_duration))
 
 
 class MaxAverageDuration(SLA):
@@ -125,11 +300,28 @@ class MaxAverageDuration(SLA):
     CONFIG_SCHEMA = {"type": "number", "minimum": 0.0,
                      "exclusiveMinimum": True}
 
-    @staticmethod
-    def check(criterion_value, result):
-        durations = [r["duration"] for r in result if not r.get("error")]
-        avg = putils.mean(durations)
-        success = avg < criterion_value
-        msg = (_("Maximum average duration per iteration %ss, found with %ss")
-               % (criterion_value, avg))
-        return SLAResult(success, msg)
+    def __init__(self, criterion_value):
+        super(MaxAverageDuration, self).__init__(criterion_value)
+        self.total_duration = 0.0
+        self.count = 0
+
+    def _average(self):
+        return self.total_duration / self.count if self.count else None
+
+    def add_iteration(self, iteration):
+        if not iteration.get("error"):
+            self.total_duration += iteration["duration"]
+            self.count += 1
+            self.success = self._average() < self.criterion_value
+        return self.success
+
+    def can_recover(self, remaining):
+        if remaining is None:
+            return self.count < self.MIN_ITERATIONS_TO_ABORT
+        return (remaining > 0 and
+                self.total_duration / (self.count + remaining) <
+                self.criterion_value)
+
+    def details(self):
+        return (_("Maximum average duration per iteration %ss, "
+                  "found with %ss") % (self.criterion_value, self._average()))
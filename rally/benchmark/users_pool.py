@@ -0,0 +1,248 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Persistent pool of tenants and users of a deployment.
+
+Creating tenants and users in keystone takes a noticeable part of short
+tasks. Tenants of the pool are created once, stored in the database with
+credentials of their users and leased to tasks whole: a tenant is used by
+one task at a time, and it is returned to the pool when the task finishes.
+Leases of tasks that have finished without returning them, and leases
+older than the lease timeout, e.g. of tasks stuck in running state after a
+crash, are released on the next lease.
+"""
+
+import collections
+import uuid
+
+from oslo.config import cfg
+
+from rally.benchmark import utils
+from rally.benchmark.wrappers import keystone
+from rally import consts
+from rally import db
+from rally import exceptions
+from rally.objects import endpoint
+from rally.openstack.common import log as logging
+from rally import osclients
+
+
+LOG = logging.getLogger(__name__)
+
+users_pool_opts = [
+    cfg.IntOpt("users_pool_lease_timeout",
+               default=86400,
+               help="Time in seconds after which tenants of the users pool "
+                    "leased to a task are returned to the pool, even if the "
+                    "task is still running. 0 for no limit."),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(users_pool_opts, group="users_context")
+
+
+class UsersPool(object):
+    """Tenants and users of a deployment that are kept between tasks."""
+
+    PATTERN_TENANT = "ctx_rally_pool_%(uid)s_tenant"
+    PATTERN_USER = "ctx_rally_pool_%(tenant_id)s_user_%(uid)d"
+
+    def __init__(self, deployment_uuid, admin_endpoint, concurrent=30,
+                 project_domain="default", user_domain="default"):
+        self.deployment_uuid = deployment_uuid
+        self.endpoint = admin_endpoint
+        self.concurrent = concurrent
+        self.project_domain = project_domain
+        self.user_domain = user_domain
+
+    @classmethod
+    def _create_tenant_users(cls, args):
+        """Create tenant with users that have random passwords.
+
+        :param args: tuple arguments, for Pool.imap()
+        :returns: list of dicts with data on users for db.users_pool_create
+        """
+        admin_endpoint, users_num, project_dom, user_dom = args
+        users = []
+
+        client = keystone.wrap(osclients.Clients(admin_endpoint).keystone())
+        tenant = client.create_project(
+            cls.PATTERN_TENANT % {"uid": uuid.uuid4().hex}, project_dom)
+
+        LOG.debug("Creating %d pooled users for tenant %s" %
+                  (users_num, tenant.id))
+
+        for user_id in range(users_num):
+            username = cls.PATTERN_USER % {"tenant_id": tenant.id,
+                                           "uid": user_id}
+            password = uuid.uuid4().hex
+            user = client.create_user(username, password,
+                                      "%s@email.me" % username, tenant.id,
+                                      user_dom)
+            user_endpoint = endpoint.Endpoint(client.auth_url, user.name,
+                                              password, tenant.name,
+                                              consts.EndpointPermission.USER,
+                                              client.region_name,
+                                              project_domain_name=project_dom,
+                                              user_domain_name=user_dom)
+            users.append({"tenant_id": tenant.id,
+                          "tenant_name": tenant.name,
+                          "user_id": user.id,
+                          "endpoint": user_endpoint})
+        return users
+
+    @classmethod
+    def _delete_tenant_users(cls, args):
+        """Delete users of a tenant and the tenant.
+
+        :param args: tuple arguments, for Pool.imap()
+        """
+        admin_endpoint, tenant_id, user_ids = args
+        client = keystone.wrap(osclients.Clients(admin_endpoint).keystone())
+
+        for user_id in user_ids:
+            try:
+                client.delete_user(user_id)
+            except Exception as ex:
+                LOG.warning("Failed to delete user: %(user_id)s. "
+                            "Exception: %(ex)s" %
+                            {"user_id": user_id, "ex": ex})
+        try:
+            client.delete_project(tenant_id)
+        except Exception as ex:
+            LOG.warning("Failed to delete tenant: %(tenant_id)s. "
+                        "Exception: %(ex)s" %
+                        {"tenant_id": tenant_id, "ex": ex})
+
+    def create(self, tenants, users_per_tenant):
+        """Add new tenants with users to the pool.
+
+        :param tenants: number of tenants to create
+        :param users_per_tenant: number of users of each tenant
+        """
+        args = [(self.endpoint, users_per_tenant, self.project_domain,
+                 self.user_domain) for i in range(tenants)]
+        for users in utils.run_concurrent(self.concurrent, UsersPool,
+                                          "_create_tenant_users", args):
+            db.users_pool_create(self.deployment_uuid, users)
+
+    def check(self):
+        """Remove users whose tenant or user is missing in keystone.
+
+        Tenants and users are listed once for the whole pool, so the check
+        is cheap compared to creation of new tenants.
+
+        :returns: number of removed users
+        """
+        users = db.users_pool_get(self.deployment_uuid)
+        if not users:
+            return 0
+        client = keystone.wrap(osclients.Clients(self.endpoint).keystone())
+        user_ids = set(user.id for user in client.list_users())
+        tenant_ids = set(tenant.id for tenant in client.list_projects())
+        broken = [user.id for user in users
+                  if user.user_id not in user_ids or
+                  user.tenant_id not in tenant_ids]
+        if broken:
+            LOG.warning("Removing %d broken users from the users pool of "
+                        "deployment %s" % (len(broken), self.deployment_uuid))
+            db.users_pool_delete(broken)
+        return len(broken)
+
+    @staticmethod
+    def _group(users, users_per_tenant):
+        by_tenant = collections.OrderedDict()
+        for user in users:
+            by_tenant.setdefault(user.tenant_id, []).append(user)
+        tenants = []
+        context_users = []
+        for tenant_id, tenant_users in by_tenant.items():
+            tenants.append({"id": tenant_id,
+                            "name": tenant_users[0].tenant_name})
+            for user in tenant_users[:users_per_tenant]:
+                context_users.append({"id": user.user_id,
+                                      "endpoint": user.endpoint,
+                                      "tenant_id": tenant_id})
+        return tenants, context_users
+
+    def lease(self, task_uuid, tenants, users_per_tenant):
+        """Lease tenants to the task, creating missing ones.
+
+        :param task_uuid: UUID of the task
+        :param tenants: number of tenants to lease
+        :param users_per_tenant: number of users of each tenant
+        :raises: :class:`rally.exceptions.UsersPoolExhausted` if leased
+                 tenants are taken by other tasks right after creation
+        :returns: tuple (list of tenants, list of users) in the format of
+                  the users context
+        """
+        self.check()
+        lease_timeout = CONF.users_context.users_pool_lease_timeout
+        users = db.users_pool_lease(self.deployment_uuid, task_uuid,
+                                    tenants, users_per_tenant, lease_timeout)
+        missing = tenants - len(set(user.tenant_id for user in users))
+        if missing:
+            LOG.info("Adding %d tenants to the users pool of deployment %s" %
+                     (missing, self.deployment_uuid))
+            self.create(missing, users_per_tenant)
+            users += db.users_pool_lease(self.deployment_uuid, task_uuid,
+                                         missing, users_per_tenant,
+                                         lease_timeout)
+        leased_tenants, leased_users = self._group(users, users_per_tenant)
+        if len(leased_tenants) < tenants:
+            self.release(task_uuid)
+            raise exceptions.UsersPoolExhausted(
+                tenants=tenants, users=users_per_tenant,
+                uuid=self.deployment_uuid)
+        return leased_tenants, leased_users
+
+    def release(self, task_uuid, tenant_ids=None):
+        """Return tenants leased to the task to the pool.
+
+        :param task_uuid: UUID of the task
+        :param tenant_ids: list of tenants to return, all if None
+        """
+        db.users_pool_release(task_uuid, tenant_ids)
+
+    def get_user(self):
+        """Return endpoint of any user of the pool or None if it is empty."""
+        users = db.users_pool_get(self.deployment_uuid)
+        return users[0].endpoint if users else None
+
+    def delete(self):
+        """Delete tenants and users of the pool that aren't leased.
+
+        :returns: number of tenants left, because they are leased to
+                  running tasks
+        """
+        # NOTE: Tenants are leased for deletion, so running tasks can't
+        #       lease them in the meantime.
+        lease_uuid = str(uuid.uuid4())
+        lease_timeout = CONF.users_context.users_pool_lease_timeout
+        users = db.users_pool_lease(self.deployment_uuid, lease_uuid,
+                                    len(db.users_pool_get(
+                                        self.deployment_uuid)), 0,
+                                    lease_timeout, deleting=True)
+        by_tenant = collections.OrderedDict()
+        for user in users:
+            by_tenant.setdefault(user.tenant_id, []).append(user)
+        utils.run_concurrent(
+            self.concurrent, UsersPool, "_delete_tenant_users",
+            [(self.endpoint, tenant_id, [user.user_id for user in t_users])
+             for tenant_id, t_users in by_tenant.items()])
+        db.users_pool_delete([user.id for user in users])
+        left = set(user.tenant_id
+                   for user in db.users_pool_get(self.deployment_uuid))
+        return len(left)
@@ -13,19 +13,58 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import abc
+import collections
 import itertools
 import logging
 import multiprocessing
+import os
+import sys
+import threading
 import time
 import traceback
 
 from novaclient.v1_1 import servers
+from oslo.config import cfg
+import six
 
 from rally import exceptions
+from rally import httppool
+from rally import utils as rutils
 
 
 LOG = logging.getLogger(__name__)
 
+CONF = cfg.CONF
+polling_opts = [
+    cfg.BoolOpt("batch_status_polling", default=False,
+                help="Refresh statuses of all resources that are waited for "
+                     "in one process with one list call per client manager "
+                     "instead of getting each resource separately"),
+    cfg.StrOpt("polling_strategy", default="fixed",
+               help="Strategy of choosing intervals between checks of "
+                    "resource statuses: \"fixed\" uses the poll interval of "
+                    "the action, \"exponential\" grows the interval from "
+                    "polling_min_interval by polling_backoff_factor up to "
+                    "polling_max_interval, \"adaptive\" polls densely "
+                    "around the end of the action expected from its "
+                    "previous runs"),
+    cfg.FloatOpt("polling_min_interval", default=0.25,
+                 help="The shortest interval in seconds between checks of "
+                      "resource statuses of the exponential and adaptive "
+                      "polling strategies"),
+    cfg.FloatOpt("polling_max_interval", default=30.0,
+                 help="The longest interval in seconds between checks of "
+                      "resource statuses of the exponential and adaptive "
+                      "polling strategies"),
+    cfg.FloatOpt("polling_backoff_factor", default=2.0,
+                 help="Factor of growth of intervals between checks of "
+                      "resource statuses of the exponential polling "
+                      "strategy")
+]
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(polling_opts, group=benchmark_group)
+
 
 def chunks(data, step):
     """Split collection into chunks.
@@ -56,15 +95,7 @@ def get_from_manager(error_statuses=None):
     error_statuses = error_statuses or ["ERROR"]
     error_statuses = map(lambda str: str.upper(), error_statuses)
 
-    def _get_from_manager(resource):
-        # catch client side errors
-        try:
-            res = resource.manager.get(resource.id)
-        except Exception as e:
-            if getattr(e, 'code', 400) == 404:
-                raise exceptions.GetResourceNotFound(resource=resource)
-            raise exceptions.GetResourceFailure(resource=resource, err=e)
-
+    def _check_status(res):
         # catch abnormal status, such as "no valid host" for servers
         status = get_status(res)
 
@@ -80,6 +111,19 @@ def get_from_manager(error_statuses=None):
 
         return res
 
+    def _get_from_manager(resource):
+        # catch client side errors
+        try:
+            res = resource.manager.get(resource.id)
+        except Exception as e:
+            if getattr(e, 'code', 400) == 404:
+                raise exceptions.GetResourceNotFound(resource=resource)
+            raise exceptions.GetResourceFailure(resource=resource, err=e)
+
+        return _check_status(res)
+
+    # NOTE: StatusPoller checks statuses of listed resources the same way.
+    _get_from_manager.check_status = _check_status
     return _get_from_manager
 
 
@@ -89,8 +133,333 @@ def manager_list_size(sizes):
     return _list
 
 
+# Status checks are counted for each atomic action that is running in the
+# current thread, so that the scenario records how many polls it made.
+_polls = threading.local()
+
+
+def start_polls_count(action):
+    """Start counting status checks made inside of the atomic action."""
+    if not hasattr(_polls, "stack"):
+        _polls.stack = []
+    _polls.stack.append([action, 0])
+
+
+def stop_polls_count():
+    """Stop counting status checks of the innermost atomic action.
+
+    :returns: number of checks made since the matching start_polls_count(),
+              including checks made by atomic actions nested in it
+    """
+    return _polls.stack.pop()[1]
+
+
+def _current_action():
+    stack = getattr(_polls, "stack", None)
+    return stack[-1][0] if stack else None
+
+
+def _count_polls(polls):
+    for counter in getattr(_polls, "stack", []):
+        counter[1] += polls
+
+
+@six.add_metaclass(abc.ABCMeta)
+class PollingStrategy(object):
+    """Chooses intervals between consecutive checks of a resource status."""
+
+    __polling_strategy__ = None
+
+    def __init__(self, check_interval, action=None):
+        """Create a strategy for one wait for a resource.
+
+        :param check_interval: poll interval configured for the action
+        :param action: name of the atomic action that waits for the resource
+        """
+        self.check_interval = check_interval
+        self.action = action
+
+    @abc.abstractmethod
+    def next_interval(self, elapsed, polls):
+        """Return the number of seconds to sleep before the next check.
+
+        :param elapsed: seconds passed since the start of waiting
+        :param polls: number of checks made so far
+        """
+
+    def finished(self, elapsed):
+        """Notify the strategy that the wait finished after elapsed seconds."""
+
+
+class FixedPolling(PollingStrategy):
+    """Checks the resource each check_interval seconds."""
+
+    __polling_strategy__ = "fixed"
+
+    def next_interval(self, elapsed, polls):
+        return self.check_interval
+
+
+class ExponentialPolling(PollingStrategy):
+    """Starts with short intervals and makes them longer after each check."""
+
+    __polling_strategy__ = "exponential"
+
+    # NOTE: Greater powers of the factor would only overflow, the interval
+    #       is capped by polling_max_interval long before.
+    MAX_POWER = 64
+
+    def next_interval(self, elapsed, polls):
+        power = min(polls - 1, self.MAX_POWER)
+        interval = (CONF.benchmark.polling_min_interval *
+                    CONF.benchmark.polling_backoff_factor ** power)
+        return min(interval, CONF.benchmark.polling_max_interval)
+
+
+# Moving average of durations of waits in each atomic action, shared by all
+# threads of the process.
+_wait_estimates = {}
+_wait_estimates_lock = threading.Lock()
+
+
+class AdaptivePolling(PollingStrategy):
+    """Polls densely around the expected end of the wait.
+
+    The wait is expected to take as long as the moving average of previous
+    waits in the same atomic action. Before that the interval is a half of
+    the remaining time, so the check gets closer to the expected end; after
+    it the interval grows with the delay up to check_interval. Until the
+    first wait of the action finishes, check_interval is used.
+    """
+
+    __polling_strategy__ = "adaptive"
+
+    SMOOTHING = 0.3
+
+    def __init__(self, check_interval, action=None):
+        super(AdaptivePolling, self).__init__(check_interval, action)
+        with _wait_estimates_lock:
+            self.estimate = _wait_estimates.get(action)
+
+    def next_interval(self, elapsed, polls):
+        if self.estimate is None:
+            return self.check_interval
+        if elapsed < self.estimate:
+            interval = (self.estimate - elapsed) / 2.0
+        else:
+            interval = min((elapsed - self.estimate) / 2.0,
+                           self.check_interval)
+        return min(max(interval, CONF.benchmark.polling_min_interval),
+                   CONF.benchmark.polling_max_interval)
+
+    def finished(self, elapsed):
+        if self.action is None:
+            return
+        with _wait_estimates_lock:
+            estimate = _wait_estimates.get(self.action)
+            if estimate is None:
+                _wait_estimates[self.action] = elapsed
+            else:
+                _wait_estimates[self.action] = (
+                    estimate + self.SMOOTHING * (elapsed - estimate))
+
+
+def get_polling_strategy(check_interval, name=None):
+    """Create the polling strategy for a wait in the current atomic action.
+
+    :param check_interval: poll interval configured for the action
+    :param name: name of the strategy, CONF.benchmark.polling_strategy by
+                 default
+    :returns: PollingStrategy instance
+    """
+    name = name or CONF.benchmark.polling_strategy
+    strategy = rutils.find_subclass(PollingStrategy, name,
+                                    "__polling_strategy__")
+    if strategy is None:
+        raise exceptions.NoSuchPollingStrategy(name=name)
+    return strategy(check_interval, _current_action())
+
+
+class _Waiter(object):
+    """Resource registered in StatusPoller and the state of waiting for it."""
+
+    def __init__(self, resource, is_ready, update_resource, strategy):
+        self.resource = resource
+        self.is_ready = is_ready
+        self.update_resource = update_resource
+        self.strategy = strategy
+        self.start = rutils.monotonic()
+        self.next_check = self.start
+        self.polls = 0
+        self.error = None
+        # NOTE: API calls made by the poller thread for this waiter, as
+        #       (summary, share) tuples.
+        self.api_calls = []
+        self.done = threading.Event()
+
+    def update(self, listed):
+        """Check the resource found in the list of its manager.
+
+        :param listed: resource returned by manager.list(), None if it is
+                       missing in the list
+        :returns: True if waiting is over
+        """
+        finished = False
+        try:
+            if listed is None:
+                # NOTE: The list may be truncated by the page size limit of
+                #       the service, so a missing resource is double-checked.
+                res = self.update_resource(self.resource)
+            else:
+                res = self.update_resource.check_status(listed)
+            self.resource = res
+            finished = self.is_ready is not None and self.is_ready(res)
+        except exceptions.GetResourceNotFound as e:
+            if self.is_ready is not None:
+                self.error = e
+            finished = True
+        except Exception as e:
+            self.error = e
+            finished = True
+        self.polls += 1
+        now = rutils.monotonic()
+        self.next_check = now + self.strategy.next_interval(now - self.start,
+                                                            self.polls)
+        return finished
+
+
+class StatusPoller(threading.Thread):
+    """Refreshes statuses of many waited for resources in bulk.
+
+    Resources are grouped by their managers, so statuses of all resources of
+    one client (i.e. one user) that are due for a check are refreshed with
+    one manager.list() call. Each resource is still checked once in its
+    "check_interval" and its waiter is woken up as soon as the resource is
+    ready, deleted or gets an error status.
+
+    API calls of the poller thread are added to the API calls of waiting
+    threads: each of them gets an equal share of the list call and the
+    calls made to check its own resource.
+    """
+
+    def __init__(self):
+        super(StatusPoller, self).__init__()
+        self.daemon = True
+        self._waiters = []
+        self._changed = threading.Condition()
+
+    def _register(self, waiter):
+        with self._changed:
+            self._waiters.append(waiter)
+            self._changed.notify()
+
+    def _unregister(self, waiter):
+        with self._changed:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _get_due_waiters(self):
+        with self._changed:
+            while True:
+                now = rutils.monotonic()
+                due = [w for w in self._waiters if w.next_check <= now]
+                if due:
+                    return due
+                if self._waiters:
+                    self._changed.wait(
+                        min(w.next_check for w in self._waiters) - now)
+                else:
+                    self._changed.wait()
+
+    def _refresh(self, manager, waiters):
+        httppool.start_api_calls_record()
+        try:
+            listed = dict((r.id, r) for r in manager.list())
+        except Exception as e:
+            LOG.debug("Falling back to getting resources one by one, "
+                      "failed to list them: %s" % e)
+            listed = {}
+        list_calls = httppool.stop_api_calls_record()
+        for waiter in waiters:
+            httppool.start_api_calls_record()
+            finished = waiter.update(listed.get(waiter.resource.id))
+            waiter.api_calls.append((httppool.stop_api_calls_record(), 1))
+            waiter.api_calls.append((list_calls, 1.0 / len(waiters)))
+            if finished:
+                self._unregister(waiter)
+                waiter.done.set()
+
+    def run(self):
+        while True:
+            by_manager = collections.OrderedDict()
+            for waiter in self._get_due_waiters():
+                by_manager.setdefault(id(waiter.resource.manager),
+                                      []).append(waiter)
+            for waiters in by_manager.values():
+                self._refresh(waiters[0].resource.manager, waiters)
+
+    def wait(self, resource, is_ready, update_resource, timeout=60,
+             check_interval=1, strategy=None):
+        """Wait for the resource like wait_for() and wait_for_delete() do.
+
+        :param is_ready: predicate of the ready resource, None to wait for
+                         deletion of the resource
+        :param update_resource: function returned by get_from_manager()
+        :param strategy: PollingStrategy, FixedPolling by default
+        :returns: the "ready" resource object, None if it is deleted
+        """
+        strategy = strategy or FixedPolling(check_interval)
+        waiter = _Waiter(resource, is_ready, update_resource, strategy)
+        try:
+            # NOTE: The first check is done immediately, the same as
+            #       wait_for() does, so ready resources are not delayed by
+            #       the poller.
+            if waiter.update(None):
+                waiter.done.set()
+            if not waiter.done.is_set():
+                self._register(waiter)
+                # NOTE: wait_for() checks the timeout after sleeping, so the
+                #       last check may happen up to one check_interval after
+                #       it.
+                remaining = (waiter.start + timeout + check_interval -
+                             rutils.monotonic())
+                waiter.done.wait(max(remaining, 0))
+                self._unregister(waiter)
+                if not waiter.done.is_set():
+                    raise exceptions.TimeoutException()
+        finally:
+            _count_polls(waiter.polls)
+            for summary, share in list(waiter.api_calls):
+                httppool.add_api_calls(summary, share)
+        if waiter.error:
+            raise waiter.error
+        strategy.finished(rutils.monotonic() - waiter.start)
+        return waiter.resource if is_ready is not None else None
+
+
+# Poller is shared by all threads of one process and is recreated in
+# processes forked from it, because its thread doesn't survive fork().
+_poller = {"pid": None, "poller": None}
+_poller_lock = threading.Lock()
+
+
+def get_status_poller():
+    """Return StatusPoller of the current process."""
+    with _poller_lock:
+        if _poller["pid"] != os.getpid():
+            poller = StatusPoller()
+            poller.start()
+            _poller.update(pid=os.getpid(), poller=poller)
+        return _poller["poller"]
+
+
+def _use_status_poller(update_resource):
+    return (CONF.benchmark.batch_status_polling and
+            hasattr(update_resource, "check_status"))
+
+
 def wait_for(resource, is_ready, update_resource=None, timeout=60,
-             check_interval=1):
+             check_interval=1, polling=None):
     """Waits for the given resource to come into the desired state.
 
     Uses the readiness check function passed as a parameter and (optionally)
@@ -105,25 +474,41 @@ def wait_for(resource, is_ready, update_resource=None, timeout=60,
                     raised
     :param check_interval: Interval in seconds between the two consecutive
                            readiness checks
+    :param polling: Name of the PollingStrategy that chooses intervals
+                    between the checks, CONF.benchmark.polling_strategy
+                    by default
 
     :returns: The "ready" resource object
     """
-
-    start = time.time()
-    while True:
-        # NOTE(boden): mitigate 1st iteration waits by updating immediately
-        if update_resource:
-            resource = update_resource(resource)
-        if is_ready(resource):
-            break
-        time.sleep(check_interval)
-        if time.time() - start > timeout:
-            raise exceptions.TimeoutException()
+    strategy = get_polling_strategy(check_interval, polling)
+    if _use_status_poller(update_resource):
+        return get_status_poller().wait(resource, is_ready, update_resource,
+                                        timeout, check_interval, strategy)
+
+    start = rutils.monotonic()
+    elapsed = 0
+    polls = 0
+    try:
+        while True:
+            # NOTE(boden): mitigate 1st iteration waits by updating
+            #              immediately
+            if update_resource:
+                resource = update_resource(resource)
+            polls += 1
+            if is_ready(resource):
+                break
+            time.sleep(strategy.next_interval(elapsed, polls))
+            elapsed = rutils.monotonic() - start
+            if elapsed > timeout:
+                raise exceptions.TimeoutException()
+    finally:
+        _count_polls(polls)
+    strategy.finished(elapsed)
     return resource
 
 
 def wait_for_delete(resource, update_resource=None, timeout=60,
-                    check_interval=1):
+                    check_interval=1, polling=None):
     """Wait for the full deletion of resource.
 
     :param update_resource: Function that should take the resource object
@@ -135,20 +520,40 @@ def wait_for_delete(resource, update_resource=None, timeout=60,
                     raised
     :param check_interval: Interval in seconds between the two consecutive
                            readiness checks
+    :param polling: Name of the PollingStrategy that chooses intervals
+                    between the checks, CONF.benchmark.polling_strategy
+                    by default
     """
-    start = time.time()
-    while True:
-        try:
-            resource = update_resource(resource)
-        except exceptions.GetResourceNotFound:
-            break
-        time.sleep(check_interval)
-        if time.time() - start > timeout:
-            raise exceptions.TimeoutException()
+    strategy = get_polling_strategy(check_interval, polling)
+    if _use_status_poller(update_resource):
+        get_status_poller().wait(resource, None, update_resource, timeout,
+                                 check_interval, strategy)
+        return
+
+    start = rutils.monotonic()
+    elapsed = 0
+    polls = 0
+    try:
+        while True:
+            polls += 1
+            try:
+                resource = update_resource(resource)
+            except exceptions.GetResourceNotFound:
+                break
+            time.sleep(strategy.next_interval(elapsed, polls))
+            elapsed = rutils.monotonic() - start
+            if elapsed > timeout:
+                raise exceptions.TimeoutException()
+    finally:
+        _count_polls(polls)
+    strategy.finished(elapsed)
 
 
 def format_exc(exc):
-    return [str(type(exc)), str(exc), traceback.format_exc()]
+    # NOTE: Exceptions that are created without raising, e.g. timeouts of
+    #       iterations, have no traceback.
+    tb = traceback.format_exc() if sys.exc_info()[1] is exc else ""
+    return [str(type(exc)), str(exc), tb]
 
 
 def infinite_run_args_generator(args_func):
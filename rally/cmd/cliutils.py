@@ -23,6 +23,7 @@ from oslo.config import cfg
 from rally.openstack.common.apiclient import exceptions
 from rally.openstack.common import cliutils
 from rally.openstack.common.gettextutils import _
+from rally.openstack.common import importutils
 from rally.openstack.common import log as logging
 from rally import version
 
@@ -108,8 +109,33 @@ def _add_command_parsers(categories, subparsers):
             parser.add_argument('action_args', nargs='*')
 
 
+def _load_categories(argv, categories):
+    """Import command classes of categories that argv may refer to.
+
+    :param argv: command line arguments
+    :param categories: dict of category names and command classes or their
+                       import paths
+    :returns: dict of category names and command classes, only categories
+              named in argv are included if there are such ones, all of
+              them otherwise (e.g. for "rally --help")
+    """
+    names = set(argv[1:]) & set(categories)
+    if not names:
+        if set(argv[1:2]) & set(["version", "bash-completion"]):
+            return {}
+        names = categories
+    loaded = {}
+    for name in names:
+        command_cls = categories[name]
+        if isinstance(command_cls, basestring):
+            command_cls = importutils.import_class(command_cls)
+        loaded[name] = command_cls
+    return loaded
+
+
 def run(argv, categories):
-    parser = lambda subparsers: _add_command_parsers(categories, subparsers)
+    commands = _load_categories(argv, categories)
+    parser = lambda subparsers: _add_command_parsers(commands, subparsers)
     category_opt = cfg.SubCommandOpt('category',
                                      title='Command categories',
                                      help='Available categories',
@@ -152,8 +178,8 @@ def run(argv, categories):
     if CONF.category.name == "bash-completion":
         if not CONF.category.query_category:
             print(" ".join(categories.keys()))
-        elif CONF.category.query_category in categories:
-            fn = categories[CONF.category.query_category]
+        elif CONF.category.query_category in commands:
+            fn = commands[CONF.category.query_category]
             command_object = fn()
             actions = _methods_of(command_object)
             print(" ".join([k for (k, v) in actions]))
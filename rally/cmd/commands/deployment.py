@@ -222,3 +222,60 @@ class DeploymentCommands(object):
                   % sys.exc_info()[1])
             return(1)
         common_cliutils.print_list(table_rows, headers)
+
+    @cliutils.args('--uuid', dest='deploy_id', type=str, required=False,
+                   help='UUID of a deployment.')
+    @cliutils.args('--tenants', type=int, default=1,
+                   help='Number of tenants to add to the pool.')
+    @cliutils.args('--users-per-tenant', dest='users_per_tenant', type=int,
+                   default=1, help='Number of users of each tenant.')
+    @envutils.with_default_deploy_id
+    def users_pool_create(self, deploy_id=None, tenants=1,
+                          users_per_tenant=1):
+        """Add tenants and users to the users pool of the deployment.
+
+        Tasks whose users context has "users_pool": true lease tenants of
+        the pool instead of creating temporary ones.
+
+        :param deploy_id: a UUID of the deployment
+        :param tenants: number of tenants to add
+        :param users_per_tenant: number of users of each tenant
+        """
+        api.users_pool_create(deploy_id, tenants, users_per_tenant)
+
+    @cliutils.args('--uuid', dest='deploy_id', type=str, required=False,
+                   help='UUID of a deployment.')
+    @envutils.with_default_deploy_id
+    def users_pool_show(self, deploy_id=None):
+        """Print tenants and users of the users pool of the deployment.
+
+        :param deploy_id: a UUID of the deployment
+        """
+        headers = ['tenant_name', 'tenant_id', 'user_id', 'leased_by']
+        table_rows = []
+        for user in db.users_pool_get(deploy_id):
+            data = [user.tenant_name, user.tenant_id, user.user_id,
+                    user.task_uuid or '']
+            table_rows.append(utils.Struct(**dict(zip(headers, data))))
+        if table_rows:
+            common_cliutils.print_list(table_rows, headers)
+        else:
+            print(_("The users pool of the deployment is empty. "
+                    "To add users to it, use:"
+                    "\nrally deployment users_pool_create"))
+
+    @cliutils.args('--uuid', dest='deploy_id', type=str, required=False,
+                   help='UUID of a deployment.')
+    @envutils.with_default_deploy_id
+    def users_pool_delete(self, deploy_id=None):
+        """Delete tenants and users of the users pool of the deployment.
+
+        Tenants leased to running tasks are left in the pool.
+
+        :param deploy_id: a UUID of the deployment
+        """
+        left = api.users_pool_delete(deploy_id)
+        if left:
+            print(_("%d tenants are leased to running tasks and were not "
+                    "deleted.") % left)
+            return(1)
@@ -81,9 +81,9 @@ class InfoCommands(object):
         scenarios = scenario_base.Scenario.list_benchmark_scenarios()
         scenario_groups = list(set(s.split(".")[0] for s in scenarios))
         scenario_methods = list(set(s.split(".")[1] for s in scenarios))
-        deploy_engines = [cls.__name__ for cls in utils.itersubclasses(
+        deploy_engines = [cls.__name__ for cls in utils.get_subclasses(
                           deploy.EngineFactory)]
-        server_providers = [cls.__name__ for cls in utils.itersubclasses(
+        server_providers = [cls.__name__ for cls in utils.get_subclasses(
                             serverprovider.ProviderFactory)]
         candidates = (scenarios + scenario_groups + scenario_methods +
                       deploy_engines + server_providers)
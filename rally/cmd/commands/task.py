@@ -26,9 +26,13 @@ import yaml
 
 from rally.benchmark.processing import plot
 from rally.benchmark.processing import utils
+from rally.benchmark.runners import base as base_runner
+from rally.benchmark.runners import saturation
+from rally.benchmark import selfbench
 from rally.cmd import cliutils
 from rally.cmd.commands import use
 from rally.cmd import envutils
+from rally import consts
 from rally import db
 from rally import exceptions
 from rally.openstack.common import cliutils as common_cliutils
@@ -101,9 +105,16 @@ class TaskCommands(object):
     def abort(self, task_id=None):
         """Force abort task
 
+        The task stops starting new iterations, waits for the started
+        ones and skips the rest of benchmarks.
+
         :param task_id: Task uuid
         """
-        api.abort_task(task_id)
+        try:
+            api.abort_task(task_id)
+        except exceptions.TaskInvalidStatus as e:
+            print(e)
+            return 1
 
     @cliutils.args('--uuid', type=str, dest='task_id', help='UUID of task')
     @envutils.with_default_task_id
@@ -124,12 +135,17 @@ class TaskCommands(object):
     @cliutils.args('--iterations-data', dest='iterations_data',
                    action='store_true',
                    help='print detailed results for each iteration')
+    @cliutils.args('--include-warmup', dest='include_warmup',
+                   action='store_true',
+                   help='take warm-up iterations into account')
     @envutils.with_default_task_id
-    def detailed(self, task_id=None, iterations_data=False):
+    def detailed(self, task_id=None, iterations_data=False,
+                 include_warmup=False):
         """Get detailed information about task
 
         :param task_id: Task uuid
         :param iterations_data: print detailed results for each iteration
+        :param include_warmup: take warm-up iterations into account
         Prints detailed information of task.
         """
         def _print_iterations_data(raw_data):
@@ -170,7 +186,7 @@ class TaskCommands(object):
 
         if task_id == "last":
             task = db.task_get_detailed_last()
-            task_id = task.uuid
+            task_id = task["uuid"]
         else:
             task = db.task_get_detailed(task_id)
 
@@ -208,6 +224,11 @@ class TaskCommands(object):
 
             scenario_time = result["data"]["scenario_duration"]
             raw = result["data"]["raw"]
+            warmup = 0
+            if not include_warmup:
+                warmup = len(raw)
+                raw = utils.without_warmup(raw)
+                warmup -= len(raw)
             table_cols = ["action", "min (sec)", "avg (sec)", "max (sec)",
                           "90 percentile", "95 percentile", "success",
                           "count"]
@@ -218,7 +239,7 @@ class TaskCommands(object):
                                    for col in float_cols]))
             table_rows = []
 
-            actions_data = utils.get_atomic_actions_data(raw)
+            actions_data = utils.get_atomic_actions_data(raw, include_warmup)
             for action in actions_data:
                 durations = actions_data[action]
                 if durations:
@@ -238,11 +259,131 @@ class TaskCommands(object):
             common_cliutils.print_list(table_rows, fields=table_cols,
                                        formatters=formatters)
 
+            actions_polls = utils.get_atomic_actions_polls(raw)
+            if actions_polls:
+                print(_("\nStatus checks of resources by atomic actions\n"))
+                polls_cols = ["action", "min polls", "avg polls",
+                              "max polls", "count"]
+                table_rows = []
+                for action, polls in actions_polls.items():
+                    table_rows.append(rutils.Struct(
+                        action=action, min_polls=min(polls),
+                        avg_polls="%.1f" % utils.mean(polls),
+                        max_polls=max(polls), count=len(polls)))
+                common_cliutils.print_list(table_rows, fields=polls_cols)
+
+            api_calls = utils.get_api_calls(raw)
+            if api_calls:
+                print(_("\nAPI calls per action\n"))
+                calls_cols = ["action", "api call", "calls",
+                              "calls per iteration", "avg latency", "bytes",
+                              "statuses"]
+                table_rows = []
+                for (action, name, count, per_iteration, latency, size,
+                     statuses) in api_calls:
+                    table_rows.append(rutils.Struct(
+                        action=action, api_call=name, calls=count,
+                        calls_per_iteration="%.1f" % per_iteration,
+                        avg_latency="%.3f" % latency, bytes=size,
+                        statuses=", ".join("%s: %s" % s
+                                           for s in sorted(statuses.items()))))
+                common_cliutils.print_list(table_rows, fields=calls_cols)
+
             if iterations_data:
                 _print_iterations_data(raw)
 
+            load = utils.get_load_data(raw)
+            if load:
+                rate = lambda rps: "%.2f" % rps if rps is not None else "n/a"
+                print(_("Requested rps: %(requested)s, achieved rps: "
+                        "%(achieved)s") %
+                      {"requested": rate(load["requested_rps"]),
+                       "achieved": rate(load["achieved_rps"])})
+                print(_("Scheduling lag (sec): avg %(avg).3f, "
+                        "95 percentile %(95).3f, max %(max).3f") %
+                      {"avg": utils.mean(load["lag"]),
+                       "95": utils.percentile(load["lag"], 0.95),
+                       "max": max(load["lag"])})
+
+            runner_config = key["kw"].get("runner", {})
+            stages = base_runner.ScenarioRunner.get_stages(runner_config)
+            stages_data = utils.get_stages_data(raw, stages)
+            saturation_point = None
+            if runner_config.get("type") == consts.RunnerType.SATURATION:
+                stages_data, saturation_point = (
+                    saturation.get_saturation_report(runner_config,
+                                                     stages_data))
+            if stages_data:
+                stage_cols = ["stage", "load", "duration (sec)",
+                              "iterations", "throughput (iter/sec)",
+                              "min (sec)", "avg (sec)", "95 percentile",
+                              "max (sec)", "success"]
+                float_cols = ["throughput (iter/sec)", "min (sec)",
+                              "avg (sec)", "95 percentile", "max (sec)"]
+                formatters = dict(zip(float_cols,
+                                      [cliutils.pretty_float_formatter(col, 3)
+                                       for col in float_cols]))
+                table_rows = []
+                for i, stage in enumerate(stages_data):
+                    config = stage["config"]
+                    if "concurrency" in config:
+                        load = "concurrency %s" % config["concurrency"]
+                    else:
+                        load = "rps %s" % config["rps"]
+                    durations = stage["durations"]
+                    if durations:
+                        latency = [min(durations), utils.mean(durations),
+                                   utils.percentile(durations, 0.95),
+                                   max(durations)]
+                    else:
+                        latency = [None] * 4
+                    success = (len(durations) * 100.0 / stage["iterations"]
+                               if stage["iterations"] else 0.0)
+                    data = ([i + 1, load, config["duration"],
+                             stage["iterations"], stage["throughput"]] +
+                            latency + ["%.1f%%" % success])
+                    table_rows.append(
+                        rutils.Struct(**dict(zip(stage_cols, data))))
+                print(_("\nLoad stages\n"))
+                common_cliutils.print_list(table_rows, fields=stage_cols,
+                                           formatters=formatters)
+            if saturation_point:
+                print(saturation_point)
+
+            workers = {}
+            for r in raw:
+                if "worker" in r:
+                    workers[r["worker"]] = workers.get(r["worker"], 0) + 1
+            if workers:
+                print(_("Iterations by worker: %s") %
+                      ", ".join("%s: %d" % w for w in sorted(workers.items())))
+
+            if warmup:
+                print(_("Warm-up iterations excluded from statistics: "),
+                      warmup)
             print(_("Whole scenario time without context preparation: "),
                   scenario_time)
+            context_duration = result["data"].get("context_duration")
+            if context_duration:
+                print(_("Context setup: %(setup).3f sec, cleanup: "
+                        "%(cleanup).3f sec%(reused)s") %
+                      {"setup": context_duration["setup"],
+                       "cleanup": context_duration["cleanup"],
+                       "reused": (_(" (shared contexts reused)")
+                                  if context_duration["reused"] else "")})
+            print(_("Keystone authentications avoided by reusing clients: "),
+                  sum(r.get("auth_calls_avoided", 0) for r in raw))
+            http_connections = [r["http_connections"] for r in raw
+                                if "http_connections" in r]
+            if http_connections:
+                print(_("HTTP connections opened: %(opened)d, "
+                        "reused: %(reused)d") %
+                      {"opened": sum(c["opened"] for c in http_connections),
+                       "reused": sum(c["reused"] for c in http_connections)})
+            recycled = len([r for r in raw if r.get("worker_recycled")])
+            if recycled:
+                print(_("Worker processes recycled after iteration "
+                        "timeouts: "), recycled)
 
             # NOTE(hughsaunders): ssrs=scenario specific results
             ssrs = []
@@ -306,7 +447,8 @@ class TaskCommands(object):
         :param output_pprint: Output in pretty print format
         :param output_json: Output in json format (Default)
         """
-        results = map(lambda x: {"key": x["key"], 'result': x['data']['raw'],
+        results = map(lambda x: {"key": x["key"],
+                                 "result": list(x["data"]["raw"]),
                                  "sla": x["data"]["sla"]},
                       db.task_result_get_all_by_uuid(task_id))
 
@@ -341,13 +483,18 @@ class TaskCommands(object):
                    help='Path to output file.')
     @cliutils.args('--open', dest='open_it', action='store_true',
                    help='Open it in browser.')
+    @cliutils.args('--include-warmup', dest='include_warmup',
+                   action='store_true',
+                   help='Show warm-up iterations in charts and tables.')
     @envutils.with_default_task_id
-    def report(self, task_id=None, out=None, open_it=False):
+    def report(self, task_id=None, out=None, open_it=False,
+               include_warmup=False):
         """Generate HTML report file for specified task.
 
         :param task_id: int, task identifier
         :param out: str, output html file name
         :param open_it: bool, whether to open output file in web browser
+        :param include_warmup: bool, whether to show warm-up iterations
         """
         results = map(lambda x: {"key": x["key"],
                                  "result": x["data"]["raw"]},
@@ -356,7 +503,7 @@ class TaskCommands(object):
             out = os.path.expanduser(out)
         output_file = out or ("%s.html" % task_id)
         with open(output_file, "w+") as f:
-            f.write(plot.plot(results))
+            f.write(plot.plot(results, include_warmup=include_warmup))
 
         if open_it:
             webbrowser.open_new_tab("file://" + os.path.realpath(output_file))
@@ -417,5 +564,93 @@ class TaskCommands(object):
         else:
             common_cliutils.print_list(results, ('benchmark', 'pos',
                                                  'criterion', 'success',
-                                                 'detail'))
+                                                 'detail',
+                                                 'failed_at_iteration'))
         return failed_criteria
+
+    @cliutils.args("--runners", type=str, dest="runners", nargs="+",
+                   help="Types of scenario runners to benchmark, all "
+                        "supported ones by default.")
+    @cliutils.args("--concurrency", type=int, dest="concurrency", nargs="+",
+                   help="Concurrency levels, 1 10 50 by default.")
+    @cliutils.args("--times", type=int, dest="times",
+                   help="Iterations per concurrent slot, 20 by default.")
+    @cliutils.args("--duration", type=float, dest="duration",
+                   help="Seconds of load for runners that keep it for "
+                        "duration, 1 by default.")
+    @cliutils.args("--sleep", type=float, dest="sleep",
+                   help="Seconds each iteration of Dummy.dummy sleeps, 0 by "
+                        "default, e.g. to see the overhead under a realistic "
+                        "number of concurrent iterations.")
+    @cliutils.args("--out", type=str, dest="out",
+                   help="Path to the JSON file to save results to, which "
+                        "can be used as a baseline later.")
+    @cliutils.args("--baseline", type=str, dest="baseline",
+                   help="Path to the JSON file with results of a previous "
+                        "run to compare with.")
+    @cliutils.args("--tolerance", type=float, dest="tolerance",
+                   help="Allowed degradation compared to the baseline in "
+                        "percent, 20 by default.")
+    @cliutils.args("--startup", dest="startup", action="store_true",
+                   help="Benchmark start of the command line interface "
+                        "instead of scenario runners.")
+    def selfbench(self, runners=None, concurrency=None, times=None,
+                  duration=None, sleep=None, out=None, baseline=None,
+                  tolerance=None, startup=False):
+        """Benchmark overhead of Rally's own scenario runners.
+
+        Runs Dummy.dummy (with zero sleep by default) through scenario
+        runners without any cloud and prints maximal rate of iterations,
+        dispatch overhead per iteration, throughput of the results consumer
+        and peak RSS of all processes. With --startup, prints time to
+        import the command line interface and time to the first output of
+        common commands instead.
+
+        :param runners: types of scenario runners to benchmark
+        :param concurrency: list of concurrency levels
+        :param times: number of iterations per concurrent slot
+        :param duration: seconds of load of duration based runners
+        :param sleep: seconds each iteration of Dummy.dummy sleeps
+        :param out: path to the JSON file to save results to
+        :param baseline: path to the JSON file with results to compare with
+        :param tolerance: allowed degradation in percent
+        :param startup: benchmark start of the command line interface
+        :returns: 1 if results are worse than the baseline
+        """
+        if startup:
+            rows = selfbench.run_startup()
+            columns = selfbench.STARTUP_COLUMNS
+            float_cols = columns[1:]
+        else:
+            runners = runners or list(selfbench.RUNNER_CONFIGS)
+            unknown = set(runners) - set(selfbench.RUNNER_CONFIGS)
+            if unknown:
+                print(_("Unsupported runners: %s") %
+                      ", ".join(sorted(unknown)))
+                return 1
+
+            rows = selfbench.run_all(runners, concurrency or [1, 10, 50],
+                                     times or 20, duration or 1, sleep or 0)
+            columns = selfbench.COLUMNS
+            float_cols = columns[4:]
+        formatters = dict(zip(float_cols,
+                              [cliutils.pretty_float_formatter(col, 2)
+                               for col in float_cols]))
+        common_cliutils.print_list([rutils.Struct(**row) for row in rows],
+                                   fields=columns,
+                                   formatters=formatters, sortby_index=None)
+        if out:
+            with open(os.path.expanduser(out), "w") as f:
+                json.dump(rows, f, indent=2)
+
+        if baseline:
+            with open(os.path.expanduser(baseline)) as f:
+                regressions = selfbench.compare(
+                    rows, json.load(f),
+                    20 if tolerance is None else tolerance)
+            if regressions:
+                print(_("Results are worse than the baseline:"))
+                for regression in regressions:
+                    print(regression)
+                return 1
+            print(_("Results are not worse than the baseline."))
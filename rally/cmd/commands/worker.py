@@ -0,0 +1,55 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+""" Rally command: worker """
+
+from __future__ import print_function
+
+import socket
+
+from rally.benchmark.runners import distributed
+from rally.cmd import cliutils
+from rally import exceptions
+
+
+class WorkerCommands(object):
+
+    @cliutils.args("--hostname", type=str, dest="hostname", required=False,
+                   help="Unique name of the worker, hostname by default. "
+                        "Should be specified to start several workers "
+                        "on the same host.")
+    @cliutils.args("--poll-interval", type=float, dest="poll_interval",
+                   required=False,
+                   help="Seconds between checks for new iterations.")
+    def start(self, hostname=None, poll_interval=None):
+        """Start a worker that runs iterations of distributed benchmarks.
+
+        The worker takes iterations of benchmarks with the "distributed"
+        runner from the database, so all workers and the host that runs
+        the task should use the same database connection. It works until
+        it is interrupted.
+
+        :param hostname: unique name of the worker
+        :param poll_interval: seconds between checks for new iterations
+        """
+        hostname = hostname or socket.gethostname()
+        try:
+            distributed.run_worker(
+                hostname, poll_interval or distributed.POLL_INTERVAL)
+        except exceptions.WorkerAlreadyRegistered as e:
+            print(e)
+            return 1
+        except KeyboardInterrupt:
+            pass
@@ -47,6 +47,8 @@ class _TaskStatus(utils.ImmutableMixin, utils.EnumMixin):
     CLEANING_UP = "cleaning up"
     FINISHED = "finished"
     FAILED = "failed"
+    ABORTING = "aborting"
+    ABORTED = "aborted"
 
 
 class _DeployStatus(utils.ImmutableMixin, utils.EnumMixin):
@@ -78,7 +80,18 @@ class _RunnerType(utils.ImmutableMixin, utils.EnumMixin):
     SERIAL = "serial"
     CONSTANT = "constant"
     CONSTANT_FOR_DURATION = "constant_for_duration"
+    CONSTANT_ASYNC = "constant_async"
     RPS = "rps"
+    RAMP = "ramp"
+    SATURATION = "saturation"
+    DISTRIBUTED = "distributed"
+
+
+class _WorkerBatchStatus(utils.ImmutableMixin, utils.EnumMixin):
+    PENDING = "pending"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
 
 
 class _Service(utils.ImmutableMixin, utils.EnumMixin):
@@ -155,6 +168,7 @@ TaskStatus = _TaskStatus()
 DeployStatus = _DeployStatus()
 EndpointPermission = _EndpointPermission()
 RunnerType = _RunnerType()
+WorkerBatchStatus = _WorkerBatchStatus()
 ServiceType = _ServiceType()
 Service = _Service()
 EndpointType = _EndpointType()
@@ -89,7 +89,8 @@ def task_get_detailed(uuid):
     """Returns task with results by uuid.
 
     :param uuid: UUID of the task.
-    :returns: task dict with data on the task and its results.
+    :returns: task dict with data on the task and its results, raw results
+              saved in chunks are loaded on iteration.
     """
     return IMPL.task_get_detailed(uuid)
 
@@ -142,12 +143,48 @@ def task_delete(uuid, status=None):
 def task_result_get_all_by_uuid(task_uuid):
     """Get list of task results.
 
+    Raw results saved in chunks are not loaded at once, they are read
+    chunk by chunk each time data["raw"] is iterated.
+
     :param task_uuid: string with UUID of Task instance.
-    :returns: list instances of TaskResult.
+    :returns: list of dicts with data on task results.
     """
     return IMPL.task_result_get_all_by_uuid(task_uuid)
 
 
+def task_result_update(result_id, data):
+    """Replace data of a task result.
+
+    :param result_id: id of TaskResult instance.
+    :param data: new data of the task result.
+    :raises: :class:`rally.exceptions.NotFoundException` if the result
+             does not exist.
+    """
+    return IMPL.task_result_update(result_id, data)
+
+
+def task_result_chunk_create(result_id, position, raw):
+    """Append a chunk of raw results to a task result.
+
+    Chunks are used by task results whose data contains "chunked": True.
+
+    :param result_id: id of TaskResult instance.
+    :param position: number of the chunk, chunks are read in this order.
+    :param raw: list of results of benchmark iterations.
+    :returns: TaskResultChunk instance appended.
+    """
+    return IMPL.task_result_chunk_create(result_id, position, raw)
+
+
+def task_result_get_raw(result_id):
+    """Get raw results saved in chunks of a task result.
+
+    :param result_id: id of TaskResult instance.
+    :returns: sized iterable which loads chunks one by one on iteration.
+    """
+    return IMPL.task_result_get_raw(result_id)
+
+
 def task_result_create(task_uuid, key, data):
     """Append result record to task.
 
@@ -159,6 +196,34 @@ def task_result_create(task_uuid, key, data):
     return IMPL.task_result_create(task_uuid, key, data)
 
 
+def task_resources_create(task_uuid, resources):
+    """Record cloud resources created by benchmarks of a task.
+
+    :param task_uuid: string with UUID of Task instance.
+    :param resources: list of dicts with "service", "type" and "id" of
+                      each resource and optional "tenant_id" of its owner.
+    :returns: list of ids of created TaskResource instances.
+    """
+    return IMPL.task_resources_create(task_uuid, resources)
+
+
+def task_resources_get(task_uuid):
+    """Get cloud resources recorded for a task.
+
+    :param task_uuid: string with UUID of Task instance.
+    :returns: list of TaskResource instances in the order of recording.
+    """
+    return IMPL.task_resources_get(task_uuid)
+
+
+def task_resources_delete(ids):
+    """Forget recorded cloud resources, e.g. after they are deleted.
+
+    :param ids: list of ids of TaskResource instances.
+    """
+    return IMPL.task_resources_delete(ids)
+
+
 def deployment_create(values):
     """Create a deployment from the values dictionary.
 
@@ -216,6 +281,65 @@ def deployment_list(status=None, parent_uuid=None, name=None):
                                 name=name)
 
 
+def users_pool_create(deployment_uuid, users):
+    """Add users to the persistent pool of users of a deployment.
+
+    :param deployment_uuid: UUID of the deployment.
+    :param users: list of dicts with "tenant_id", "tenant_name", "user_id"
+                  and "endpoint" of each user.
+    """
+    return IMPL.users_pool_create(deployment_uuid, users)
+
+
+def users_pool_get(deployment_uuid):
+    """Get users of the pool of a deployment.
+
+    :param deployment_uuid: UUID of the deployment.
+    :returns: list of PooledUser instances in the order of creation.
+    """
+    return IMPL.users_pool_get(deployment_uuid)
+
+
+def users_pool_lease(deployment_uuid, task_uuid, tenants, users_per_tenant,
+                     lease_timeout=None, deleting=False):
+    """Lease free tenants of the pool of a deployment to a task.
+
+    Tenants are leased whole, with all their users. Leases of tasks that
+    are not running anymore and leases older than lease_timeout are
+    released before.
+
+    :param deployment_uuid: UUID of the deployment.
+    :param task_uuid: UUID of the task that leases tenants, or any unique
+                      id if tenants are leased for deletion.
+    :param tenants: max number of tenants to lease.
+    :param users_per_tenant: min number of users of leased tenants.
+    :param lease_timeout: seconds after which leases are released even if
+                          their task is still running, None for no limit.
+    :param deleting: whether tenants are leased for deletion.
+    :returns: list of PooledUser instances of leased tenants, it may have
+              fewer tenants than requested.
+    """
+    return IMPL.users_pool_lease(deployment_uuid, task_uuid, tenants,
+                                 users_per_tenant, lease_timeout, deleting)
+
+
+def users_pool_release(task_uuid, tenant_ids=None):
+    """Release tenants of the pool leased to a task.
+
+    :param task_uuid: UUID of the task.
+    :param tenant_ids: list of tenants to release, all if None.
+    """
+    return IMPL.users_pool_release(task_uuid, tenant_ids)
+
+
+def users_pool_delete(ids):
+    """Remove users from the pool, e.g. after they are deleted.
+
+    :param ids: list of ids of PooledUser instances.
+    """
+    return IMPL.users_pool_delete(ids)
+
+
 def resource_create(values):
     """Create a resource from the values dictionary.
 
@@ -359,3 +483,112 @@ def update_worker(hostname):
     :raises: WorkerNotFound
     """
     IMPL.update_worker(hostname)
+
+
+def get_workers():
+    """Get a list of all registered worker services.
+
+    :returns: A list of workers.
+    """
+    return IMPL.get_workers()
+
+
+def worker_job_create(values, batches):
+    """Create a job for distributed workers.
+
+    :param values: dict with record values of the job, 'payload' is a
+                   dict with everything required to run its iterations.
+    :param batches: list of (start, count) tuples with ranges of iterations
+                    that can be taken by workers one by one.
+    :returns: a worker job.
+    """
+    return IMPL.worker_job_create(values, batches)
+
+
+def worker_job_get(uuid):
+    """Get a worker job by uuid.
+
+    :param uuid: UUID of the worker job.
+    :raises: :class:`rally.exceptions.WorkerJobNotFound` if the job
+             does not exist.
+    :returns: a worker job.
+    """
+    return IMPL.worker_job_get(uuid)
+
+
+def worker_job_delete(uuid):
+    """Delete a worker job with all its batches and not popped results.
+
+    :param uuid: UUID of the worker job.
+    :raises: :class:`rally.exceptions.WorkerJobNotFound` if the job
+             does not exist.
+    """
+    return IMPL.worker_job_delete(uuid)
+
+
+def worker_batch_take(hostname):
+    """Take the oldest pending batch of iterations of any worker job.
+
+    :param hostname: The hostname of the worker that takes the batch.
+    :returns: a worker batch or None if there are no pending batches.
+    """
+    return IMPL.worker_batch_take(hostname)
+
+
+def worker_batch_finish(batch_id, hostname, failed=False):
+    """Mark a batch of iterations as finished or failed.
+
+    The batch is not changed if it isn't run by the worker anymore.
+
+    :param batch_id: id of the worker batch.
+    :param hostname: The hostname of the worker that ran the batch.
+    :param failed: True if the worker failed to run the batch.
+    """
+    return IMPL.worker_batch_finish(batch_id, hostname, failed)
+
+
+def worker_batches_get(job_uuid):
+    """Get batches of iterations of a worker job.
+
+    :param job_uuid: UUID of the worker job.
+    :returns: list of worker batches in order of iterations.
+    """
+    return IMPL.worker_batches_get(job_uuid)
+
+
+def worker_batches_requeue(job_uuid, timeout):
+    """Return batches of workers that are not alive to pending ones.
+
+    Iterations whose results were already sent by the worker are excluded
+    from the returned batches.
+
+    :param job_uuid: UUID of the worker job.
+    :param timeout: seconds since the last heartbeat after which a worker
+                    is considered dead.
+    :returns: number of returned batches.
+    """
+    return IMPL.worker_batches_requeue(job_uuid, timeout)
+
+
+def worker_results_create(job_uuid, hostname, results, batch_id=None):
+    """Send results of iterations of a worker job.
+
+    :param job_uuid: UUID of the worker job.
+    :param hostname: The hostname of the worker that ran the iterations.
+    :param results: list of dicts with results of iterations.
+    :param batch_id: id of the worker batch of the iterations.
+    :raises: :class:`rally.exceptions.WorkerJobNotFound` if the job is
+             deleted.
+    :raises: :class:`rally.exceptions.WorkerBatchNotFound` if the batch
+             is not run by the worker anymore.
+    """
+    return IMPL.worker_results_create(job_uuid, hostname, results, batch_id)
+
+
+def worker_results_pop(job_uuid):
+    """Get and delete all results of a worker job sent so far.
+
+    :param job_uuid: UUID of the worker job.
+    :returns: list of worker results in order they were sent.
+    """
+    return IMPL.worker_results_pop(job_uuid)
@@ -16,12 +16,15 @@
 SQLAlchemy implementation for DB.API
 """
 
+import collections
+
 from oslo.config import cfg
 from oslo.db import exception as db_exc
 from oslo.db.sqlalchemy import session as db_session
 import sqlalchemy as sa
 from sqlalchemy.orm.exc import NoResultFound
 
+from rally import consts
 from rally.db.sqlalchemy import models
 from rally import exceptions
 from rally.openstack.common.gettextutils import _
@@ -57,6 +60,37 @@ def get_backend():
     return Connection()
 
 
+class _TaskResultChunks(object):
+    """Raw results of a benchmark which are loaded chunk by chunk.
+
+    Only one chunk is kept in memory while the results are iterated, and
+    chunks are loaded from the database again on each iteration.
+    """
+
+    def __init__(self, task_result_id):
+        self.task_result_id = task_result_id
+
+    def _query(self, session, *entities):
+        return (session.query(*entities).
+                filter_by(task_result_id=self.task_result_id))
+
+    def __len__(self):
+        count = self._query(get_session(),
+                            sa.func.sum(models.TaskResultChunk.count)).scalar()
+        return int(count or 0)
+
+    def __iter__(self):
+        session = get_session()
+        chunk_ids = [chunk.id for chunk in
+                     self._query(session, models.TaskResultChunk.id).
+                     order_by(models.TaskResultChunk.position)]
+        for chunk_id in chunk_ids:
+            data = (session.query(models.TaskResultChunk.data).
+                    filter_by(id=chunk_id).scalar())
+            for row in data["raw"]:
+                yield row
+
+
 class Connection(object):
 
     def db_cleanup(self):
@@ -103,15 +137,34 @@ class Connection(object):
     def task_get(self, uuid):
         return self._task_get(uuid)
 
+    @staticmethod
+    def _task_result_as_dict(result):
+        result_dict = dict(result)
+        if result.data.get("chunked"):
+            data = dict(result.data)
+            data["raw"] = _TaskResultChunks(result.id)
+            result_dict["data"] = data
+        return result_dict
+
+    def _task_detailed_as_dict(self, task):
+        if task is None:
+            return None
+        task_dict = dict(task)
+        task_dict["results"] = [self._task_result_as_dict(result)
+                                for result in task.results]
+        return task_dict
+
     def task_get_detailed(self, uuid):
-        return (self.model_query(models.Task).
-                options(sa.orm.joinedload('results')).
-                filter_by(uuid=uuid).first())
+        return self._task_detailed_as_dict(
+            self.model_query(models.Task).
+            options(sa.orm.joinedload('results')).
+            filter_by(uuid=uuid).first())
 
     def task_get_detailed_last(self):
-        return (self.model_query(models.Task).
-                options(sa.orm.joinedload('results')).
-                order_by(models.Task.id.desc()).first())
+        return self._task_detailed_as_dict(
+            self.model_query(models.Task).
+            options(sa.orm.joinedload('results')).
+            order_by(models.Task.id.desc()).first())
 
     def task_create(self, values):
         task = models.Task()
@@ -141,8 +194,15 @@ class Connection(object):
             if status is not None:
                 query = base_query.filter_by(status=status)
 
+            result_ids = (session.query(models.TaskResult.id).
+                          filter_by(task_uuid=uuid).subquery())
+            (self.model_query(models.TaskResultChunk, session=session).
+             filter(models.TaskResultChunk.task_result_id.in_(result_ids)).
+             delete(synchronize_session=False))
             (self.model_query(models.TaskResult).filter_by(task_uuid=uuid).
              delete(synchronize_session=False))
+            (self.model_query(models.TaskResource, session=session).
+             filter_by(task_uuid=uuid).delete(synchronize_session=False))
 
             count = query.delete(synchronize_session=False)
             if not count:
@@ -160,9 +220,54 @@ class Connection(object):
         result.save()
         return result
 
+    def task_result_update(self, result_id, data):
+        count = (self.model_query(models.TaskResult).
+                 filter_by(id=result_id).update({"data": data}))
+        if not count:
+            raise exceptions.NotFoundException(
+                "Can't find task result with id '%s'." % result_id)
+
+    def task_result_chunk_create(self, result_id, position, raw):
+        chunk = models.TaskResultChunk()
+        chunk.update({"task_result_id": result_id, "position": position,
+                      "count": len(raw), "data": {"raw": raw}})
+        chunk.save()
+        return chunk
+
+    def task_result_get_raw(self, result_id):
+        return _TaskResultChunks(result_id)
+
     def task_result_get_all_by_uuid(self, uuid):
-        return (self.model_query(models.TaskResult).
-                filter_by(task_uuid=uuid).all())
+        return [self._task_result_as_dict(result) for result in
+                self.model_query(models.TaskResult).
+                filter_by(task_uuid=uuid).all()]
+
+    def task_resources_create(self, task_uuid, resources):
+        records = []
+        session = get_session()
+        with session.begin():
+            for resource in resources:
+                record = models.TaskResource()
+                record.update({"task_uuid": task_uuid,
+                               "tenant_id": resource.get("tenant_id"),
+                               "service": resource["service"],
+                               "type": resource["type"],
+                               "resource_id": resource["id"]})
+                record.save(session=session)
+                records.append(record)
+        return [r.id for r in records]
+
+    def task_resources_get(self, task_uuid):
+        return (self.model_query(models.TaskResource).
+                filter_by(task_uuid=task_uuid).
+                order_by(models.TaskResource.id).all())
+
+    def task_resources_delete(self, ids):
+        if not ids:
+            return
+        (self.model_query(models.TaskResource).
+         filter(models.TaskResource.id.in_(ids)).
+         delete(synchronize_session=False))
 
     def _deployment_get(self, uuid, session=None):
         deploy = (self.model_query(models.Deployment, session=session).
@@ -185,6 +290,9 @@ class Connection(object):
             if count:
                 raise exceptions.DeploymentIsBusy(uuid=uuid)
 
+            (self.model_query(models.PooledUser, session=session).
+             filter_by(deployment_uuid=uuid).
+             delete(synchronize_session=False))
             count = (self.model_query(models.Deployment, session=session).
                      filter_by(uuid=uuid).delete(synchronize_session=False))
             if not count:
@@ -211,6 +319,109 @@ class Connection(object):
             query = query.filter_by(status=status)
         return query.all()
 
+    def users_pool_create(self, deployment_uuid, users):
+        session = get_session()
+        with session.begin():
+            for user in users:
+                record = models.PooledUser()
+                record.update({"deployment_uuid": deployment_uuid,
+                               "tenant_id": user["tenant_id"],
+                               "tenant_name": user["tenant_name"],
+                               "user_id": user["user_id"],
+                               "endpoint": user["endpoint"]})
+                record.save(session=session)
+
+    def users_pool_get(self, deployment_uuid):
+        return (self.model_query(models.PooledUser).
+                filter_by(deployment_uuid=deployment_uuid).
+                order_by(models.PooledUser.id).all())
+
+    def _users_pool_release_stale(self, deployment_uuid, users,
+                                  lease_timeout):
+        leased = [user for user in users if user.task_uuid]
+        if not leased:
+            return
+        # NOTE: Tenants leased for deletion don't belong to a task, so only
+        #       the age of their lease is checked.
+        leased_by = set(user.task_uuid for user in leased
+                        if not user.deleting)
+        running = set()
+        if leased_by:
+            finished = [consts.TaskStatus.FINISHED, consts.TaskStatus.FAILED,
+                        consts.TaskStatus.ABORTED]
+            running = set(task.uuid for task in
+                          self.model_query(models.Task).
+                          filter(models.Task.uuid.in_(leased_by)).
+                          filter(~models.Task.status.in_(finished)))
+        stale = set()
+        for user in leased:
+            if not user.deleting and user.task_uuid not in running:
+                stale.add(user.task_uuid)
+            elif (lease_timeout and user.leased_at and
+                    timeutils.is_older_than(user.leased_at, lease_timeout)):
+                stale.add(user.task_uuid)
+        if stale:
+            (self.model_query(models.PooledUser).
+             filter_by(deployment_uuid=deployment_uuid).
+             filter(models.PooledUser.task_uuid.in_(stale)).
+             update({"task_uuid": None, "leased_at": None,
+                     "deleting": False}, synchronize_session=False))
+            for user in users:
+                if user.task_uuid in stale:
+                    user.update({"task_uuid": None, "leased_at": None,
+                                 "deleting": False})
+
+    def users_pool_lease(self, deployment_uuid, task_uuid, tenants,
+                         users_per_tenant, lease_timeout=None,
+                         deleting=False):
+        users = self.users_pool_get(deployment_uuid)
+        self._users_pool_release_stale(deployment_uuid, users, lease_timeout)
+
+        by_tenant = collections.OrderedDict()
+        for user in users:
+            by_tenant.setdefault(user.tenant_id, []).append(user)
+        leased = []
+        for tenant_id, tenant_users in by_tenant.items():
+            if len(leased) == tenants:
+                break
+            if (len(tenant_users) < users_per_tenant or
+                    any(user.task_uuid for user in tenant_users)):
+                continue
+            # NOTE: Another task may lease the same tenant at the same time,
+            #       so the tenant is leased only if all its users are free.
+            query = (self.model_query(models.PooledUser).
+                     filter_by(deployment_uuid=deployment_uuid,
+                               tenant_id=tenant_id))
+            values = {"task_uuid": task_uuid,
+                      "leased_at": timeutils.utcnow(),
+                      "deleting": deleting}
+            count = (query.filter_by(task_uuid=None).
+                     update(values, synchronize_session=False))
+            if count != len(tenant_users):
+                (query.filter_by(task_uuid=task_uuid).
+                 update({"task_uuid": None, "leased_at": None,
+                         "deleting": False}, synchronize_session=False))
+                continue
+            for user in tenant_users:
+                user.update(values)
+            leased.append(tenant_users)
+        return [user for tenant_users in leased for user in tenant_users]
+
+    def users_pool_release(self, task_uuid, tenant_ids=None):
+        query = self.model_query(models.PooledUser).filter_by(
+            task_uuid=task_uuid)
+        if tenant_ids is not None:
+            query = query.filter(models.PooledUser.tenant_id.in_(tenant_ids))
+        query.update({"task_uuid": None, "leased_at": None,
+                      "deleting": False}, synchronize_session=False)
+
+    def users_pool_delete(self, ids):
+        if not ids:
+            return
+        (self.model_query(models.PooledUser).
+         filter(models.PooledUser.id.in_(ids)).
+         delete(synchronize_session=False))
+
     def resource_create(self, values):
         resource = models.Resource()
         resource.update(values)
@@ -315,3 +526,134 @@ class Connection(object):
                  update({'updated_at': timeutils.utcnow()}))
         if count == 0:
             raise exceptions.WorkerNotFound(worker=hostname)
+
+    def get_workers(self):
+        return self.model_query(models.Worker).all()
+
+    def _worker_job_get(self, uuid, session=None):
+        job = (self.model_query(models.WorkerJob, session=session).
+               filter_by(uuid=uuid).first())
+        if not job:
+            raise exceptions.WorkerJobNotFound(uuid=uuid)
+        return job
+
+    def worker_job_create(self, values, batches):
+        session = get_session()
+        with session.begin():
+            job = models.WorkerJob()
+            job.update(values)
+            job.save(session=session)
+            for start, count in batches:
+                batch = models.WorkerBatch()
+                batch.update({"job_uuid": job.uuid, "start": start,
+                              "count": count})
+                batch.save(session=session)
+        return job
+
+    def worker_job_get(self, uuid):
+        return self._worker_job_get(uuid)
+
+    def worker_job_delete(self, uuid):
+        session = get_session()
+        with session.begin():
+            (self.model_query(models.WorkerResult, session=session).
+             filter_by(job_uuid=uuid).delete(synchronize_session=False))
+            (self.model_query(models.WorkerBatch, session=session).
+             filter_by(job_uuid=uuid).delete(synchronize_session=False))
+            count = (self.model_query(models.WorkerJob, session=session).
+                     filter_by(uuid=uuid).delete(synchronize_session=False))
+            if not count:
+                raise exceptions.WorkerJobNotFound(uuid=uuid)
+
+    def worker_batch_take(self, hostname):
+        pending = consts.WorkerBatchStatus.PENDING
+        while True:
+            batch = (self.model_query(models.WorkerBatch).
+                     filter_by(status=pending).
+                     order_by(models.WorkerBatch.id).first())
+            if not batch:
+                return None
+            # NOTE: Several workers may find the same pending batch, so it
+            #       is taken only if its status is still unchanged.
+            values = {"status": consts.WorkerBatchStatus.RUNNING,
+                      "hostname": hostname}
+            count = (self.model_query(models.WorkerBatch).
+                     filter_by(id=batch.id, status=pending).
+                     update(values, synchronize_session=False))
+            if count:
+                batch.update(values)
+                return batch
+
+    def worker_batch_finish(self, batch_id, hostname, failed=False):
+        status = (consts.WorkerBatchStatus.FAILED if failed
+                  else consts.WorkerBatchStatus.FINISHED)
+        (self.model_query(models.WorkerBatch).
+         filter_by(id=batch_id, hostname=hostname,
+                   status=consts.WorkerBatchStatus.RUNNING).
+         update({"status": status}))
+
+    def worker_batches_get(self, job_uuid):
+        return (self.model_query(models.WorkerBatch).
+                filter_by(job_uuid=job_uuid).
+                order_by(models.WorkerBatch.id).all())
+
+    def worker_batches_requeue(self, job_uuid, timeout):
+        running = consts.WorkerBatchStatus.RUNNING
+        alive = set(worker.hostname for worker in self.get_workers()
+                    if not timeutils.is_older_than(worker.updated_at,
+                                                   timeout))
+        requeued = 0
+        for batch in (self.model_query(models.WorkerBatch).
+                      filter_by(job_uuid=job_uuid, status=running)):
+            if batch.hostname in alive:
+                continue
+            # NOTE: Only iterations whose results were not sent are run
+            #       again. The batch is changed only if its worker hasn't
+            #       sent more results or finished it in the meantime.
+            values = {"status": consts.WorkerBatchStatus.PENDING,
+                      "hostname": None,
+                      "start": batch.start + batch.sent,
+                      "count": batch.count - batch.sent,
+                      "sent": 0}
+            if values["count"] <= 0:
+                values = {"status": consts.WorkerBatchStatus.FINISHED}
+            requeued += (self.model_query(models.WorkerBatch).
+                         filter_by(id=batch.id, status=running,
+                                   hostname=batch.hostname,
+                                   sent=batch.sent).
+                         update(values, synchronize_session=False))
+        return requeued
+
+    def worker_results_create(self, job_uuid, hostname, results,
+                              batch_id=None):
+        session = get_session()
+        with session.begin():
+            self._worker_job_get(job_uuid, session=session)
+            if batch_id is not None:
+                count = (self.model_query(models.WorkerBatch,
+                                          session=session).
+                         filter_by(id=batch_id, hostname=hostname,
+                                   status=consts.WorkerBatchStatus.RUNNING).
+                         update({"sent": models.WorkerBatch.sent +
+                                 len(results)},
+                                synchronize_session=False))
+                if not count:
+                    raise exceptions.WorkerBatchNotFound(id=batch_id)
+            for data in results:
+                result = models.WorkerResult()
+                result.update({"job_uuid": job_uuid, "hostname": hostname,
+                               "data": data})
+                result.save(session=session)
+
+    def worker_results_pop(self, job_uuid):
+        session = get_session()
+        with session.begin():
+            results = (self.model_query(models.WorkerResult,
+                                        session=session).
+                       filter_by(job_uuid=job_uuid).
+                       order_by(models.WorkerResult.id).all())
+            if results:
+                (self.model_query(models.WorkerResult, session=session).
+                 filter(models.WorkerResult.id.in_([r.id for r in results])).
+                 delete(synchronize_session=False))
+        return results
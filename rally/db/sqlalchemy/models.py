@@ -177,6 +177,62 @@ class TaskResult(BASE, RallyBase):
                                primaryjoin='TaskResult.task_uuid == Task.uuid')
 
 
+class TaskResultChunk(BASE, RallyBase):
+    """Represents a part of raw results of a benchmark."""
+    __tablename__ = "task_result_chunks"
+    __table_args__ = (
+        sa.Index("task_result_chunk_position", "task_result_id", "position"),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    task_result_id = sa.Column(sa.Integer, sa.ForeignKey(TaskResult.id),
+                               nullable=False)
+    position = sa.Column(sa.Integer, nullable=False)
+    count = sa.Column(sa.Integer, nullable=False)
+    data = sa.Column(sa_types.BigMutableJSONEncodedDict, nullable=False)
+
+
+class TaskResource(BASE, RallyBase):
+    """Represents a cloud resource created by benchmarks of a task."""
+    __tablename__ = "task_resources"
+    __table_args__ = (
+        sa.Index("task_resource_task_uuid", "task_uuid"),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    task_uuid = sa.Column(sa.String(36), nullable=False)
+    tenant_id = sa.Column(sa.String(255))
+    service = sa.Column(sa.String(36), nullable=False)
+    type = sa.Column(sa.String(36), nullable=False)
+    resource_id = sa.Column(sa.String(255), nullable=False)
+
+
+class PooledUser(BASE, RallyBase):
+    """Represents a user of the persistent pool of users of a deployment."""
+    __tablename__ = "pooled_users"
+    __table_args__ = (
+        sa.Index("pooled_user_deployment_uuid", "deployment_uuid"),
+        sa.Index("pooled_user_task_uuid", "task_uuid"),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    deployment_uuid = sa.Column(
+        sa.String(36),
+        sa.ForeignKey(Deployment.uuid),
+        nullable=False,
+    )
+    tenant_id = sa.Column(sa.String(255), nullable=False)
+    tenant_name = sa.Column(sa.String(255), nullable=False)
+    user_id = sa.Column(sa.String(255), nullable=False)
+    # NOTE: This is pickled rally.object.Endpoint object
+    endpoint = sa.Column(types.PickleType, nullable=False)
+    # NOTE: UUID of the task that leased the tenant of the user
+    task_uuid = sa.Column(sa.String(36))
+    leased_at = sa.Column(sa.DateTime)
+    # NOTE: The tenant is leased for deletion, not to a task
+    deleting = sa.Column(sa.Boolean, default=False, nullable=False)
+
+
 class Verification(BASE, RallyBase):
     """Represents a verifier result."""
 
@@ -227,6 +283,58 @@ class Worker(BASE, RallyBase):
     hostname = sa.Column(sa.String(255))
 
 
+class WorkerJob(BASE, RallyBase):
+    """Represents a benchmark executed by distributed workers."""
+    __tablename__ = "worker_jobs"
+    __table_args__ = (
+        sa.Index("worker_job_uuid", "uuid", unique=True),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    uuid = sa.Column(sa.String(36), default=UUID, nullable=False)
+    task_uuid = sa.Column(sa.String(36))
+
+    # NOTE: This is pickled dict with scenario name, context, args and
+    #       options of the runner, which are required to run iterations.
+    payload = sa.Column(types.PickleType, nullable=False)
+
+
+class WorkerBatch(BASE, RallyBase):
+    """Represents a range of iterations of a worker job."""
+    __tablename__ = "worker_batches"
+    __table_args__ = (
+        sa.Index("worker_batch_status", "status"),
+        sa.Index("worker_batch_job_uuid", "job_uuid"),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    job_uuid = sa.Column(sa.String(36), sa.ForeignKey(WorkerJob.uuid),
+                         nullable=False)
+    start = sa.Column(sa.Integer, nullable=False)
+    count = sa.Column(sa.Integer, nullable=False)
+    status = sa.Column(sa.Enum(*list(consts.WorkerBatchStatus),
+                       name="enum_worker_batches_status"),
+                       default=consts.WorkerBatchStatus.PENDING,
+                       nullable=False)
+    hostname = sa.Column(sa.String(255))
+    # NOTE: Number of iterations of the batch whose results are sent.
+    sent = sa.Column(sa.Integer, default=0, nullable=False)
+
+
+class WorkerResult(BASE, RallyBase):
+    """Represents a result of an iteration sent by a worker."""
+    __tablename__ = "worker_results"
+    __table_args__ = (
+        sa.Index("worker_result_job_uuid", "job_uuid"),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    job_uuid = sa.Column(sa.String(36), sa.ForeignKey(WorkerJob.uuid),
+                         nullable=False)
+    hostname = sa.Column(sa.String(255))
+    data = sa.Column(sa_types.MutableJSONEncodedDict, nullable=False)
+
+
 def create_db():
     from rally.db.sqlalchemy import api as sa_api
 
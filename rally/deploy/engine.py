@@ -81,10 +81,10 @@ class EngineFactory(object):
     @staticmethod
     def get_by_name(name):
         """Return Engine class by name."""
-        for engine in utils.itersubclasses(EngineFactory):
-            if name == engine.__name__:
-                return engine
-        raise exceptions.NoSuchEngine(engine_name=name)
+        engine = utils.find_subclass(EngineFactory, name)
+        if engine is None:
+            raise exceptions.NoSuchEngine(engine_name=name)
+        return engine
 
     @staticmethod
     def get_engine(name, deployment):
@@ -102,7 +102,7 @@ class EngineFactory(object):
     @staticmethod
     def get_available_engines():
         """Returns a list of names of available engines."""
-        return [e.__name__ for e in utils.itersubclasses(EngineFactory)]
+        return [e.__name__ for e in utils.get_subclasses(EngineFactory)]
 
     @abc.abstractmethod
     def deploy(self):
@@ -134,10 +134,10 @@ class ProviderFactory(object):
     @staticmethod
     def get_by_name(name):
         """Return Server Provider class by type."""
-        for provider in utils.itersubclasses(ProviderFactory):
-            if name == provider.__name__:
-                return provider
-        raise exceptions.NoSuchVMProvider(vm_provider_name=name)
+        provider = utils.find_subclass(ProviderFactory, name)
+        if provider is None:
+            raise exceptions.NoSuchVMProvider(vm_provider_name=name)
+        return provider
 
     @staticmethod
     def get_provider(config, deployment):
@@ -148,7 +148,7 @@ class ProviderFactory(object):
     @staticmethod
     def get_available_providers():
         """Returns list of names of available engines."""
-        return [e.__name__ for e in utils.itersubclasses(ProviderFactory)]
+        return [e.__name__ for e in utils.get_subclasses(ProviderFactory)]
 
     @abc.abstractmethod
     def create_servers(self, image_uuid=None, type_id=None, amount=1):
@@ -104,6 +104,11 @@ class NotFoundScenarios(InvalidTaskException):
     msg_fmt = _("There are no benchmark scenarios with names: `%(names)s`.")
 
 
+class NotSharedContexts(InvalidTaskException):
+    msg_fmt = _("Benchmarks of a task can't share contexts with names: "
+                "`%(names)s`.")
+
+
 class InvalidBenchmarkConfig(InvalidTaskException):
     msg_fmt = _("Task config is invalid.\n"
                 "\tBenchmark %(name)s has wrong configuration at"
@@ -144,6 +149,10 @@ class NoSuchRole(NotFoundException):
     msg_fmt = _("There is no role with name `%(role)s`.")
 
 
+class NoSuchPollingStrategy(NotFoundException):
+    msg_fmt = _("There is no polling strategy with name `%(name)s`.")
+
+
 class TaskNotFound(NotFoundException):
     msg_fmt = _("Task with uuid=%(uuid)s not found.")
 
@@ -157,6 +166,17 @@ class DeploymentIsBusy(RallyException):
                 "uuid=%(uuid)s.")
 
 
+class WorkerBatchNotFound(NotFoundException):
+    msg_fmt = _("Worker batch %(id)s is not found or is taken by another "
+                "worker.")
+
+
+class UsersPoolExhausted(RallyException):
+    msg_fmt = _("Unable to lease %(tenants)s tenants with %(users)s users "
+                "each from the users pool of the deployment with "
+                "uuid=%(uuid)s.")
+
+
 class ResourceNotFound(NotFoundException):
     msg_fmt = _("Resource with id=%(id)s not found.")
 
@@ -165,6 +185,10 @@ class TimeoutException(RallyException):
     msg_fmt = _("Timeout exceeded.")
 
 
+class WorkerProcessDied(RallyException):
+    msg_fmt = _("Worker process running iteration %(iteration)s died.")
+
+
 class GetResourceFailure(RallyException):
     msg_fmt = _("Failed to get the resource %(resource)s: %(err)s")
 
@@ -238,3 +262,7 @@ class WorkerNotFound(NotFoundException):
 
 class WorkerAlreadyRegistered(RallyException):
     msg_fmt = _("Worker %(worker)s already registered")
+
+
+class WorkerJobNotFound(NotFoundException):
+    msg_fmt = _("Worker job with UUID %(uuid)s not found.")
@@ -0,0 +1,375 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Keep-alive HTTP connections shared by OpenStack clients of a process.
+
+Python clients of OpenStack services open HTTP connections on their own:
+some of them keep a requests session per client and some send each request
+through a new session. With the pool all of them send requests through one
+set of per-host connection pools, so TCP and TLS handshakes are done once
+per connection instead of once per client or request.
+
+Requests of all clients are also recorded, whether the pool is used or
+not: each thread that runs a benchmark iteration gets a summary of its API
+calls grouped by atomic action, service and URL template.
+"""
+
+import cookielib
+import httplib
+import os
+import re
+import threading
+import urlparse
+
+from oslo.config import cfg
+import six
+
+from rally import utils
+
+
+requests = utils.LazyModule("requests")
+
+
+CONF = cfg.CONF
+CONF.register_opts([
+    cfg.BoolOpt("http_pool", default=True,
+                help="Send requests of all OpenStack clients of the process "
+                     "through shared pools of keep-alive HTTP connections"),
+    cfg.IntOpt("http_pool_size", default=10,
+               help="Number of connections kept open to each host")
+])
+
+# NOTE: Number of hosts whose connection pools are kept, pools of the least
+#       recently used hosts are closed.
+MAX_HOSTS = 100
+
+# Key of API calls made outside of atomic actions.
+NO_ACTION = "(no action)"
+
+# Path segments that are replaced by "{id}" in URL templates: UUIDs,
+# hexadecimal ids of keystone and numbers.
+_ID_RE = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-"
+                    r"[0-9a-f]{12}|[0-9a-f]{32}|[0-9]+)$", re.IGNORECASE)
+
+
+class ConnectionPool(object):
+    """Pools of keep-alive HTTP connections to each host.
+
+    The pool can be mounted to requests sessions, passed to novaclient as
+    its connection pool, or used instead of requests.request().
+    """
+
+    def __init__(self, pool_size=None):
+        self.adapter = requests.adapters.HTTPAdapter(
+            pool_connections=MAX_HOSTS,
+            pool_maxsize=pool_size or CONF.http_pool_size)
+        self.session = requests.Session()
+        self.mount(self.session)
+        # NOTE: The session is shared by clients of different users, so it
+        #       must not keep cookies of one of them.
+        self.session.cookies.set_policy(
+            cookielib.DefaultCookiePolicy(allowed_domains=[]))
+
+        self._lock = threading.Lock()
+        self._closed_opened = 0
+        self._closed_requests = 0
+        pools = self.adapter.poolmanager.pools
+        close = pools.dispose_func
+
+        def dispose(pool):
+            with self._lock:
+                self._closed_opened += pool.num_connections
+                self._closed_requests += pool.num_requests
+            close(pool)
+
+        pools.dispose_func = dispose
+
+    def mount(self, session):
+        """Send requests of the session through the pool."""
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+
+    def get(self, url):
+        """Return the adapter for the URL, like novaclient's pools do."""
+        return self.adapter
+
+    def request(self, method, url, **kwargs):
+        """Send a request like requests.request() does."""
+        return self.session.request(method=method, url=url, **kwargs)
+
+    def stats(self):
+        """Return numbers of connections opened and reused so far.
+
+        :returns: dict with "opened" and "reused" connections, a connection
+                  is reused by each request after the first one it serves
+        """
+        pools = self.adapter.poolmanager.pools
+        with self._lock:
+            opened = self._closed_opened
+            sent = self._closed_requests
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return {"opened": opened, "reused": max(sent - opened, 0)}
+
+
+_pool = {"pid": None, "pool": None}
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the connection pool of the current process.
+
+    Connections are never shared with forked processes, each of them
+    creates its own pool on first use.
+    """
+    with _pool_lock:
+        if _pool["pid"] != os.getpid():
+            _pool["pid"] = os.getpid()
+            _pool["pool"] = ConnectionPool()
+        return _pool["pool"]
+
+
+def get_stats():
+    """Return stats of the pool of the current process, zeros if unused."""
+    with _pool_lock:
+        pool = _pool["pool"] if _pool["pid"] == os.getpid() else None
+    if pool is None:
+        return {"opened": 0, "reused": 0}
+    return pool.stats()
+
+
+class _PooledRequests(object):
+    """Stand-in for the requests module in modules of client libraries."""
+
+    def __init__(self, module):
+        self._module = module
+
+    def request(self, method, url, **kwargs):
+        if not CONF.http_pool:
+            return self._module.request(method, url, **kwargs)
+        return get_pool().request(method, url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+def install(module):
+    """Make requests.request() calls of the module use the pool.
+
+    :param module: module of a client library that sends requests with
+                   requests.request(), e.g. cinderclient.client
+    """
+    if not isinstance(module.requests, _PooledRequests):
+        module.requests = _PooledRequests(module.requests)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def _get_netloc(parsed):
+    """Return host and port of the parsed URL, without the default port."""
+    default = {"http": httplib.HTTP_PORT, "https": httplib.HTTPS_PORT}
+    if parsed.port is None or parsed.port == default.get(parsed.scheme):
+        return parsed.hostname or ""
+    return "%s:%d" % (parsed.hostname, parsed.port)
+
+
+def register_service(url, service_type):
+    """Name requests to URLs that start with the URL after the service.
+
+    :param url: endpoint URL of the service from the service catalog
+    :param service_type: type of the service, e.g. "compute"
+    """
+    parsed = urlparse.urlparse(url)
+    with _services_lock:
+        prefixes = _services.setdefault(_get_netloc(parsed), {})
+        prefixes[parsed.path.rstrip("/")] = service_type
+
+
+def _get_call_name(method, url):
+    """Return "<service> <METHOD> <URL template>" of the request."""
+    parsed = urlparse.urlparse(url)
+    path = parsed.path.rstrip("/")
+    service = _get_netloc(parsed)
+    with _services_lock:
+        prefixes = _services.get(service, {})
+        matched = [prefix for prefix in prefixes
+                   if path == prefix or path.startswith(prefix + "/")]
+        if matched:
+            prefix = max(matched, key=len)
+            service = prefixes[prefix]
+            path = path[len(prefix):]
+    template = "/".join("{id}" if _ID_RE.match(segment) else segment
+                        for segment in path.split("/"))
+    return "%s %s %s" % (service, method, template or "/")
+
+
+def _size(body):
+    if isinstance(body, (six.binary_type, six.text_type)):
+        return len(body)
+    return 0
+
+
+# API calls are recorded for each thread that runs an iteration and are
+# grouped by the innermost atomic action running in the thread.
+_calls = threading.local()
+
+_install_lock = threading.Lock()
+
+
+def _get_url(connection, url):
+    """Return the full URL of a request sent by the httplib connection."""
+    if urlparse.urlparse(url).netloc:
+        return url
+    # NOTE: HTTPS connections of urllib3 are not subclasses of the httplib
+    #       one, so the scheme is told by the default port.
+    scheme = ("https" if connection.default_port == httplib.HTTPS_PORT
+              else "http")
+    host = connection.host
+    if ":" in host:
+        host = "[%s]" % host
+    return "%s://%s:%d%s" % (scheme, host, connection.port, url)
+
+
+def _install_recording():
+    """Record requests sent by httplib connections of the process.
+
+    Clients send requests with requests, through the pool or through their
+    own sessions, or with httplib directly (e.g. ironic); all of them end
+    up in httplib connections. A connection is used by one thread between
+    sending a request and getting the response headers, so the request is
+    kept in the connection until then.
+    """
+    with _install_lock:
+        if getattr(httplib.HTTPConnection, "_rally_recorded", False):
+            return
+        request = httplib.HTTPConnection.request
+        getresponse = httplib.HTTPConnection.getresponse
+
+        def request_recorded(self, method, url, body=None, *args, **kwargs):
+            if _recording():
+                self._rally_call = (method, _get_url(self, url),
+                                    _size(body), utils.monotonic())
+            try:
+                return request(self, method, url, body, *args, **kwargs)
+            except Exception:
+                _finish_call(self, None)
+                raise
+
+        def getresponse_recorded(self, *args, **kwargs):
+            response = None
+            try:
+                response = getresponse(self, *args, **kwargs)
+                return response
+            finally:
+                _finish_call(self, response)
+
+        httplib.HTTPConnection.request = request_recorded
+        httplib.HTTPConnection.getresponse = getresponse_recorded
+        httplib.HTTPConnection._rally_recorded = True
+
+
+def start_api_calls_record():
+    """Start recording API calls made by the current thread."""
+    _install_recording()
+    _calls.summary = {}
+    _calls.actions = []
+
+
+def stop_api_calls_record():
+    """Stop recording API calls made by the current thread.
+
+    :returns: dict that maps atomic action names (NO_ACTION for calls made
+              outside of actions) to dicts that map "<service> <METHOD>
+              <URL template>" to the number of calls, their total duration
+              in seconds, total size of request and response bodies in bytes
+              and numbers of responses with each status code ("error" if
+              there is no response)
+    """
+    summary = getattr(_calls, "summary", None) or {}
+    _calls.summary = None
+    _calls.actions = []
+    return summary
+
+
+def add_api_calls(summary, share=1):
+    """Add API calls made on behalf of the current thread by another one.
+
+    Calls are added to the innermost atomic action running in the current
+    thread, whichever actions they were made in.
+
+    :param summary: dict returned by stop_api_calls_record() in the thread
+                    that made the calls
+    :param share: part of the calls that is made for the current thread,
+                  e.g. 1/3 of a call made for three threads at once; numbers
+                  of calls stay integer if it is 1
+    """
+    if not _recording():
+        return
+    action = _calls.actions[-1] if _calls.actions else NO_ACTION
+    for action_calls in summary.values():
+        for name, call in action_calls.items():
+            total = _calls.summary.setdefault(action, {}).setdefault(
+                name, {"count": 0, "duration": 0.0, "bytes": 0, "status": {}})
+            total["count"] += call["count"] * share
+            total["duration"] += call["duration"] * share
+            total["bytes"] += call["bytes"] * share
+            for status, count in call["status"].items():
+                total["status"][status] = (total["status"].get(status, 0) +
+                                           count * share)
+
+
+def start_api_action(name):
+    """Group API calls of the current thread under the atomic action."""
+    if _recording():
+        _calls.actions.append(name)
+
+
+def stop_api_action():
+    """Stop grouping API calls under the innermost atomic action."""
+    if _recording() and _calls.actions:
+        _calls.actions.pop()
+
+
+def _recording():
+    return getattr(_calls, "summary", None) is not None
+
+
+def _finish_call(connection, response):
+    """Record the request of the connection, if any, with its response."""
+    started = connection.__dict__.pop("_rally_call", None)
+    if started is None or not _recording():
+        return
+    method, url, size, start = started
+    action = _calls.actions[-1] if _calls.actions else NO_ACTION
+    name = _get_call_name(method, url)
+    call = _calls.summary.setdefault(action, {}).setdefault(
+        name, {"count": 0, "duration": 0.0, "bytes": 0, "status": {}})
+    call["count"] += 1
+    call["duration"] += utils.monotonic() - start
+    call["bytes"] += size
+    if response is None:
+        status = "error"
+    else:
+        status = str(response.status)
+        try:
+            call["bytes"] += int(response.getheader("content-length", 0))
+        except ValueError:
+            pass
+    call["status"][status] = call["status"].get(status, 0) + 1
@@ -17,6 +17,7 @@ import json
 
 from rally import consts
 from rally import db
+from rally import exceptions
 
 
 class Task(object):
@@ -45,6 +46,24 @@ class Task(object):
     def update_status(self, status):
         self._update({'status': status})
 
+    def get_status(self):
+        """Read the current status of the task from the database."""
+        return db.task_get(self.task['uuid'])['status']
+
+    def abort(self):
+        """Ask the benchmark engine that runs the task to stop it.
+
+        :raises: :class:`rally.exceptions.TaskInvalidStatus` if the task
+                 is already stopped
+        """
+        status = self.get_status()
+        if status in (consts.TaskStatus.FINISHED, consts.TaskStatus.FAILED,
+                      consts.TaskStatus.ABORTED):
+            raise exceptions.TaskInvalidStatus(
+                uuid=self.task['uuid'], actual=status,
+                require=consts.TaskStatus.RUNNING)
+        self.update_status(consts.TaskStatus.ABORTING)
+
     def update_verification_log(self, log):
         self._update({'verification_log': json.dumps(log)})
 
@@ -56,5 +75,27 @@ class Task(object):
     def append_results(self, key, value):
         db.task_result_create(self.task['uuid'], key, value)
 
+    def create_chunked_results(self, key):
+        """Create results of a benchmark whose raw data is saved in chunks.
+
+        :returns: id of the task result
+        """
+        result = db.task_result_create(self.task['uuid'], key,
+                                       {"raw": [], "chunked": True})
+        return result['id']
+
+    @staticmethod
+    def append_results_chunk(result_id, position, raw):
+        db.task_result_chunk_create(result_id, position, raw)
+
+    @staticmethod
+    def get_chunked_raw(result_id):
+        return db.task_result_get_raw(result_id)
+
+    @staticmethod
+    def finish_chunked_results(result_id, value):
+        value = dict(value, raw=[], chunked=True)
+        db.task_result_update(result_id, value)
+
     def delete(self, status=None):
         db.task_delete(self.task['uuid'], status=status)
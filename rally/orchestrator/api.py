@@ -16,10 +16,14 @@
 import jsonschema
 
 from rally.benchmark import engine
+from rally.benchmark import users_pool
 from rally import consts
+from rally import db
 from rally import deploy
 from rally import exceptions
 from rally import objects
+from rally.objects import endpoint
+from rally.openstack.common.gettextutils import _
 from rally.openstack.common import log as logging
 from rally.verification.verifiers.tempest import tempest
 
@@ -59,6 +63,12 @@ def destroy_deploy(deploy_uuid):
     # TODO(akscram): Check that the deployment have got a status that
     #                is equal to "*->finished" or "deploy->inconsistent".
     deployment = objects.Deployment.get(deploy_uuid)
+    try:
+        _delete_users_pool(deployment)
+    except Exception as e:
+        LOG.warning(_("Failed to delete the users pool of deployment "
+                      "%(uuid)s: %(error)s") %
+                    {"uuid": deploy_uuid, "error": e})
     deployer = deploy.EngineFactory.get_engine(deployment['config']['type'],
                                                deployment)
     with deployer:
@@ -68,6 +78,38 @@ def destroy_deploy(deploy_uuid):
     tempest.Tempest(deploy_uuid).uninstall()
 
 
+def _get_users_pool(deployment):
+    return users_pool.UsersPool(deployment["uuid"],
+                                endpoint.Endpoint(**deployment["admin"]))
+
+
+def _delete_users_pool(deployment):
+    if not db.users_pool_get(deployment["uuid"]):
+        return 0
+    return _get_users_pool(deployment).delete()
+
+
+def users_pool_create(deploy_uuid, tenants, users_per_tenant):
+    """Add tenants with users to the users pool of the deployment.
+
+    :param deploy_uuid: UUID of the deployment
+    :param tenants: number of tenants to create
+    :param users_per_tenant: number of users of each tenant
+    """
+    deployment = objects.Deployment.get(deploy_uuid)
+    _get_users_pool(deployment).create(tenants, users_per_tenant)
+
+
+def users_pool_delete(deploy_uuid):
+    """Delete tenants and users of the users pool of the deployment.
+
+    :param deploy_uuid: UUID of the deployment
+    :returns: number of tenants that are left, because they are leased
+              to running tasks
+    """
+    return _delete_users_pool(objects.Deployment.get(deploy_uuid))
+
+
 def recreate_deploy(deploy_uuid):
     """Performs a clean up and then start to deploy.
 
@@ -139,8 +181,17 @@ def start_task(deploy_uuid, config, task=None):
 
 
 def abort_task(task_uuid):
-    """Abort running task."""
-    raise NotImplementedError()
+    """Abort running task.
+
+    The benchmark engine that runs the task stops starting new iterations
+    of the current benchmarks, waits for the started ones and skips the
+    rest of benchmarks of the task.
+
+    :param task_uuid: The UUID of the task.
+    :raises: :class:`rally.exceptions.TaskInvalidStatus` when the task
+             is already stopped
+    """
+    objects.Task.get(task_uuid).abort()
 
 
 def delete_task(task_uuid, force=False):
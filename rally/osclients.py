@@ -13,26 +13,40 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import json
+import os
+import threading
 import urlparse
 
-from ceilometerclient import client as ceilometer
-from cinderclient import client as cinder
-from designateclient import v1 as designate
-import glanceclient as glance
-from heatclient import client as heat
-from ironicclient import client as ironic
-from keystoneclient import discover as keystone_discover
-from keystoneclient import exceptions as keystone_exceptions
-from keystoneclient.v2_0 import client as keystone_v2
-from keystoneclient.v3 import client as keystone_v3
-from neutronclient.neutron import client as neutron
-from novaclient import client as nova
 from oslo.config import cfg
-from saharaclient import client as sahara
-from zaqarclient.queues import client as zaqar
 
 from rally import consts
 from rally import exceptions
+from rally import httppool
+from rally.openstack.common import log as logging
+from rally import utils
+
+
+# NOTE: Client libraries are imported on first use, so CLI commands that
+#       don't talk to the cloud don't spend time on importing all of them.
+ceilometer = utils.LazyModule("ceilometerclient.client")
+cinder = utils.LazyModule("cinderclient.client")
+designate = utils.LazyModule("designateclient.v1")
+glance = utils.LazyModule("glanceclient")
+heat = utils.LazyModule("heatclient.client")
+heat_http = utils.LazyModule("heatclient.common.http")
+ironic = utils.LazyModule("ironicclient.client")
+keystone_access = utils.LazyModule("keystoneclient.access")
+keystone_discover = utils.LazyModule("keystoneclient.discover")
+keystone_exceptions = utils.LazyModule("keystoneclient.exceptions")
+keystone_v2 = utils.LazyModule("keystoneclient.v2_0.client")
+keystone_v3 = utils.LazyModule("keystoneclient.v3.client")
+neutron = utils.LazyModule("neutronclient.neutron.client")
+neutron_http = utils.LazyModule("neutronclient.client")
+nova = utils.LazyModule("novaclient.client")
+sahara = utils.LazyModule("saharaclient.client")
+zaqar = utils.LazyModule("zaqarclient.queues.client")
 
 
 CONF = cfg.CONF
@@ -42,12 +56,21 @@ CONF.register_opts([
     cfg.BoolOpt("https_insecure", default=False,
                 help="Use SSL for all OpenStack API interfaces"),
     cfg.StrOpt("https_cacert", default=None,
-               help="Path to CA server cetrificate for SSL")
+               help="Path to CA server cetrificate for SSL"),
+    cfg.BoolOpt("auth_cache", default=True,
+                help="Share keystone tokens and service endpoint URLs "
+                     "between clients with the same credentials in the "
+                     "process"),
+    cfg.IntOpt("auth_cache_stale_duration", default=300,
+               help="Cached tokens that expire in less than this number "
+                    "of seconds are not used, a new token is requested"),
+    cfg.StrOpt("auth_cache_file", default=None,
+               help="File where cached tokens are kept between runs of "
+                    "rally commands, tokens are kept only in memory "
+                    "if it is not set")
 ])
 
-
-# NOTE(boris-42): super dirty hack to fix nova python client 2.17 thread safe
-nova._adapter_pool = lambda x: nova.adapters.HTTPAdapter()
+LOG = logging.getLogger(__name__)
 
 
 def cached(func):
@@ -66,6 +89,174 @@ def cached(func):
     return wrapper
 
 
+class AuthCache(object):
+    """Process-wide cache of keystone tokens and service endpoint URLs.
+
+    Entries are keyed by auth URL, user, password hash, tenant, region and
+    endpoint type, so all clients with the same credentials share one token
+    and resolve each service endpoint once. A token that expires soon is
+    dropped together with endpoints resolved from it. If the path of a file
+    is given, tokens are loaded from it on first use and saved to it on each
+    update, so they outlive the process.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.token_hits = 0
+        self.token_misses = 0
+        self.url_hits = 0
+        self.url_misses = 0
+        self._entries = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def get_key(endpoint):
+        password = hashlib.sha256(endpoint.password or "").hexdigest()
+        return "|".join(str(part) for part in (
+            endpoint.auth_url, endpoint.username, password,
+            endpoint.tenant_name, endpoint.region_name,
+            endpoint.endpoint_type))
+
+    def _check_pid(self):
+        # NOTE: A forked process keeps the entries, but the lock could be
+        #       held by a thread that doesn't exist in the child.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+
+    def _load(self):
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as cache_file:
+                tokens = json.load(cache_file)
+        except (IOError, ValueError) as e:
+            LOG.debug("Failed to load cached tokens from %(path)s: "
+                      "%(error)s" % {"path": self.path, "error": e})
+            return
+        for key, auth_ref in tokens.items():
+            self._entries[key] = {
+                "auth_ref": keystone_access.AccessInfo.factory(**auth_ref),
+                "urls": {}}
+
+    def _save(self):
+        if not self.path:
+            return
+        tokens = dict((key, dict(entry["auth_ref"]))
+                      for key, entry in self._entries.items())
+        tmp_path = "%s.%d" % (self.path, os.getpid())
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0o600)
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump(tokens, cache_file)
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            LOG.debug("Failed to save cached tokens to %(path)s: "
+                      "%(error)s" % {"path": self.path, "error": e})
+
+    def get_auth_ref(self, key, stale_duration=0):
+        """Return the cached token if it doesn't expire soon.
+
+        :param key: key returned by get_key()
+        :param stale_duration: number of seconds before the expiration of
+                               the token when it is considered expired
+        :returns: keystoneclient AccessInfo or None
+        """
+        self._check_pid()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry and entry["auth_ref"].will_expire_soon(stale_duration):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.token_misses += 1
+                LOG.debug("Token cache miss, %s" % self._stats())
+                return None
+            self.token_hits += 1
+            return entry["auth_ref"]
+
+    def set_auth_ref(self, key, auth_ref):
+        """Cache the token, endpoints resolved from the old one are dropped.
+
+        Only tokens returned by keystone (AccessInfo dicts) are cached.
+        """
+        if not isinstance(auth_ref, dict):
+            return
+        self._check_pid()
+        with self._lock:
+            self._entries[key] = {"auth_ref": auth_ref, "urls": {}}
+            self._save()
+
+    def get_url(self, key, service_type, resolve):
+        """Return the cached URL of the service, resolving it on a miss.
+
+        :param resolve: function that returns the URL from the catalog
+        """
+        self._check_pid()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and service_type in entry["urls"]:
+                self.url_hits += 1
+                return entry["urls"][service_type]
+        url = resolve()
+        with self._lock:
+            self.url_misses += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["urls"][service_type] = url
+        LOG.debug("Endpoint cache miss for %(service)s, %(stats)s" %
+                  {"service": service_type, "stats": self._stats()})
+        return url
+
+    def invalidate(self, key):
+        """Drop the token and endpoints of the key, e.g. on auth failure."""
+        self._check_pid()
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def clear(self):
+        """Drop all entries and reset counters."""
+        self._check_pid()
+        with self._lock:
+            self._entries = {}
+            self._loaded = True
+            self.token_hits = self.token_misses = 0
+            self.url_hits = self.url_misses = 0
+
+    def _stats(self):
+        return ("tokens: %(th)d hits, %(tm)d misses; endpoints: %(uh)d "
+                "hits, %(um)d misses" %
+                {"th": self.token_hits, "tm": self.token_misses,
+                 "uh": self.url_hits, "um": self.url_misses})
+
+
+_auth_cache = {"cache": None}
+_auth_cache_lock = threading.Lock()
+
+
+def get_auth_cache():
+    """Return the AuthCache shared by all Clients of the process."""
+    with _auth_cache_lock:
+        cache = _auth_cache["cache"]
+        if cache is None or cache.path != CONF.auth_cache_file:
+            cache = AuthCache(CONF.auth_cache_file)
+            _auth_cache["cache"] = cache
+        return cache
+
+
+def _create_keystone_client_from_token(auth_ref, args):
+    if auth_ref.version == "v3":
+        return keystone_v3.Client(auth_ref=auth_ref, **args)
+    return keystone_v2.Client(auth_ref=auth_ref, **args)
+
+
 def create_keystone_client(args):
     discover = keystone_discover.Discover(**args)
     for version_data in discover.version_data():
@@ -89,6 +280,19 @@ class Clients(object):
         """Remove all cached client handles."""
         self.cache = {}
 
+    def is_authenticated(self, stale_duration=0):
+        """Check that cached keystone client holds a token that is valid.
+
+        :param stale_duration: Number of seconds before the actual token
+                               expiration when the token is considered
+                               to be already expired
+        :returns: False if there is no token yet or it expires soon
+        """
+        client = self.cache.get("keystone")
+        if client is None or client.auth_ref is None:
+            return False
+        return not client.auth_ref.will_expire_soon(stale_duration)
+
     @cached
     def keystone(self):
         """Return keystone client."""
@@ -108,11 +312,46 @@ class Clients(object):
                 )
             else:
                 kw["endpoint"] = kw["auth_url"]
+        httppool.register_service(kw["auth_url"], "identity")
+        if kw.get("endpoint"):
+            httppool.register_service(kw["endpoint"], "identity")
+        if not CONF.auth_cache:
+            client = create_keystone_client(kw)
+            if client.auth_ref is None:
+                client.authenticate()
+            return client
+
+        auth_cache = get_auth_cache()
+        key = auth_cache.get_key(self.endpoint)
+        auth_ref = auth_cache.get_auth_ref(key,
+                                           CONF.auth_cache_stale_duration)
+        if auth_ref is not None:
+            return _create_keystone_client_from_token(auth_ref, kw)
         client = create_keystone_client(kw)
         if client.auth_ref is None:
             client.authenticate()
+        auth_cache.set_auth_ref(key, client.auth_ref)
         return client
 
+    def _url_for(self, service_type):
+        """Return the URL of the service from the catalog of the token."""
+        kc = self.keystone()
+
+        def resolve():
+            return kc.service_catalog.url_for(
+                service_type=service_type,
+                endpoint_type=self.endpoint.endpoint_type,
+                region_name=self.endpoint.region_name)
+
+        if not CONF.auth_cache:
+            url = resolve()
+        else:
+            auth_cache = get_auth_cache()
+            url = auth_cache.get_url(auth_cache.get_key(self.endpoint),
+                                     service_type, resolve)
+        httppool.register_service(url, service_type)
+        return url
+
     def verified_keystone(self):
         """Ensure keystone endpoints are valid and then authenticate
 
@@ -126,6 +365,9 @@ class Clients(object):
                 raise exceptions.InvalidAdminException(
                     username=self.endpoint.username)
         except keystone_exceptions.Unauthorized:
+            if CONF.auth_cache:
+                get_auth_cache().invalidate(
+                    AuthCache.get_key(self.endpoint))
             raise exceptions.InvalidEndpointsException()
         except keystone_exceptions.AuthorizationFailure:
             raise exceptions.HostUnreachableException(
@@ -136,10 +378,10 @@ class Clients(object):
     def nova(self, version='2'):
         """Return nova client."""
         kc = self.keystone()
-        compute_api_url = kc.service_catalog.url_for(
-            service_type='compute',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        compute_api_url = self._url_for('compute')
+        # NOTE(boris-42): super dirty hack to fix nova python client 2.17
+        #                 thread safe
+        nova._adapter_pool = lambda x: nova.adapters.HTTPAdapter()
         client = nova.Client(version,
                              auth_token=kc.auth_token,
                              http_log_debug=CONF.debug,
@@ -147,16 +389,17 @@ class Clients(object):
                              insecure=CONF.https_insecure,
                              cacert=CONF.https_cacert)
         client.set_management_url(compute_api_url)
+        if CONF.http_pool:
+            client.client._connection_pool = httppool.get_pool()
         return client
 
     @cached
     def neutron(self, version='2.0'):
         """Return neutron client."""
         kc = self.keystone()
-        network_api_url = kc.service_catalog.url_for(
-            service_type='network',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        network_api_url = self._url_for('network')
+        if CONF.http_pool:
+            httppool.install(neutron_http)
         client = neutron.Client(version,
                                 token=kc.auth_token,
                                 endpoint_url=network_api_url,
@@ -169,26 +412,24 @@ class Clients(object):
     def glance(self, version='1'):
         """Return glance client."""
         kc = self.keystone()
-        image_api_url = kc.service_catalog.url_for(
-            service_type='image',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        image_api_url = self._url_for('image')
         client = glance.Client(version,
                                endpoint=image_api_url,
                                token=kc.auth_token,
                                timeout=CONF.openstack_client_http_timeout,
                                insecure=CONF.https_insecure,
                                cacert=CONF.https_cacert)
+        if CONF.http_pool:
+            httppool.get_pool().mount(client.http_client.session)
         return client
 
     @cached
     def heat(self, version='1'):
         """Return heat client."""
         kc = self.keystone()
-        orchestration_api_url = kc.service_catalog.url_for(
-            service_type='orchestration',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        orchestration_api_url = self._url_for('orchestration')
+        if CONF.http_pool:
+            httppool.install(heat_http)
         client = heat.Client(version,
                              endpoint=orchestration_api_url,
                              token=kc.auth_token,
@@ -200,16 +441,15 @@ class Clients(object):
     @cached
     def cinder(self, version='1'):
         """Return cinder client."""
+        if CONF.http_pool:
+            httppool.install(cinder)
         client = cinder.Client(version, None, None,
                                http_log_debug=CONF.debug,
                                timeout=CONF.openstack_client_http_timeout,
                                insecure=CONF.https_insecure,
                                cacert=CONF.https_cacert)
         kc = self.keystone()
-        volume_api_url = kc.service_catalog.url_for(
-            service_type='volume',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        volume_api_url = self._url_for('volume')
         client.client.management_url = volume_api_url
         client.client.auth_token = kc.auth_token
         return client
@@ -218,10 +458,7 @@ class Clients(object):
     def ceilometer(self, version='2'):
         """Return ceilometer client."""
         kc = self.keystone()
-        metering_api_url = kc.service_catalog.url_for(
-            service_type='metering',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        metering_api_url = self._url_for('metering')
         auth_token = kc.auth_token
         if not hasattr(auth_token, '__call__'):
             # python-ceilometerclient requires auth_token to be a callable
@@ -239,10 +476,7 @@ class Clients(object):
     def ironic(self, version='1.0'):
         """Return Ironic client."""
         kc = self.keystone()
-        baremetal_api_url = kc.service_catalog.url_for(
-            service_type='baremetal',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        baremetal_api_url = self._url_for('baremetal')
         client = ironic.get_client(version,
                                    os_auth_token=kc.auth_token,
                                    ironic_url=baremetal_api_url,
@@ -265,11 +499,7 @@ class Clients(object):
     @cached
     def zaqar(self):
         """Return Zaqar client."""
-        kc = self.keystone()
-        messaging_api_url = kc.service_catalog.url_for(
-            service_type='messaging',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        messaging_api_url = self._url_for('messaging')
         conf = {'auth_opts': {'backend': 'keystone', 'options': {
             'os_username': self.endpoint.username,
             'os_password': self.endpoint.password,
@@ -286,14 +516,13 @@ class Clients(object):
     def designate(self):
         """Return designate client."""
         kc = self.keystone()
-        dns_api_url = kc.service_catalog.url_for(
-            service_type='dns',
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        dns_api_url = self._url_for('dns')
         client = designate.Client(
             endpoint=dns_api_url,
             token=kc.auth_token,
             insecure=CONF.https_insecure)
+        if CONF.http_pool:
+            httppool.get_pool().mount(client.requests)
         return client
 
     @cached
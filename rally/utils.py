@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ctypes
+import ctypes.util
 import functools
 import imp
 import inspect
@@ -79,14 +81,55 @@ class StdErrCapture(object):
         sys.stderr = self.stderr
 
 
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+def _get_monotonic_clock():
+    """Return a function that reads a monotonic clock in seconds.
+
+    Python 2 has no time.monotonic(), so on Linux CLOCK_MONOTONIC is read
+    with clock_gettime() through ctypes. The clock doesn't jump with NTP
+    adjustments and is shared by all processes of the host. Where it isn't
+    available, time.time() is used.
+    """
+    if hasattr(time, "monotonic"):
+        return time.monotonic
+    if not sys.platform.startswith("linux"):
+        return time.time
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("rt") or "libc.so.6",
+                           use_errno=True)
+        clock_gettime = libc.clock_gettime
+    except (OSError, AttributeError):
+        return time.time
+
+    clock_monotonic = 1
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_Timespec)]
+
+    def monotonic():
+        timespec = _Timespec()
+        if clock_gettime(clock_monotonic, ctypes.byref(timespec)):
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return timespec.tv_sec + timespec.tv_nsec * 1e-9
+
+    return monotonic
+
+
+monotonic = _get_monotonic_clock()
+
+
 class Timer(object):
+    """Measures duration of the with-block by the monotonic clock."""
+
     def __enter__(self):
         self.error = None
-        self.start = time.time()
+        self.start = monotonic()
         return self
 
     def __exit__(self, type, value, tb):
-        self.finish = time.time()
+        self.finish = monotonic()
         if type:
             self.error = (type, value, tb)
 
@@ -118,6 +161,96 @@ def itersubclasses(cls, _seen=None):
                 yield sub
 
 
+# NOTE: Indexes of subclasses of plugin bases (scenarios, runners, contexts,
+#       SLA, deploy engines and server providers), built on first lookup.
+_subclasses = {}
+_subclasses_indexes = {}
+
+
+def invalidate_subclasses_cache():
+    """Drop cached lists and indexes of subclasses.
+
+    Called when new plugins are loaded, so lookups see their classes.
+    """
+    _subclasses.clear()
+    _subclasses_indexes.clear()
+
+
+def _count_subclasses(classes):
+    return [len(type.__subclasses__(c)) for c in classes]
+
+
+def get_subclasses(cls):
+    """Return the cached list of all subclasses of cls.
+
+    Subclasses are listed in the same order as by itersubclasses(). A class
+    defined after the list was cached adds a direct subclass to one of the
+    listed classes or to cls, so the list is rebuilt when their numbers of
+    direct subclasses change.
+    """
+    cached = _subclasses.get(cls)
+    if cached is not None:
+        subclasses, counts = cached
+        if _count_subclasses([cls] + subclasses) == counts:
+            return subclasses
+        for key in [key for key in _subclasses_indexes if key[0] is cls]:
+            del _subclasses_indexes[key]
+    subclasses = list(itersubclasses(cls))
+    _subclasses[cls] = (subclasses, _count_subclasses([cls] + subclasses))
+    return subclasses
+
+
+def find_subclass(cls, value, attr="__name__"):
+    """Find a subclass of cls by the value of its attribute.
+
+    Subclasses are indexed by the attribute once, so lookups don't walk all
+    of them. If there is no such subclass, the index is rebuilt once to find
+    classes defined after it was built.
+
+    :param cls: base class, e.g. Scenario
+    :param value: value of the attribute, e.g. name of the scenario class
+    :param attr: name of the class attribute the subclasses are indexed by
+    :returns: the first subclass in order of itersubclasses() that has the
+              attribute equal to value or None
+    """
+    key = (cls, attr)
+    for rebuild in (False, True):
+        if rebuild or key not in _subclasses_indexes:
+            _subclasses.pop(cls, None)
+            index = {}
+            for sub in get_subclasses(cls):
+                index.setdefault(getattr(sub, attr, None), sub)
+            _subclasses_indexes[key] = index
+        if value in _subclasses_indexes[key]:
+            return _subclasses_indexes[key][value]
+    return None
+
+
+class LazyModule(object):
+    """Module that is imported on the first access to its attributes.
+
+    Heavy optional modules (e.g. python clients of OpenStack services) are
+    assigned to module level names like usual imports, but don't slow down
+    the start of commands that never use them.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        if self._lazy_module is None:
+            self.__dict__["_lazy_module"] = importutils.import_module(
+                self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+
 def try_append_module(name, modules):
     if name not in modules:
         modules[name] = importutils.import_module(name)
@@ -137,6 +270,7 @@ def import_modules_from_package(package):
             new_package = ".".join(root.split(os.sep)).split("....")[1]
             module_name = '%s.%s' % (new_package, filename[:-3])
             try_append_module(module_name, sys.modules)
+    invalidate_subclasses_cache()
 
 
 def _log_wrapper(obj, log, msg, **kw):
@@ -196,6 +330,7 @@ def load_plugins(directory):
             except Exception as e:
                 LOG.error(_("Couldn't load module from %(path)s: %(msg)s") %
                           {"path": fullpath, "msg": six.text_type(e)})
+        invalidate_subclasses_cache()
 
 
 def get_method_class(func):
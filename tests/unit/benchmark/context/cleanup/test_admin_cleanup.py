@@ -14,6 +14,7 @@
 #    under the License.
 
 import mock
+from oslo.config import cfg
 
 from rally.benchmark.context.cleanup import admin_cleanup
 from tests.unit import fakes
@@ -41,6 +42,9 @@ class AdminCleanupTestCase(test.TestCase):
     @mock.patch("%s.osclients.Clients" % BASE)
     @mock.patch("%s.utils.delete_keystone_resources" % BASE)
     def test_cleaner_admin(self, mock_del_keystone, mock_clients):
+        cfg.CONF.set_override("cleanup_sweep", True, "benchmark")
+        self.addCleanup(cfg.CONF.clear_override, "cleanup_sweep",
+                        "benchmark")
         context = {
             "task": mock.MagicMock(),
             "config": {"admin_cleanup": ["keystone"]},
@@ -57,3 +61,57 @@ class AdminCleanupTestCase(test.TestCase):
         mock_clients.assert_called_once_with(context["admin"]["endpoint"])
         mock_clients.return_value.keystone.assert_called_with()
         mock_del_keystone.assert_called_once_with(fake_keystone)
+
+    @mock.patch("%s.osclients.Clients" % BASE)
+    @mock.patch("%s.utils.delete_keystone_resources" % BASE)
+    @mock.patch("%s.utils.db" % BASE)
+    def test_cleaner_admin_ledger(self, mock_db, mock_del_keystone,
+                                  mock_clients):
+        context = {
+            "task": {"uuid": "task"},
+            "config": {"admin_cleanup": ["keystone"]},
+            "admin": {"endpoint": mock.MagicMock()},
+        }
+        mock_db.task_resources_get.return_value = [
+            mock.Mock(id=1, tenant_id=None, service="keystone",
+                      type="users", resource_id="u1"),
+            mock.Mock(id=2, tenant_id=None, service="keystone",
+                      type="tenants", resource_id="t1"),
+            mock.Mock(id=3, tenant_id="t1", service="nova",
+                      type="servers", resource_id="s1")]
+        keystone = mock_clients.return_value.keystone.return_value
+        keystone.version = "v2.0"
+        res_cleaner = admin_cleanup.AdminCleanup(context)
+
+        with res_cleaner:
+            res_cleaner.setup()
+
+        self.assertTrue(context["resource_ledger"])
+        mock_db.task_resources_get.assert_called_once_with("task")
+        mock_del_keystone.assert_called_once_with(keystone,
+                                                  ("service", "role"))
+        keystone.users.delete.assert_called_once_with("u1")
+        keystone.tenants.delete.assert_called_once_with("t1")
+        self.assertEqual([1, 2], sorted(
+            mock_db.task_resources_delete.call_args[0][0]))
+
+    @mock.patch("%s.osclients.Clients" % BASE)
+    @mock.patch("%s.utils.delete_keystone_resources" % BASE)
+    @mock.patch("%s.utils.db" % BASE)
+    def test_cleaner_admin_ledger_incomplete(self, mock_db,
+                                             mock_del_keystone,
+                                             mock_clients):
+        context = {
+            "task": {"uuid": "task"},
+            "config": {"admin_cleanup": ["keystone"]},
+            "admin": {"endpoint": mock.MagicMock()},
+        }
+        keystone = mock_clients.return_value.keystone.return_value
+        res_cleaner = admin_cleanup.AdminCleanup(context)
+
+        with res_cleaner:
+            res_cleaner.setup()
+            context["resource_ledger_incomplete"] = True
+
+        self.assertFalse(mock_db.task_resources_get.called)
+        mock_del_keystone.assert_called_once_with(keystone)
@@ -0,0 +1,122 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+
+from rally.benchmark.context.cleanup import executor
+from rally.benchmark.context.cleanup import utils
+from tests.unit import test
+
+
+class CleanupExecutorTestCase(test.TestCase):
+
+    def setUp(self):
+        super(CleanupExecutorTestCase, self).setUp()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _step(self, name, depends=(), error=None, leftovers=0):
+        def delete(tenant):
+            with self.lock:
+                self.calls.append((tenant, name))
+            if error:
+                raise error
+        return utils.CleanupStep(name, delete,
+                                 lambda tenant: [None] * leftovers,
+                                 list(depends))
+
+    def _without_duration(self, report):
+        for service_report in report.values():
+            self.assertTrue(service_report.pop("duration") >= 0)
+        return report
+
+    def test_run_respects_dependencies(self):
+        steps = [self._step("ports"), self._step("routers", ["ports"]),
+                 self._step("subnets", ["routers"]),
+                 self._step("networks", ["subnets"])]
+        cleanup_executor = executor.CleanupExecutor(concurrency=4)
+        for tenant in range(10):
+            cleanup_executor.add("neutron", steps, lambda t=tenant: [t])
+
+        report = cleanup_executor.run()
+
+        self.assertEqual({"neutron": {"steps": 40, "failed": 0,
+                                      "skipped": 0, "leftovers": 0}},
+                         self._without_duration(report))
+        for tenant in range(10):
+            self.assertEqual(["ports", "routers", "subnets", "networks"],
+                             [name for t, name in self.calls if t == tenant])
+
+    def test_run_skips_dependents_of_failed_steps(self):
+        steps = [self._step("transfers", error=Exception("fail")),
+                 self._step("snapshots"), self._step("backups"),
+                 self._step("volumes", ["transfers", "snapshots"],
+                            leftovers=2)]
+        cleanup_executor = executor.CleanupExecutor(concurrency=2)
+        cleanup_executor.add("cinder", steps, lambda: ["tenant"])
+
+        report = cleanup_executor.run()
+
+        self.assertEqual({"cinder": {"steps": 3, "failed": 1, "skipped": 1,
+                                     "leftovers": 0}},
+                         self._without_duration(report))
+        self.assertNotIn(("tenant", "volumes"), self.calls)
+
+    def test_run_counts_leftovers(self):
+        cleanup_executor = executor.CleanupExecutor(concurrency=2)
+        cleanup_executor.add("nova", [self._step("servers", leftovers=2)],
+                             lambda: ["tenant1"])
+        cleanup_executor.add("nova", [self._step("servers", leftovers=1)],
+                             lambda: ["tenant2"])
+        cleanup_executor.add("heat", [self._step("stacks")],
+                             lambda: ["tenant1"])
+
+        report = cleanup_executor.run()
+
+        self.assertEqual({"nova": {"steps": 2, "failed": 0, "skipped": 0,
+                                   "leftovers": 3},
+                          "heat": {"steps": 1, "failed": 0, "skipped": 0,
+                                   "leftovers": 0}},
+                         self._without_duration(report))
+
+    def test_run_args_failed(self):
+        get_args = mock.MagicMock(side_effect=Exception("auth failed"))
+        cleanup_executor = executor.CleanupExecutor(concurrency=2)
+        cleanup_executor.add("nova", [self._step("servers"),
+                                      self._step("keypairs"),
+                                      self._step("security_groups",
+                                                 ["servers"])], get_args)
+
+        report = cleanup_executor.run()
+
+        self.assertEqual({"nova": {"steps": 2, "failed": 2, "skipped": 1,
+                                   "leftovers": 0}},
+                         self._without_duration(report))
+        self.assertEqual([], self.calls)
+        self.assertEqual(1, get_args.call_count)
+
+    def test_run_without_cleanups(self):
+        self.assertEqual({}, executor.CleanupExecutor().run())
+
+    def test_cleanup_steps_dependencies(self):
+        for service, steps in utils.CLEANUP_STEPS.items():
+            names = []
+            for step in steps:
+                for dependency in step.depends:
+                    self.assertIn(dependency, names,
+                                  "%s %s" % (service, step.name))
+                names.append(step.name)
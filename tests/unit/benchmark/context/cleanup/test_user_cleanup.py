@@ -14,8 +14,11 @@
 #    under the License.
 
 import mock
+from novaclient import exceptions as nova_exceptions
+from oslo.config import cfg
 
 from rally.benchmark.context.cleanup import user_cleanup
+from rally.benchmark.context.cleanup import utils
 from tests.unit import fakes
 from tests.unit import test
 
@@ -25,6 +28,11 @@ BASE = "rally.benchmark.context.cleanup.user_cleanup"
 
 class UserCleanupTestCase(test.TestCase):
 
+    def _sweep(self):
+        cfg.CONF.set_override("cleanup_sweep", True, "benchmark")
+        self.addCleanup(cfg.CONF.clear_override, "cleanup_sweep",
+                        "benchmark")
+
     def test_with_statement_no_user(self):
         context = {
             "task": mock.MagicMock(),
@@ -50,12 +58,13 @@ class UserCleanupTestCase(test.TestCase):
         user_cleaner._cleanup_resources.assert_called_once_with()
 
     @mock.patch("%s.osclients.Clients" % BASE)
-    @mock.patch("%s.utils.delete_nova_resources" % BASE)
-    @mock.patch("%s.utils.delete_glance_resources" % BASE)
-    @mock.patch("%s.utils.delete_cinder_resources" % BASE)
-    @mock.patch("%s.utils.delete_neutron_resources" % BASE)
-    def test_cleaner_resources(self, mock_del_neutron, mock_del_cinder,
-                               mock_del_glance, mock_del_nova, mock_clients):
+    def test_cleaner_resources(self, mock_clients):
+        self._sweep()
+        steps = {}
+        for service in ["cinder", "nova", "glance", "neutron"]:
+            steps[service] = [utils.CleanupStep(
+                "step", mock.MagicMock(), mock.MagicMock(return_value=[]),
+                [])]
         context = {
             "task": mock.MagicMock(),
             "users": [{"endpoint": mock.MagicMock()},
@@ -63,19 +72,127 @@ class UserCleanupTestCase(test.TestCase):
             "config": {"cleanup": ["cinder", "nova", "glance", "neutron"]},
             "tenants": [mock.MagicMock()]
         }
+        clients = mock_clients.return_value
+        for service in steps:
+            getattr(clients, service).return_value = service
+        clients.keystone.return_value.tenant_id = "tenant"
         user_cleaner = user_cleanup.UserCleanup(context)
 
-        with user_cleaner:
-            user_cleaner.setup()
+        with mock.patch.dict("%s.utils.CLEANUP_STEPS" % BASE, steps):
+            with user_cleaner:
+                user_cleaner.setup()
 
         expected = [mock.call(context["users"][0]["endpoint"]),
                     mock.call(context["users"][1]["endpoint"])]
         mock_clients.assert_has_calls(expected, any_order=True)
 
-        self.assertEqual(mock_del_nova.call_count, 2)
-        self.assertEqual(mock_del_glance.call_count, 2)
-        self.assertEqual(mock_del_cinder.call_count, 2)
-        self.assertEqual(mock_del_neutron.call_count, 2)
+        for service in ["nova", "cinder"]:
+            self.assertEqual([mock.call(service)] * 2,
+                             steps[service][0].delete.call_args_list)
+        for service in ["glance", "neutron"]:
+            self.assertEqual([mock.call(service, "tenant")] * 2,
+                             steps[service][0].delete.call_args_list)
+
+    @mock.patch("%s.osclients.Clients" % BASE)
+    def test_cleanup_resources_report(self, mock_clients):
+        self._sweep()
+        steps = {"nova": [utils.CleanupStep(
+            "servers", mock.MagicMock(),
+            mock.MagicMock(return_value=["server"]), [])]}
+        context = {
+            "task": mock.MagicMock(),
+            "users": [{"endpoint": mock.MagicMock()}],
+            "config": {"cleanup": ["nova"]}
+        }
+        user_cleaner = user_cleanup.UserCleanup(context)
+        user_cleaner.setup()
+
+        with mock.patch.dict("%s.utils.CLEANUP_STEPS" % BASE, steps):
+            report = user_cleaner._cleanup_resources()
+
+        self.assertEqual({"steps": 1, "failed": 0, "skipped": 0,
+                          "leftovers": 1},
+                         dict((k, v) for k, v in report["nova"].items()
+                              if k != "duration"))
+
+    def _cleanup_with_ledger(self, mock_db, mock_clients,
+                             incomplete=False):
+        sweep_steps = {}
+        for service, names in [("nova", ["servers", "keypairs"]),
+                               ("glance", ["images"])]:
+            sweep_steps[service] = [
+                utils.CleanupStep(name, mock.MagicMock(),
+                                  mock.MagicMock(return_value=[]), [])
+                for name in names]
+        context = {
+            "task": {"uuid": "task"},
+            "users": [{"endpoint": "e1", "tenant_id": "t1"},
+                      {"endpoint": "e2", "tenant_id": "t1"},
+                      {"endpoint": "e3", "tenant_id": "t2"}],
+            "config": {"cleanup": ["nova", "glance", "zaqar"]}
+        }
+        mock_db.task_resources_get.return_value = [
+            mock.Mock(id=1, tenant_id="t1", service="nova",
+                      type="servers", resource_id="s1"),
+            mock.Mock(id=2, tenant_id="t1", service="nova",
+                      type="floating_ips", resource_id="f1"),
+            mock.Mock(id=3, tenant_id="t2", service="nova",
+                      type="floating_ips", resource_id="f2")]
+        nova = mock.MagicMock()
+        nova.servers.get.side_effect = nova_exceptions.NotFound(404)
+
+        def delete_floating_ip(floating_ip_id):
+            if floating_ip_id == "f2":
+                raise Exception("delete failed")
+        nova.floating_ips.delete.side_effect = delete_floating_ip
+        mock_clients.return_value.nova.return_value = nova
+        zaqar = mock_clients.return_value.zaqar.return_value
+        zaqar.queues.list.return_value = []
+        user_cleaner = user_cleanup.UserCleanup(context)
+        user_cleaner.setup()
+        if incomplete:
+            context["resource_ledger_incomplete"] = True
+
+        with mock.patch.dict("%s.utils.CLEANUP_STEPS" % BASE, sweep_steps):
+            report = user_cleaner._cleanup_resources()
+
+        self.assertTrue(context["resource_ledger"])
+        self.assertEqual([mock.call("f1"), mock.call("f2")],
+                         sorted(nova.floating_ips.delete.call_args_list))
+        # NOTE: Keypairs are not recorded, so they are listed and deleted
+        #       with clients of each user.
+        self.assertEqual([mock.call(nova)] * 3,
+                         sweep_steps["nova"][1].delete.call_args_list)
+        self.assertEqual(1, report["nova"]["failed"])
+        self.assertEqual(1, report["nova"]["leftovers"])
+        self.assertEqual(3, report["zaqar"]["steps"])
+        return nova, sweep_steps, report
+
+    @mock.patch("%s.osclients.Clients" % BASE)
+    @mock.patch("%s.utils.db" % BASE)
+    def test_cleanup_resources_ledger(self, mock_db, mock_clients):
+        nova, sweep_steps, report = self._cleanup_with_ledger(mock_db,
+                                                              mock_clients)
+
+        nova.servers.delete.assert_called_once_with("s1")
+        self.assertFalse(sweep_steps["nova"][0].delete.called)
+        self.assertFalse(sweep_steps["glance"][0].delete.called)
+        self.assertEqual([1, 2], sorted(
+            mock_db.task_resources_delete.call_args[0][0]))
+        self.assertEqual(12, report["nova"]["steps"])
+
+    @mock.patch("%s.osclients.Clients" % BASE)
+    @mock.patch("%s.utils.db" % BASE)
+    def test_cleanup_resources_ledger_incomplete(self, mock_db,
+                                                 mock_clients):
+        nova, sweep_steps, report = self._cleanup_with_ledger(
+            mock_db, mock_clients, incomplete=True)
+
+        self.assertFalse(nova.servers.delete.called)
+        self.assertEqual([mock.call(nova)] * 3,
+                         sweep_steps["nova"][0].delete.call_args_list)
+        self.assertEqual(3, sweep_steps["glance"][0].delete.call_count)
+        self.assertEqual([2], mock_db.task_resources_delete.call_args[0][0])
 
     @mock.patch("%s.UserCleanup._cleanup_resources" % BASE)
     def test_cleaner_default_behavior(self, mock_cleanup):
@@ -15,6 +15,7 @@
 
 
 import mock
+from novaclient import exceptions as nova_exceptions
 
 from rally.benchmark.context.cleanup import utils
 from rally.benchmark import scenarios
@@ -159,4 +160,112 @@ class CleanupUtilsTestCase(test.TestCase):
         self.assertEqual(queues_no(zaqar), 1)
         utils.delete_zaqar_resources(zaqar)
         self.assertEqual(messages_no(queue), 0)
-        self.assertEqual(queues_no(zaqar), 0)
\ No newline at end of file
+        self.assertEqual(queues_no(zaqar), 0)
+
+
+class LedgerStepsTestCase(test.TestCase):
+
+    def _run_steps(self, service, client, recorded):
+        for step in utils.LEDGER_STEPS[service]:
+            step.delete(client, recorded)
+
+    def test_delete_recorded_waits_for_deletion(self):
+        nova = mock.MagicMock()
+        nova.servers.get.side_effect = [
+            mock.Mock(status="ACTIVE"), mock.Mock(status="DELETED"),
+            nova_exceptions.NotFound(404)]
+        recorded = {"servers": [{"id": 1, "resource_id": "s1"},
+                                {"id": 2, "resource_id": "s2"}]}
+        step = utils.LEDGER_STEPS["nova"][0]
+
+        with mock.patch("rally.benchmark.utils.time.sleep"):
+            step.delete(nova, recorded)
+
+        self.assertEqual([mock.call("s1"), mock.call("s2")],
+                         nova.servers.delete.call_args_list)
+        self.assertEqual([True, True],
+                         [r.get("deleted") for r in recorded["servers"]])
+        self.assertEqual([], step.list(nova, recorded))
+
+    def test_delete_recorded_skips_deleted_and_reports_errors(self):
+        nova = mock.MagicMock()
+        nova.floating_ips.delete.side_effect = [
+            nova_exceptions.NotFound(404), RuntimeError("error"), None]
+        recorded = {"floating_ips": [{"id": 1, "resource_id": "f1"},
+                                     {"id": 2, "resource_id": "f2"},
+                                     {"id": 3, "resource_id": "f3"}]}
+        step = utils.LEDGER_STEPS["nova"][2]
+
+        self.assertRaises(RuntimeError, step.delete, nova, recorded)
+
+        self.assertEqual([{"id": 2, "resource_id": "f2"}],
+                         step.list(nova, recorded))
+
+    def test_delete_recorded_neutron_resources(self):
+        neutron = mock.MagicMock()
+        neutron.list_ports.return_value = {"ports": [{"id": "p2"}]}
+        recorded = {"ports": [{"id": 1, "resource_id": "p1"}],
+                    "routers": [{"id": 2, "resource_id": "r1"}],
+                    "networks": [{"id": 3, "resource_id": "n1"}]}
+
+        self._run_steps("neutron", neutron, recorded)
+
+        neutron.delete_port.assert_called_once_with("p1")
+        neutron.list_ports.assert_called_once_with(
+            device_id="r1", device_owner="network:router_interface")
+        neutron.remove_interface_router.assert_called_once_with(
+            "r1", {"port_id": "p2"})
+        neutron.delete_router.assert_called_once_with("r1")
+        self.assertFalse(neutron.delete_subnet.called)
+        neutron.delete_network.assert_called_once_with("n1")
+
+    def test_get_ledger_cleanup_steps(self):
+        steps = utils.get_ledger_cleanup_steps("cinder")
+
+        self.assertEqual([("transfers", []), ("snapshots", []),
+                          ("backups", []),
+                          ("volumes", ["transfers", "snapshots"])],
+                         [(step.name, step.depends) for step in steps])
+        cinder = mock.MagicMock()
+        cinder.transfers.list.return_value = []
+        cinder.volumes.get.return_value = mock.Mock(status="DELETED")
+        recorded = {"volumes": [{"id": 1, "resource_id": "v1"}]}
+        for step in steps:
+            step.delete((cinder, recorded), (cinder,))
+        cinder.volumes.delete.assert_called_once_with("v1")
+        self.assertFalse(cinder.volumes.list.called)
+        cinder.transfers.list.assert_called_with()
+
+    def test_get_ledger_cleanup_steps_sweep(self):
+        steps = dict((step.name, step) for step in
+                     utils.get_ledger_cleanup_steps("nova", sweep=True))
+        nova = mock.MagicMock()
+        nova.servers.list.return_value = []
+        recorded = {"servers": [{"id": 1, "resource_id": "s1"}],
+                    "floating_ips": [{"id": 2, "resource_id": "f1"}]}
+
+        steps["servers"].delete((nova, recorded), (nova,))
+        steps["floating_ips"].delete((nova, recorded), (nova,))
+
+        self.assertFalse(nova.servers.delete.called)
+        nova.servers.list.assert_called_with()
+        nova.floating_ips.delete.assert_called_once_with("f1")
+
+    @mock.patch("rally.benchmark.context.cleanup.utils.db")
+    def test_get_recorded_and_forget_deleted_resources(self, mock_db):
+        mock_db.task_resources_get.return_value = [
+            mock.Mock(id=1, tenant_id="t1", service="nova", type="servers",
+                      resource_id="s1"),
+            mock.Mock(id=2, tenant_id=None, service="keystone",
+                      type="users", resource_id="u1")]
+
+        recorded = utils.get_recorded_resources("task")
+
+        mock_db.task_resources_get.assert_called_once_with("task")
+        self.assertEqual([{"id": 1, "resource_id": "s1"}],
+                         recorded["t1"]["nova"]["servers"])
+        self.assertEqual({}, recorded["t2"])
+        recorded["t1"]["nova"]["servers"][0]["deleted"] = True
+        self.assertEqual(1, utils.forget_deleted_resources(
+            [recorded["t1"]["nova"], recorded[None]["keystone"]]))
+        mock_db.task_resources_delete.assert_called_once_with([1])
@@ -58,10 +58,8 @@ class BaseContextTestCase(test.TestCase):
 
     @mock.patch("rally.benchmark.context.base.utils.itersubclasses")
     def test_get_by_name(self, mock_itersubclasses):
-        A = mock.MagicMock()
-        A.__ctx_name__ = "a"
-        B = mock.MagicMock()
-        B.__ctx_name__ = "b"
+        A = type("A", (object,), {"__ctx_name__": "a"})
+        B = type("B", (object,), {"__ctx_name__": "b"})
         mock_itersubclasses.return_value = [A, B]
 
         self.assertEqual(A, base.Context.get_by_name("a"))
@@ -249,6 +247,24 @@ class ContextManagerTestCase(test.TestCase):
                                                     mock.call.cleanup()],
                                                    any_order=True)
 
+    def test_split_shared(self):
+        config = {"users": {"tenants": 2}, "roles": ["admin"],
+                  "cleanup": ["nova"]}
+        self.assertEqual(({"users": {"tenants": 2}, "roles": ["admin"]},
+                          {"cleanup": ["nova"]}),
+                         base.ContextManager.split_shared(config))
+
+    @mock.patch("rally.utils.monotonic")
+    @mock.patch("rally.benchmark.context.base.Context.get_by_name")
+    def test_durations(self, mock_get_by_name, mock_monotonic):
+        mock_monotonic.side_effect = [10, 12, 20, 23]
+        manager = base.ContextManager({"config": {"a": []}})
+        manager.setup()
+        manager.cleanup()
+
+        self.assertEqual(2, manager.setup_duration)
+        self.assertEqual(3, manager.cleanup_duration)
+
     @mock.patch("rally.benchmark.context.base.ContextManager.cleanup")
     @mock.patch("rally.benchmark.context.base.ContextManager.setup")
     def test_with_statement(self, mock_setup, mock_cleanup):
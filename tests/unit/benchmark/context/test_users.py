@@ -224,3 +224,30 @@ class UserGeneratorTestCase(test.TestCase):
                                                     tenants_ids, user_list):
                 self.assertEqual(user["id"], orig_user.id)
                 self.assertEqual(user["tenant_id"], tenant_id)
+
+    @mock.patch("rally.benchmark.context.users.users_pool.UsersPool")
+    def test_setup_and_cleanup_users_pool(self, mock_pool):
+        context = self.context
+        context["config"]["users"]["users_pool"] = True
+        tenants = [{"id": "t1", "name": "tenant"}]
+        pooled_users = [{"id": "u1", "endpoint": "e", "tenant_id": "t1"}]
+        pool = mock_pool.return_value
+        pool.lease.return_value = (tenants, pooled_users)
+
+        with users.UserGenerator(context) as ctx:
+            ctx.setup()
+
+            self.assertEqual(tenants, ctx.context["tenants"])
+            self.assertEqual(pooled_users, ctx.context["users"])
+            pool.lease.assert_called_once_with(
+                context["task"]["uuid"], self.tenants_num,
+                self.users_per_tenant)
+            self.assertFalse(self.wrapped_keystone.create_project.called)
+
+        mock_pool.assert_called_with(
+            context["task"]["deployment_uuid"],
+            context["admin"]["endpoint"], concurrent=self.concurrent,
+            project_domain="default", user_domain="default")
+        pool.release.assert_called_once_with(context["task"]["uuid"], ["t1"])
+        self.assertFalse(self.wrapped_keystone.delete_user.called)
+        self.assertFalse(self.wrapped_keystone.delete_project.called)
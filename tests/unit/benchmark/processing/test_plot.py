@@ -48,15 +48,24 @@ class PlotTestCase(test.TestCase):
         mock_open.assert_called_once_with("%s/src/index.mako"
                                           % mock_dirname.return_value)
 
+    @mock.patch("rally.benchmark.processing.plot._process_parallel")
+    @mock.patch("rally.benchmark.processing.plot._process_stages")
+    @mock.patch("rally.benchmark.processing.plot._process_api_calls")
+    @mock.patch("rally.benchmark.processing.plot._process_atomic_tree")
+    @mock.patch("rally.benchmark.processing.plot._process_load")
     @mock.patch("rally.benchmark.processing.plot._prepare_data")
     @mock.patch("rally.benchmark.processing.plot._process_atomic")
     @mock.patch("rally.benchmark.processing.plot._process_main_duration")
     def test__process_results(self, mock_main_duration, mock_atomic,
-                              mock_prepare):
+                              mock_prepare, mock_load, mock_tree,
+                              mock_api_calls, mock_stages, mock_parallel):
         results = [
-            {"key": {"name": "Klass.method_foo", "pos": 0, "kw": "config1"}},
-            {"key": {"name": "Klass.method_foo", "pos": 1, "kw": "config2"}},
-            {"key": {"name": "Klass.method_bar", "pos": 0, "kw": "config3"}}
+            {"key": {"name": "Klass.method_foo", "pos": 0, "kw": "config1"},
+             "result": []},
+            {"key": {"name": "Klass.method_foo", "pos": 1, "kw": "config2"},
+             "result": []},
+            {"key": {"name": "Klass.method_bar", "pos": 0, "kw": "config3"},
+             "result": []}
         ]
         table_cols = [
                 {"title": "action", "class": "center"},
@@ -70,6 +79,7 @@ class PlotTestCase(test.TestCase):
 
         mock_main_duration.return_value = "main_duration"
         mock_atomic.return_value = "main_atomic"
+        mock_parallel.return_value = {("Klass.method_foo", 1): "parallel"}
 
         output = plot._process_results(results)
 
@@ -90,10 +100,186 @@ class PlotTestCase(test.TestCase):
                 "config": config,
                 "duration": mock_main_duration.return_value,
                 "atomic": mock_atomic.return_value,
+                "load": mock_load.return_value,
+                "tree": mock_tree.return_value,
+                "api_calls": mock_api_calls.return_value,
+                "stages": mock_stages.return_value,
+                "parallel": mock_parallel.return_value.get(
+                    (r["key"]["name"], pos),
+                    {"section": None, "members": [], "timeline": []}),
                 "table_cols": table_cols,
                 "table_rows": [['total', None, None, None, None, None, 0, 0]]
             })
 
+    @mock.patch("rally.benchmark.processing.plot._process_parallel")
+    @mock.patch("rally.benchmark.processing.plot._process_stages")
+    @mock.patch("rally.benchmark.processing.plot._process_load")
+    def test__process_results_warmup(self, mock_load, mock_stages,
+                                     mock_parallel):
+        mock_parallel.return_value = {}
+        results = [{"key": {"name": "Klass.method", "pos": 0, "kw": {}},
+                    "result": [{"error": [], "duration": 5,
+                                "idle_duration": 0, "atomic_actions": {},
+                                "warmup": True},
+                               {"error": [], "duration": 1,
+                                "idle_duration": 0, "atomic_actions": {}}]}]
+
+        output = plot._process_results(results)
+        self.assertEqual(1, output[0]["table_rows"][0][-1])
+        self.assertEqual(1, len(mock_load.call_args[0][0]["result"]))
+
+        output = plot._process_results(results, include_warmup=True)
+        self.assertEqual(2, output[0]["table_rows"][0][-1])
+
+    def test__process_load(self):
+        result = {"result": [
+            {"scheduled_start": 0.0, "actual_start": 0.1},
+            {"scheduled_start": 0.5, "actual_start": 1.2},
+            {"scheduled_start": 1.0, "actual_start": 1.3}
+        ]}
+        output = plot._process_load(result)
+
+        self.assertEqual([
+            {"key": "requested", "values": [(0, 2), (1, 1)]},
+            {"key": "achieved", "values": [(0, 1), (1, 2)]}
+        ], output["rate"])
+        self.assertEqual([{"key": "scheduling lag",
+                           "values": [(1, 0.1), (2, 0.7), (3, 0.3)]}],
+                         output["lag"])
+
+    def test__process_load_without_schedule(self):
+        self.assertEqual({"rate": [], "lag": [], "concurrency": []},
+                         plot._process_load({"result": [{"duration": 1}]}))
+
+    def test__process_load_concurrency(self):
+        result = {"result": [{"start_offset": 0.1, "duration": 1.0},
+                             {"start_offset": 0.5, "duration": 0.25}]}
+        self.assertEqual({"rate": [], "lag": [],
+                          "concurrency": [{"key": "in flight",
+                                           "values": [(0.1, 1), (0.5, 2),
+                                                      (0.75, 1), (1.1, 0)]}]},
+                         plot._process_load(result))
+
+    def test__process_atomic_tree(self):
+        tree = [["delete_all", 0.0, 3.0, None], ["delete", 0.5, 1.0, 0],
+                ["delete", 1.5, 1.0, 0]]
+        result = {"result": [
+            {"error": [], "duration": 3.5, "atomic_actions_tree": tree},
+            {"error": ["err"], "duration": 1.0,
+             "atomic_actions_tree": [["delete_all", 0.0, 1.0, None]]},
+            {"error": [], "duration": 1.0}
+        ]}
+        output = plot._process_atomic_tree(result)
+
+        self.assertEqual([["delete_all", 2, 4.0, 2.0, 2.0, 1.0, "50.0%"],
+                          ["delete", 2, 2.0, 2.0, 1.0, 1.0, "50.0%"]],
+                         output["rows"])
+        self.assertEqual(2, len(output["waterfall"]))
+        waterfall = output["waterfall"][0]
+        self.assertEqual(1, waterfall["iteration"])
+        self.assertEqual("iteration 1 (3.500 sec)", waterfall["label"])
+        self.assertEqual(
+            [{"key": "start", "values": [("1. delete_all", 0.0),
+                                         ("2. - delete", 0.5),
+                                         ("3. - delete", 1.5)]},
+             {"key": "duration", "values": [("1. delete_all", 3.0),
+                                            ("2. - delete", 1.0),
+                                            ("3. - delete", 1.0)]}],
+            waterfall["data"])
+        self.assertEqual("iteration 2 (1.000 sec, failed)",
+                         output["waterfall"][1]["label"])
+
+        output = plot._process_atomic_tree(result, max_iterations=1)
+        self.assertEqual([1], [w["iteration"] for w in output["waterfall"]])
+
+    def test__process_atomic_tree_without_tree(self):
+        output = plot._process_atomic_tree({"result": [{"duration": 1}]})
+        self.assertEqual([], output["rows"])
+        self.assertEqual([], output["waterfall"])
+
+    def test__process_api_calls(self):
+        result = {"result": [
+            {"api_calls": {"boot": {"compute POST /servers": {
+                "count": 1, "duration": 0.5, "bytes": 100,
+                "status": {"202": 1}}}}},
+            {"api_calls": {"boot": {"compute POST /servers": {
+                "count": 1, "duration": 1.5, "bytes": 100,
+                "status": {"500": 1}}}}}
+        ]}
+        output = plot._process_api_calls(result)
+        self.assertEqual([["boot", "compute POST /servers", 2, 1.0, 1.0, 200,
+                           "202: 1, 500: 1"]], output["rows"])
+        self.assertEqual(7, len(output["cols"]))
+
+    def test__process_stages(self):
+        stages = [{"concurrency": 2, "duration": 2},
+                  {"rps": 4, "duration": 1}]
+        result = {
+            "key": {"kw": {"runner": {"type": "ramp", "stages": stages}}},
+            "result": [
+                {"error": [], "duration": 1, "stage": 0},
+                {"error": [], "duration": 3, "stage": 0},
+                {"error": ["error"], "duration": 0, "stage": 1}
+            ]
+        }
+        output = plot._process_stages(result)
+
+        self.assertEqual(10, len(output["cols"]))
+        self.assertEqual([
+            [1, "concurrency 2", 2, 2, 1.0, 1, 2.0, 2.9, 3, "100.0%"],
+            [2, "rps 4", 1, 1, 0.0, None, None, None, None, "0.0%"]
+        ], output["rows"])
+
+    def test__process_stages_saturation(self):
+        runner = {"type": "saturation", "start": 1, "factor": 2,
+                  "max_load": 8, "phase_duration": 1}
+        result = {
+            "key": {"kw": {"runner": runner}},
+            "result": [
+                {"error": [], "duration": 1, "stage": 0},
+                {"error": [], "duration": 1, "stage": 1},
+                {"error": [], "duration": 1, "stage": 1},
+                {"error": [], "duration": 1, "stage": 2},
+                {"error": [], "duration": 1, "stage": 2}
+            ]
+        }
+        output = plot._process_stages(result)
+
+        self.assertEqual(3, len(output["rows"]))
+        self.assertIn("Saturation point is concurrency 2",
+                      output["saturation"])
+
+    def test__process_stages_without_stages(self):
+        result = {"key": {"kw": {"runner": {"type": "constant"}}},
+                  "result": [{"error": [], "duration": 1}]}
+        output = plot._process_stages(result)
+        self.assertEqual([], output["rows"])
+        self.assertIsNone(output["saturation"])
+
+    def test__process_parallel(self):
+        results = [
+            {"key": {"name": "A.a", "pos": 0,
+                     "kw": {"parallel_section": "s"}},
+             "result": [{"error": [], "duration": 2, "timestamp": 11},
+                        {"error": [], "duration": 1, "timestamp": 10},
+                        {"error": ["error"], "duration": 0,
+                         "timestamp": 12}]},
+            {"key": {"name": "B.b", "pos": 1,
+                     "kw": {"parallel_section": "s"}},
+             "result": [{"error": [], "duration": 3, "timestamp": 10.5}]},
+            {"key": {"name": "C.c", "pos": 0, "kw": {}},
+             "result": [{"error": [], "duration": 1, "timestamp": 0}]}
+        ]
+        output = plot._process_parallel(results)
+
+        expected = {"section": "s",
+                    "members": ["A.a [1]", "B.b [2]"],
+                    "timeline": [
+                        {"key": "A.a [1]", "values": [(0, 1), (1, 2)]},
+                        {"key": "B.b [2]", "values": [(0.5, 3)]}]}
+        self.assertEqual({("A.a", 0): expected, ("B.b", 1): expected},
+                         output)
+
     def test__process_main_time(self):
         result = {
             "result": [
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+
 from rally.benchmark.processing import utils
 from rally import exceptions
 from tests.unit import test
@@ -83,3 +85,183 @@ class AtomicActionsDataTestCase(test.TestCase):
 
         output = utils.get_atomic_actions_data(raw_data)
         self.assertEqual(output, atomic_actions_data)
+
+    def test_without_warmup(self):
+        loaded = []
+
+        def raw_data():
+            for row in [{"warmup": True}, {"n": 1}, {"n": 2}]:
+                loaded.append(row)
+                yield row
+
+        class Raw(object):
+            def __iter__(self):
+                return raw_data()
+
+        records = utils.without_warmup(Raw())
+        self.assertEqual([], loaded)
+        self.assertEqual(2, len(records))
+        self.assertEqual([{"n": 1}, {"n": 2}], list(records))
+        self.assertEqual([{"n": 1}, {"n": 2}], list(records))
+
+    def test_get_atomic_actions_data_warmup(self):
+        raw_data = [
+            {"error": [], "duration": 5, "atomic_actions": {"action": 4},
+             "warmup": True},
+            {"error": [], "duration": 2, "atomic_actions": {"action": 1}}
+        ]
+
+        self.assertEqual({"action": [1], "total": [2]},
+                         utils.get_atomic_actions_data(raw_data))
+        self.assertEqual({"action": [4, 1], "total": [5, 2]},
+                         utils.get_atomic_actions_data(raw_data,
+                                                       include_warmup=True))
+
+
+class LoadDataTestCase(test.TestCase):
+
+    def test_get_load_data(self):
+        raw_data = [
+            {"scheduled_start": 1.0, "actual_start": 1.5},
+            {"scheduled_start": 0.0, "actual_start": 0.0},
+            {"scheduled_start": 0.5, "actual_start": 0.6},
+            {"scheduled_start": 1.5, "actual_start": 3.0}
+        ]
+        output = utils.get_load_data(raw_data)
+
+        self.assertEqual(2.0, output["requested_rps"])
+        self.assertEqual(1.0, output["achieved_rps"])
+        self.assertEqual([0.0, 0.1, 0.5, 1.5],
+                         [round(lag, 3) for lag in output["lag"]])
+        self.assertEqual([(0, 2), (1, 2)], output["requested_per_second"])
+        self.assertEqual([(0, 2), (1, 1), (2, 0), (3, 1)],
+                         output["achieved_per_second"])
+
+    def test_get_load_data_single_iteration(self):
+        output = utils.get_load_data([{"scheduled_start": 0.0,
+                                       "actual_start": 0.2}])
+        self.assertIsNone(output["requested_rps"])
+        self.assertIsNone(output["achieved_rps"])
+
+    def test_get_load_data_without_schedule(self):
+        self.assertIsNone(utils.get_load_data([{"duration": 1}]))
+
+
+class AtomicActionsSelfTimeTestCase(test.TestCase):
+
+    def test_get_atomic_actions_self_time(self):
+        raw_data = [
+            {"atomic_actions_tree": [["delete_all", 0.0, 3.0, None],
+                                     ["delete", 0.5, 1.0, 0],
+                                     ["delete", 1.5, 1.5, 0],
+                                     ["wait", 1.6, 1.0, 2]]},
+            {"atomic_actions_tree": [["boot", 0.0, None, None]]},
+            {"atomic_actions": {}}
+        ]
+        self.assertEqual([("delete_all", 1, 3.0, 0.5),
+                          ("delete", 2, 2.5, 1.5),
+                          ("wait", 1, 1.0, 1.0)],
+                         utils.get_atomic_actions_self_time(raw_data))
+
+
+class AtomicActionsPollsTestCase(test.TestCase):
+
+    def test_get_atomic_actions_polls(self):
+        raw_data = [
+            {"atomic_actions_polls": {"boot": 3, "delete": 1}},
+            {"atomic_actions_polls": {"boot": 5}},
+            {"atomic_actions": {}}
+        ]
+        polls = utils.get_atomic_actions_polls(raw_data)
+        self.assertEqual([("boot", [3, 5]), ("delete", [1])],
+                         list(polls.items()))
+
+    def test_get_api_calls(self):
+        get = {"count": 2, "duration": 1.0, "bytes": 10,
+               "status": {"200": 2}}
+        raw_data = [
+            {"api_calls": {"boot": {"compute GET /servers/{id}": get}}},
+            {"api_calls": {"boot": {"compute GET /servers/{id}": get},
+                           "(no action)": {
+                               "image GET /v2/images": {
+                                   "count": 1, "duration": 0.5, "bytes": 0,
+                                   "status": {"error": 1}}}}},
+            {"atomic_actions": {}}
+        ]
+        self.assertEqual(
+            [("(no action)", "image GET /v2/images", 1, 0.5, 0.5, 0,
+              {"error": 1}),
+             ("boot", "compute GET /servers/{id}", 4, 2.0, 0.5, 20,
+              {"200": 4})],
+            utils.get_api_calls(raw_data))
+
+    def test_get_api_calls_shared(self):
+        shared = {"count": 1 / 3.0, "duration": 0.1, "bytes": 10 / 3.0,
+                  "status": {"200": 1 / 3.0}}
+        raw_data = [{"api_calls": {"boot": {"compute GET /servers": shared}}}
+                    for i in range(3)]
+        self.assertEqual(
+            [("boot", "compute GET /servers", 1, 1 / 3.0, mock.ANY, 10,
+              {"200": 1})],
+            utils.get_api_calls(raw_data))
+
+
+class ConcurrencyDataTestCase(test.TestCase):
+
+    def test_get_concurrency_data(self):
+        raw_data = [
+            {"start_offset": 0.0, "duration": 1.0, "idle_duration": 1.0},
+            {"start_offset": 0.5, "duration": 0.5},
+            {"start_offset": 1.0, "duration": 1.0},
+            {"duration": 1.0}
+        ]
+        self.assertEqual([(0.0, 1), (0.5, 2), (1.0, 2), (2.0, 0)],
+                         utils.get_concurrency_data(raw_data))
+
+    def test_get_concurrency_data_reduced(self):
+        raw_data = [{"start_offset": i, "duration": 0.5} for i in range(4)]
+        self.assertEqual([(0, 1), (1, 1), (2, 1), (3, 1)],
+                         utils.get_concurrency_data(raw_data, max_points=4))
+
+    def test_get_concurrency_data_without_offsets(self):
+        self.assertEqual([], utils.get_concurrency_data([{"duration": 1}]))
+
+
+class StagesDataTestCase(test.TestCase):
+
+    def test_get_stages_data(self):
+        stages = [{"concurrency": 1, "duration": 2},
+                  {"rps": 2, "duration": 1},
+                  {"rps": 4, "duration": 1}]
+        raw_data = [
+            {"error": [], "duration": 1.0, "stage": 0},
+            {"error": [], "duration": 2.0, "stage": 1},
+            {"error": ["error"], "duration": 0.0, "stage": 1},
+            {"error": [], "duration": 3.0, "stage": 0}
+        ]
+        output = utils.get_stages_data(raw_data, stages)
+
+        self.assertEqual([
+            {"config": stages[0], "iterations": 2, "errors": 0,
+             "throughput": 1.0, "durations": [1.0, 3.0]},
+            {"config": stages[1], "iterations": 2, "errors": 1,
+             "throughput": 1.0, "durations": [2.0]},
+            {"config": stages[2], "iterations": 0, "errors": 0,
+             "throughput": 0.0, "durations": []}
+        ], output)
+
+    def test_get_stages_data_with_timestamps(self):
+        stages = [{"concurrency": 2, "duration": 2}]
+        raw_data = [
+            {"error": [], "duration": 1.0, "stage": 0, "timestamp": 10},
+            {"error": [], "duration": 1.0, "stage": 0, "timestamp": 11},
+            {"error": [], "duration": 1.5, "stage": 0, "timestamp": 11}
+        ]
+        output = utils.get_stages_data(raw_data, stages)
+
+        self.assertEqual(3, output[0]["iterations"])
+        self.assertEqual(1.0, output[0]["throughput"])
+
+    def test_get_stages_data_without_stages(self):
+        self.assertEqual([], utils.get_stages_data(
+            [{"error": [], "duration": 1.0}], []))
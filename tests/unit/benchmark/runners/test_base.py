@@ -15,10 +15,13 @@
 
 import jsonschema
 import mock
+from oslo.config import cfg
 
 from rally.benchmark.runners import base
 from rally.benchmark.runners import serial
 from rally.benchmark.scenarios import base as scenario_base
+from rally.benchmark import utils
+from rally import consts
 from rally import exceptions
 from tests.unit import fakes
 from tests.unit import test
@@ -26,6 +29,11 @@ from tests.unit import test
 
 class ScenarioHelpersTestCase(test.TestCase):
 
+    def setUp(self):
+        super(ScenarioHelpersTestCase, self).setUp()
+        base._clear_clients()
+        self.addCleanup(base._clear_clients)
+
     @mock.patch("rally.benchmark.runners.base.utils.format_exc")
     def test_format_result_on_timeout(self, mock_format_exc):
         mock_exc = mock.MagicMock()
@@ -62,9 +70,9 @@ class ScenarioHelpersTestCase(test.TestCase):
 
         self.assertEqual(expected_context, base._get_scenario_context(context))
 
-    @mock.patch("rally.benchmark.runners.base.osclients")
-    def test_run_scenario_once_internal_logic(self, mock_clients):
-        mock_clients.Clients.return_value = "cl"
+    @mock.patch("rally.benchmark.runners.base._get_clients")
+    def test_run_scenario_once_internal_logic(self, mock_get_clients):
+        mock_get_clients.return_value = ("cl", False)
 
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         scenario_cls = mock.MagicMock()
@@ -80,11 +88,13 @@ class ScenarioHelpersTestCase(test.TestCase):
         ]
         scenario_cls.assert_has_calls(expected_calls, any_order=True)
 
+    @mock.patch("rally.benchmark.runners.base.time")
     @mock.patch("rally.benchmark.runners.base.rutils")
     @mock.patch("rally.benchmark.runners.base.osclients")
     def test_run_scenario_once_without_scenario_output(self, mock_clients,
-                                                       mock_rutils):
+                                                       mock_rutils, mock_time):
         mock_rutils.Timer = fakes.FakeTimer
+        mock_time.time.return_value = 5
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         args = (1, fakes.FakeScenario, "do_it", context, {})
         result = base._run_scenario_once(args)
@@ -94,15 +104,22 @@ class ScenarioHelpersTestCase(test.TestCase):
             "idle_duration": 0,
             "error": [],
             "scenario_output": {"errors": "", "data": {}},
-            "atomic_actions": {}
+            "atomic_actions": {},
+            "atomic_actions_tree": [],
+            "atomic_actions_polls": {},
+            "auth_calls_avoided": 0,
+            "timestamp": 5,
+            "iteration": 1
         }
         self.assertEqual(expected_result, result)
 
+    @mock.patch("rally.benchmark.runners.base.time")
     @mock.patch("rally.benchmark.runners.base.rutils")
     @mock.patch("rally.benchmark.runners.base.osclients")
     def test_run_scenario_once_with_scenario_output(self, mock_clients,
-                                                    mock_rutils):
+                                                    mock_rutils, mock_time):
         mock_rutils.Timer = fakes.FakeTimer
+        mock_time.time.return_value = 5
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         args = (1, fakes.FakeScenario, "with_output", context, {})
         result = base._run_scenario_once(args)
@@ -112,14 +129,22 @@ class ScenarioHelpersTestCase(test.TestCase):
             "idle_duration": 0,
             "error": [],
             "scenario_output": fakes.FakeScenario().with_output(),
-            "atomic_actions": {}
+            "atomic_actions": {},
+            "atomic_actions_tree": [],
+            "atomic_actions_polls": {},
+            "auth_calls_avoided": 0,
+            "timestamp": 5,
+            "iteration": 1
         }
         self.assertEqual(expected_result, result)
 
+    @mock.patch("rally.benchmark.runners.base.time")
     @mock.patch("rally.benchmark.runners.base.rutils")
     @mock.patch("rally.benchmark.runners.base.osclients")
-    def test_run_scenario_once_exception(self, mock_clients, mock_rutils):
+    def test_run_scenario_once_exception(self, mock_clients, mock_rutils,
+                                         mock_time):
         mock_rutils.Timer = fakes.FakeTimer
+        mock_time.time.return_value = 5
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         args = (1, fakes.FakeScenario, "something_went_wrong", context, {})
         result = base._run_scenario_once(args)
@@ -128,12 +153,148 @@ class ScenarioHelpersTestCase(test.TestCase):
             "duration": fakes.FakeTimer().duration(),
             "idle_duration": 0,
             "scenario_output": {"errors": "", "data": {}},
-            "atomic_actions": {}
+            "atomic_actions": {},
+            "atomic_actions_tree": [],
+            "atomic_actions_polls": {},
+            "auth_calls_avoided": 0,
+            "timestamp": 5,
+            "iteration": 1
         }
         self.assertEqual(expected_result, result)
         self.assertEqual(expected_error[:2],
                          [str(Exception), "Something went wrong"])
 
+    @mock.patch("rally.benchmark.scenarios.base.db")
+    @mock.patch("rally.benchmark.runners.base.osclients")
+    def test_run_scenario_once_with_resources(self, mock_clients, mock_db):
+        context = base._get_scenario_context(fakes.FakeUserContext({}).context)
+        context["resource_ledger"] = True
+        args = (1, fakes.FakeScenario, "with_resources", context, {})
+        result = base._run_scenario_once(args)
+
+        # NOTE: Resources are recorded when they are created, even by
+        #       iterations that fail afterwards.
+        mock_db.task_resources_create.assert_called_once_with(
+            context["task"]["uuid"],
+            [{"tenant_id": None, "service": "nova", "type": "servers",
+              "id": "server"}])
+        self.assertNotIn("resources", result)
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+
+    @mock.patch("rally.benchmark.runners.base.httppool.get_stats")
+    @mock.patch("rally.benchmark.runners.base.osclients")
+    def test_run_scenario_once_http_connections(self, mock_clients,
+                                                mock_get_stats):
+        mock_get_stats.side_effect = [{"opened": 1, "reused": 2},
+                                      {"opened": 2, "reused": 5}]
+        context = base._get_scenario_context(fakes.FakeUserContext({}).context)
+        args = (1, fakes.FakeScenario, "do_it", context, {})
+        result = base._run_scenario_once(args)
+
+        self.assertEqual({"opened": 1, "reused": 3},
+                         result["http_connections"])
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+
+    @mock.patch("rally.benchmark.runners.base.httppool"
+                ".stop_api_calls_record")
+    @mock.patch("rally.benchmark.runners.base.osclients")
+    def test_run_scenario_once_api_calls(self, mock_clients, mock_stop):
+        mock_stop.return_value = {"action": {"compute GET /servers": {
+            "count": 1, "duration": 0.1, "bytes": 10,
+            "status": {"200": 1}}}}
+        context = base._get_scenario_context(fakes.FakeUserContext({}).context)
+        args = (1, fakes.FakeScenario, "do_it", context, {})
+        result = base._run_scenario_once(args)
+
+        self.assertEqual(mock_stop.return_value, result["api_calls"])
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+
+    @mock.patch("rally.utils.monotonic")
+    @mock.patch("rally.benchmark.runners.base.osclients")
+    def test_run_scenario_once_start_offsets(self, mock_clients,
+                                             mock_monotonic):
+        mock_monotonic.side_effect = [12, 13, 15, 16]
+        context = base._get_scenario_context(fakes.FakeUserContext({}).context)
+        context["benchmark_start"] = 10
+        args = (1, fakes.FakeScenario, "with_atomic_action", context, {})
+        result = base._run_scenario_once(args)
+
+        self.assertEqual(4, result["duration"])
+        self.assertEqual(2, result["start_offset"])
+        self.assertEqual([["action", 1, 2, None]],
+                         result["atomic_actions_tree"])
+        self.assertEqual({"action": 2}, result["atomic_actions"])
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+
+
+class ClientsRegistryTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ClientsRegistryTestCase, self).setUp()
+        base._clear_clients()
+        self.addCleanup(base._clear_clients)
+        self.endpoint = fakes.FakeUserContext.user["endpoint"]
+
+    @mock.patch("rally.benchmark.runners.base.osclients.Clients")
+    def test_get_clients(self, mock_clients):
+        clients, reused = base._get_clients(self.endpoint)
+
+        mock_clients.assert_called_once_with(self.endpoint)
+        self.assertEqual(mock_clients.return_value, clients)
+        self.assertFalse(reused)
+
+    @mock.patch("rally.benchmark.runners.base.osclients.Clients")
+    def test_get_clients_reused(self, mock_clients):
+        mock_clients.return_value.is_authenticated.return_value = True
+        base._get_clients(self.endpoint)
+        clients, reused = base._get_clients(self.endpoint)
+
+        mock_clients.assert_called_once_with(self.endpoint)
+        clients.is_authenticated.assert_called_once_with(
+            cfg.CONF.benchmark.clients_token_stale_duration)
+        self.assertTrue(reused)
+        self.assertFalse(clients.clear.called)
+
+    @mock.patch("rally.benchmark.runners.base.osclients.Clients")
+    def test_get_clients_token_expires(self, mock_clients):
+        mock_clients.return_value.is_authenticated.return_value = False
+        base._get_clients(self.endpoint)
+        clients, reused = base._get_clients(self.endpoint)
+
+        mock_clients.assert_called_once_with(self.endpoint)
+        clients.clear.assert_called_once_with()
+        self.assertFalse(reused)
+
+    @mock.patch("rally.benchmark.runners.base.osclients.Clients")
+    def test_get_clients_different_endpoints(self, mock_clients):
+        base._get_clients(self.endpoint)
+        base._get_clients(fakes.FakeUserContext.admin["endpoint"])
+
+        self.assertEqual(2, mock_clients.call_count)
+
+    @mock.patch("rally.benchmark.runners.base.os.getpid")
+    @mock.patch("rally.benchmark.runners.base.osclients.Clients")
+    def test_get_clients_after_fork(self, mock_clients, mock_getpid):
+        mock_clients.return_value.is_authenticated.return_value = True
+        mock_getpid.return_value = 1
+        base._get_clients(self.endpoint)
+        mock_getpid.return_value = 2
+        clients, reused = base._get_clients(self.endpoint)
+
+        self.assertEqual(2, mock_clients.call_count)
+        self.assertFalse(reused)
+
+    @mock.patch("rally.benchmark.runners.base.osclients.Clients")
+    def test_get_clients_reuse_disabled(self, mock_clients):
+        cfg.CONF.set_override("reuse_clients", False, "benchmark")
+        self.addCleanup(cfg.CONF.clear_override, "reuse_clients", "benchmark")
+        mock_clients.return_value.is_authenticated.return_value = True
+        base._get_clients(self.endpoint)
+        clients, reused = base._get_clients(self.endpoint)
+
+        self.assertEqual(2, mock_clients.call_count)
+        self.assertFalse(reused)
+
 
 class ScenarioRunnerResultTestCase(test.TestCase):
 
@@ -199,11 +360,37 @@ class ScenarioRunnerTestCase(test.TestCase):
         self.assertEqual(runner.config, config)
         self.assertIsInstance(runner, NewRunner)
 
+    def test_abort(self):
+
+        class AbortedRunner(base.ScenarioRunner):
+            __execution_type__ = "aborted_runner"
+
+            def _run_scenario(self, cls, method_name, context, args):
+                pass
+
+        runner = AbortedRunner(None, {})
+        iterations = runner._until_aborted(iter(range(5)))
+
+        self.assertEqual(0, next(iterations))
+        runner.abort()
+        self.assertTrue(runner.aborted.is_set())
+        self.assertEqual([], list(iterations))
+
     def test_get_runner_no_such(self):
         self.assertRaises(exceptions.NoSuchRunner,
                           base.ScenarioRunner.get_runner,
                           None, {"type": "NoSuchRunner"})
 
+    def test_get_stages(self):
+        stages = [{"concurrency": 1, "duration": 1}]
+        self.assertEqual(stages, base.ScenarioRunner.get_stages(
+            {"type": consts.RunnerType.RAMP, "stages": stages}))
+        self.assertEqual([], base.ScenarioRunner.get_stages(
+            {"type": consts.RunnerType.SERIAL, "times": 1}))
+        self.assertEqual([], base.ScenarioRunner.get_stages(
+            {"type": "NoSuchRunner"}))
+        self.assertEqual([], base.ScenarioRunner.get_stages({}))
+
     @mock.patch("rally.benchmark.runners.base.jsonschema.validate")
     def test_validate_default_runner(self, mock_validate):
         config = {"a": 10}
@@ -243,7 +430,9 @@ class ScenarioRunnerTestCase(test.TestCase):
 
         expected_config_kwargs = {"image": 1, "flavor": 1}
         runner._run_scenario.assert_called_once_with(
-            cls, method_name, context_obj, expected_config_kwargs)
+            cls, method_name, dict(context_obj,
+                                   benchmark_start=runner.started_at),
+            expected_config_kwargs)
 
     def test_runner_send_result_exception(self):
         runner = serial.SerialScenarioRunner(
@@ -252,3 +441,54 @@ class ScenarioRunnerTestCase(test.TestCase):
         self.assertRaises(
             jsonschema.ValidationError,
             lambda: runner._send_result(mock.MagicMock()))
+
+    def test_send_result_warmup_iterations(self):
+        runner = serial.SerialScenarioRunner(
+            None, {"type": consts.RunnerType.SERIAL,
+                   "warmup": {"iterations": 2}})
+        for i in range(3):
+            runner._send_result({"duration": 1, "error": []})
+
+        self.assertEqual([True, True, False],
+                         [r.get("warmup", False)
+                          for r in runner.result_queue])
+
+    def test_send_result_warmup_iterations_out_of_order(self):
+        runner = serial.SerialScenarioRunner(
+            None, {"type": consts.RunnerType.SERIAL,
+                   "warmup": {"iterations": 2}})
+        for i in [2, 0, 3, 1]:
+            runner._send_result({"duration": 1, "error": [], "iteration": i})
+
+        self.assertEqual([(2, False), (0, True), (3, False), (1, True)],
+                         [(r["iteration"], r.get("warmup", False))
+                          for r in runner.result_queue])
+
+    def test_send_result_warmup_duration(self):
+        runner = serial.SerialScenarioRunner(
+            None, {"type": consts.RunnerType.SERIAL,
+                   "warmup": {"duration": 5}})
+        for start_offset in [0, 4.9, 5, 10]:
+            runner._send_result({"duration": 1, "error": [],
+                                 "start_offset": start_offset})
+
+        self.assertEqual([True, True, False, False],
+                         [r.get("warmup", False)
+                          for r in runner.result_queue])
+
+    def test_send_result_ledger_incomplete(self):
+        runner = serial.SerialScenarioRunner(
+            None, {"type": consts.RunnerType.SERIAL})
+        runner._send_result({"duration": 1,
+                             "error": utils.format_exc(KeyError())})
+        self.assertFalse(runner.ledger_incomplete)
+        runner._send_result(base.format_result_on_timeout(
+            exceptions.TimeoutException(), 1))
+        self.assertTrue(runner.ledger_incomplete)
+
+    def test_send_result_without_warmup(self):
+        runner = serial.SerialScenarioRunner(
+            None, {"type": consts.RunnerType.SERIAL})
+        runner._send_result({"duration": 1, "error": []})
+
+        self.assertNotIn("warmup", runner.result_queue[0])
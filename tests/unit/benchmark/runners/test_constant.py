@@ -13,11 +13,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import multiprocessing
+import Queue
+import threading
+
 import jsonschema
+import mock
 
 from rally.benchmark.runners import base
 from rally.benchmark.runners import constant
 from rally import consts
+from rally import utils as rutils
 from tests.unit import fakes
 from tests.unit import test
 
@@ -45,6 +51,30 @@ class ConstantScenarioRunnerTestCase(test.TestCase):
                           constant.ConstantScenarioRunner.validate,
                           self.config)
 
+    def test_validate_warmup(self):
+        self.config["warmup"] = {"iterations": 2}
+        constant.ConstantScenarioRunner.validate(self.config)
+        self.config["warmup"] = {"duration": 1.5}
+        constant.ConstantScenarioRunner.validate(self.config)
+
+        for warmup in [{}, {"iterations": 2, "duration": 1},
+                       {"iterations": 0}, {"times": 1}]:
+            self.config["warmup"] = warmup
+            self.assertRaises(jsonschema.ValidationError,
+                              constant.ConstantScenarioRunner.validate,
+                              self.config)
+
+    def test_run_scenario_marks_warmup(self):
+        self.config["warmup"] = {"iterations": 2}
+        runner = constant.ConstantScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(len(runner.result_queue), self.config["times"])
+        self.assertEqual(2, len([r for r in runner.result_queue
+                                 if r.get("warmup")]))
+
     def test_run_scenario_constantly_for_times(self):
         runner = constant.ConstantScenarioRunner(
                         None, self.config)
@@ -55,6 +85,14 @@ class ConstantScenarioRunnerTestCase(test.TestCase):
         for result in runner.result_queue:
             self.assertIsNotNone(base.ScenarioRunnerResult(result))
 
+    def test_run_scenario_constantly_for_times_aborted(self):
+        runner = constant.ConstantScenarioRunner(None, self.config)
+        runner.abort()
+
+        runner._run_scenario(fakes.FakeScenario,
+                             "do_it", self.context, self.args)
+        self.assertEqual(0, len(runner.result_queue))
+
     def test_run_scenario_constantly_for_times_exception(self):
         runner = constant.ConstantScenarioRunner(
                         None, self.config)
@@ -77,6 +115,19 @@ class ConstantScenarioRunnerTestCase(test.TestCase):
             self.assertIsNotNone(base.ScenarioRunnerResult(result))
         self.assertIn('error', runner.result_queue[0])
 
+    def test_run_scenario_constantly_for_times_hung_iteration(self):
+        self.config["timeout"] = 0.5
+        runner = constant.ConstantScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario,
+                             "hang", self.context, self.args)
+        self.assertEqual(len(runner.result_queue), self.config["times"])
+        self.assertEqual(range(self.config["times"]),
+                         sorted(r["iteration"] for r in runner.result_queue))
+        for result in runner.result_queue:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
+            self.assertTrue(result["worker_recycled"])
+
 
 class ConstantForDurationScenarioRunnerTeestCase(test.TestCase):
 
@@ -138,3 +189,185 @@ class ConstantForDurationScenarioRunnerTeestCase(test.TestCase):
         for result in runner.result_queue:
             self.assertIsNotNone(base.ScenarioRunnerResult(result))
         self.assertIn('error', runner.result_queue[0])
+
+
+class ConstantAsyncScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ConstantAsyncScenarioRunnerTestCase, self).setUp()
+        self.config = {"times": 4, "concurrency": 2, "timeout": 2,
+                       "processes": 2,
+                       "type": consts.RunnerType.CONSTANT_ASYNC}
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+        self.args = {"a": 1}
+
+    def test_validate(self):
+        constant.ConstantAsyncScenarioRunner.validate(self.config)
+
+    def test_validate_failed(self):
+        self.config["rps"] = 10
+        self.assertRaises(jsonschema.ValidationError,
+                          constant.ConstantAsyncScenarioRunner.validate,
+                          self.config)
+
+    def test_run_scenario(self):
+        runner = constant.ConstantAsyncScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario,
+                             "do_it", self.context, self.args)
+        self.assertEqual(len(runner.result_queue), self.config["times"])
+        for result in runner.result_queue:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
+
+    def test_run_scenario_exception(self):
+        runner = constant.ConstantAsyncScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario,
+                             "something_went_wrong", self.context, self.args)
+        self.assertEqual(len(runner.result_queue), self.config["times"])
+        for result in runner.result_queue:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
+            self.assertTrue(result["error"])
+
+    def test_run_scenario_marks_warmup_out_of_order(self):
+        self.config.update({"concurrency": 4, "processes": 1,
+                            "warmup": {"iterations": 2}})
+        runner = constant.ConstantAsyncScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "first_finishes_last",
+                             self.context, self.args)
+
+        self.assertEqual(0, runner.result_queue[-1]["iteration"])
+        self.assertEqual([0, 1], sorted(r["iteration"]
+                                        for r in runner.result_queue
+                                        if r.get("warmup")))
+
+    def test_run_scenario_aborted(self):
+        self.config["times"] = 1000
+        runner = constant.ConstantAsyncScenarioRunner(None, self.config)
+        runner.abort()
+
+        runner._run_scenario(fakes.FakeScenario,
+                             "do_it", self.context, self.args)
+        self.assertEqual(0, len(runner.result_queue))
+
+    def test_run_scenario_more_processes_than_iterations(self):
+        self.config.update({"times": 1, "concurrency": 10, "processes": 4})
+        runner = constant.ConstantAsyncScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario,
+                             "do_it", self.context, self.args)
+        self.assertEqual(len(runner.result_queue), 1)
+
+    def test_run_scenario_for_duration(self):
+        del self.config["times"]
+        self.config["duration"] = 0.05
+        runner = constant.ConstantAsyncScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario,
+                             "do_it", self.context, self.args)
+        self.assertTrue(len(runner.result_queue) > 0)
+        for result in runner.result_queue:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
+
+    @mock.patch("rally.benchmark.runners.constant.rutils.monotonic")
+    def test__next_iteration(self, mock_monotonic):
+        mock_monotonic.return_value = 10
+        counter = multiprocessing.Value("i", 0)
+
+        self.assertEqual(0, constant._next_iteration(counter, 2))
+        self.assertEqual(1, constant._next_iteration(counter, None, 11))
+        self.assertIsNone(constant._next_iteration(counter, None, 10))
+        self.assertEqual(2, constant._next_iteration(counter, None))
+        self.assertIsNone(constant._next_iteration(counter, 3))
+
+        aborted = multiprocessing.Event()
+        counter = multiprocessing.Value("i", 0)
+        self.assertEqual(0, constant._next_iteration(counter, 2, None,
+                                                     aborted))
+        aborted.set()
+        self.assertIsNone(constant._next_iteration(counter, 2, None,
+                                                   aborted))
+
+    def test__iteration_threads(self):
+        queue = Queue.Queue()
+        counter = multiprocessing.Value("i", 0)
+        threads = set()
+
+        def run_once(args):
+            threads.add(threading.current_thread())
+            return {"iteration": args[0]}
+
+        with mock.patch("rally.benchmark.runners.constant.base."
+                        "_run_scenario_once", side_effect=run_once):
+            constant._IterationThreads(queue, counter, 6, 1, "cls", "method",
+                                       self.context, self.args).run(2)
+
+        self.assertEqual(6, counter.value)
+        self.assertEqual(range(6), sorted(queue.get_nowait()["iteration"]
+                                          for i in range(queue.qsize())))
+        self.assertTrue(len(threads) <= 2)
+
+    def test__iteration_threads_timeout(self):
+        queue = Queue.Queue()
+        counter = multiprocessing.Value("i", 0)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def run_once(args):
+            if args[0] == 0:
+                release.wait()
+            return {"iteration": args[0]}
+
+        context = dict(self.context, benchmark_start=rutils.monotonic())
+        with mock.patch("rally.benchmark.runners.constant.base."
+                        "_run_scenario_once", side_effect=run_once):
+            iteration_threads = constant._IterationThreads(
+                queue, counter, 3, 0.2, "cls", "method", context, self.args)
+            iteration_threads.run(2)
+
+        results = [queue.get_nowait() for i in range(queue.qsize())]
+        self.assertEqual(3, len(results))
+        timeouts = [r for r in results if "error" in r]
+        self.assertEqual(1, len(timeouts))
+        self.assertEqual(0.2, timeouts[0]["duration"])
+        self.assertIn("TimeoutException", timeouts[0]["error"][0])
+        self.assertEqual(0, timeouts[0]["iteration"])
+        self.assertIn("timestamp", timeouts[0])
+        self.assertTrue(0 <= timeouts[0]["start_offset"] < 0.2)
+        self.assertIsNotNone(base.ScenarioRunnerResult(timeouts[0]))
+        self.assertEqual([1, 2], sorted(r["iteration"] for r in results
+                                        if "error" not in r))
+
+        release.set()
+
+    def test__iteration_threads_timeout_replaces_hung_threads(self):
+        queue = Queue.Queue()
+        counter = multiprocessing.Value("i", 0)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        threads = set()
+
+        def run_once(args):
+            threads.add(threading.current_thread())
+            if args[0] < 3:
+                release.wait()
+            return {"iteration": args[0]}
+
+        timer = threading.Timer(0.5, release.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        with mock.patch("rally.benchmark.runners.constant.base."
+                        "_run_scenario_once", side_effect=run_once):
+            iteration_threads = constant._IterationThreads(
+                queue, counter, 5, 0.1, "cls", "method", self.context,
+                self.args)
+            iteration_threads.run(1)
+
+        results = [queue.get_nowait() for i in range(queue.qsize())]
+        self.assertEqual(5, len(results))
+        self.assertEqual(2, len([r for r in results if "error" in r]))
+        # NOTE: The first hung thread is replaced, the second one is
+        #       counted against the concurrency until it is released.
+        self.assertEqual(2, len(threads))
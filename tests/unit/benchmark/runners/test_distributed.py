@@ -0,0 +1,259 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import threading
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import distributed
+from rally import consts
+from rally import db
+from rally import exceptions
+from tests.unit import fakes
+from tests.unit import test
+
+
+class SerializedDB(object):
+    """DB API whose calls from different threads don't run at once.
+
+    Workers run in threads of the test process and share the connection
+    to the in-memory DB, which doesn't support concurrent use.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        func = getattr(db, name)
+
+        def wrapper(*args, **kwargs):
+            with self.lock:
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class DistributedScenarioRunnerTestCase(test.DBTestCase):
+
+    def setUp(self):
+        super(DistributedScenarioRunnerTestCase, self).setUp()
+        self.config = {"type": consts.RunnerType.DISTRIBUTED,
+                       "times": 5, "concurrency": 2, "batch_size": 2,
+                       "timeout": 2, "worker_timeout": 1}
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+        self.args = {"a": 1}
+        base._clear_clients()
+        self.addCleanup(base._clear_clients)
+        db_patcher = mock.patch("rally.benchmark.runners.distributed.db",
+                                SerializedDB())
+        db_patcher.start()
+        self.addCleanup(db_patcher.stop)
+
+    def _start_workers(self, *hostnames):
+        stop_event = threading.Event()
+        workers = [threading.Thread(target=distributed.run_worker,
+                                    args=(hostname, 0.05, stop_event))
+                   for hostname in hostnames]
+        for worker in workers:
+            worker.start()
+
+        def stop():
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+        self.addCleanup(stop)
+
+    def test_validate(self):
+        distributed.DistributedScenarioRunner.validate(self.config)
+
+    def test_validate_failed(self):
+        self.config["batch_size"] = 0
+        self.assertRaises(jsonschema.ValidationError,
+                          distributed.DistributedScenarioRunner.validate,
+                          self.config)
+
+    @mock.patch("rally.benchmark.runners.distributed.POLL_INTERVAL", 0.05)
+    def test_run_scenario(self):
+        # NOTE: Workers of a loaded test run may miss heartbeats of the
+        #       short worker_timeout and get their batches requeued.
+        self.config["worker_timeout"] = 30
+        self._start_workers("worker1", "worker2")
+        runner = distributed.DistributedScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(5, len(runner.result_queue))
+        for result in runner.result_queue:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
+            self.assertIn(result["worker"], ["worker1", "worker2"])
+        self.assertIsNone(db.worker_batch_take("worker3"))
+        self.assertFalse(runner.ledger_incomplete)
+
+    @mock.patch("rally.benchmark.runners.distributed.POLL_INTERVAL", 0.05)
+    @mock.patch("rally.benchmark.runners.distributed.time")
+    def test_run_scenario_without_workers(self, mock_time):
+        mock_time.time.side_effect = [0, 0, 2]
+        runner = distributed.DistributedScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(0, len(runner.result_queue))
+        self.assertIsNone(db.worker_batch_take("worker"))
+
+    @mock.patch("rally.benchmark.runners.distributed.POLL_INTERVAL", 0.05)
+    def test_run_scenario_requeues_batch_of_dead_worker(self):
+        with mock.patch("rally.db.sqlalchemy.api.timeutils.utcnow",
+                        return_value=datetime.datetime(2014, 1, 1)):
+            db.register_worker({"hostname": "dead"})
+        worker_job_create = db.worker_job_create
+
+        def job_create(values, batches):
+            job = worker_job_create(values, batches)
+            db.worker_batch_take("dead")
+            return job
+
+        self._start_workers("worker1")
+        runner = distributed.DistributedScenarioRunner(None, self.config)
+        with mock.patch("rally.benchmark.runners.distributed.db."
+                        "worker_job_create", side_effect=job_create):
+            runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                                 self.args)
+
+        self.assertEqual(["worker1"] * 5,
+                         [r["worker"] for r in runner.result_queue])
+        self.assertTrue(runner.ledger_incomplete)
+
+    @mock.patch("rally.benchmark.runners.distributed.POLL_INTERVAL", 0.05)
+    @mock.patch("rally.benchmark.runners.distributed.scenario_base.Scenario"
+                ".get_by_name", side_effect=exceptions.NoSuchScenario(
+                    name="FakeScenario"))
+    def test_run_scenario_batches_fail(self, mock_get_by_name):
+        self._start_workers("worker1")
+        runner = distributed.DistributedScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(0, len(runner.result_queue))
+        self.assertEqual(3, mock_get_by_name.call_count)
+        self.assertTrue(runner.ledger_incomplete)
+
+    @mock.patch("rally.benchmark.runners.distributed.POLL_INTERVAL", 0.05)
+    def test_run_scenario_aborted(self):
+        runner = distributed.DistributedScenarioRunner(None, self.config)
+        runner.abort()
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(0, len(runner.result_queue))
+        self.assertIsNone(db.worker_batch_take("worker"))
+
+    def test__run_batch_job_deleted(self):
+        db.register_worker({"hostname": "worker"})
+        job = db.worker_job_create(
+            {"task_uuid": "uuid",
+             "payload": {"cls": "FakeScenario", "method_name": "do_it",
+                         "context": self.context, "args": self.args,
+                         "concurrency": 1, "timeout": 2}},
+            [(0, 100)])
+        batch = db.worker_batch_take("worker")
+        db.worker_job_delete(job["uuid"])
+
+        distributed._run_batch("worker", job, batch, 0.05)
+
+        self.assertEqual([], db.worker_results_pop(job["uuid"]))
+
+    def test__run_batch(self):
+        db.register_worker({"hostname": "worker"})
+        job = db.worker_job_create(
+            {"task_uuid": "uuid",
+             "payload": {"cls": "FakeScenario", "method_name": "do_it",
+                         "context": self.context, "args": self.args,
+                         "concurrency": 2, "timeout": 2}},
+            [(3, 3)])
+        batch = db.worker_batch_take("worker")
+
+        distributed._run_batch("worker", job, batch, 0.05)
+
+        results = db.worker_results_pop(job["uuid"])
+        self.assertEqual(3, len(results))
+        for result in results:
+            self.assertEqual("worker", result["hostname"])
+            self.assertIsNotNone(base.ScenarioRunnerResult(result["data"]))
+
+    @mock.patch("rally.benchmark.runners.distributed.rutils.monotonic")
+    @mock.patch("rally.benchmark.runners.distributed.time.time")
+    def test__run_batch_rebases_benchmark_start(self, mock_time,
+                                                mock_monotonic):
+        mock_time.return_value = 1000
+        mock_monotonic.return_value = 30
+        db.register_worker({"hostname": "worker"})
+        job = db.worker_job_create(
+            {"task_uuid": "uuid",
+             "payload": {"cls": "FakeScenario", "method_name": "do_it",
+                         "context": self.context, "args": self.args,
+                         "concurrency": 1, "timeout": 2,
+                         "benchmark_start_timestamp": 990}},
+            [(1, 1)])
+        batch = db.worker_batch_take("worker")
+
+        with mock.patch("rally.benchmark.runners.distributed.constant."
+                        "base._run_scenario_once") as mock_run_once:
+            mock_run_once.return_value = {"duration": 1, "error": []}
+            distributed._run_batch("worker", job, batch, 0.05)
+
+        context = mock_run_once.call_args[0][0][3]
+        self.assertEqual(20, context["benchmark_start"])
+
+    @mock.patch("rally.benchmark.runners.distributed._run_batch")
+    def test_run_worker_batch_fails(self, mock_run_batch):
+        stop_event = threading.Event()
+        job = db.worker_job_create({"task_uuid": "uuid", "payload": {}},
+                                   [(0, 1), (1, 1)])
+
+        def run_batch(*args):
+            if mock_run_batch.call_count == 2:
+                stop_event.set()
+            raise Exception("error")
+        mock_run_batch.side_effect = run_batch
+
+        distributed.run_worker("worker", 0.05, stop_event)
+
+        self.assertEqual([consts.WorkerBatchStatus.FAILED] * 2,
+                         [batch["status"] for batch in
+                          db.worker_batches_get(job["uuid"])])
+
+    @mock.patch("rally.benchmark.runners.distributed._run_batch")
+    def test_run_worker(self, mock_run_batch):
+        stop_event = threading.Event()
+        job = db.worker_job_create({"task_uuid": "uuid", "payload": {}},
+                                   [(0, 1)])
+        mock_run_batch.side_effect = lambda *args: stop_event.set()
+
+        distributed.run_worker("worker", 0.05, stop_event)
+
+        self.assertEqual(1, mock_run_batch.call_count)
+        hostname, job_arg, batch, interval = mock_run_batch.call_args[0]
+        self.assertEqual(("worker", job["uuid"], 0, 0.05),
+                         (hostname, job_arg["uuid"], batch["start"],
+                          interval))
+        self.assertIsNone(db.worker_batch_take("worker"))
+        self.assertEqual([], db.get_workers())
@@ -0,0 +1,115 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import resource
+
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import process_pool
+from tests.unit import fakes
+from tests.unit import test
+
+
+class ProcessPoolTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ProcessPoolTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+        self.context["user"] = self.context["users"][0]
+
+    def _iterations(self, methods):
+        return [(i, fakes.FakeScenario, method, self.context, {})
+                for i, method in enumerate(methods)]
+
+    def test_imap_unordered(self):
+        pool = process_pool.ProcessPool(2, 10)
+
+        results = list(pool.imap_unordered(
+            self._iterations(["do_it"] * 3 + ["something_went_wrong"])))
+
+        self.assertEqual([0, 1, 2, 3],
+                         sorted(r["iteration"] for r in results))
+        for result in results:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
+            self.assertEqual(result["iteration"] == 3, bool(result["error"]))
+        self.assertEqual(0, pool.recycled)
+        self.assertEqual([], pool.workers)
+
+    def test_imap_unordered_recycles_hung_workers(self):
+        pool = process_pool.ProcessPool(2, 0.5)
+
+        results = list(pool.imap_unordered(
+            self._iterations(["do_it", "hang", "do_it", "do_it", "hang"])))
+
+        self.assertEqual(5, len(results))
+        timeouts = [r for r in results if r.get("worker_recycled")]
+        self.assertEqual([1, 4], sorted(r["iteration"] for r in timeouts))
+        for result in timeouts:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
+            self.assertIn("TimeoutException", result["error"][0])
+            self.assertEqual(0.5, result["duration"])
+        self.assertEqual(2, pool.recycled)
+
+    def test_imap_unordered_keeps_concurrency(self):
+        pool = process_pool.ProcessPool(2, 0.5)
+
+        results = pool.imap_unordered(
+            self._iterations(["hang", "hang", "do_it", "do_it"]))
+        next(results)
+        self.assertEqual(2, sum(w.process.is_alive() for w in pool.workers))
+        self.assertEqual(4, len(list(results)) + 1)
+        self.assertEqual(2, pool.recycled)
+
+    @mock.patch("rally.benchmark.runners.process_pool.base."
+                "_run_scenario_once")
+    def test_imap_unordered_worker_died(self, mock_run_once):
+        mock_run_once.side_effect = SystemExit
+        pool = process_pool.ProcessPool(1, 10)
+
+        results = list(pool.imap_unordered(self._iterations(["do_it"])))
+
+        self.assertEqual(1, len(results))
+        self.assertEqual(0, results[0]["iteration"])
+        self.assertIn("WorkerProcessDied", results[0]["error"][0])
+        self.assertTrue(results[0]["worker_recycled"])
+
+    def test__wait_ready_high_file_descriptors(self):
+        soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        if soft_limit != resource.RLIM_INFINITY and soft_limit <= 1100:
+            self.skipTest("Not enough file descriptors")
+        read_fd, write_fd = os.pipe()
+        high_fd = 1100
+        os.dup2(read_fd, high_fd)
+        for fd in (read_fd, write_fd, high_fd):
+            self.addCleanup(os.close, fd)
+        ready = mock.Mock()
+        ready.fileno.return_value = high_fd
+
+        self.assertEqual([], process_pool._wait_ready([ready], 0))
+        os.write(write_fd, "x")
+        self.assertEqual([ready], process_pool._wait_ready([ready], 1))
+
+    def test_terminate(self):
+        pool = process_pool.ProcessPool(2, 10)
+        pool.workers = [process_pool._Worker() for i in range(2)]
+        processes = [w.process for w in pool.workers]
+
+        pool.terminate()
+
+        self.assertFalse(any(p.is_alive() for p in processes))
+        self.assertEqual([], pool.workers)
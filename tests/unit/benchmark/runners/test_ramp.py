@@ -0,0 +1,119 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import constant
+from rally.benchmark.runners import ramp
+from rally.benchmark.runners import rps
+from rally import consts
+from tests.unit import fakes
+from tests.unit import test
+
+
+class RampScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(RampScenarioRunnerTestCase, self).setUp()
+        self.config = {"type": consts.RunnerType.RAMP,
+                       "stages": [{"concurrency": 2, "duration": 0.2},
+                                  {"rps": 10, "duration": 0.2}],
+                       "timeout": 2,
+                       "processes": 2}
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+        self.args = {"a": 1}
+
+    def test_validate(self):
+        ramp.RampScenarioRunner.validate(self.config)
+
+    def test_validate_failed(self):
+        for stage in [{"concurrency": 1, "rps": 1, "duration": 1},
+                      {"duration": 1},
+                      {"concurrency": 1},
+                      {"concurrency": 1, "duration": 0}]:
+            self.config["stages"] = [stage]
+            self.assertRaises(jsonschema.ValidationError,
+                              ramp.RampScenarioRunner.validate,
+                              self.config)
+
+    def test__get_stage_runner(self):
+        runner = ramp.RampScenarioRunner(None, self.config)
+
+        concurrency_runner = runner._get_stage_runner(
+            self.config["stages"][0])
+        self.assertIsInstance(concurrency_runner,
+                              constant.ConstantAsyncScenarioRunner)
+        self.assertEqual({"type": consts.RunnerType.CONSTANT_ASYNC,
+                          "concurrency": 2, "duration": 0.2, "timeout": 2,
+                          "processes": 2}, concurrency_runner.config)
+
+        rps_runner = runner._get_stage_runner(
+            {"rps": 10, "duration": 0.2, "max_concurrency": 3})
+        self.assertIsInstance(rps_runner, rps.RPSScenarioRunner)
+        self.assertEqual({"type": consts.RunnerType.RPS, "rps": 10,
+                          "times": 2, "distribution": "fixed",
+                          "max_concurrency": 3}, rps_runner.config)
+
+    @mock.patch("rally.benchmark.runners.ramp.RampScenarioRunner."
+                "_get_stage_runner")
+    def test_run_scenario_tags_stages(self, mock_get_stage_runner):
+        def fake_run_scenario(runner):
+            def _run_scenario(cls, method_name, context, args):
+                runner.result_queue.append({"duration": 1.0,
+                                            "idle_duration": 0,
+                                            "error": []})
+            return _run_scenario
+
+        stage_runners = [mock.MagicMock(), mock.MagicMock()]
+        for stage_runner in stage_runners:
+            stage_runner._run_scenario.side_effect = fake_run_scenario(
+                stage_runner)
+        mock_get_stage_runner.side_effect = stage_runners
+        runner = ramp.RampScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual([0, 1], [r["stage"] for r in runner.result_queue])
+
+    @mock.patch("rally.benchmark.runners.ramp.RampScenarioRunner."
+                "_get_stage_runner")
+    def test_run_scenario_aborted(self, mock_get_stage_runner):
+        runner = ramp.RampScenarioRunner(None, self.config)
+        stage_runner = mock_get_stage_runner.return_value
+        stage_runner._run_scenario.side_effect = (
+            lambda *args: runner.abort())
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(1, mock_get_stage_runner.call_count)
+        self.assertEqual(runner.aborted, stage_runner.aborted)
+
+    def test_run_scenario(self):
+        runner = ramp.RampScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        stages = [r["stage"] for r in runner.result_queue]
+        self.assertIn(0, stages)
+        self.assertEqual(2, stages.count(1))
+        self.assertEqual(sorted(stages), stages)
+        for result in runner.result_queue:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
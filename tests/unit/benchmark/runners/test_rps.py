@@ -13,12 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import Queue
+import threading
+
 import jsonschema
 import mock
 
 from rally.benchmark.runners import base
 from rally.benchmark.runners import rps
 from rally import consts
+from rally import utils as rutils
 from tests.unit import fakes
 from tests.unit import test
 
@@ -54,61 +58,125 @@ class RPSScenarioRunnerTestCase(test.TestCase):
                                                  consts.RunnerType.RPS})
         self.assertIsNotNone(runner)
 
-    @mock.patch("rally.benchmark.runners.rps.LOG")
-    @mock.patch("rally.benchmark.runners.rps.time")
-    @mock.patch("rally.benchmark.runners.rps.threading.Thread")
-    @mock.patch("rally.benchmark.runners.rps.multiprocessing.Queue")
-    def test__worker_process(self, mock_queue, mock_thread, mock_time,
-                             mock_log):
-
-        def time_side():
-            time_side.last += 0.03
-            time_side.count += 1
-            return time_side.last
-        time_side.last = 0
-        time_side.count = 0
-
-        mock_time.time = time_side
-
-        mock_thread_instance = mock.MagicMock(
-            isAlive=mock.MagicMock(return_value=False))
-        mock_thread.return_value = mock_thread_instance
-
-        times = 4
-
-        rps._worker_process(10, times, mock_queue, None, 600, 1, 1,
-                            "Dummy", "dummy", ())
-
-        self.assertEqual(times, mock_log.debug.call_count)
-        self.assertEqual(times, mock_thread.call_count)
-
-        self.assertEqual(times, mock_thread_instance.start.call_count)
-        self.assertEqual(times, mock_thread_instance.join.call_count)
-        self.assertEqual(3, mock_time.sleep.call_count)
-        self.assertEqual(times, mock_thread_instance.isAlive.call_count)
-        self.assertEqual(15, mock_time.time.count)
-
-        for i in range(1, times + 1):
-            call = mock.call(args=(mock_queue,
-                                   (i, "Dummy", "dummy",
-                                    None, ())),
-                             target=rps._worker_thread)
-            self.assertIn(call, mock_thread.mock_calls)
-
-    @mock.patch("rally.benchmark.runners.rps.base",
-                _run_scenario_once=mock.MagicMock())
-    def test__worker_thread(self, mock_base):
-        mock_queue = mock.MagicMock()
-
-        args = ("some_args",)
-
-        rps._worker_thread(mock_queue, args)
-
-        self.assertEqual(1, mock_queue.put.call_count)
+    def test_validate_distribution(self):
+        config = {"type": consts.RunnerType.RPS, "times": 1, "rps": 10,
+                  "distribution": "poisson", "max_concurrency": 5}
+        rps.RPSScenarioRunner.validate(config)
+        config["distribution"] = "gauss"
+        self.assertRaises(jsonschema.ValidationError,
+                          rps.RPSScenarioRunner.validate, config)
 
-        expected_calls = [mock.call(("some_args",))]
-        self.assertEqual(expected_calls,
-                         mock_base._run_scenario_once.mock_calls)
+    def test__get_arrival_offsets_fixed(self):
+        self.assertEqual([0.0, 0.5, 1.0, 1.5],
+                         rps._get_arrival_offsets(4, 2.0))
+
+    @mock.patch("rally.benchmark.runners.rps.random")
+    def test__get_arrival_offsets_poisson(self, mock_random):
+        mock_random.expovariate.return_value = 0.3
+        self.assertEqual([0.0, 0.3, 0.6],
+                         rps._get_arrival_offsets(3, 2, "poisson"))
+        mock_random.expovariate.assert_called_with(2)
+
+    @mock.patch("rally.benchmark.runners.rps.random")
+    def test__get_arrival_offsets_uniform(self, mock_random):
+        mock_random.uniform.return_value = 0.25
+        self.assertEqual([0.0, 0.25, 0.5],
+                         rps._get_arrival_offsets(3, 4, "uniform"))
+        mock_random.uniform.assert_called_with(0, 0.5)
+
+    @mock.patch("rally.benchmark.runners.rps.rutils.monotonic")
+    @mock.patch("rally.benchmark.runners.rps.base._run_scenario_once")
+    def test__worker_pool(self, mock_run_once, mock_monotonic):
+        threads = set()
+
+        def run_once(args):
+            threads.add(threading.current_thread())
+            return {"iteration": args[0]}
+        mock_run_once.side_effect = run_once
+        mock_monotonic.return_value = 12
+        queue = Queue.Queue()
+        context = fakes.FakeUserContext({}).context
+        pool = rps._WorkerPool(2, queue, 10, "cls", "method", context, {})
+
+        for i in range(5):
+            pool.put(i, i * 0.5)
+        pool.join()
+
+        self.assertTrue(1 <= len(threads) <= 2)
+        self.assertEqual([], pool.threads)
+        results = sorted([queue.get() for i in range(5)],
+                         key=lambda r: r["iteration"])
+        self.assertEqual([{"iteration": i, "scheduled_start": i * 0.5,
+                           "actual_start": 2} for i in range(5)], results)
+        self.assertTrue(queue.empty())
+
+    def test__worker_pool_timeout(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def run_once(args):
+            if args[0] == 0:
+                release.wait()
+            return {"iteration": args[0]}
+
+        queue = Queue.Queue()
+        context = dict(fakes.FakeUserContext({}).context,
+                       benchmark_start=rutils.monotonic())
+        with mock.patch("rally.benchmark.runners.rps.base._run_scenario_once",
+                        side_effect=run_once):
+            pool = rps._WorkerPool(1, queue, rutils.monotonic(), "cls",
+                                   "method", context, {}, timeout=0.2)
+            for i in range(3):
+                pool.put(i, 0)
+            pool.join()
+
+        results = [queue.get_nowait() for i in range(queue.qsize())]
+        self.assertEqual(3, len(results))
+        timeout = results[0]
+        self.assertEqual(0, timeout["iteration"])
+        self.assertIn("TimeoutException", timeout["error"][0])
+        self.assertEqual(0, timeout["scheduled_start"])
+        self.assertIsNotNone(base.ScenarioRunnerResult(timeout))
+        self.assertEqual([1, 2], [r["iteration"] for r in results[1:]])
+
+        release.set()
+
+    @mock.patch("rally.benchmark.runners.rps._WorkerPool")
+    @mock.patch("rally.benchmark.runners.rps.rutils.monotonic")
+    @mock.patch("rally.benchmark.runners.rps.time")
+    def test__worker_process(self, mock_time, mock_monotonic, mock_pool):
+        mock_monotonic.return_value = 100.5
+
+        rps._worker_process("queue", [(1, 0.0), (3, 1.0), (5, 2.0)], 4, 100,
+                            "Dummy", "dummy", "context", "args")
+
+        mock_pool.assert_called_once_with(4, "queue", 100, "Dummy", "dummy",
+                                          "context", "args", 600)
+        self.assertEqual([mock.call(0.5), mock.call(1.5)],
+                         mock_time.sleep.mock_calls)
+        self.assertEqual([mock.call(1, 0.0), mock.call(3, 1.0),
+                          mock.call(5, 2.0)],
+                         mock_pool.return_value.put.mock_calls)
+        mock_pool.return_value.join.assert_called_once_with()
+
+    @mock.patch("rally.benchmark.runners.rps._WorkerPool")
+    @mock.patch("rally.benchmark.runners.rps.rutils.monotonic")
+    @mock.patch("rally.benchmark.runners.rps.time")
+    def test__worker_process_aborted(self, mock_time, mock_monotonic,
+                                     mock_pool):
+        mock_monotonic.return_value = 100.5
+        aborted = mock.MagicMock()
+        aborted.wait.side_effect = [False, True]
+
+        rps._worker_process("queue", [(1, 0.0), (3, 1.0), (5, 2.0)], 4, 100,
+                            "Dummy", "dummy", "context", "args", aborted)
+
+        self.assertEqual([mock.call(0), mock.call(0.5)],
+                         aborted.wait.mock_calls)
+        self.assertFalse(mock_time.sleep.called)
+        self.assertEqual([mock.call(1, 0.0)],
+                         mock_pool.return_value.put.mock_calls)
+        mock_pool.return_value.join.assert_called_once_with()
 
     @mock.patch("rally.benchmark.runners.rps.time.sleep")
     def test__run_scenario(self, mock_sleep):
@@ -124,6 +192,11 @@ class RPSScenarioRunnerTestCase(test.TestCase):
 
         for result in runner.result_queue:
             self.assertIsNotNone(base.ScenarioRunnerResult(result))
+            self.assertIn("scheduled_start", result)
+            self.assertIn("actual_start", result)
+        self.assertEqual(range(config["times"]),
+                         sorted(round(r["scheduled_start"] * config["rps"])
+                                for r in runner.result_queue))
 
     @mock.patch("rally.benchmark.runners.rps.time.sleep")
     def test__run_scenario_exception(self, mock_sleep):
@@ -139,3 +212,18 @@ class RPSScenarioRunnerTestCase(test.TestCase):
         self.assertEqual(len(runner.result_queue), config["times"])
         for result in runner.result_queue:
             self.assertIsNotNone(base.ScenarioRunnerResult(result))
+
+    @mock.patch("rally.benchmark.runners.rps.multiprocessing")
+    def test__run_scenario_splits_max_concurrency(self, mock_mp):
+        mock_mp.cpu_count.return_value = 4
+        mock_mp.Process.return_value.is_alive.return_value = False
+        mock_mp.Queue.return_value.empty.return_value = True
+        config = {"times": 20, "rps": 20, "max_concurrency": 6,
+                  "timeout": 5}
+        runner = rps.RPSScenarioRunner(None, config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", {}, {})
+
+        worker_args = [c[1]["args"] for c in mock_mp.Process.call_args_list]
+        self.assertEqual([2, 2, 1, 1], [args[2] for args in worker_args])
+        self.assertEqual([5] * 4, [args[-1] for args in worker_args])
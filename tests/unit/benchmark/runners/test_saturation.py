@@ -0,0 +1,206 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import saturation
+from rally.benchmark.scenarios.dummy import dummy
+from rally import consts
+from tests.unit import fakes
+from tests.unit import test
+
+
+def _phase(throughput, durations=None, errors=0, iterations=None, **load):
+    durations = durations or [1.0]
+    load = load or {"concurrency": 1}
+    load["duration"] = 1
+    if iterations is None:
+        iterations = len(durations) + errors
+    return {"config": load, "iterations": iterations, "errors": errors,
+            "throughput": throughput, "durations": durations}
+
+
+class SaturationPointTestCase(test.TestCase):
+
+    def test_get_saturation_point_not_reached(self):
+        phases = [_phase(1), _phase(2), _phase(4)]
+        self.assertEqual((2, None),
+                         saturation.get_saturation_point({}, phases))
+
+    def test_get_saturation_point_without_phases(self):
+        self.assertEqual((None, None),
+                         saturation.get_saturation_point({}, []))
+
+    def test_get_saturation_point_plateau(self):
+        phases = [_phase(1), _phase(2), _phase(2.1), _phase(2.2)]
+        point, reason = saturation.get_saturation_point({}, phases)
+        self.assertEqual(1, point)
+        self.assertIn("grows less than 10%", reason)
+
+        config = {"min_throughput_gain": 0}
+        self.assertEqual((3, None),
+                         saturation.get_saturation_point(config, phases))
+
+    def test_get_saturation_point_p95(self):
+        phases = [_phase(1, [0.5]), _phase(2, [3.0])]
+        point, reason = saturation.get_saturation_point(
+            {"max_p95_latency": 2}, phases)
+        self.assertEqual(0, point)
+        self.assertIn("95 percentile", reason)
+
+    def test_get_saturation_point_failures(self):
+        phases = [_phase(1, errors=1, durations=[1.0] * 9)]
+        point, reason = saturation.get_saturation_point(
+            {"max_failure_percent": 5}, phases)
+        self.assertIsNone(point)
+        self.assertIn("failure rate 10.0%", reason)
+
+    def test_get_saturation_report(self):
+        phases = [_phase(1, concurrency=1), _phase(2, concurrency=2),
+                  _phase(2, concurrency=4),
+                  _phase(0, iterations=0, concurrency=8)]
+        shown, message = saturation.get_saturation_report({}, phases)
+        self.assertEqual(phases[:3], shown)
+        self.assertIn("Saturation point is concurrency 2 (phase 2, "
+                      "2.000 iter/sec), at concurrency 4", message)
+
+    def test_get_saturation_report_not_reached(self):
+        phases = [_phase(1, rps=1), _phase(2, rps=2)]
+        shown, message = saturation.get_saturation_report({}, phases)
+        self.assertEqual(phases, shown)
+        self.assertEqual("Saturation point is not reached up to rps 2",
+                         message)
+
+    def test_get_saturation_report_saturated_at_start(self):
+        phases = [_phase(1, errors=1, durations=[1.0])]
+        message = saturation.get_saturation_report(
+            {"max_failure_percent": 0}, phases)[1]
+        self.assertIn("saturated already at concurrency 1", message)
+
+    def test_get_saturation_report_without_phases(self):
+        self.assertEqual(
+            ([], "No phases of the saturation search were run"),
+            saturation.get_saturation_report({}, []))
+
+
+class SaturationScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(SaturationScenarioRunnerTestCase, self).setUp()
+        self.config = {"type": consts.RunnerType.SATURATION,
+                       "start": 1, "factor": 2, "max_load": 8,
+                       "phase_duration": 0.2, "processes": 1}
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+        self.args = {"a": 1}
+
+    def test_validate(self):
+        saturation.SaturationScenarioRunner.validate(self.config)
+
+    def test_validate_failed(self):
+        for update in [{"step": 1}, {"factor": 1}, {"load": "threads"},
+                       {"max_failure_percent": 101}]:
+            config = dict(self.config, **update)
+            self.assertRaises(jsonschema.ValidationError,
+                              saturation.SaturationScenarioRunner.validate,
+                              config)
+
+        del self.config["max_load"]
+        self.assertRaises(jsonschema.ValidationError,
+                          saturation.SaturationScenarioRunner.validate,
+                          self.config)
+
+    def test__get_stages_factor(self):
+        stages = saturation.SaturationScenarioRunner._get_stages(self.config)
+        self.assertEqual([{"concurrency": c, "duration": 0.2}
+                          for c in [1, 2, 4, 8]], stages)
+
+    def test__get_stages_small_factor(self):
+        self.config["factor"] = 1.2
+        stages = saturation.SaturationScenarioRunner._get_stages(self.config)
+        self.assertEqual([1, 2, 3, 4, 5, 6, 8],
+                         [s["concurrency"] for s in stages])
+
+    def test__get_stages_rps_step(self):
+        config = {"type": consts.RunnerType.SATURATION, "load": "rps",
+                  "start": 5, "step": 5, "max_load": 15,
+                  "max_concurrency": 10}
+        stages = saturation.SaturationScenarioRunner._get_stages(config)
+        self.assertEqual([{"rps": rps, "duration": 30, "max_concurrency": 10}
+                          for rps in [5, 10, 15]], stages)
+
+    def test_get_stages(self):
+        self.assertEqual(
+            saturation.SaturationScenarioRunner._get_stages(self.config),
+            base.ScenarioRunner.get_stages(self.config))
+
+    @mock.patch("rally.benchmark.runners.saturation.SaturationScenarioRunner."
+                "_get_stage_runner")
+    def test_run_scenario_stops_at_knee(self, mock_get_stage_runner):
+        def fake_run_scenario(runner, iterations):
+            def _run_scenario(cls, method_name, context, args):
+                for i in range(iterations):
+                    runner.result_queue.append({"duration": 0.1,
+                                                "idle_duration": 0,
+                                                "error": []})
+            return _run_scenario
+
+        stage_runners = []
+        for iterations in [2, 4, 4, 4]:
+            stage_runner = mock.MagicMock()
+            stage_runner._run_scenario.side_effect = fake_run_scenario(
+                stage_runner, iterations)
+            stage_runners.append(stage_runner)
+        mock_get_stage_runner.side_effect = stage_runners
+        runner = saturation.SaturationScenarioRunner(None, self.config)
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(3, mock_get_stage_runner.call_count)
+        self.assertEqual([0] * 2 + [1] * 4 + [2] * 4,
+                         [r["stage"] for r in runner.result_queue])
+
+    @mock.patch("rally.benchmark.runners.saturation.SaturationScenarioRunner."
+                "_get_stage_runner")
+    def test_run_scenario_aborted(self, mock_get_stage_runner):
+        runner = saturation.SaturationScenarioRunner(None, self.config)
+        stage_runner = mock_get_stage_runner.return_value
+        stage_runner._run_scenario.side_effect = (
+            lambda *args: runner.abort())
+
+        runner._run_scenario(fakes.FakeScenario, "do_it", self.context,
+                             self.args)
+
+        self.assertEqual(1, mock_get_stage_runner.call_count)
+        self.assertEqual(runner.aborted, stage_runner.aborted)
+
+    def test_run_scenario(self):
+        self.config.update({"max_load": 32, "phase_duration": 0.5})
+        runner = saturation.SaturationScenarioRunner(None, self.config)
+
+        runner._run_scenario(dummy.Dummy, "dummy", self.context,
+                             {"sleep": 0.1, "capacity": 2})
+
+        stages = [r["stage"] for r in runner.result_queue]
+        self.assertEqual(sorted(stages), stages)
+        # NOTE: Throughput of the dummy scenario stops growing after its
+        #       capacity of 2 concurrent iterations, so the search stops
+        #       long before the concurrency of 32.
+        self.assertTrue(max(stages) < 5)
+        for result in runner.result_queue:
+            self.assertIsNotNone(base.ScenarioRunnerResult(result))
@@ -40,3 +40,17 @@ class SerialScenarioRunnerTestCase(test.TestCase):
         self.assertEqual(len(runner.result_queue), times)
         results = list(runner.result_queue)
         self.assertEqual(results, expected_results)
+
+    @mock.patch("rally.benchmark.runners.base._run_scenario_once")
+    def test_run_scenario_aborted(self, mock_run_once):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(), {"times": 5})
+
+        def run_once(args):
+            if args[0] == 1:
+                runner.abort()
+            return {"duration": 10, "idle_duration": 0, "error": []}
+        mock_run_once.side_effect = run_once
+
+        runner._run_scenario(fakes.FakeScenario, "do_it",
+                             fakes.FakeUserContext({}).context, {})
+        self.assertEqual(2, len(runner.result_queue))
@@ -29,6 +29,20 @@ class DummyTestCase(test.TestCase):
         scenario.dummy(sleep=10)
         mock_sleep.sleep.assert_called_once_with(10)
 
+    @mock.patch("rally.benchmark.scenarios.dummy.dummy.time")
+    @mock.patch.dict("rally.benchmark.scenarios.dummy.dummy._calls",
+                     {"count": 3})
+    def test_dummy_with_capacity(self, mock_time):
+        scenario = dummy.Dummy()
+
+        scenario.dummy(sleep=10, capacity=2)
+        mock_time.sleep.assert_called_once_with(20)
+        self.assertEqual(3, dummy._calls["count"])
+
+        mock_time.reset_mock()
+        scenario.dummy(sleep=10, capacity=5)
+        mock_time.sleep.assert_called_once_with(10)
+
     def test_dummy_exception(self):
         scenario = dummy.Dummy()
 
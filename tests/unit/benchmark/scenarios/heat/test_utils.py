@@ -101,6 +101,8 @@ class HeatScenarioNegativeTestCase(test.TestCase):
         mock_bench.heat_stack_create_prepoll_delay = 2
         mock_bench.heat_stack_create_timeout = 1
         mock_bench.benchmark.heat_stack_create_poll_interval = 1
+        mock_bench.batch_status_polling = False
+        mock_bench.polling_strategy = "fixed"
 
         mock_clients("heat").stacks.create.return_value = {
             'stack': {'id': 'test_id'}
@@ -60,7 +60,7 @@ class KeystoneScenarioTestCase(test.TestCase):
         name = "abc"
         mock_gen_name.return_value = name
 
-        user = {}
+        user = mock.MagicMock()
         fake_keystone = fakes.FakeKeystoneClient()
         fake_keystone.users.create = mock.MagicMock(return_value=user)
         fake_clients = fakes.FakeClients()
@@ -90,7 +90,7 @@ class KeystoneScenarioTestCase(test.TestCase):
         name = "abc"
         mock_gen_name.return_value = name
 
-        tenant = {}
+        tenant = mock.MagicMock()
         fake_keystone = fakes.FakeKeystoneClient()
         fake_keystone.tenants.create = mock.MagicMock(return_value=tenant)
         fake_clients = fakes.FakeClients()
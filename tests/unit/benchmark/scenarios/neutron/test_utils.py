@@ -28,7 +28,7 @@ class NeutronScenarioTestCase(test.TestCase):
 
     def setUp(self):
         super(NeutronScenarioTestCase, self).setUp()
-        self.network = mock.Mock()
+        self.network = mock.MagicMock()
 
     def _test_atomic_action_timer(self, atomic_actions_time, name):
         action_duration = atomic_actions_time.get(name)
@@ -192,7 +192,7 @@ class NeutronScenarioTestCase(test.TestCase):
     @mock.patch(NEUTRON_UTILS + 'NeutronScenario.clients')
     def test_create_router(self, mock_clients, mock_random_name):
         scenario = utils.NeutronScenario()
-        router = mock.Mock()
+        router = mock.MagicMock()
         explicit_name = "explicit_name"
         random_name = "random_name"
         mock_random_name.return_value = random_name
@@ -20,6 +20,7 @@ import mock
 from rally.benchmark.context import base as base_ctx
 from rally.benchmark.scenarios import base
 from rally.benchmark.scenarios.dummy import dummy
+from rally.benchmark import utils as bench_utils
 from rally.benchmark import validation
 from rally import consts
 from rally import exceptions
@@ -227,6 +228,41 @@ class ScenarioTestCase(test.TestCase):
         scenario.sleep_between(0.001, 0.002)
         self.assertTrue(0.001 <= scenario.idle_duration() <= 0.002)
 
+    @mock.patch("rally.benchmark.scenarios.base.db")
+    def test_register_resource(self, mock_db):
+        mock_db.task_resources_create.side_effect = [[1], [2], [3], [4]]
+        scenario = base.Scenario(context={"resource_ledger": True,
+                                          "task": {"uuid": "task"},
+                                          "user": {"tenant_id": "t"}})
+        scenario._register_resource("nova", "servers", "s1")
+        scenario._register_resource("nova", "servers", "s2")
+        scenario._register_resource("nova", "floating_ips", 1)
+        scenario._register_resource("keystone", "users", "u1", admin=True)
+        scenario._unregister_resource("nova", "servers", "s1")
+        scenario._unregister_resource("nova", "floating_ips")
+        scenario._unregister_resource("nova", "floating_ips")
+
+        mock_db.task_resources_create.assert_has_calls([
+            mock.call("task", [{"tenant_id": "t", "service": "nova",
+                                "type": "servers", "id": "s1"}]),
+            mock.call("task", [{"tenant_id": None, "service": "keystone",
+                                "type": "users", "id": "u1"}])],
+            any_order=True)
+        self.assertEqual([mock.call([1]), mock.call([3])],
+                         mock_db.task_resources_delete.mock_calls)
+        self.assertEqual([{"tenant_id": "t", "service": "nova",
+                           "type": "servers", "id": "s2"},
+                          {"tenant_id": None, "service": "keystone",
+                           "type": "users", "id": "u1"}],
+                         scenario.resources())
+
+    @mock.patch("rally.benchmark.scenarios.base.db")
+    def test_register_resource_without_ledger(self, mock_db):
+        scenario = base.Scenario(context={"user": {"tenant_id": "t"}})
+        scenario._register_resource("nova", "servers", "s1")
+        self.assertEqual([], scenario.resources())
+        self.assertFalse(mock_db.task_resources_create.called)
+
     def test_sleep_beetween_multi(self):
         scenario = base.Scenario()
         scenario.sleep_between(0.001, 0.001)
@@ -343,11 +379,72 @@ class AtomicActionTestCase(test.TestCase):
         self.assertEqual(c.name, 'asdf')
 
     @mock.patch('tests.unit.fakes.FakeScenario._add_atomic_actions')
-    @mock.patch('rally.utils.time')
-    def test__exit__(self, mock_time, mock__add_atomic_actions):
+    @mock.patch('rally.utils.monotonic')
+    def test__exit__(self, mock_monotonic, mock__add_atomic_actions):
+        mock_monotonic.side_effect = [10, 12]
         fake_scenario_instance = fakes.FakeScenario()
-        self.start = mock_time.time()
         with base.AtomicAction(fake_scenario_instance, "asdf"):
             pass
-        duration = mock_time.time() - self.start
-        mock__add_atomic_actions.assert_called_once_with('asdf', duration)
+        mock__add_atomic_actions.assert_called_once_with('asdf', 2)
+        self.assertEqual([["asdf", 10, 2, None]],
+                         fake_scenario_instance.atomic_actions_tree())
+
+    @mock.patch('rally.utils.monotonic')
+    def test_nested(self, mock_monotonic):
+        mock_monotonic.side_effect = [10, 11, 12, 13, 14, 15]
+        scenario = fakes.FakeScenario()
+        with base.AtomicAction(scenario, "delete_all"):
+            for i in range(2):
+                with base.AtomicAction(scenario, "delete"):
+                    pass
+
+        self.assertEqual([["delete_all", 10, 5, None],
+                          ["delete", 11, 1, 0],
+                          ["delete", 13, 1, 0]],
+                         scenario.atomic_actions_tree())
+        self.assertEqual({"delete_all": 5, "delete": 1, "delete (2)": 1},
+                         scenario.atomic_actions())
+
+    @mock.patch('rally.utils.monotonic')
+    def test_failed(self, mock_monotonic):
+        mock_monotonic.side_effect = [10, 12]
+        scenario = fakes.FakeScenario()
+        try:
+            with base.AtomicAction(scenario, "asdf"):
+                raise ValueError()
+        except ValueError:
+            pass
+
+        self.assertEqual({"asdf": None}, scenario.atomic_actions())
+        self.assertEqual([["asdf", 10, 2, None]],
+                         scenario.atomic_actions_tree())
+
+    @mock.patch("rally.benchmark.utils.time.sleep")
+    def test_polls(self, mock_sleep):
+        scenario = fakes.FakeScenario()
+        is_ready = mock.MagicMock(side_effect=[False, True, False, False,
+                                               True])
+        with base.AtomicAction(scenario, "boot_all"):
+            with base.AtomicAction(scenario, "boot"):
+                bench_utils.wait_for("server", is_ready)
+            with base.AtomicAction(scenario, "boot"):
+                bench_utils.wait_for("server", is_ready)
+            with base.AtomicAction(scenario, "list"):
+                pass
+
+        self.assertEqual({"boot_all": 5, "boot": 2, "boot (2)": 3},
+                         scenario.atomic_actions_polls())
+
+    @mock.patch("rally.benchmark.scenarios.base.httppool")
+    def test_api_calls(self, mock_httppool):
+        scenario = fakes.FakeScenario()
+        with base.AtomicAction(scenario, "boot"):
+            pass
+        with base.AtomicAction(scenario, "boot"):
+            pass
+
+        self.assertEqual([mock.call.start_api_action("boot"),
+                          mock.call.stop_api_action(),
+                          mock.call.start_api_action("boot (2)"),
+                          mock.call.stop_api_action()],
+                         mock_httppool.mock_calls)
@@ -15,6 +15,7 @@
 
 
 import jsonschema
+import mock
 
 from rally.benchmark.sla import base
 from tests.unit import test
@@ -26,7 +27,7 @@ class TestCriterion(base.SLA):
 
     @staticmethod
     def check(criterion_value, result):
-        return base.SLAResult(criterion_value == result,
+        return base.SLAResult(criterion_value == len(result),
                               msg='detail')
 
 
@@ -44,18 +45,28 @@ class BaseSLATestCase(test.TestCase):
         self.assertRaises(jsonschema.ValidationError,
                           base.SLA.validate, {"test_criterion": 42.0})
 
+    def test_validate_include_warmup(self):
+        base.SLA.validate({"test_criterion": 42, "include_warmup": True})
+        self.assertRaises(jsonschema.ValidationError,
+                          base.SLA.validate, {"include_warmup": "yes"})
+
+    def test_validate_abort_on_failure(self):
+        base.SLA.validate({"test_criterion": 42, "abort_on_failure": True})
+        self.assertRaises(jsonschema.ValidationError,
+                          base.SLA.validate, {"abort_on_failure": 1})
+
     def test_check_all(self):
         config = {
             "sla": {"test_criterion": 42},
         }
         result = {"key": {"kw": config, "name": "fake", "pos": 0},
-                  "data": 42}
+                  "data": [{}] * 42}
         results = list(base.SLA.check_all(config, result["data"]))
         expected = [{'criterion': 'test_criterion',
                      'detail': 'detail',
                      'success': True}]
         self.assertEqual(expected, results)
-        result["data"] = 43
+        result["data"] = [{}] * 43
         results = list(base.SLA.check_all(config, result["data"]))
         expected = [{'criterion': 'test_criterion',
                      'detail': 'detail',
@@ -63,6 +74,122 @@ class BaseSLATestCase(test.TestCase):
         self.assertEqual(expected, results)
 
 
+class SLACheckerTestCase(test.TestCase):
+
+    def test_add_iteration_and_results(self):
+        config = {"sla": {"max_seconds_per_iteration": 2,
+                          "max_failure_percent": 50}}
+        checker = base.SLAChecker(config)
+        self.assertFalse(checker.abort_on_failure)
+
+        self.assertTrue(checker.add_iteration({"duration": 1, "error": []}))
+        self.assertFalse(checker.add_iteration({"duration": 3,
+                                                "error": []}))
+        self.assertFalse(checker.add_iteration({"duration": 1,
+                                                "error": ["error"]}))
+
+        results = dict((r["criterion"], r) for r in checker.results())
+        self.assertEqual(
+            {"criterion": "max_seconds_per_iteration", "success": False,
+             "detail": mock.ANY, "failed_at_iteration": 2},
+            results["max_seconds_per_iteration"])
+        self.assertEqual(
+            {"criterion": "max_failure_percent", "success": True,
+             "detail": mock.ANY, "failed_at_iteration": None},
+            results["max_failure_percent"])
+
+    def test_abort_on_failure(self):
+        checker = base.SLAChecker({"sla": {"abort_on_failure": True}})
+        self.assertTrue(checker.abort_on_failure)
+        self.assertTrue(checker.add_iteration({"duration": 1, "error": []}))
+        self.assertEqual([], checker.results())
+
+    def test_should_abort(self):
+        checker = base.SLAChecker({"sla": {"max_failure_percent": 10,
+                                           "abort_on_failure": True},
+                                   "runner": {"times": 100}})
+        self.assertFalse(checker.add_iteration({"error": ["error"]}))
+        self.assertFalse(checker.should_abort())
+        for i in range(98):
+            checker.add_iteration({"error": []})
+        self.assertTrue(checker.add_iteration({"error": []}))
+        self.assertTrue(checker.results()[0]["success"])
+
+        checker = base.SLAChecker({"sla": {"max_failure_percent": 10,
+                                           "abort_on_failure": True},
+                                   "runner": {"times": 20}})
+        for i in range(2):
+            checker.add_iteration({"error": ["error"]})
+        self.assertFalse(checker.should_abort())
+        checker.add_iteration({"error": ["error"]})
+        self.assertTrue(checker.should_abort())
+
+    def test_should_abort_unknown_times(self):
+        checker = base.SLAChecker({"sla": {"max_avg_duration": 1,
+                                           "abort_on_failure": True}})
+        checker.add_iteration({"duration": 5, "error": []})
+        self.assertFalse(checker.should_abort())
+        for i in range(9):
+            checker.add_iteration({"duration": 1, "error": []})
+        self.assertTrue(checker.should_abort())
+
+    def test_should_abort_max_criterion(self):
+        checker = base.SLAChecker({"sla": {"max_seconds_per_iteration": 1,
+                                           "abort_on_failure": True},
+                                   "runner": {"times": 100}})
+        checker.add_iteration({"duration": 5, "error": []})
+        self.assertTrue(checker.should_abort())
+
+        checker.abort_on_failure = False
+        self.assertFalse(checker.should_abort())
+
+    def test_check_all_skips_abort_on_failure(self):
+        config = {"sla": {"test_criterion": 42, "abort_on_failure": True}}
+        self.assertEqual(["test_criterion"],
+                         [r["criterion"]
+                          for r in base.SLA.check_all(config, [{}] * 42)])
+
+    def test_check_all_skips_warmup(self):
+        config = {"sla": {"test_criterion": 42}}
+        result = [{"warmup": True}] + [{}] * 42
+        self.assertTrue(base.SLA.check_all(config, result)[0]["success"])
+
+        config["sla"]["include_warmup"] = True
+        self.assertEqual(
+            [{"criterion": "test_criterion", "success": False,
+              "detail": "detail"}],
+            base.SLA.check_all(config, result))
+
+    def test_check_only_criterion(self):
+        checker = base.SLAChecker({"sla": {"test_criterion": 2}})
+        self.assertTrue(checker.add_iteration({"duration": 1, "error": []}))
+        self.assertTrue(checker.add_iteration({"duration": 1, "error": []}))
+        self.assertEqual(
+            [{"criterion": "test_criterion", "success": True,
+              "detail": "detail", "failed_at_iteration": None}],
+            checker.results())
+
+        checker.add_iteration({"duration": 1, "error": []})
+        self.assertFalse(checker.results()[0]["success"])
+
+    def test_skips_warmup(self):
+        checker = base.SLAChecker({"sla": {"max_failure_percent": 0}})
+        self.assertFalse(checker.include_warmup)
+        self.assertTrue(checker.add_iteration({"duration": 1, "warmup": True,
+                                               "error": ["error"]}))
+        self.assertTrue(checker.add_iteration({"duration": 1, "error": []}))
+        self.assertEqual(1, checker.iterations)
+        self.assertTrue(checker.results()[0]["success"])
+
+    def test_include_warmup(self):
+        checker = base.SLAChecker({"sla": {"max_failure_percent": 0,
+                                           "include_warmup": True}})
+        self.assertFalse(checker.add_iteration({"duration": 1,
+                                                "warmup": True,
+                                                "error": ["error"]}))
+        self.assertEqual(1, checker.failed_at["max_failure_percent"])
+
+
 class FailureRateTestCase(test.TestCase):
     def test_check(self):
         result = [
@@ -74,6 +201,16 @@ class FailureRateTestCase(test.TestCase):
         # 50% > 25%
         self.assertFalse(base.FailureRate.check(25, result).success)
 
+    def test_add_iteration(self):
+        criterion = base.FailureRate(50)
+        self.assertTrue(criterion.add_iteration({"error": []}))
+        self.assertTrue(criterion.add_iteration({"error": ["error"]}))
+        self.assertFalse(criterion.add_iteration({"error": ["error"]}))
+        self.assertTrue(criterion.add_iteration({"error": []}))
+
+    def test_check_without_iterations(self):
+        self.assertTrue(base.FailureRate.check(0, []).success)
+
 
 class IterationTimeTestCase(test.TestCase):
     def test_config_schema(self):
@@ -107,3 +244,7 @@ class MaxAverageDurationTestCase(test.TestCase):
         ]
         self.assertTrue(base.MaxAverageDuration.check(42, result).success)
         self.assertFalse(base.MaxAverageDuration.check(3.62, result).success)
+
+    def test_check_without_successful_iterations(self):
+        result = [{"duration": 10, "error": ["error"]}]
+        self.assertTrue(base.MaxAverageDuration.check(1, result).success)
@@ -17,10 +17,13 @@
 
 import collections
 import copy
+import threading
 
 import jsonschema
 import mock
+from oslo.config import cfg
 
+from rally.benchmark.context import base as base_ctx
 from rally.benchmark import engine
 from rally import consts
 from rally import exceptions
@@ -190,12 +193,14 @@ class BenchmarkEngineTestCase(test.TestCase):
                           eng._validate_config_semantic_helper, "a", "u", "n",
                           "p", mock.MagicMock(), {})
 
+    @mock.patch("rally.benchmark.engine.users_pool.UsersPool.get_user")
     @mock.patch("rally.benchmark.engine.osclients.Clients")
     @mock.patch("rally.benchmark.engine.users_ctx")
     @mock.patch("rally.benchmark.engine.BenchmarkEngine"
                 "._validate_config_semantic_helper")
     def test__validate_config_semantic(self, mock_helper, mock_userctx,
-                                       mock_osclients):
+                                       mock_osclients, mock_get_user):
+        mock_get_user.return_value = None
         mock_userctx.UserGenerator = fakes.FakeUserContext
         mock_osclients.return_value = mock.MagicMock()
         config = {
@@ -224,6 +229,30 @@ class BenchmarkEngineTestCase(test.TestCase):
         ]
         mock_helper.assert_has_calls(expected_calls, any_order=True)
 
+    @mock.patch("rally.benchmark.engine.users_pool.UsersPool.get_user")
+    @mock.patch("rally.benchmark.engine.osclients.Clients")
+    @mock.patch("rally.benchmark.engine.users_ctx")
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine"
+                "._validate_config_semantic_helper")
+    def test__validate_config_semantic_pooled_user(self, mock_helper,
+                                                   mock_userctx,
+                                                   mock_osclients,
+                                                   mock_get_user):
+        mock_get_user.return_value = "pooled_user"
+        config = {"a": [mock.MagicMock()]}
+        fake_task = mock.MagicMock()
+        eng = engine.BenchmarkEngine(config, fake_task)
+        eng.admin_endpoint = "admin"
+
+        eng._validate_config_semantic(config)
+
+        self.assertFalse(mock_userctx.UserGenerator.called)
+        mock_osclients.assert_has_calls([mock.call("admin"),
+                                         mock.call("pooled_user")])
+        admin = user = mock_osclients.return_value
+        mock_helper.assert_called_once_with(admin, user, "a", 0, fake_task,
+                                            config["a"][0])
+
     @mock.patch("rally.benchmark.engine.BenchmarkEngine.consume_results")
     @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.cleanup")
     @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.setup")
@@ -242,6 +271,41 @@ class BenchmarkEngineTestCase(test.TestCase):
             mock.call(consts.TaskStatus.FINISHED)
         ])
 
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine"
+                "._get_released_contexts")
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine._prepare_contexts")
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine._run_section")
+    def test_run__aborted(self, mock_run_section, mock_prepare,
+                          mock_released):
+        task = mock.MagicMock()
+        task.get_status.side_effect = [consts.TaskStatus.RUNNING,
+                                       consts.TaskStatus.RUNNING,
+                                       consts.TaskStatus.ABORTING]
+        config = collections.OrderedDict([("a.benchmark", [{}]),
+                                          ("b.benchmark", [{}])])
+        eng = engine.BenchmarkEngine(config, task)
+        eng.run()
+
+        mock_run_section.assert_called_once_with(
+            [{"name": "a.benchmark", "pos": 0, "kw": {}}],
+            mock_released.return_value)
+        self.assertEqual([mock.call(consts.TaskStatus.RUNNING),
+                          mock.call(consts.TaskStatus.ABORTED)],
+                         task.update_status.mock_calls)
+
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine._prepare_contexts")
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine._run_section")
+    def test_run__aborted_before_start(self, mock_run_section, mock_prepare):
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.ABORTING
+        eng = engine.BenchmarkEngine({"a.benchmark": [{}]}, task)
+        eng.run()
+
+        self.assertFalse(mock_prepare.called)
+        self.assertFalse(mock_run_section.called)
+        task.update_status.assert_called_once_with(
+            consts.TaskStatus.ABORTED)
+
     @mock.patch("rally.benchmark.engine.BenchmarkEngine.consume_results")
     @mock.patch("rally.benchmark.engine.base_scenario.Scenario")
     @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
@@ -296,6 +360,178 @@ class BenchmarkEngineTestCase(test.TestCase):
         eng = engine.BenchmarkEngine(config, task).bind({})
         eng.run()
 
+    def test__get_sections(self):
+        config = collections.OrderedDict([
+            ("a.benchmark", [{"parallel_section": "s"}, {}]),
+            ("b.benchmark", [{"parallel_section": "t"}]),
+            ("c.benchmark", [{"parallel_section": "s"}])
+        ])
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+
+        sections = eng._get_sections()
+
+        self.assertEqual([[("a.benchmark", 0), ("c.benchmark", 0)],
+                          [("a.benchmark", 1)],
+                          [("b.benchmark", 0)]],
+                         [[(k["name"], k["pos"]) for k in keys]
+                          for keys in sections])
+        self.assertEqual(config["c.benchmark"][0], sections[0][1]["kw"])
+
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine._run_benchmark")
+    def test__run_section_runs_benchmarks_concurrently(self, mock_run):
+        started = []
+        all_started = threading.Event()
+        running_together = []
+
+        def run_benchmark(key, finish):
+            started.append(key["name"])
+            if len(started) == 2:
+                all_started.set()
+            all_started.wait(5)
+            running_together.append(all_started.is_set())
+        mock_run.side_effect = run_benchmark
+        keys = [{"name": "a", "pos": 0, "kw": {"parallel_section": "s"}},
+                {"name": "b", "pos": 0, "kw": {"parallel_section": "s"}}]
+        eng = engine.BenchmarkEngine({}, mock.MagicMock())
+
+        eng._run_section(keys)
+
+        mock_run.assert_has_calls([mock.call(keys[0], mock.ANY),
+                                   mock.call(keys[1], mock.ANY)],
+                                  any_order=True)
+        self.assertEqual([True, True], running_together)
+
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine._run_benchmark")
+    def test__run_section_reraises_error(self, mock_run):
+        keys = [{"name": "a", "pos": 0, "kw": {"parallel_section": "s"}},
+                {"name": "b", "pos": 0, "kw": {"parallel_section": "s"}}]
+
+        def run_benchmark(key, finish):
+            if key["name"] == "b":
+                raise exceptions.RallyException()
+        mock_run.side_effect = run_benchmark
+        eng = engine.BenchmarkEngine({}, mock.MagicMock())
+
+        self.assertRaises(exceptions.RallyException, eng._run_section, keys)
+        self.assertEqual(2, mock_run.call_count)
+
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine.consume_results")
+    @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.cleanup")
+    @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.setup")
+    @mock.patch("rally.benchmark.engine.base_scenario.Scenario")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test__run_benchmark(self, mock_runner, mock_scenario, mock_setup,
+                            mock_cleanup, mock_consume):
+        mock_scenario.meta.return_value = {}
+        runner = mock_runner.get_runner.return_value
+        runner.run.return_value = 10
+        runner.ledger_incomplete = False
+        key = {"name": "a.benchmark", "pos": 1,
+               "kw": {"args": {"a": 1}, "parallel_section": "s"}}
+        eng = engine.BenchmarkEngine({}, mock.MagicMock())
+        eng.admin_endpoint = "admin"
+        eng._prepare_contexts([[key]])
+
+        eng._run_benchmark(key)
+
+        self.assertEqual({("a.benchmark", 1): 10}, eng.durations)
+        self.assertEqual({"setup": 0.0, "cleanup": 0.0, "reused": False},
+                         eng.context_durations[("a.benchmark", 1)])
+        runner.run.assert_called_once_with("a.benchmark", mock.ANY, {"a": 1})
+        mock_consume.assert_called_once_with(key, eng.task, runner,
+                                             mock.ANY)
+
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine.consume_results")
+    @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.cleanup")
+    @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.setup")
+    @mock.patch("rally.benchmark.engine.base_scenario.Scenario")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test__run_benchmark_ledger_incomplete(self, mock_runner,
+                                              mock_scenario, mock_setup,
+                                              mock_cleanup, mock_consume):
+        mock_scenario.meta.return_value = {}
+        runner = mock_runner.get_runner.return_value
+        runner.ledger_incomplete = True
+        key = {"name": "a.benchmark", "pos": 0, "kw": {}}
+        eng = engine.BenchmarkEngine({}, mock.MagicMock())
+        eng.admin_endpoint = "admin"
+        eng._prepare_contexts([[key]])
+
+        eng._run_benchmark(key)
+
+        context_obj = runner.run.call_args[0][1]
+        self.assertTrue(context_obj["resource_ledger_incomplete"])
+        shared_context = list(eng._shared_contexts.values())[0].context_obj
+        self.assertTrue(shared_context["resource_ledger_incomplete"])
+
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine.consume_results")
+    @mock.patch("rally.benchmark.engine.base_scenario.Scenario.meta")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def _run_with_contexts(self, config, mock_runner, mock_meta,
+                           mock_consume):
+        mock_meta.return_value = {}
+        events = []
+
+        def record(event, duration):
+            def method(manager):
+                setattr(manager, "%s_duration" % event, duration)
+                users = manager.context_obj["config"].get("users")
+                if users is not None:
+                    events.append((event, users.get("tenants")))
+            return method
+
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+        eng.admin_endpoint = "admin"
+        with mock.patch.object(base_ctx.ContextManager, "setup",
+                               autospec=True,
+                               side_effect=record("setup", 1.0)):
+            with mock.patch.object(base_ctx.ContextManager, "cleanup",
+                                   autospec=True,
+                                   side_effect=record("cleanup", 2.0)):
+                eng.run()
+        return eng, events
+
+    def test_run_reuses_shared_contexts(self):
+        config = collections.OrderedDict([
+            ("a.benchmark", [{"context": {"users": {"tenants": 2}}},
+                             {"context": {"users": {"tenants": 2}}}]),
+            ("b.benchmark", [{"context": {"users": {"tenants": 3}}}]),
+            ("c.benchmark", [{"context": {"users": {"tenants": 2}}}])
+        ])
+
+        eng, events = self._run_with_contexts(config)
+
+        self.assertEqual([("setup", 2), ("cleanup", 2), ("setup", 3),
+                          ("cleanup", 3), ("setup", 2), ("cleanup", 2)],
+                         events)
+        self.assertEqual({"setup": 2.0, "cleanup": 2.0, "reused": False},
+                         eng.context_durations[("a.benchmark", 0)])
+        self.assertEqual({"setup": 1.0, "cleanup": 4.0, "reused": True},
+                         eng.context_durations[("a.benchmark", 1)])
+
+    def test_run_with_task_shared_context(self):
+        config = collections.OrderedDict([
+            ("shared_context", {"users": {"tenants": 2}}),
+            ("a.benchmark", [{}, {}]),
+            ("b.benchmark", [{"context": {"users": {"tenants": 3}}}]),
+            ("c.benchmark", [{}])
+        ])
+
+        eng, events = self._run_with_contexts(config)
+
+        self.assertEqual([("setup", 2), ("setup", 3), ("cleanup", 3),
+                          ("cleanup", 2)], events)
+        self.assertTrue(eng.context_durations[("c.benchmark", 0)]["reused"])
+
+    def test__validate_shared_context(self):
+        eng = engine.BenchmarkEngine({}, mock.MagicMock())
+        eng._validate_shared_context({"users": {"tenants": 2}})
+        self.assertRaises(exceptions.NotSharedContexts,
+                          eng._validate_shared_context,
+                          {"users": {}, "quotas": {}})
+        self.assertRaises(jsonschema.ValidationError,
+                          eng._validate_shared_context, [])
+
     @mock.patch("rally.benchmark.engine.osclients")
     @mock.patch("rally.benchmark.engine.endpoint.Endpoint")
     def test_bind(self, mock_endpoint, mock_osclients):
@@ -344,16 +580,125 @@ class BenchmarkEngineTestCase(test.TestCase):
         self.assertEqual(result, expected_result)
         mock_meta.assert_called_once_with(name, "context")
 
-    @mock.patch("rally.benchmark.sla.base.SLA.check_all")
-    def test_consume_results(self, mock_check_all):
+    @mock.patch("rally.benchmark.engine.base_sla.SLAChecker")
+    def test_consume_results(self, mock_sla_checker):
         key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
         task = mock.MagicMock()
+        runner = mock.MagicMock()
+        runner.result_queue = collections.deque([{"duration": 1},
+                                                 {"duration": 2}])
         config = {
             "a.benchmark": [{"context": {"context_a": {"a": 1}}}],
         }
         is_done = mock.MagicMock()
         is_done.isSet.side_effect = [False, False, True]
+        checker = mock_sla_checker.return_value
+        checker.add_iteration.return_value = True
+        checker.should_abort.return_value = False
         eng = engine.BenchmarkEngine(config, task)
-        eng.duration = 1
-        eng.consume_results(key, task, collections.deque([1, 2]), is_done)
-        mock_check_all.assert_called_once_with({"fake": 2}, [1, 2])
+        eng.durations = {("fake", 0): 1}
+        eng.consume_results(key, task, runner, is_done)
+
+        result_id = task.create_chunked_results.return_value
+        task.create_chunked_results.assert_called_once_with(key)
+        task.append_results_chunk.assert_called_once_with(
+            result_id, 0, [{"duration": 1}, {"duration": 2}])
+        mock_sla_checker.assert_called_once_with({"fake": 2})
+        self.assertEqual([mock.call({"duration": 1}),
+                          mock.call({"duration": 2})],
+                         checker.add_iteration.mock_calls)
+        self.assertFalse(runner.abort.called)
+        task.finish_chunked_results.assert_called_once_with(
+            result_id, {"scenario_duration": 1,
+                        "sla": checker.results.return_value})
+
+    def test_consume_results_aborts_on_sla_failure(self):
+        key = {"kw": {"sla": {"max_failure_percent": 0,
+                              "abort_on_failure": True}},
+               "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        runner = mock.MagicMock()
+        runner.result_queue = collections.deque(
+            [{"error": []}, {"error": ["error"]}, {"error": []}])
+        is_done = mock.MagicMock()
+        is_done.isSet.return_value = True
+        eng = engine.BenchmarkEngine({}, task)
+        eng.consume_results(key, task, runner, is_done)
+
+        runner.abort.assert_called_once_with()
+        value = task.finish_chunked_results.call_args[0][1]
+        self.assertEqual(
+            [{"criterion": "max_failure_percent", "success": False,
+              "detail": mock.ANY, "failed_at_iteration": 2}],
+            value["sla"])
+
+    def test_consume_results_aborts_on_sla_failure_for_good(self):
+        key = {"kw": {"sla": {"max_failure_percent": 10,
+                              "abort_on_failure": True},
+                      "runner": {"times": 10}},
+               "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        runner = mock.MagicMock()
+        runner.result_queue = collections.deque(
+            [{"error": ["error"]}] + [{"error": []}] * 5 +
+            [{"error": ["error"]}] + [{"error": []}] * 3)
+        left = []
+        runner.abort.side_effect = lambda: left.append(
+            len(runner.result_queue))
+        is_done = mock.MagicMock()
+        is_done.isSet.return_value = True
+        eng = engine.BenchmarkEngine({}, task)
+        eng.consume_results(key, task, runner, is_done)
+
+        # NOTE: The first error may be recovered by the next successful
+        #       iterations, the second one can't be.
+        self.assertEqual([3], left)
+
+    def test_consume_results_without_abort_on_failure(self):
+        key = {"kw": {"sla": {"max_failure_percent": 0}},
+               "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        runner = mock.MagicMock()
+        runner.result_queue = collections.deque([{"error": ["error"]}])
+        is_done = mock.MagicMock()
+        is_done.isSet.return_value = True
+        eng = engine.BenchmarkEngine({}, task)
+        eng.consume_results(key, task, runner, is_done)
+
+        self.assertFalse(runner.abort.called)
+
+    @mock.patch("rally.benchmark.engine.rutils.monotonic")
+    def test_consume_results_aborts_with_task(self, mock_monotonic):
+        mock_monotonic.side_effect = [0, 2, 2]
+        key = {"kw": {}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.ABORTING
+        runner = mock.MagicMock()
+        runner.result_queue = collections.deque()
+        is_done = mock.MagicMock()
+        is_done.isSet.side_effect = [False, True]
+        eng = engine.BenchmarkEngine({}, task)
+        eng.consume_results(key, task, runner, is_done)
+
+        runner.abort.assert_called_once_with()
+
+    def test_consume_results_in_chunks(self):
+        cfg.CONF.set_override("result_chunk_size", 2, "benchmark")
+        self.addCleanup(cfg.CONF.clear_override, "result_chunk_size",
+                        "benchmark")
+        key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        runner = mock.MagicMock()
+        results = [{"duration": i, "error": []} for i in range(5)]
+        runner.result_queue = collections.deque(results)
+        is_done = mock.MagicMock()
+        is_done.isSet.return_value = True
+        eng = engine.BenchmarkEngine({}, task)
+        eng.durations = {("fake", 0): 1}
+        eng.consume_results(key, task, runner, is_done)
+
+        result_id = task.create_chunked_results.return_value
+        self.assertEqual([mock.call(result_id, 0, results[0:2]),
+                          mock.call(result_id, 1, results[2:4]),
+                          mock.call(result_id, 2, results[4:])],
+                         task.append_results_chunk.mock_calls)
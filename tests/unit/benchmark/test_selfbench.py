@@ -0,0 +1,97 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark import selfbench
+from rally import consts
+from tests.unit import test
+
+
+class SelfBenchTestCase(test.TestCase):
+
+    def test_runner_configs_are_valid(self):
+        for runner_type, get_config in selfbench.RUNNER_CONFIGS.items():
+            config = get_config(10, 2, 1)
+            config["type"] = runner_type
+            base.ScenarioRunner.validate(config)
+
+    def test_run(self):
+        row = selfbench.run(consts.RunnerType.CONSTANT_ASYNC, 2, times=3)
+
+        self.assertEqual(set(selfbench.COLUMNS), set(row))
+        self.assertEqual(6, row["iterations"])
+        self.assertEqual(2, row["concurrency"])
+        self.assertTrue(row["iterations/sec"] > 0)
+        self.assertTrue(row["consumer (results/sec)"] > 0)
+
+    def test_run_with_sleep(self):
+        row = selfbench.run(consts.RunnerType.SERIAL, 1, times=2,
+                            sleep=0.05)
+
+        self.assertEqual(2, row["iterations"])
+        self.assertTrue(row["iterations/sec"] < 20)
+
+    @mock.patch("rally.benchmark.selfbench.run")
+    def test_run_all(self, mock_run):
+        rows = selfbench.run_all([consts.RunnerType.SERIAL,
+                                  consts.RunnerType.CONSTANT], [1, 10],
+                                 times=3, duration=2, sleep=0.5)
+
+        self.assertEqual([mock.call(consts.RunnerType.SERIAL, 1, 3, 2, 0.5),
+                          mock.call(consts.RunnerType.CONSTANT, 1, 3, 2, 0.5),
+                          mock.call(consts.RunnerType.CONSTANT, 10, 3, 2,
+                                    0.5)],
+                         mock_run.mock_calls)
+        self.assertEqual([mock_run.return_value] * 3, rows)
+
+    def test_compare(self):
+        baseline = [{"runner": "constant", "concurrency": 10,
+                     "iterations/sec": 100.0, "overhead (ms/iter)": 2.0,
+                     "consumer (results/sec)": 1000.0,
+                     "peak rss (MB)": 100.0}]
+        rows = [{"runner": "constant", "concurrency": 10,
+                 "iterations/sec": 70.0, "overhead (ms/iter)": 2.2,
+                 "consumer (results/sec)": 2000.0,
+                 "peak rss (MB)": 130.0},
+                {"runner": "constant", "concurrency": 50,
+                 "iterations/sec": 1.0}]
+
+        regressions = selfbench.compare(rows, baseline)
+
+        self.assertEqual(2, len(regressions))
+        self.assertIn("iterations/sec 100.00 -> 70.00", regressions[0])
+        self.assertIn("peak rss (MB) 100.00 -> 130.00", regressions[1])
+        self.assertEqual([], selfbench.compare(rows, baseline, 50))
+
+    def test_compare_startup(self):
+        baseline = [{"command": "rally version", "first output (ms)": 100.0,
+                     "exit (ms)": 100.0}]
+        rows = [{"command": "rally version", "first output (ms)": 150.0,
+                 "exit (ms)": 150.0}]
+
+        self.assertEqual(["rally version: first output (ms) 100.00 -> 150.00"],
+                         selfbench.compare(rows, baseline))
+
+    def test_run_startup(self):
+        rows = selfbench.run_startup([("print", ["-c", "print(1)"])],
+                                     repeat=2)
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(set(selfbench.STARTUP_COLUMNS), set(rows[0]))
+        self.assertEqual("print", rows[0]["command"])
+        self.assertTrue(
+            0 < rows[0]["first output (ms)"] <= rows[0]["exit (ms)"])
@@ -0,0 +1,141 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import itertools
+
+import mock
+
+from rally.benchmark import users_pool
+from rally.benchmark import utils
+from rally import consts
+from rally import db
+from rally import exceptions
+from tests.unit import test
+
+
+run_concurrent = (lambda dummy, cls, f, args: list(
+    itertools.imap(getattr(cls, f), args)))
+
+
+@mock.patch.object(utils, "run_concurrent", run_concurrent)
+class UsersPoolTestCase(test.DBTestCase):
+
+    def setUp(self):
+        super(UsersPoolTestCase, self).setUp()
+        self.deploy_uuid = db.deployment_create({})["uuid"]
+        self.pool = users_pool.UsersPool(self.deploy_uuid, "admin")
+
+        osclients_patcher = mock.patch(
+            "rally.benchmark.users_pool.osclients")
+        osclients_patcher.start()
+        self.addCleanup(osclients_patcher.stop)
+        keystone_patcher = mock.patch("rally.benchmark.users_pool.keystone")
+        self.keystone = keystone_patcher.start().wrap.return_value
+        self.addCleanup(keystone_patcher.stop)
+
+        self.keystone.auth_url = "http://localhost:5000/v2.0"
+        self.keystone.region_name = None
+        self.tenant_ids = iter(["t%d" % i for i in range(100)])
+        self.user_ids = iter(["u%d" % i for i in range(100)])
+
+        def create_project(name, domain):
+            tenant = mock.Mock(id=next(self.tenant_ids))
+            tenant.name = name
+            return tenant
+
+        def create_user(name, password, email, tenant_id, domain):
+            user = mock.Mock(id=next(self.user_ids))
+            user.name = name
+            return user
+
+        self.keystone.create_project.side_effect = create_project
+        self.keystone.create_user.side_effect = create_user
+
+    def _create_task(self, status=consts.TaskStatus.RUNNING):
+        return db.task_create({"status": status,
+                               "deployment_uuid": self.deploy_uuid})["uuid"]
+
+    def test_create(self):
+        self.pool.create(2, 3)
+
+        users = db.users_pool_get(self.deploy_uuid)
+        self.assertEqual(["t0"] * 3 + ["t1"] * 3,
+                         [user.tenant_id for user in users])
+        self.assertEqual(["u%d" % i for i in range(6)],
+                         [user.user_id for user in users])
+        passwords = set(user.endpoint.password for user in users)
+        self.assertEqual(6, len(passwords))
+        self.assertNotIn("password", passwords)
+
+    def test_check(self):
+        self.pool.create(2, 2)
+        self.keystone.list_users.return_value = [
+            mock.Mock(id="u0"), mock.Mock(id="u1"), mock.Mock(id="u2")]
+        self.keystone.list_projects.return_value = [mock.Mock(id="t0")]
+
+        self.assertEqual(2, self.pool.check())
+        self.assertEqual(["u0", "u1"],
+                         [user.user_id for user in
+                          db.users_pool_get(self.deploy_uuid)])
+
+    def test_check_empty_pool(self):
+        self.assertEqual(0, self.pool.check())
+        self.assertFalse(self.keystone.list_users.called)
+
+    @mock.patch("rally.benchmark.users_pool.UsersPool.check")
+    def test_lease_and_release(self, mock_check):
+        self.pool.create(1, 2)
+        task = self._create_task()
+
+        tenants, users = self.pool.lease(task, 2, 1)
+
+        mock_check.assert_called_once_with()
+        self.assertEqual(["t0", "t1"], [t["id"] for t in tenants])
+        self.assertEqual([("u0", "t0"), ("u2", "t1")],
+                         [(u["id"], u["tenant_id"]) for u in users])
+        self.assertEqual(3, self.keystone.create_user.call_count)
+        self.assertEqual([task] * 3, [user.task_uuid for user in
+                                      db.users_pool_get(self.deploy_uuid)])
+
+        self.pool.release(task)
+        self.assertEqual([None] * 3, [user.task_uuid for user in
+                                      db.users_pool_get(self.deploy_uuid)])
+
+    @mock.patch("rally.benchmark.users_pool.db.users_pool_lease")
+    @mock.patch("rally.benchmark.users_pool.UsersPool.check")
+    def test_lease_exhausted(self, mock_check, mock_lease):
+        mock_lease.return_value = []
+
+        self.assertRaises(exceptions.UsersPoolExhausted,
+                          self.pool.lease, "task", 1, 1)
+
+    def test_get_user(self):
+        self.assertIsNone(self.pool.get_user())
+        self.pool.create(1, 1)
+        self.assertEqual("http://localhost:5000/v2.0",
+                         self.pool.get_user().auth_url)
+
+    @mock.patch("rally.benchmark.users_pool.UsersPool.check")
+    def test_delete(self, mock_check):
+        self.pool.create(2, 1)
+        task = self._create_task()
+        self.pool.lease(task, 1, 1)
+
+        self.assertEqual(1, self.pool.delete())
+
+        self.keystone.delete_user.assert_called_once_with("u1")
+        self.keystone.delete_project.assert_called_once_with("t1")
+        self.assertEqual(["u0"], [user.user_id for user in
+                                  db.users_pool_get(self.deploy_uuid)])
@@ -14,11 +14,16 @@
 #    under the License.
 
 import datetime
+import threading
+import time
 
 import mock
+from oslo.config import cfg
 
+from rally.benchmark.runners import base as runner_base
 from rally.benchmark import utils
 from rally import exceptions
+from rally import httppool
 from tests.unit import fakes
 from tests.unit import test
 
@@ -41,7 +46,7 @@ class BenchmarkUtilsTestCase(test.TestCase):
         utils.wait_for_delete(resource, update_resource=update_resource)
 
     @mock.patch("time.sleep")
-    @mock.patch("time.time")
+    @mock.patch("rally.benchmark.utils.rutils.monotonic")
     def test_wait_for_delete_fails(self, mock_time, mock_sleep):
         def update_resource(self):
             pass
@@ -58,6 +63,19 @@ class BenchmarkUtilsTestCase(test.TestCase):
         self.assertTrue(is_active(fakes.FakeResource(status="aCtIvE")))
         self.assertFalse(is_active(fakes.FakeResource(status="ERROR")))
 
+    def test_format_exc(self):
+        try:
+            raise exceptions.TimeoutException()
+        except exceptions.TimeoutException as e:
+            error = utils.format_exc(e)
+        self.assertIn("TimeoutException", error[0])
+        self.assertIn("Traceback", error[2])
+
+    def test_format_exc_not_raised(self):
+        error = utils.format_exc(exceptions.TimeoutException())
+        self.assertIn("TimeoutException", error[0])
+        self.assertEqual("", error[2])
+
     def test_infinite_run_args_generator(self):
         args = lambda x: (x, "a", "b", 123)
         for i, real_args in enumerate(utils.infinite_run_args_generator(args)):
@@ -214,3 +232,325 @@ class WaitForTestCase(test.TestCase):
                           self.resource, self.fake_checker_false,
                           self.fake_updater, self.load_secs,
                           self.load_secs / 3)
+
+
+class StatusPollerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(StatusPollerTestCase, self).setUp()
+        self.poller = utils.StatusPoller()
+        self.poller.start()
+        self.manager = fakes.FakeManager()
+        self.manager.get = mock.MagicMock(side_effect=self._get)
+        self.manager.list = mock.MagicMock(side_effect=self.manager.list)
+
+    def _get(self, resource_id):
+        if resource_id not in self.manager.cache:
+            error = Exception()
+            error.code = 404
+            raise error
+        return self.manager.cache[resource_id]
+
+    def _enable_batch_status_polling(self):
+        cfg.CONF.set_override("batch_status_polling", True, "benchmark")
+        self.addCleanup(cfg.CONF.clear_override, "batch_status_polling",
+                        "benchmark")
+
+    def _resource(self, status="BUILD"):
+        return self.manager._cache(fakes.FakeResource(manager=self.manager,
+                                                      status=status))
+
+    def _wait_in_thread(self, resource, is_ready, results):
+        def wait():
+            try:
+                results[resource.id] = self.poller.wait(
+                    resource, is_ready, utils.get_from_manager(),
+                    timeout=5, check_interval=0.01)
+            except Exception as e:
+                results[resource.id] = e
+        thread = threading.Thread(target=wait)
+        thread.start()
+        return thread
+
+    def test_wait_refreshes_statuses_with_list(self):
+        resources = [self._resource() for i in range(5)]
+        results = {}
+        threads = [self._wait_in_thread(r, utils.resource_is("ACTIVE"),
+                                        results) for r in resources]
+        while self.manager.list.call_count < 3:
+            time.sleep(0.01)
+        for resource in resources:
+            resource.status = "ACTIVE"
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(dict((r.id, r) for r in resources), results)
+        # NOTE: Each resource is got separately only for its first check.
+        self.assertEqual(5, self.manager.get.call_count)
+
+    @mock.patch("rally.benchmark.utils.httppool")
+    def test_refresh_shares_api_calls(self, mock_httppool):
+        mock_httppool.stop_api_calls_record.side_effect = ["list", "get1",
+                                                           "get2"]
+        resources = [self._resource(), self._resource("ACTIVE")]
+        waiters = [utils._Waiter(r, utils.resource_is("ACTIVE"),
+                                 utils.get_from_manager(),
+                                 utils.FixedPolling(1)) for r in resources]
+
+        utils.StatusPoller()._refresh(self.manager, waiters)
+
+        self.assertEqual([("get1", 1.0), ("list", 0.5)], waiters[0].api_calls)
+        self.assertEqual([("get2", 1.0), ("list", 0.5)], waiters[1].api_calls)
+        self.assertFalse(waiters[0].done.is_set())
+        self.assertTrue(waiters[1].done.is_set())
+
+    def test_wait_api_calls_match_result_schema(self):
+        call = {"count": 1, "duration": 0.1, "bytes": 10,
+                "status": {"200": 1}}
+
+        def list_resources():
+            httppool.add_api_calls(
+                {httppool.NO_ACTION: {"compute GET /servers": call}})
+            return self.manager.cache.values()
+
+        self.manager.list.side_effect = list_resources
+        resources = [self._resource() for i in range(3)]
+        api_calls = {}
+
+        def wait(resource):
+            httppool.start_api_calls_record()
+            try:
+                self.poller.wait(resource, utils.resource_is("ACTIVE"),
+                                 utils.get_from_manager(), timeout=5,
+                                 check_interval=0.01)
+            finally:
+                api_calls[resource.id] = httppool.stop_api_calls_record()
+
+        threads = [threading.Thread(target=wait, args=(r,))
+                   for r in resources]
+        for thread in threads:
+            thread.start()
+        while self.manager.list.call_count < 3:
+            time.sleep(0.01)
+        for resource in resources:
+            resource.status = "ACTIVE"
+        for thread in threads:
+            thread.join()
+
+        for resource in resources:
+            calls = api_calls[resource.id][httppool.NO_ACTION]
+            self.assertIn("compute GET /servers", calls)
+            runner_base.ScenarioRunnerResult(
+                {"duration": 1, "idle_duration": 0, "error": [],
+                 "scenario_output": {"errors": "", "data": {}},
+                 "atomic_actions": {}, "api_calls": api_calls[resource.id]})
+
+    @mock.patch("rally.benchmark.utils.httppool.add_api_calls")
+    def test_wait_adds_api_calls(self, mock_add_api_calls):
+        resource = self._resource()
+        results = {}
+        thread = self._wait_in_thread(resource, utils.resource_is("ACTIVE"),
+                                      results)
+        while not self.manager.list.called:
+            time.sleep(0.01)
+        resource.status = "ACTIVE"
+        thread.join()
+
+        self.assertTrue(mock_add_api_calls.called)
+        self.assertEqual(1.0, mock_add_api_calls.call_args_list[-1][0][1])
+
+    def test_wait_ready_at_first_check(self):
+        resource = self._resource("ACTIVE")
+        utils.start_polls_count("boot")
+        self.assertEqual(resource, self.poller.wait(
+            resource, utils.resource_is("ACTIVE"), utils.get_from_manager()))
+        self.assertFalse(self.manager.list.called)
+        self.assertEqual(1, utils.stop_polls_count())
+
+    def test_wait_error_status(self):
+        resource = self._resource()
+        results = {}
+        thread = self._wait_in_thread(resource, utils.resource_is("ACTIVE"),
+                                      results)
+        resource.status = "ERROR"
+        thread.join()
+
+        self.assertIsInstance(results[resource.id],
+                              exceptions.GetResourceErrorStatus)
+
+    def test_wait_for_deletion(self):
+        resource = self._resource()
+        results = {}
+        thread = self._wait_in_thread(resource, None, results)
+        while not self.manager.list.called:
+            time.sleep(0.01)
+        self.manager.delete(resource.id)
+        thread.join()
+
+        self.assertIsNone(results[resource.id])
+
+    def test_wait_not_found(self):
+        resource = self._resource()
+        results = {}
+        thread = self._wait_in_thread(resource, utils.resource_is("ACTIVE"),
+                                      results)
+        self.manager.delete(resource.id)
+        thread.join()
+
+        self.assertIsInstance(results[resource.id],
+                              exceptions.GetResourceNotFound)
+
+    def test_wait_list_failed(self):
+        self.manager.list.side_effect = Exception
+        resource = self._resource()
+        results = {}
+        thread = self._wait_in_thread(resource, utils.resource_is("ACTIVE"),
+                                      results)
+        while self.manager.get.call_count < 3:
+            time.sleep(0.01)
+        resource.status = "ACTIVE"
+        thread.join()
+
+        self.assertEqual(resource, results[resource.id])
+
+    def test_wait_timeout(self):
+        resource = self._resource()
+        self.assertRaises(exceptions.TimeoutException, self.poller.wait,
+                          resource, utils.resource_is("ACTIVE"),
+                          utils.get_from_manager(), timeout=0.05,
+                          check_interval=0.01)
+        self.assertEqual([], self.poller._waiters)
+
+    @mock.patch("rally.benchmark.utils.get_polling_strategy")
+    @mock.patch("rally.benchmark.utils.get_status_poller")
+    def test_wait_for_uses_poller(self, mock_get_status_poller,
+                                  mock_get_polling_strategy):
+        self._enable_batch_status_polling()
+        update_resource = utils.get_from_manager()
+        strategy = mock_get_polling_strategy.return_value
+
+        resource = utils.wait_for("resource", "is_ready", update_resource,
+                                  timeout=10, check_interval=2)
+        utils.wait_for_delete("resource", update_resource, timeout=10,
+                              check_interval=2, polling="adaptive")
+
+        poller = mock_get_status_poller.return_value
+        self.assertEqual(poller.wait.return_value, resource)
+        self.assertEqual(
+            [mock.call("resource", "is_ready", update_resource, 10, 2,
+                       strategy),
+             mock.call("resource", None, update_resource, 10, 2, strategy)],
+            poller.wait.call_args_list)
+        self.assertEqual([mock.call(2, None), mock.call(2, "adaptive")],
+                         mock_get_polling_strategy.call_args_list)
+
+    @mock.patch("rally.benchmark.utils.get_status_poller")
+    def test_wait_for_without_poller(self, mock_get_status_poller):
+        resource = self._resource("ACTIVE")
+        utils.wait_for(resource, utils.resource_is("ACTIVE"),
+                       utils.get_from_manager())
+        self._enable_batch_status_polling()
+        utils.wait_for(resource, lambda r: True, lambda r: r)
+
+        self.assertFalse(mock_get_status_poller.called)
+
+    @mock.patch("rally.benchmark.utils.os.getpid")
+    def test_get_status_poller(self, mock_getpid):
+        mock_getpid.return_value = -1
+        poller = utils.get_status_poller()
+        self.assertIs(poller, utils.get_status_poller())
+        self.assertTrue(poller.is_alive())
+
+        mock_getpid.return_value = -2
+        self.assertIsNot(poller, utils.get_status_poller())
+
+
+class PollingStrategyTestCase(test.TestCase):
+
+    def setUp(self):
+        super(PollingStrategyTestCase, self).setUp()
+        self.addCleanup(utils._wait_estimates.clear)
+
+    def test_fixed(self):
+        strategy = utils.FixedPolling(2)
+        self.assertEqual([2, 2], [strategy.next_interval(e, p)
+                                  for e, p in [(0, 1), (100, 50)]])
+
+    def test_exponential(self):
+        strategy = utils.ExponentialPolling(2)
+        self.assertEqual([0.25, 0.5, 1.0, 16.0, 30.0, 30.0],
+                         [strategy.next_interval(0, p)
+                          for p in [1, 2, 3, 7, 8, 10000]])
+
+    def test_adaptive(self):
+        strategy = utils.AdaptivePolling(2, "boot")
+        self.assertEqual(2, strategy.next_interval(0, 1))
+        strategy.finished(10)
+
+        strategy = utils.AdaptivePolling(2, "boot")
+        self.assertEqual([5, 1, 0.25, 0.25, 1, 2],
+                         [strategy.next_interval(e, 1)
+                          for e in [0, 8, 9.9, 10, 12, 20]])
+        strategy.finished(20)
+        self.assertEqual(13, utils.AdaptivePolling(2, "boot").estimate)
+        self.assertIsNone(utils.AdaptivePolling(2, "delete").estimate)
+
+    def test_adaptive_without_action(self):
+        strategy = utils.AdaptivePolling(2)
+        strategy.finished(10)
+        self.assertEqual({}, utils._wait_estimates)
+
+    def test_get_polling_strategy(self):
+        strategy = utils.get_polling_strategy(2)
+        self.assertIsInstance(strategy, utils.FixedPolling)
+
+        utils.start_polls_count("boot")
+        self.addCleanup(utils.stop_polls_count)
+        strategy = utils.get_polling_strategy(2, "adaptive")
+        self.assertIsInstance(strategy, utils.AdaptivePolling)
+        self.assertEqual((2, "boot"),
+                         (strategy.check_interval, strategy.action))
+
+    def test_polling_strategy_is_abstract(self):
+        class NoInterval(utils.PollingStrategy):
+            pass
+
+        self.assertRaises(TypeError, NoInterval, 1)
+
+    def test_get_polling_strategy_not_found(self):
+        self.assertRaises(exceptions.NoSuchPollingStrategy,
+                          utils.get_polling_strategy, 2, "random")
+
+    def test_polls_count(self):
+        utils.start_polls_count("boot_all")
+        utils._count_polls(2)
+        utils.start_polls_count("boot")
+        utils._count_polls(3)
+        self.assertEqual(3, utils.stop_polls_count())
+        self.assertEqual(5, utils.stop_polls_count())
+        utils._count_polls(1)
+
+    @mock.patch("time.sleep")
+    @mock.patch("rally.benchmark.utils.rutils.monotonic")
+    def test_wait_for_uses_strategy(self, mock_time, mock_sleep):
+        mock_time.side_effect = [0, 1, 3]
+        is_ready = mock.MagicMock(side_effect=[False, False, True])
+        utils.start_polls_count("boot")
+
+        utils.wait_for("resource", is_ready, timeout=10, check_interval=2,
+                       polling="exponential")
+
+        self.assertEqual(3, utils.stop_polls_count())
+        self.assertEqual([mock.call(0.25), mock.call(0.5)],
+                         mock_sleep.call_args_list)
+
+    @mock.patch("time.sleep")
+    @mock.patch("rally.benchmark.utils.rutils.monotonic")
+    def test_wait_for_delete_counts_polls_on_timeout(self, mock_time,
+                                                     mock_sleep):
+        mock_time.side_effect = [0, 1, 3]
+        utils.start_polls_count("delete")
+
+        self.assertRaises(exceptions.TimeoutException, utils.wait_for_delete,
+                          "resource", lambda r: r, timeout=2)
+        self.assertEqual(2, utils.stop_polls_count())
@@ -223,3 +223,33 @@ class DeploymentCommandsTestCase(test.TestCase):
         mock_default.side_effect = exceptions.InvalidArgumentsException
         self.assertRaises(exceptions.InvalidArgumentsException,
                           self.deployment.endpoint, None)
+
+    @mock.patch('rally.cmd.commands.deployment.api.users_pool_create')
+    def test_users_pool_create(self, mock_create):
+        deploy_id = "b1a6153e-a314-4cb3-b63b-cf08c1a416c3"
+        self.deployment.users_pool_create(deploy_id, tenants=2,
+                                          users_per_tenant=3)
+        mock_create.assert_called_once_with(deploy_id, 2, 3)
+
+    @mock.patch('rally.cmd.commands.deployment.common_cliutils.print_list')
+    @mock.patch('rally.cmd.commands.deployment.db.users_pool_get')
+    def test_users_pool_show(self, mock_pool_get, mock_print_list):
+        deploy_id = "b1a6153e-a314-4cb3-b63b-cf08c1a416c3"
+        mock_pool_get.return_value = [
+            mock.Mock(tenant_name="t", tenant_id="t_id", user_id="u1",
+                      task_uuid=None),
+            mock.Mock(tenant_name="t", tenant_id="t_id", user_id="u2",
+                      task_uuid="task")]
+        self.deployment.users_pool_show(deploy_id)
+        mock_pool_get.assert_called_once_with(deploy_id)
+        rows = mock_print_list.call_args[0][0]
+        self.assertEqual([("u1", ""), ("u2", "task")],
+                         [(r.user_id, r.leased_by) for r in rows])
+
+    @mock.patch('rally.cmd.commands.deployment.api.users_pool_delete')
+    def test_users_pool_delete(self, mock_delete):
+        deploy_id = "b1a6153e-a314-4cb3-b63b-cf08c1a416c3"
+        mock_delete.return_value = 0
+        self.assertIsNone(self.deployment.users_pool_delete(deploy_id))
+        mock_delete.return_value = 2
+        self.assertEqual(1, self.deployment.users_pool_delete(deploy_id))
@@ -13,10 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+import os
+import shutil
+import tempfile
+
 import mock
 
 from rally.cmd.commands import task
 from rally import exceptions
+from rally import utils as rutils
 from tests.unit import test
 
 
@@ -75,6 +81,12 @@ class TaskCommandsTestCase(test.TestCase):
         self.task.abort(test_uuid)
         task.api.abort_task.assert_called_once_with(test_uuid)
 
+    @mock.patch('rally.cmd.commands.task.api')
+    def test_abort_stopped_task(self, mock_api):
+        mock_api.abort_task.side_effect = exceptions.TaskInvalidStatus(
+            uuid='uuid', actual='finished', require='running')
+        self.assertEqual(1, self.task.abort('uuid'))
+
     @mock.patch('rally.cmd.commands.task.envutils.get_global')
     def test_abort_no_task_id(self, mock_default):
         mock_default.side_effect = exceptions.InvalidArgumentsException
@@ -107,7 +119,7 @@ class TaskCommandsTestCase(test.TestCase):
                     "key": {
                         "name": "fake_name",
                         "pos": "fake_pos",
-                        "kw": "fake_kw"
+                        "kw": {"fake": "kw"}
                     },
                     "data": {
                         "scenario_duration": 1.0,
@@ -121,6 +133,263 @@ class TaskCommandsTestCase(test.TestCase):
         self.task.detailed(test_uuid)
         mock_db.task_get_detailed.assert_called_once_with(test_uuid)
 
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_rps(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "scheduled_start": i * 0.5, "actual_start": i * 0.5 + 0.1}
+               for i in range(3)]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Requested rps: 2.00, achieved rps: 2.00",
+                      out.getvalue())
+        self.assertIn("Scheduling lag (sec): avg 0.100", out.getvalue())
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_polls(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {"nova.boot_server": 1.0},
+                "atomic_actions_polls": {"nova.boot_server": polls},
+                "scenario_output": {"errors": "", "data": {}}}
+               for polls in [2, 4]]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Status checks of resources by atomic actions",
+                      out.getvalue())
+        self.assertRegexpMatches(
+            out.getvalue(), r"nova.boot_server\s+\|\s+2\s+\|\s+3.0\s+\|"
+                            r"\s+4\s+\|\s+2")
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_http_connections(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "http_connections": {"opened": opened, "reused": 3}}
+               for opened in [2, 0]]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("HTTP connections opened: 2, reused: 6",
+                      out.getvalue())
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_api_calls(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {"nova.boot_server": 1.0},
+                "scenario_output": {"errors": "", "data": {}},
+                "api_calls": {"nova.boot_server": {
+                    "compute GET /servers/{id}": {
+                        "count": 3, "duration": 0.3, "bytes": 30,
+                        "status": {"200": 3}}}}}]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("API calls per action", out.getvalue())
+        self.assertRegexpMatches(
+            out.getvalue(), r"nova.boot_server\s+\|\s+compute GET "
+                            r"/servers/\{id\}\s+\|\s+3\s+\|\s+3.0\s+\|"
+                            r"\s+0.100\s+\|\s+30\s+\|\s+200: 3")
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_context_duration(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": [],
+                                  "context_duration": {"setup": 1.5,
+                                                       "cleanup": 0.25,
+                                                       "reused": True}}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Context setup: 1.500 sec, cleanup: 0.250 sec "
+                      "(shared contexts reused)", out.getvalue())
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_ramp(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0 + i, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "stage": i // 2}
+               for i in range(4)]
+        stages = [{"concurrency": 1, "duration": 2},
+                  {"rps": 5, "duration": 1}]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"runner": {"type": "ramp",
+                                                   "stages": stages}}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Load stages", out.getvalue())
+        self.assertIn("concurrency 1", out.getvalue())
+        self.assertIn("rps 5", out.getvalue())
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_saturation(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "stage": stage}
+               for stage in [0, 1, 1, 2, 2]]
+        runner = {"type": "saturation", "start": 1, "factor": 2,
+                  "max_load": 8, "phase_duration": 1}
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"runner": runner}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Load stages", out.getvalue())
+        self.assertIn("concurrency 4", out.getvalue())
+        self.assertNotIn("concurrency 8", out.getvalue())
+        self.assertIn("Saturation point is concurrency 2", out.getvalue())
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_distributed(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "worker": worker}
+               for worker in ["host2", "host1", "host2"]]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Iterations by worker: host1: 1, host2: 2",
+                      out.getvalue())
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_recycled_workers(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "iteration": 0},
+               {"duration": 2.0, "idle_duration": 0.0,
+                "error": ["TimeoutException", "", ""],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "iteration": 1, "worker_recycled": True}]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Worker processes recycled after iteration timeouts:  1",
+                      out.getvalue())
+
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_warmup(self, mock_db):
+        test_uuid = 'c0d874d4-7195-4fd5-8688-abe82bfad36f'
+        raw = [{"duration": 10.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}},
+                "warmup": True},
+               {"duration": 1.0, "idle_duration": 0.0, "error": [],
+                "atomic_actions": {},
+                "scenario_output": {"errors": "", "data": {}}}]
+        value = {
+            "id": "task",
+            "uuid": test_uuid,
+            "status": "status",
+            "results": [{"key": {"name": "fake_name", "pos": "fake_pos",
+                                 "kw": {"fake": "kw"}},
+                         "data": {"scenario_duration": 1.0, "raw": raw}}],
+            "failed": False
+        }
+        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid)
+        self.assertIn("Warm-up iterations excluded from statistics:  1",
+                      out.getvalue())
+        self.assertNotIn("| 10.0 ", out.getvalue())
+
+        with rutils.StdOutCapture() as out:
+            self.task.detailed(test_uuid, include_warmup=True)
+        self.assertNotIn("Warm-up iterations", out.getvalue())
+        self.assertIn("| 10.0 ", out.getvalue())
+
     @mock.patch('rally.cmd.commands.task.envutils.get_global')
     def test_detailed_no_task_id(self, mock_default):
         mock_default.side_effect = exceptions.InvalidArgumentsException
@@ -139,7 +408,7 @@ class TaskCommandsTestCase(test.TestCase):
     def test_results_default(self, mock_json, mock_db):
         test_uuid = 'aa808c14-69cc-4faf-a906-97e05f5aebbd'
         value = [
-            {'key': 'key', 'data': {'raw': 'raw', 'sla': []}}
+            {'key': 'key', 'data': {'raw': [{'duration': 1}], 'sla': []}}
         ]
         result = map(lambda x: {"key": x["key"],
                                 "result": x["data"]["raw"],
@@ -154,7 +423,7 @@ class TaskCommandsTestCase(test.TestCase):
     def test_results_json(self, mock_json, mock_db):
         test_uuid = 'e87dd629-cd3d-4a1e-b377-7b93c19226fb'
         value = [
-            {'key': 'key', 'data': {'raw': 'raw', 'sla': []}}
+            {'key': 'key', 'data': {'raw': [{'duration': 1}], 'sla': []}}
         ]
         result = map(lambda x: {"key": x["key"],
                                 "result": x["data"]["raw"],
@@ -170,7 +439,7 @@ class TaskCommandsTestCase(test.TestCase):
     def test_results_pprint(self, mock_pprint, mock_db):
         test_uuid = 'c1e4bc59-a8fd-458c-9abb-c922d8df4285'
         value = [
-            {'key': 'key', 'data': {'raw': 'raw', 'sla': []}}
+            {'key': 'key', 'data': {'raw': [{'duration': 1}], 'sla': []}}
         ]
         result = map(lambda x: {"key": x["key"],
                                 "result": x["data"]["raw"],
@@ -242,7 +511,7 @@ class TaskCommandsTestCase(test.TestCase):
                     "key": {
                         "name": "fake_name",
                         "pos": "fake_pos",
-                        "kw": "fake_kw"
+                        "kw": {"fake": "kw"}
                     },
                     "data": {
                         "scenario_duration": 1.0,
@@ -265,3 +534,45 @@ class TaskCommandsTestCase(test.TestCase):
     def test_verify(self, mock_validate):
         self.task.validate('path_to_config.json', 'fake_id')
         mock_validate.assert_called_once_with('fake_id', {"some": "json"})
+
+    @mock.patch("rally.cmd.commands.task.selfbench.run_all")
+    def test_selfbench(self, mock_run_all):
+        rows = [{"runner": "constant", "concurrency": 10, "iterations": 20,
+                 "processes": 11, "iterations/sec": 100.0,
+                 "overhead (ms/iter)": 2.0, "consumer (results/sec)": 1000.0,
+                 "peak rss (MB)": 100.0}]
+        mock_run_all.return_value = rows
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        out = os.path.join(tmp_dir, "baseline.json")
+
+        with rutils.StdOutCapture() as stdout:
+            self.assertIsNone(self.task.selfbench(
+                runners=["constant"], concurrency=[10], out=out))
+        mock_run_all.assert_called_once_with(["constant"], [10], 20, 1, 0)
+        self.assertIn("100.0", stdout.getvalue())
+        with open(out) as f:
+            self.assertEqual(rows, json.load(f))
+
+        self.assertIsNone(self.task.selfbench(baseline=out))
+        rows[0]["iterations/sec"] = 50.0
+        with rutils.StdOutCapture() as stdout:
+            self.assertEqual(1, self.task.selfbench(baseline=out))
+        self.assertIn("iterations/sec 100.00 -> 50.00", stdout.getvalue())
+
+    @mock.patch("rally.cmd.commands.task.selfbench.run_all")
+    @mock.patch("rally.cmd.commands.task.selfbench.run_startup")
+    def test_selfbench_startup(self, mock_run_startup, mock_run_all):
+        mock_run_startup.return_value = [{"command": "rally version",
+                                          "first output (ms)": 123.0,
+                                          "exit (ms)": 150.0}]
+
+        with rutils.StdOutCapture() as stdout:
+            self.assertIsNone(self.task.selfbench(startup=True))
+        mock_run_startup.assert_called_once_with()
+        self.assertFalse(mock_run_all.called)
+        self.assertIn("rally version", stdout.getvalue())
+        self.assertIn("123.0", stdout.getvalue())
+
+    def test_selfbench_unsupported_runner(self):
+        self.assertEqual(1, self.task.selfbench(runners=["distributed"]))
@@ -0,0 +1,45 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from rally.cmd.commands import worker
+from rally import exceptions
+from tests.unit import test
+
+
+class WorkerCommandsTestCase(test.TestCase):
+
+    def setUp(self):
+        super(WorkerCommandsTestCase, self).setUp()
+        self.worker = worker.WorkerCommands()
+
+    @mock.patch("rally.cmd.commands.worker.socket.gethostname")
+    @mock.patch("rally.cmd.commands.worker.distributed.run_worker")
+    def test_start(self, mock_run_worker, mock_gethostname):
+        mock_gethostname.return_value = "host"
+        self.worker.start()
+        mock_run_worker.assert_called_once_with("host", 1)
+
+    @mock.patch("rally.cmd.commands.worker.distributed.run_worker")
+    def test_start_with_hostname(self, mock_run_worker):
+        self.worker.start(hostname="worker1", poll_interval=0.5)
+        mock_run_worker.assert_called_once_with("worker1", 0.5)
+
+    @mock.patch("rally.cmd.commands.worker.distributed.run_worker")
+    def test_start_already_registered(self, mock_run_worker):
+        mock_run_worker.side_effect = exceptions.WorkerAlreadyRegistered(
+            worker="worker1")
+        self.assertEqual(1, self.worker.start(hostname="worker1"))
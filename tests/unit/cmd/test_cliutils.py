@@ -174,6 +174,28 @@ class CliUtilsTestCase(test.TestCase):
         self.assertTrue(mock_validate_args.called)
         self.assertEqual(ret, 1)
 
+    def test__load_categories(self):
+        categories = {"show": "rally.cmd.commands.show.ShowCommands",
+                      "task": "rally.cmd.commands.task.TaskCommands",
+                      "use": use.UseCommands}
+
+        self.assertEqual({"show": show.ShowCommands},
+                         cliutils._load_categories(["rally", "show", "list"],
+                                                   categories))
+        self.assertEqual({"show": show.ShowCommands,
+                          "task": task.TaskCommands,
+                          "use": use.UseCommands},
+                         cliutils._load_categories(["rally", "--help"],
+                                                   categories))
+        self.assertEqual({}, cliutils._load_categories(["rally", "version"],
+                                                       categories))
+
+    def test_run_with_import_paths(self):
+        categories = {"show": "rally.cmd.commands.show.ShowCommands",
+                      "use": "rally.cmd.commands.use.UseCommands"}
+        ret = cliutils.run(["rally", "bash-completion", "use"], categories)
+        self.assertEqual(ret, 0)
+
     def test_run_failed_to_open_file(self):
 
         class FailuresCommands(object):
@@ -0,0 +1,41 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import subprocess
+import sys
+
+from rally.cmd import main
+from rally.openstack.common import importutils
+from tests.unit import test
+
+
+class MainTestCase(test.TestCase):
+
+    def test_categories_are_importable(self):
+        for name, path in main.CATEGORIES.items():
+            self.assertTrue(importutils.import_class(path).__name__.lower()
+                            .startswith(name))
+
+    def test_import_is_lazy(self):
+        # NOTE: Modules are checked in a new interpreter, because all of
+        #       them are already imported by other tests.
+        code = ("import json, sys; import rally.cmd.main; "
+                "print(json.dumps(sorted(sys.modules)))")
+        modules = json.loads(subprocess.check_output([sys.executable, "-c",
+                                                      code]))
+        for module in ["novaclient", "keystoneclient", "rally.benchmark",
+                       "rally.cmd.commands.task", "rally.osclients"]:
+            self.assertNotIn(module, modules)
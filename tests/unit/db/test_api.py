@@ -15,6 +15,10 @@
 
 """Tests for db.api layer."""
 
+import datetime
+
+import mock
+
 from rally import consts
 from rally import db
 from rally import exceptions
@@ -158,6 +162,61 @@ class TasksTestCase(test.DBTestCase):
             self.assertEqual(res[0]['key'], data)
             self.assertEqual(res[0]['data'], data)
 
+    def test_task_result_chunks(self):
+        task_id = self._create_task()['uuid']
+        key = {'name': 'atata'}
+        result = db.task_result_create(task_id, key,
+                                       {'raw': [], 'chunked': True})
+        db.task_result_chunk_create(result['id'], 1, [{'i': 2}])
+        db.task_result_chunk_create(result['id'], 0, [{'i': 0}, {'i': 1}])
+        db.task_result_update(result['id'], {'raw': [], 'chunked': True,
+                                             'sla': []})
+
+        res = db.task_result_get_all_by_uuid(task_id)
+        self.assertEqual(1, len(res))
+        self.assertEqual([], res[0]['data']['sla'])
+        raw = res[0]['data']['raw']
+        self.assertEqual(3, len(raw))
+        self.assertEqual([{'i': 0}, {'i': 1}, {'i': 2}], list(raw))
+        self.assertEqual([{'i': 0}, {'i': 1}, {'i': 2}], list(raw))
+
+        detailed = db.task_get_detailed(task_id)
+        self.assertEqual(3, len(detailed['results'][0]['data']['raw']))
+
+        db.task_delete(task_id)
+        self.assertEqual(0, len(db.task_result_get_raw(result['id'])))
+
+    def test_task_result_update_not_found(self):
+        self.assertRaises(exceptions.NotFoundException,
+                          db.task_result_update, 42, {})
+
+    def test_task_resources(self):
+        task1 = self._create_task()['uuid']
+        task2 = self._create_task()['uuid']
+        ids = db.task_resources_create(task1, [
+            {"tenant_id": "t1", "service": "nova", "type": "servers",
+             "id": "s1"},
+            {"service": "keystone", "type": "users", "id": "u1"}])
+        db.task_resources_create(task2, [
+            {"tenant_id": "t2", "service": "nova", "type": "servers",
+             "id": "s2"}])
+
+        resources = db.task_resources_get(task1)
+        self.assertEqual([("t1", "nova", "servers", "s1"),
+                          (None, "keystone", "users", "u1")],
+                         [(r.tenant_id, r.service, r.type, r.resource_id)
+                          for r in resources])
+        self.assertEqual([r.id for r in resources], ids)
+
+        db.task_resources_delete([resources[0].id])
+        db.task_resources_delete([])
+        self.assertEqual(["u1"], [r.resource_id for r in
+                                  db.task_resources_get(task1)])
+
+        db.task_delete(task1)
+        self.assertEqual([], db.task_resources_get(task1))
+        self.assertEqual(1, len(db.task_resources_get(task2)))
+
     def test_task_get_detailed(self):
         task1 = self._create_task()
         key = {'name': 'atata'}
@@ -401,6 +460,105 @@ class ResourceTestCase(test.DBTestCase):
         self.assertEqual(res_two['id'], resources[0]['id'])
 
 
+class UsersPoolTestCase(test.DBTestCase):
+    def setUp(self):
+        super(UsersPoolTestCase, self).setUp()
+        self.deploy_uuid = db.deployment_create({})['uuid']
+        users = []
+        for tenant in ['t1', 't2', 't3']:
+            for user in ['u1', 'u2']:
+                users.append({'tenant_id': tenant, 'tenant_name': tenant,
+                              'user_id': '%s_%s' % (tenant, user),
+                              'endpoint': {'username': user}})
+        db.users_pool_create(self.deploy_uuid, users)
+
+    def _create_task(self, status):
+        return db.task_create({'status': status,
+                               'deployment_uuid': self.deploy_uuid})['uuid']
+
+    def _leased_by(self):
+        return [user.task_uuid for user in db.users_pool_get(self.deploy_uuid)]
+
+    def test_users_pool_create(self):
+        users = db.users_pool_get(self.deploy_uuid)
+        self.assertEqual(6, len(users))
+        self.assertEqual('t1_u1', users[0].user_id)
+        self.assertEqual({'username': 'u1'}, users[0].endpoint)
+        self.assertEqual([None] * 6, self._leased_by())
+
+    def test_users_pool_lease(self):
+        task1 = self._create_task(consts.TaskStatus.RUNNING)
+        task2 = self._create_task(consts.TaskStatus.RUNNING)
+
+        users = db.users_pool_lease(self.deploy_uuid, task1, 2, 2)
+        self.assertEqual(['t1_u1', 't1_u2', 't2_u1', 't2_u2'],
+                         [user.user_id for user in users])
+        users = db.users_pool_lease(self.deploy_uuid, task2, 2, 2)
+        self.assertEqual(['t3_u1', 't3_u2'], [user.user_id for user in users])
+        self.assertEqual([task1] * 4 + [task2] * 2, self._leased_by())
+        self.assertEqual([], db.users_pool_lease(self.deploy_uuid, task2,
+                                                 1, 1))
+
+    def test_users_pool_lease_not_enough_users(self):
+        users = db.users_pool_lease(self.deploy_uuid, 'task', 1, 3)
+        self.assertEqual([], users)
+
+    def test_users_pool_lease_releases_stale(self):
+        task1 = self._create_task(consts.TaskStatus.FAILED)
+        db.users_pool_lease(self.deploy_uuid, task1, 2, 1)
+        db.users_pool_lease(self.deploy_uuid, 'deleted_task', 1, 1)
+
+        users = db.users_pool_lease(self.deploy_uuid, 'task2', 3, 1)
+        self.assertEqual(6, len(users))
+        self.assertEqual(['task2'] * 6, self._leased_by())
+
+    def test_users_pool_lease_keeps_deleting(self):
+        db.users_pool_lease(self.deploy_uuid, 'deleting', 1, 0,
+                            deleting=True)
+
+        users = db.users_pool_lease(self.deploy_uuid, 'task', 3, 1)
+        self.assertEqual(['t2_u1', 't2_u2', 't3_u1', 't3_u2'],
+                         [user.user_id for user in users])
+        self.assertEqual(['deleting'] * 2 + ['task'] * 4, self._leased_by())
+
+    def test_users_pool_lease_releases_old(self):
+        task1 = self._create_task(consts.TaskStatus.RUNNING)
+        with mock.patch("rally.db.sqlalchemy.api.timeutils.utcnow",
+                        return_value=datetime.datetime(2014, 1, 1)):
+            db.users_pool_lease(self.deploy_uuid, task1, 1, 1)
+            db.users_pool_lease(self.deploy_uuid, 'deleting', 1, 0,
+                                deleting=True)
+        task2 = self._create_task(consts.TaskStatus.RUNNING)
+        db.users_pool_lease(self.deploy_uuid, task2, 1, 1)
+
+        users = db.users_pool_lease(self.deploy_uuid, 'task3', 3, 1)
+        self.assertEqual([], users)
+        users = db.users_pool_lease(self.deploy_uuid, 'task3', 3, 1,
+                                    lease_timeout=3600)
+        self.assertEqual(['t1_u1', 't1_u2', 't2_u1', 't2_u2'],
+                         [user.user_id for user in users])
+        self.assertEqual(['task3'] * 4 + [task2] * 2, self._leased_by())
+
+    def test_users_pool_release(self):
+        db.users_pool_lease(self.deploy_uuid, 'task', 3, 1)
+        db.users_pool_release('task', ['t2'])
+        self.assertEqual(['task', 'task', None, None, 'task', 'task'],
+                         self._leased_by())
+        db.users_pool_release('task')
+        self.assertEqual([None] * 6, self._leased_by())
+
+    def test_users_pool_delete(self):
+        users = db.users_pool_get(self.deploy_uuid)
+        db.users_pool_delete([users[0].id, users[1].id])
+        self.assertEqual(['t2_u1', 't2_u2', 't3_u1', 't3_u2'],
+                         [user.user_id for user in
+                          db.users_pool_get(self.deploy_uuid)])
+
+    def test_deployment_delete(self):
+        db.deployment_delete(self.deploy_uuid)
+        self.assertEqual([], db.users_pool_get(self.deploy_uuid))
+
+
 class VerificationTestCase(test.DBTestCase):
     def setUp(self):
         super(VerificationTestCase, self).setUp()
@@ -455,3 +613,108 @@ class WorkerTestCase(test.DBTestCase):
     def test_update_worker_not_found(self):
         self.assertRaises(exceptions.WorkerNotFound,
                           db.update_worker, 'fake')
+
+    def test_get_workers(self):
+        db.register_worker({'hostname': 'test2'})
+        self.assertEqual(['test', 'test2'],
+                         sorted(w['hostname'] for w in db.get_workers()))
+
+
+class WorkerJobTestCase(test.DBTestCase):
+    def setUp(self):
+        super(WorkerJobTestCase, self).setUp()
+        self.job = db.worker_job_create({"task_uuid": "task",
+                                         "payload": {"args": {"a": 1}}},
+                                        [(0, 2), (2, 1)])
+
+    def test_worker_job_get(self):
+        job = db.worker_job_get(self.job["uuid"])
+        self.assertEqual("task", job["task_uuid"])
+        self.assertEqual({"args": {"a": 1}}, job["payload"])
+
+    def test_worker_job_get_not_found(self):
+        self.assertRaises(exceptions.WorkerJobNotFound,
+                          db.worker_job_get, "fake")
+
+    def test_worker_job_delete(self):
+        db.worker_results_create(self.job["uuid"], "test", [{"a": 1}])
+        db.worker_job_delete(self.job["uuid"])
+        self.assertRaises(exceptions.WorkerJobNotFound,
+                          db.worker_job_get, self.job["uuid"])
+        self.assertIsNone(db.worker_batch_take("test"))
+        self.assertEqual([], db.worker_results_pop(self.job["uuid"]))
+
+    def test_worker_job_delete_not_found(self):
+        self.assertRaises(exceptions.WorkerJobNotFound,
+                          db.worker_job_delete, "fake")
+
+    def test_worker_batch_take(self):
+        batch = db.worker_batch_take("host1")
+        self.assertEqual((self.job["uuid"], 0, 2),
+                         (batch["job_uuid"], batch["start"], batch["count"]))
+        self.assertEqual(consts.WorkerBatchStatus.RUNNING, batch["status"])
+        self.assertEqual("host1", batch["hostname"])
+
+        batch = db.worker_batch_take("host2")
+        self.assertEqual((2, 1), (batch["start"], batch["count"]))
+        self.assertIsNone(db.worker_batch_take("host1"))
+
+    def test_worker_batch_finish(self):
+        batch = db.worker_batch_take("host1")
+        db.worker_batch_finish(batch["id"], "host1")
+        self.assertEqual(2, db.worker_batch_take("host1")["start"])
+        self.assertIsNone(db.worker_batch_take("host1"))
+        self.assertEqual([consts.WorkerBatchStatus.FINISHED,
+                          consts.WorkerBatchStatus.RUNNING],
+                         [b["status"] for b in
+                          db.worker_batches_get(self.job["uuid"])])
+
+    def test_worker_batch_finish_failed(self):
+        batch = db.worker_batch_take("host1")
+        db.worker_batch_finish(batch["id"], "host2")
+        db.worker_batch_finish(batch["id"], "host1", failed=True)
+        self.assertEqual([consts.WorkerBatchStatus.FAILED,
+                          consts.WorkerBatchStatus.PENDING],
+                         [b["status"] for b in
+                          db.worker_batches_get(self.job["uuid"])])
+
+    def test_worker_batches_requeue(self):
+        db.register_worker({"hostname": "alive"})
+        with mock.patch("rally.db.sqlalchemy.api.timeutils.utcnow",
+                        return_value=datetime.datetime(2014, 1, 1)):
+            db.register_worker({"hostname": "dead"})
+        dead = db.worker_batch_take("dead")
+        db.worker_batch_take("alive")
+        db.worker_results_create(self.job["uuid"], "dead", [{"a": 1}],
+                                 batch_id=dead["id"])
+
+        self.assertEqual(1, db.worker_batches_requeue(self.job["uuid"], 10))
+
+        batch = db.worker_batch_take("alive")
+        self.assertEqual((1, 1, 0), (batch["start"], batch["count"],
+                                     batch["sent"]))
+        self.assertRaises(exceptions.WorkerBatchNotFound,
+                          db.worker_results_create, self.job["uuid"],
+                          "dead", [{"a": 2}], batch_id=dead["id"])
+
+    def test_worker_batches_requeue_unregistered_worker(self):
+        batch = db.worker_batch_take("gone")
+        db.worker_results_create(self.job["uuid"], "gone",
+                                 [{"a": 1}, {"a": 2}], batch_id=batch["id"])
+
+        self.assertEqual(1, db.worker_batches_requeue(self.job["uuid"], 10))
+        self.assertEqual([consts.WorkerBatchStatus.FINISHED,
+                          consts.WorkerBatchStatus.PENDING],
+                         [b["status"] for b in
+                          db.worker_batches_get(self.job["uuid"])])
+
+    def test_worker_results_pop(self):
+        db.worker_results_create(self.job["uuid"], "host1",
+                                 [{"a": 1}, {"a": 2}])
+        db.worker_results_create(self.job["uuid"], "host2", [{"a": 3}])
+
+        results = db.worker_results_pop(self.job["uuid"])
+        self.assertEqual([("host1", {"a": 1}), ("host1", {"a": 2}),
+                          ("host2", {"a": 3})],
+                         [(r["hostname"], r["data"]) for r in results])
+        self.assertEqual([], db.worker_results_pop(self.job["uuid"]))
@@ -17,6 +17,7 @@ import multiprocessing
 import random
 import re
 import string
+import time
 import uuid
 
 from ceilometerclient import exc as ceilometer_exc
@@ -1233,15 +1234,30 @@ class FakeScenario(base.Scenario):
     def with_output(self, **kwargs):
         return {"data": {"a": 1}, "error": None}
 
+    def with_atomic_action(self, **kwargs):
+        with base.AtomicAction(self, "action"):
+            pass
+
     def too_long(self, **kwargs):
         pass
 
     def something_went_wrong(self, **kwargs):
         raise Exception("Something went wrong")
 
+    def with_resources(self, **kwargs):
+        self._register_resource("nova", "servers", "server")
+        raise Exception("Something went wrong")
+
     def raise_timeout(self, **kwargs):
         raise multiprocessing.TimeoutError()
 
+    def first_finishes_last(self, **kwargs):
+        if self.context()["iteration"] == 0:
+            time.sleep(0.2)
+
+    def hang(self, **kwargs):
+        time.sleep(60)
+
 
 class FakeTimer(rally_utils.Timer):
 
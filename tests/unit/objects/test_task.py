@@ -20,6 +20,7 @@ import json
 import mock
 
 from rally import consts
+from rally import exceptions
 from rally import objects
 from tests.unit import test
 
@@ -104,6 +105,30 @@ class TaskTestCase(test.TestCase):
             {'status': consts.TaskStatus.FINISHED},
         )
 
+    @mock.patch('rally.objects.task.db.task_get')
+    def test_get_status(self, mock_get):
+        mock_get.return_value = {'status': consts.TaskStatus.ABORTING}
+        task = objects.Task(task=self.task)
+        self.assertEqual(consts.TaskStatus.ABORTING, task.get_status())
+        mock_get.assert_called_once_with(self.task['uuid'])
+
+    @mock.patch('rally.objects.task.db.task_update')
+    @mock.patch('rally.objects.task.db.task_get')
+    def test_abort(self, mock_get, mock_update):
+        mock_get.return_value = {'status': consts.TaskStatus.RUNNING}
+        task = objects.Task(task=self.task)
+        task.abort()
+        mock_update.assert_called_once_with(
+            self.task['uuid'], {'status': consts.TaskStatus.ABORTING})
+
+    @mock.patch('rally.objects.task.db.task_update')
+    @mock.patch('rally.objects.task.db.task_get')
+    def test_abort_finished(self, mock_get, mock_update):
+        mock_get.return_value = {'status': consts.TaskStatus.FINISHED}
+        task = objects.Task(task=self.task)
+        self.assertRaises(exceptions.TaskInvalidStatus, task.abort)
+        self.assertFalse(mock_update.called)
+
     @mock.patch('rally.objects.task.db.task_update')
     def test_update_verification_log(self, mock_update):
         mock_update.return_value = self.task
@@ -121,6 +146,33 @@ class TaskTestCase(test.TestCase):
         mock_append_results.assert_called_once_with(self.task['uuid'],
                                                     'opt', 'val')
 
+    @mock.patch('rally.objects.task.db.task_result_create')
+    def test_create_chunked_results(self, mock_result_create):
+        mock_result_create.return_value = {'id': 42}
+        task = objects.Task(task=self.task)
+        self.assertEqual(42, task.create_chunked_results('key'))
+        mock_result_create.assert_called_once_with(
+            self.task['uuid'], 'key', {'raw': [], 'chunked': True})
+
+    @mock.patch('rally.objects.task.db.task_result_chunk_create')
+    def test_append_results_chunk(self, mock_chunk_create):
+        task = objects.Task(task=self.task)
+        task.append_results_chunk(42, 1, [{'a': 1}])
+        mock_chunk_create.assert_called_once_with(42, 1, [{'a': 1}])
+
+    @mock.patch('rally.objects.task.db.task_result_get_raw')
+    def test_get_chunked_raw(self, mock_get_raw):
+        task = objects.Task(task=self.task)
+        self.assertEqual(mock_get_raw.return_value, task.get_chunked_raw(42))
+        mock_get_raw.assert_called_once_with(42)
+
+    @mock.patch('rally.objects.task.db.task_result_update')
+    def test_finish_chunked_results(self, mock_result_update):
+        task = objects.Task(task=self.task)
+        task.finish_chunked_results(42, {'sla': []})
+        mock_result_update.assert_called_once_with(
+            42, {'sla': [], 'raw': [], 'chunked': True})
+
     @mock.patch('rally.objects.task.db.task_update')
     def test_set_failed(self, mock_update):
         mock_update.return_value = self.task
@@ -138,9 +138,11 @@ class APITestCase(test.TestCase):
         mock_deployment_get().update_status.assert_called_once_with(
             consts.DeployStatus.DEPLOY_INCONSISTENT)
 
-    def test_abort_task(self):
-        self.assertRaises(NotImplementedError, api.abort_task,
-                          self.task_uuid)
+    @mock.patch("rally.objects.Task.get")
+    def test_abort_task(self, mock_task_get):
+        api.abort_task(self.task_uuid)
+        mock_task_get.assert_called_once_with(self.task_uuid)
+        mock_task_get.return_value.abort.assert_called_once_with()
 
     @mock.patch("rally.objects.task.db.task_delete")
     def test_delete_task(self, mock_delete):
@@ -184,16 +186,57 @@ class APITestCase(test.TestCase):
             self.deploy_uuid,
             {'status': consts.DeployStatus.DEPLOY_FAILED})
 
+    @mock.patch("rally.orchestrator.api.db.users_pool_get", return_value=[])
     @mock.patch("rally.objects.deploy.db.deployment_delete")
     @mock.patch("rally.objects.deploy.db.deployment_update")
     @mock.patch("rally.objects.deploy.db.deployment_get")
-    def test_destroy_deploy(self, mock_get, mock_update, mock_delete):
+    def test_destroy_deploy(self, mock_get, mock_update, mock_delete,
+                            mock_pool_get):
         mock_get.return_value = self.deployment
         mock_update.return_value = self.deployment
         api.destroy_deploy(self.deploy_uuid)
         mock_get.assert_called_once_with(self.deploy_uuid)
+        mock_pool_get.assert_called_once_with(self.deploy_uuid)
         mock_delete.assert_called_once_with(self.deploy_uuid)
 
+    @mock.patch("rally.orchestrator.api.users_pool.UsersPool")
+    @mock.patch("rally.orchestrator.api.db.users_pool_get",
+                return_value=["user"])
+    @mock.patch("rally.objects.deploy.db.deployment_delete")
+    @mock.patch("rally.objects.deploy.db.deployment_update")
+    @mock.patch("rally.objects.deploy.db.deployment_get")
+    def test_destroy_deploy_with_users_pool(self, mock_get, mock_update,
+                                            mock_delete, mock_pool_get,
+                                            mock_pool):
+        mock_get.return_value = self.deployment
+        mock_update.return_value = self.deployment
+        mock_pool.return_value.delete.side_effect = Exception("error")
+        api.destroy_deploy(self.deploy_uuid)
+        mock_pool.return_value.delete.assert_called_once_with()
+        mock_delete.assert_called_once_with(self.deploy_uuid)
+
+    @mock.patch("rally.orchestrator.api.users_pool.UsersPool")
+    @mock.patch("rally.objects.deploy.db.deployment_get")
+    def test_users_pool_create(self, mock_get, mock_pool):
+        mock_get.return_value = self.deployment
+        api.users_pool_create(self.deploy_uuid, 2, 3)
+        self.assertEqual(self.deploy_uuid, mock_pool.call_args[0][0])
+        self.assertEqual("admin", mock_pool.call_args[0][1].username)
+        mock_pool.return_value.create.assert_called_once_with(2, 3)
+
+    @mock.patch("rally.orchestrator.api.users_pool.UsersPool")
+    @mock.patch("rally.orchestrator.api.db.users_pool_get")
+    @mock.patch("rally.objects.deploy.db.deployment_get")
+    def test_users_pool_delete(self, mock_get, mock_pool_get, mock_pool):
+        mock_get.return_value = self.deployment
+        mock_pool_get.return_value = []
+        self.assertEqual(0, api.users_pool_delete(self.deploy_uuid))
+        self.assertFalse(mock_pool.called)
+
+        mock_pool_get.return_value = ["user"]
+        mock_pool.return_value.delete.return_value = 1
+        self.assertEqual(1, api.users_pool_delete(self.deploy_uuid))
+
     @mock.patch("rally.objects.deploy.db.deployment_update")
     @mock.patch("rally.objects.deploy.db.deployment_get")
     def test_recreate_deploy(self, mock_get, mock_update):
@@ -18,6 +18,7 @@ from oslotest import base
 
 from rally import db
 from rally.openstack.common.fixture import config
+from rally import utils
 
 
 class DatabaseFixture(config.Config):
@@ -36,6 +37,7 @@ class TestCase(base.BaseTestCase):
     def setUp(self):
         super(TestCase, self).setUp()
         self.addCleanup(mock.patch.stopall)
+        self.addCleanup(utils.invalidate_subclasses_cache)
 
 
 class DBTestCase(TestCase):
@@ -0,0 +1,195 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import BaseHTTPServer
+import httplib
+import threading
+
+import mock
+from oslo.config import cfg
+import requests
+
+from rally import httppool
+from tests.unit import test
+
+
+class ConnectionPoolTestCase(test.TestCase):
+
+    def test_mount(self):
+        pool = httppool.ConnectionPool(pool_size=2)
+        session = mock.MagicMock()
+        pool.mount(session)
+        self.assertEqual([mock.call("http://", pool.adapter),
+                          mock.call("https://", pool.adapter)],
+                         session.mount.mock_calls)
+        self.assertEqual(pool.adapter, pool.get("http://host"))
+        self.assertEqual(pool.adapter,
+                         pool.session.get_adapter("https://host/v2"))
+
+    def test_request(self):
+        pool = httppool.ConnectionPool()
+        with mock.patch.object(pool.session, "request") as mock_request:
+            self.assertEqual(mock_request.return_value,
+                             pool.request("GET", "http://host", timeout=1))
+        mock_request.assert_called_once_with(method="GET", url="http://host",
+                                             timeout=1)
+
+    def test_stats(self):
+        pool = httppool.ConnectionPool()
+        self.assertEqual({"opened": 0, "reused": 0}, pool.stats())
+        host1 = pool.adapter.poolmanager.connection_from_host("host1", 80)
+        host1.num_connections = 1
+        host1.num_requests = 5
+        host2 = pool.adapter.poolmanager.connection_from_host("host2", 80)
+        host2.num_connections = 2
+        host2.num_requests = 2
+        self.assertEqual({"opened": 3, "reused": 4}, pool.stats())
+
+        # Counters of closed pools are kept
+        pool.adapter.poolmanager.clear()
+        self.assertEqual({"opened": 3, "reused": 4}, pool.stats())
+
+    @mock.patch("rally.httppool.os.getpid")
+    def test_get_pool(self, mock_getpid):
+        mock_getpid.return_value = 1
+        pool = httppool.get_pool()
+        self.assertIs(pool, httppool.get_pool())
+        self.assertEqual(pool.stats(), httppool.get_stats())
+
+        mock_getpid.return_value = 2
+        self.assertEqual({"opened": 0, "reused": 0}, httppool.get_stats())
+        self.assertIsNot(pool, httppool.get_pool())
+
+    @mock.patch("rally.httppool.get_pool")
+    def test_install(self, mock_get_pool):
+        module = mock.Mock()
+        module_requests = module.requests
+        httppool.install(module)
+        httppool.install(module)
+
+        module.requests.request("GET", "http://host", timeout=1)
+        mock_get_pool.return_value.request.assert_called_once_with(
+            "GET", "http://host", timeout=1)
+        self.assertEqual(module_requests.codes, module.requests.codes)
+
+        cfg.CONF.set_override("http_pool", False)
+        self.addCleanup(cfg.CONF.clear_override, "http_pool")
+        module.requests.request("GET", "http://host")
+        module_requests.request.assert_called_once_with("GET", "http://host")
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "10")
+        self.end_headers()
+        self.wfile.write("0" * 10)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path.endswith("/close"):
+            return
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class APICallsTestCase(test.TestCase):
+
+    def setUp(self):
+        super(APICallsTestCase, self).setUp()
+        self.addCleanup(httppool.stop_api_calls_record)
+        self.addCleanup(httppool._services.clear)
+
+    def test_add_api_calls(self):
+        summary = {httppool.NO_ACTION: {"compute GET /a": {
+            "count": 1, "duration": 0.5, "bytes": 10, "status": {"200": 1}}}}
+        httppool.add_api_calls(summary)
+        httppool.start_api_calls_record()
+        httppool.start_api_action("boot")
+        httppool.add_api_calls(summary, 0.5)
+        httppool.add_api_calls(summary, 0.5)
+
+        self.assertEqual(
+            {"boot": {"compute GET /a": {
+                "count": 1.0, "duration": 0.5, "bytes": 10.0,
+                "status": {"200": 1.0}}}},
+            httppool.stop_api_calls_record())
+
+    def test__get_call_name(self):
+        httppool.register_service("http://nova:8774/v2/tenant", "compute")
+        httppool.register_service("http://nova:8774/", "other")
+        self.assertEqual(
+            "compute GET /servers/{id}",
+            httppool._get_call_name(
+                "GET", "http://nova:8774/v2/tenant/servers/"
+                       "c0d874d4-7195-4fd5-8688-abe82bfad36f?all=1"))
+        self.assertEqual("compute POST /",
+                         httppool._get_call_name(
+                             "POST", "http://nova:8774/v2/tenant"))
+        self.assertEqual("other GET /v2/other/flavors/{id}",
+                         httppool._get_call_name(
+                             "GET", "http://nova:8774/v2/other/flavors/1"))
+        httppool.register_service("https://keystone/v2.0", "identity")
+        self.assertEqual("identity POST /tokens",
+                         httppool._get_call_name(
+                             "POST", "https://keystone:443/v2.0/tokens"))
+        self.assertEqual("glance:9292 GET /v1/images/{id}",
+                         httppool._get_call_name(
+                             "GET", "http://glance:9292/v1/images/%s" %
+                                    ("ab" * 16)))
+
+    def _start_server(self):
+        server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(server.shutdown)
+        return server.server_address[1]
+
+    def test_record(self):
+        port = self._start_server()
+        url = "http://127.0.0.1:%d/v2/t" % port
+        httppool.register_service(url, "compute")
+        session = requests.Session()
+
+        session.get(url + "/a")
+        httppool.start_api_calls_record()
+        session.get(url + "/a")
+        httppool.start_api_action("boot")
+        httppool.get_pool().request("POST", url + "/a", data="12345")
+        connection = httplib.HTTPConnection("127.0.0.1", port)
+        connection.request("POST", "/v2/t/close", "123")
+        self.assertRaises(httplib.BadStatusLine, connection.getresponse)
+        httppool.stop_api_action()
+        summary = httppool.stop_api_calls_record()
+
+        self.assertEqual(
+            {httppool.NO_ACTION: {"compute GET /a": {
+                "count": 1, "duration": mock.ANY, "bytes": 10,
+                "status": {"200": 1}}},
+             "boot": {"compute POST /a": {
+                 "count": 1, "duration": mock.ANY, "bytes": 5,
+                 "status": {"201": 1}},
+                 "compute POST /close": {
+                 "count": 1, "duration": mock.ANY, "bytes": 3,
+                 "status": {"error": 1}}}},
+            summary)
+        self.assertEqual({}, httppool.stop_api_calls_record())
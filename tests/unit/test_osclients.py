@@ -13,9 +13,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+import os
+import shutil
+import tempfile
 import urlparse
 
+from keystoneclient import access
 from keystoneclient import exceptions as keystone_exceptions
+from keystoneclient.fixture import v2 as keystone_fixture
 import mock
 from oslo.config import cfg
 
@@ -44,6 +50,9 @@ class OSClientsTestCase(test.TestCase):
         self.mock_create_keystone_client = keystone_patcher.start()
         self.addCleanup(keystone_patcher.stop)
         self.mock_create_keystone_client.return_value = self.fake_keystone
+        self.addCleanup(osclients.get_auth_cache().clear)
+        cfg.CONF.set_override("http_pool", False)
+        self.addCleanup(cfg.CONF.clear_override, "http_pool")
 
     def tearDown(self):
         super(OSClientsTestCase, self).tearDown()
@@ -64,6 +73,17 @@ class OSClientsTestCase(test.TestCase):
         self.mock_create_keystone_client.assert_called_once_with(kwargs)
         self.assertEqual(self.clients.cache["keystone"], self.fake_keystone)
 
+    def test_is_authenticated(self):
+        self.assertFalse(self.clients.is_authenticated())
+        self.clients.keystone()
+        self.fake_keystone.auth_ref = mock.MagicMock()
+        self.fake_keystone.auth_ref.will_expire_soon.return_value = False
+        self.assertTrue(self.clients.is_authenticated(10))
+        self.fake_keystone.auth_ref.will_expire_soon.assert_called_once_with(
+            10)
+        self.fake_keystone.auth_ref.will_expire_soon.return_value = True
+        self.assertFalse(self.clients.is_authenticated(10))
+
     @mock.patch("rally.osclients.Clients.keystone")
     def test_verified_keystone_user_not_admin(self, mock_keystone):
         mock_keystone.return_value = fakes.FakeKeystoneClient()
@@ -261,3 +281,134 @@ class OSClientsTestCase(test.TestCase):
             clients.services(), {
                 consts.ServiceType.IDENTITY: consts.Service.KEYSTONE,
                 consts.ServiceType.COMPUTE: consts.Service.NOVA})
+
+    @mock.patch("rally.osclients.httppool")
+    @mock.patch("rally.osclients.designate")
+    @mock.patch("rally.osclients.cinder")
+    @mock.patch("rally.osclients.glance")
+    @mock.patch("rally.osclients.nova")
+    def test_http_pool(self, mock_nova, mock_glance, mock_cinder,
+                       mock_designate, mock_httppool):
+        cfg.CONF.set_override("http_pool", True)
+        pool = mock_httppool.get_pool.return_value
+
+        self.assertEqual(pool, self.clients.nova().client._connection_pool)
+        pool.mount.assert_called_once_with(
+            self.clients.glance().http_client.session)
+        self.clients.cinder()
+        mock_httppool.install.assert_called_once_with(mock_cinder)
+        self.clients.designate()
+        pool.mount.assert_called_with(
+            mock_designate.Client.return_value.requests)
+
+    @mock.patch("rally.osclients._create_keystone_client_from_token")
+    def test_keystone_cached_token(self, mock_create_from_token):
+        self.fake_keystone.auth_ref = _make_auth_ref()
+        self.assertEqual(self.fake_keystone, self.clients.keystone())
+
+        clients = osclients.Clients(self.endpoint)
+        client = clients.keystone()
+
+        self.assertEqual(mock_create_from_token.return_value, client)
+        self.assertEqual(1, self.mock_create_keystone_client.call_count)
+        self.assertEqual(self.fake_keystone.auth_ref,
+                         mock_create_from_token.call_args[0][0])
+        self.assertEqual(1, osclients.get_auth_cache().token_hits)
+
+    def test_keystone_without_auth_cache(self):
+        cfg.CONF.set_override("auth_cache", False)
+        self.addCleanup(cfg.CONF.clear_override, "auth_cache")
+        self.fake_keystone.auth_ref = _make_auth_ref()
+        self.clients.keystone()
+        osclients.Clients(self.endpoint).keystone()
+        self.assertEqual(2, self.mock_create_keystone_client.call_count)
+
+
+def _make_auth_ref(expires_in=3600):
+    token = keystone_fixture.Token(
+        expires=(datetime.datetime.utcnow() +
+                 datetime.timedelta(seconds=expires_in)))
+    token.set_scope()
+    return access.AccessInfo.factory(body=token)
+
+
+class AuthCacheTestCase(test.TestCase):
+
+    def setUp(self):
+        super(AuthCacheTestCase, self).setUp()
+        self.cache = osclients.AuthCache()
+        self.endpoint = endpoint.Endpoint("http://auth_url", "user", "pass",
+                                          "tenant")
+        self.key = self.cache.get_key(self.endpoint)
+
+    def test_get_key(self):
+        other = endpoint.Endpoint("http://auth_url", "user", "other",
+                                  "tenant")
+        self.assertNotEqual(self.key, self.cache.get_key(other))
+        self.assertNotIn("pass", self.key)
+
+    def test_auth_ref(self):
+        self.assertIsNone(self.cache.get_auth_ref(self.key))
+        auth_ref = _make_auth_ref()
+        self.cache.set_auth_ref(self.key, auth_ref)
+        self.cache.set_auth_ref("other", mock.Mock())
+
+        self.assertEqual(auth_ref, self.cache.get_auth_ref(self.key, 300))
+        self.assertIsNone(self.cache.get_auth_ref("other"))
+        self.assertIsNone(self.cache.get_auth_ref(self.key, 7200))
+        self.assertIsNone(self.cache.get_auth_ref(self.key))
+        self.assertEqual((1, 4), (self.cache.token_hits,
+                                  self.cache.token_misses))
+
+    def test_get_url(self):
+        resolve = mock.MagicMock(side_effect=["url1", "url2", "url3"])
+        self.assertEqual("url1", self.cache.get_url(self.key, "compute",
+                                                    resolve))
+        self.cache.set_auth_ref(self.key, _make_auth_ref())
+        self.assertEqual("url2", self.cache.get_url(self.key, "compute",
+                                                    resolve))
+        self.assertEqual("url2", self.cache.get_url(self.key, "compute",
+                                                    resolve))
+        self.cache.invalidate(self.key)
+        self.assertEqual("url3", self.cache.get_url(self.key, "compute",
+                                                    resolve))
+        self.assertEqual((1, 3), (self.cache.url_hits,
+                                  self.cache.url_misses))
+
+    def test_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "tokens.json")
+        auth_ref = _make_auth_ref()
+
+        osclients.AuthCache(path).set_auth_ref(self.key, auth_ref)
+
+        self.assertEqual(0o600, os.stat(path).st_mode & 0o777)
+        loaded = osclients.AuthCache(path).get_auth_ref(self.key)
+        self.assertEqual(auth_ref.auth_token, loaded.auth_token)
+        self.assertEqual(auth_ref.version, loaded.version)
+
+    def test_file_broken(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "tokens.json")
+        with open(path, "w") as cache_file:
+            cache_file.write("{")
+        self.assertIsNone(osclients.AuthCache(path).get_auth_ref(self.key))
+
+    @mock.patch("rally.osclients.os.getpid")
+    def test_fork(self, mock_getpid):
+        mock_getpid.return_value = 1
+        cache = osclients.AuthCache()
+        cache.set_auth_ref(self.key, _make_auth_ref())
+        lock = cache._lock
+        mock_getpid.return_value = 2
+        self.assertIsNotNone(cache.get_auth_ref(self.key))
+        self.assertIsNot(lock, cache._lock)
+
+    def test_get_auth_cache(self):
+        cache = osclients.get_auth_cache()
+        self.assertIs(cache, osclients.get_auth_cache())
+        cfg.CONF.set_override("auth_cache_file", "/tmp/tokens")
+        self.addCleanup(cfg.CONF.clear_override, "auth_cache_file")
+        self.assertEqual("/tmp/tokens", osclients.get_auth_cache().path)
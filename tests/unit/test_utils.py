@@ -82,16 +82,37 @@ class StdIOCaptureTestCase(test.TestCase):
         self.assertEqual(stderr, sys.stderr)
 
 
+class MonotonicTestCase(test.TestCase):
+
+    def test_monotonic(self):
+        values = [utils.monotonic() for i in range(100)]
+        self.assertEqual(sorted(values), values)
+
+    @mock.patch("rally.utils.sys")
+    def test_get_monotonic_clock_not_linux(self, mock_sys):
+        mock_sys.platform = "win32"
+        with mock.patch("rally.utils.time") as mock_time:
+            del mock_time.monotonic
+            self.assertEqual(mock_time.time, utils._get_monotonic_clock())
+
+    @mock.patch("rally.utils.ctypes.CDLL")
+    def test_get_monotonic_clock_without_librt(self, mock_cdll):
+        mock_cdll.side_effect = OSError
+        with mock.patch("rally.utils.time") as mock_time:
+            del mock_time.monotonic
+            self.assertEqual(mock_time.time, utils._get_monotonic_clock())
+
+
 class TimerTestCase(test.TestCase):
 
     def test_timer_duration(self):
         start_time = time.time()
         end_time = time.time()
 
-        with mock.patch('rally.utils.time') as mock_time:
-            mock_time.time = mock.MagicMock(return_value=start_time)
+        with mock.patch('rally.utils.monotonic') as mock_monotonic:
+            mock_monotonic.return_value = start_time
             with utils.Timer() as timer:
-                mock_time.time = mock.MagicMock(return_value=end_time)
+                mock_monotonic.return_value = end_time
 
         self.assertIsNone(timer.error)
         self.assertEqual(end_time - start_time, timer.duration())
@@ -124,6 +145,83 @@ class IterSubclassesTestCase(test.TestCase):
         self.assertEqual([B, C, D], list(utils.itersubclasses(A)))
 
 
+class SubclassesCacheTestCase(test.TestCase):
+
+    def setUp(self):
+        super(SubclassesCacheTestCase, self).setUp()
+
+        class A(object):
+            key = "a"
+
+        class B(A):
+            key = "b"
+
+        self.A = A
+        self.B = B
+
+    @mock.patch("rally.utils.itersubclasses")
+    def test_get_subclasses(self, mock_itersubclasses):
+        mock_itersubclasses.side_effect = lambda cls: iter([self.B])
+
+        self.assertEqual([self.B], utils.get_subclasses(self.A))
+        self.assertEqual([self.B], utils.get_subclasses(self.A))
+        self.assertEqual(1, mock_itersubclasses.call_count)
+
+        utils.invalidate_subclasses_cache()
+        self.assertEqual([self.B], utils.get_subclasses(self.A))
+        self.assertEqual(2, mock_itersubclasses.call_count)
+
+    def test_get_subclasses_defined_later(self):
+        self.assertEqual([self.B], utils.get_subclasses(self.A))
+
+        class C(self.B):
+            pass
+
+        class D(self.A):
+            pass
+
+        self.assertEqual([self.B, C, D], utils.get_subclasses(self.A))
+        self.assertEqual(D, utils.find_subclass(self.A, "D"))
+
+    def test_find_subclass(self):
+        self.assertEqual(self.B, utils.find_subclass(self.A, "B"))
+        self.assertEqual(self.B, utils.find_subclass(self.A, "b", "key"))
+        self.assertIsNone(utils.find_subclass(self.A, "a", "key"))
+
+    def test_find_subclass_defined_later(self):
+        self.assertIsNone(utils.find_subclass(self.A, "C"))
+
+        class C(self.A):
+            pass
+
+        self.assertEqual(C, utils.find_subclass(self.A, "C"))
+
+    @mock.patch("rally.utils.itersubclasses")
+    def test_find_subclass_uses_index(self, mock_itersubclasses):
+        mock_itersubclasses.side_effect = lambda cls: iter([self.B])
+
+        for i in range(3):
+            self.assertEqual(self.B, utils.find_subclass(self.A, "B"))
+        self.assertEqual(1, mock_itersubclasses.call_count)
+
+
+class LazyModuleTestCase(test.TestCase):
+
+    @mock.patch("rally.utils.importutils.import_module")
+    def test_import_on_first_use(self, mock_import_module):
+        module = utils.LazyModule("some.module")
+        self.assertFalse(mock_import_module.called)
+
+        self.assertEqual(mock_import_module.return_value.attr, module.attr)
+        module.other = 10
+        self.assertEqual(10, mock_import_module.return_value.other)
+        mock_import_module.assert_called_once_with("some.module")
+
+    def test_import_error(self):
+        module = utils.LazyModule("tests.unit.fixtures.import.broken")
+        self.assertRaises(ImportError, getattr, module, "attr")
+
+
 class ImportModulesTestCase(test.TestCase):
     def test_try_append_module_into_sys_modules(self):
         modules = {}
@@ -171,6 +269,7 @@ class LogTestCase(test.TestCase):
 
 class LoadExtraModulesTestCase(test.TestCase):
 
+    @mock.patch("rally.utils.invalidate_subclasses_cache")
     @mock.patch("rally.utils.imp.load_module")
     @mock.patch("rally.utils.imp.find_module")
     @mock.patch("rally.utils.os.path.exists", return_value=True)
@@ -178,7 +277,7 @@ class LoadExtraModulesTestCase(test.TestCase):
     @mock.patch("rally.utils.os.listdir")
     def test_load_plugins_successfull(self, mock_listdir, mock_isfile,
                                       mock_exists, mock_find_module,
-                                      mock_load_module):
+                                      mock_load_module, mock_invalidate):
         mock_listdir.return_value = ["plugin1.py", "plugin2.py",
                                      "somethingnotpythonmodule",
                                      "somestrangedir.py"]
@@ -197,6 +296,7 @@ class LoadExtraModulesTestCase(test.TestCase):
         ]
         self.assertEqual(mock_find_module.mock_calls, expected)
         self.assertEqual(len(mock_load_module.mock_calls), 2)
+        mock_invalidate.assert_called_once_with()
 
     @mock.patch("rally.utils.os")
     def test_load_plugins_from_nonexisting_and_empty_dir(self, mock_os):